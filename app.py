@@ -1,9 +1,12 @@
-from flask import Flask, render_template, request, jsonify, render_template_string
+from flask import Flask, render_template, request, jsonify, render_template_string, Response, stream_with_context
 from flask_cors import CORS
 from flask_basicauth import BasicAuth
 from typing import Tuple, List, Optional
 import os
 import time
+import json
+import queue
+import hashlib
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
@@ -31,7 +34,7 @@ from google import genai
 import requests
 import base64
 from pathlib import Path
-from database import save_comparison, get_recent_comparisons, get_saved_comparisons, mark_as_saved, get_comparison_stats, delete_comparison, save_feedback, get_best_config, get_analytics_summary, update_response_rating, log_system_event
+from database import save_comparison, get_comparison_results, get_recent_comparisons, get_saved_comparisons, mark_as_saved, get_comparison_stats, delete_comparison, save_feedback, get_best_config, get_analytics_summary, update_response_rating, log_system_event, usage_record, estimate_usage
 from file_processor import process_file
 from project_manager import ProjectManager
 from council_roles import COUNCIL_ROLES, DEFAULT_ASSIGNMENTS
@@ -39,9 +42,22 @@ from workflows import WORKFLOW_TEMPLATES, Workflow
 from persona_synthesizer import analyze_persona_drift
 from visuals import visuals_bp, get_style_for_role, fabricate_and_persist_visual
 from deployment_platforms import PLATFORMS
-from enforcement import EnforcementEngine
+from enforcement import enforcement_engine, enforcement_scanner
 from feedback_analyzer import analyze_feedback_text
-from orchestrator import KorumOrchestrator
+from orchestrator import KorumOrchestrator, PIPELINE_LAYERS
+from fanout import fanout_engine, FanoutEngine
+from provider_clients import provider_clients
+from deadline import Deadline, DeadlineExceeded, deadline_from, MIN_ATTEMPT_SECONDS
+from response_cache import response_cache
+from single_flight import single_flight
+from provider_health import provider_health
+from rate_limiter import provider_limiter, quota_tokens
+from semantic_cache import semantic_cache, SEMANTIC_CACHE_MODE
+from persistence_queue import persistence_queue
+from credibility_store import credibility_store
+from job_store import workflow_jobs
+from workflow_context import context_builder
+from workflow_events import workflow_events
 
 korum_orchestrator = KorumOrchestrator()
 
@@ -76,30 +92,15 @@ ANTHROPIC_API_KEY = os.getenv('ANTHROPIC_API_KEY', 'your-anthropic-key-here')
 GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY', 'your-google-key-here')
 PERPLEXITY_API_KEY = os.getenv('PERPLEXITY_API_KEY', 'your-perplexity-key-here')
 
-anthropic_client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY, timeout=90.0)
-google_client = genai.Client(api_key=GOOGLE_API_KEY)
+# Provider SDK clients come from the shared pooled registry (provider_clients.py)
 
 # Initialize Project Manager
 project_manager = ProjectManager()
-enforcement_engine = EnforcementEngine()
-
-# Background Workflow Store
-WORKFLOW_JOBS = {} # { job_id: { status: str, results: list, engine: Workflow, error: str, created_at: float } }
-WORKFLOW_JOB_TTL = 600  # 10 minutes TTL for completed jobs
-
-def cleanup_old_workflow_jobs():
-    """Remove completed workflow jobs older than TTL to prevent memory leaks"""
-    now = time.time()
-    to_delete = []
-    for job_id, job in WORKFLOW_JOBS.items():
-        if job.get('status') in ('complete', 'failed'):
-            created_at = job.get('created_at', now)
-            if now - created_at > WORKFLOW_JOB_TTL:
-                to_delete.append(job_id)
-    for job_id in to_delete:
-        del WORKFLOW_JOBS[job_id]
-    if to_delete:
-        print(f"[CLEANUP] Removed {len(to_delete)} old workflow jobs")
+# Shared with workflows and /interrogate (enforcement.enforcement_engine); restore persisted scores now
+credibility_store.warm_start()
+
+# Background Workflow Store: shared across workers (job_store.py); finished jobs expire after WORKFLOW_JOB_TTL
+workflow_jobs.start_sweeper()
 
 # Configuration
 # Use environment variable or fallback to local FrankNet path (Windows)
@@ -113,22 +114,30 @@ else: # Cloud fallback (folder probably doesn't exist, which is fine, search wil
 
 TRIAI_REPORTS_DIR = OBSIDIAN_VAULT_PATH / "TriAI_Reports"
 
-# Cost estimation (approximate USD per 1M tokens)
-PRICING = {
-    "gpt-4o": {"input": 5.00, "output": 15.00},
-    "claude-sonnet-4": {"input": 3.00, "output": 15.00},
-    "gemini": {"input": 0.00, "output": 0.00},
-    "perplexity": {"input": 3.00, "output": 15.00}
-}
-
-def calculate_cost(model_key, input_text, output_text):
-    input_tokens = len(input_text) / 4
-    output_tokens = len(output_text) / 4
-    pricing = PRICING.get(model_key, {"input": 0, "output": 0})
-    input_cost = (input_tokens / 1_000_000) * pricing["input"]
-    output_cost = (output_tokens / 1_000_000) * pricing["output"]
-    total_cost = input_cost + output_cost
-    return round(total_cost, 6)
+def extract_usage(provider: str, payload) -> Optional[dict]:
+    """
+    Ledger entry from the usage block a provider returned (SDK object or Perplexity JSON).
+    None when the response carried no usage, so the caller falls back to an estimate.
+    """
+    try:
+        if provider == 'perplexity':
+            usage = (payload or {}).get('usage')
+            return usage_record(provider, usage['prompt_tokens'], usage['completion_tokens']) if usage else None
+        if provider == 'google':
+            meta = getattr(payload, 'usage_metadata', None)
+            if meta is None or meta.prompt_token_count is None:
+                return None
+            # Gemini bills thinking tokens as output
+            output_tokens = (meta.candidates_token_count or 0) + (getattr(meta, 'thoughts_token_count', None) or 0)
+            return usage_record(provider, meta.prompt_token_count, output_tokens)
+        usage = getattr(payload, 'usage', None)
+        if usage is None:
+            return None
+        if provider == 'anthropic':
+            return usage_record(provider, usage.input_tokens, usage.output_tokens)
+        return usage_record(provider, usage.prompt_tokens, usage.completion_tokens)
+    except (AttributeError, KeyError, TypeError):
+        return None
 
 def search_vault(query, limit=3):
     """Simple keyword search in Obsidian Vault"""
@@ -208,6 +217,18 @@ def health():
             "status": "healthy",
             "database": "connected",
             "api_keys": api_status,
+            "provider_pools": provider_clients.stats(),
+            "response_cache": response_cache.stats(),
+            "semantic_cache": semantic_cache.stats(),
+            "persistence_queue": persistence_queue.stats(),
+            "credibility_store": credibility_store.stats(),
+            "workflow_jobs": workflow_jobs.stats(),
+            "workflow_context": context_builder.stats(),
+            "workflow_events": workflow_events.stats(),
+            "korum_pipeline": korum_orchestrator.stats(),
+            "provider_health": provider_health.stats(),
+            "rate_limiter": provider_limiter.stats(),
+            "single_flight": single_flight.stats(),
             "timestamp": time.time()
         })
     except Exception as e:
@@ -253,7 +274,7 @@ def extract_persona(text: str) -> Optional[str]:
             return match.group(1).strip()
     return None
 
-def run_enforcement_check(text: str, kwargs: dict, model_key: str, user_query: str="", has_image: bool=False) -> dict:
+def run_enforcement_check(text: str, kwargs: dict, model_key: str, user_query: str="", has_image: bool=False, scan: dict = None) -> dict:
     """Runs the enforcement engine UNIVERSALLY (Council or Standard)."""
     contract = None
     role_name = "Standard Model"
@@ -273,55 +294,13 @@ def run_enforcement_check(text: str, kwargs: dict, model_key: str, user_query: s
         model_key, 
         contract,
         user_query=user_query,
-        has_image=has_image
+        has_image=has_image,
+        scan=scan
     )
 
-def determine_execution_bias(response_text: str) -> str:
-    """Detects Execution Bias: action-forward, advisory, or narrative."""
-    import re
-    text = response_text.lower()
-    
-    # Action indicators
-    action_keywords = [
-        r"\b(do|implement|execute|run|start|setup|install|configure|mandatory)\b",
-        r"\b(action plan|steps|immediate moves|tactical steps|deliverables)\b",
-        r"1\.\s*[A-Z]", 
-        r"###\s+action",
-        r"\b(script|code|command|terminal|bypass)\b"
-    ]
-    
-    # Advisory indicators
-    advisory_keywords = [
-        r"\b(consider|recommend|approach|framework|strategy|best practice)\b",
-        r"\b(options|alternatives|roadmap|strategic|potential)\b",
-        r"\b(consult|advice|guiding|perspective)\b"
-    ]
-    
-    # Narrative/Caution indicators
-    narrative_keywords = [
-        r"\b(however|caution|note|warn|risks|dangers|limitations|complexity)\b",
-        r"\b(important to note|should be aware|significant drawback|challenges)\b",
-        r"\b(explore|evaluate|analysis|background|context|nuance)\b",
-        r"\b(comprehensive overview|history|theory)\b"
-    ]
-    
-    def count_matches(keywords):
-        total = 0
-        for kw in keywords:
-            total += len(re.findall(kw, text))
-        return total
-
-    action_score = count_matches(action_keywords)
-    advisory_score = count_matches(advisory_keywords)
-    narrative_score = count_matches(narrative_keywords)
-    
-    # Weighting: Mandatory and Concrete markers rank higher for "Action"
-    if action_score >= advisory_score and action_score >= narrative_score and action_score > 0:
-        return "action-forward"
-    elif narrative_score > advisory_score and narrative_score > action_score:
-        return "narrative"
-    else:
-        return "advisory"
+def determine_execution_bias(response_text: str, scan: dict = None) -> str:
+    """Detects Execution Bias: action-forward, advisory, or narrative (keyword groups live in enforcement.py)."""
+    return enforcement_scanner.execution_bias(scan or enforcement_scanner.scan(response_text))
 
 def get_visual_mandate(profile: str) -> str:
     """Returns a specific mandate to force the AI to provide data for the visual engine."""
@@ -361,28 +340,174 @@ def generate_visual_mockup(prompt, role='general'):
         print(f"Visual Generation Error: {e}")
         return None
 
-def query_openai(question, image_data=None, **kwargs):
-    """Query OpenAI (Display: GPT-5.2) with DALL-E 3 Support"""
-    start_time = time.time()
+# ==============================================================================
+# PROVIDER LAYER
+# Prompt builders and response finalization are shared by the blocking query_*
+# functions (workflows, interrogation) and their async aquery_* twins (fan-out engine).
+# ==============================================================================
 
-    # 2. Standard Chat Completion
-    try:
-        client = openai.OpenAI(api_key=OPENAI_API_KEY, timeout=90.0)
-        
-        # DEFAULT PROMPT: Self-Selecting Expert
-        system_prompt = """You are an ELITE ADVISOR. 
+# Display names used for skipped/failed slots and self-selected persona labels
+PROVIDER_MODEL_LABELS = {
+    "openai": "GPT-5.2",
+    "anthropic": "Claude 4.5 Sonnet",
+    "google": "Gemini 3.0",
+    "perplexity": "Perplexity Pro"
+}
+PERSONA_DISPLAY_NAMES = {
+    "openai": "GPT-5.2",
+    "anthropic": "Claude 4.5 Sonnet",
+    "google": "Gemini 3.0 Pro",
+    "perplexity": "Perplexity Pro"
+}
+
+# Legacy-Safe Fallback List
+ANTHROPIC_MODELS = [
+    "claude-3-5-sonnet-20241022", # Stable
+    "claude-3-5-sonnet-20240620",
+    "claude-3-opus-20240229",
+    "claude-3-haiku-20240307"
+]
+
+# 2026 ERA MODELS - Use exact version IDs to avoid "-latest" suffix issues
+# Feb 2026 Model Priority (Paid Tier)
+GOOGLE_MODELS = [
+    'gemini-2.5-flash',      # Primary: Current stable (active until June 2026)
+    'gemini-2.5-pro',        # Power: Higher reasoning (replacement for 1.5 Pro)
+    'gemini-2.0-flash'       # Fallback: Retiring March 31, 2026 but reliable
+]
+GOOGLE_TIMEOUT = 45  # Hard timeout - kill if no response in 45 seconds
+GOOGLE_MAX_RETRIES = 2
+
+PERPLEXITY_URL = "https://api.perplexity.ai/chat/completions"
+PERPLEXITY_MODELS = ["sonar-pro", "sonar", "sonar-reasoning-pro", "sonar-reasoning"]
+
+VISUAL_ANALYST_PREAMBLE = """VISUAL ANALYST MODE ACTIVATED.
+The user has uploaded an image. Your PRIMARY MANDATE is to analyze this specific visual evidence.
+1. Describes what you see in the image FORENSICALLY.
+2. Do NOT hallucinate context (like 'market research') if it is not in the pixels.
+3. If it is a document/screen, transcribe and analyze the text exactly.
+"""
+
+def make_skipped_result(provider: str, response: str = "Skipped") -> dict:
+    """Placeholder result for a provider that was not queried."""
+    return {"success": False, "response": response, "model": PROVIDER_MODEL_LABELS.get(provider, provider), "time": 0, "cost": 0, "thought": None}
+
+def apply_visual_augmentation(full_content: str, kwargs: dict) -> str:
+    """Append a Mermaid chart or fabricated image to a response when a visual profile is active."""
+    visual_profile = kwargs.get('visual_profile', 'off')
+    if visual_profile == 'off':
+        return full_content
+
+    from visuals import fabricate_and_persist_visual, generate_mermaid_viz
+
+    if visual_profile in ['data-viz', 'knowledge-graph']:
+        visual_result = generate_mermaid_viz(full_content, profile=visual_profile, deadline=kwargs.get('deadline'))
+        if visual_result:
+            full_content += f"\n\n### 📊 {visual_profile.replace('-', ' ').upper()}\n\n```mermaid\n{visual_result}\n```"
+    else:
+        # realistic, blueprint, or auto
+        visual_result = fabricate_and_persist_visual(full_content, role=kwargs.get('role', 'general'), profile=visual_profile,
+                                                     deadline=kwargs.get('deadline'))
+        if visual_result:
+            full_content += f"\n\n### 🎨 Generated Visual ({visual_profile.capitalize()})\n\n![Generated Image]({visual_result})\n\n_Engine: Google Nano Banana_"
+    return full_content
+
+def finalize_provider_response(provider: str, full_content: str, question: str, image_data, kwargs: dict, start_time: float, model_display: str, usage: dict = None) -> dict:
+    """Post-process raw model output into the standard result dict (visuals, thought, persona, enforcement)."""
+    elapsed_time = time.time() - start_time
+    # Ledger: tokens the provider reported; estimate from the raw text only when it reported none
+    usage = usage or estimate_usage(provider, question, full_content)
+
+    # Handle Visual Augmentation (Post-process)
+    full_content = apply_visual_augmentation(full_content, kwargs)
+
+    thought, clean_content = extract_thought(full_content)
+
+    # Final model name display
+    self_selected_persona = None
+    if not kwargs.get('council_mode'):
+        self_selected_persona = extract_persona(clean_content)
+        if self_selected_persona:
+            model_display = f"{PERSONA_DISPLAY_NAMES[provider]} ({self_selected_persona})"
+
+    # Enforcement Check (one scan feeds both the enforcement audit and the execution bias)
+    scan = enforcement_scanner.scan(clean_content)
+    enforcement = run_enforcement_check(clean_content, kwargs, provider, user_query=question, has_image=bool(image_data), scan=scan)
+
+    return {
+        "success": True,
+        "response": clean_content,
+        "thought": thought,
+        "execution_bias": determine_execution_bias(clean_content, scan),
+        "time": round(elapsed_time, 2),
+        "cost": round(usage["cost"], 6),
+        "usage": usage,
+        "model": model_display,
+        "self_selected_persona": self_selected_persona,
+        "enforcement": enforcement
+    }
+
+async def afinalize_provider_response(provider: str, full_content: str, question: str, image_data, kwargs: dict, start_time: float, model_display: str, usage: dict = None) -> dict:
+    """Async wrapper: visual fabrication blocks on HTTP, so it is pushed off the event loop."""
+    if kwargs.get('visual_profile', 'off') != 'off':
+        return await asyncio.to_thread(finalize_provider_response, provider, full_content, question, image_data, kwargs, start_time, model_display, usage)
+    return finalize_provider_response(provider, full_content, question, image_data, kwargs, start_time, model_display, usage)
+
+def serve_cached_response(provider: str, entry: dict, question: str, image_data, kwargs: dict, start_time: float, model_display: str) -> dict:
+    """Finalize a response cache hit like a live response. A hit costs nothing."""
+    result = finalize_provider_response(provider, entry['text'], question, image_data, kwargs, start_time, model_display, usage_record(provider, 0, 0, "cache"))
+    result["cached"] = True
+    return result
+
+async def aserve_cached_response(provider: str, entry: dict, question: str, image_data, kwargs: dict, start_time: float, model_display: str, on_token=None) -> dict:
+    """Async twin of serve_cached_response. Streaming callers get the cached text as a single token."""
+    if on_token:
+        on_token(entry['text'])
+    result = await afinalize_provider_response(provider, entry['text'], question, image_data, kwargs, start_time, model_display, usage_record(provider, 0, 0, "cache"))
+    result["cached"] = True
+    return result
+
+def flight_key(provider: str, models: list, cache_parts: tuple) -> str:
+    """Single-flight key: the response cache key, taken over the provider's whole model fallback chain."""
+    return response_cache.make_key(provider, ",".join(models), *cache_parts)
+
+def finish_flight(provider: str, outcome: tuple, question: str, image_data, kwargs: dict, start_time: float, model_display: str) -> dict:
+    """Finalize a single_flight outcome ((text, usage), shared). A shared call costs its followers nothing, like a cache hit."""
+    (full_content, usage), shared = outcome
+    result = finalize_provider_response(provider, full_content, question, image_data, kwargs, start_time, model_display,
+                                        usage_record(provider, 0, 0, "coalesced") if shared else usage)
+    if shared:
+        result["coalesced"] = True
+    return result
+
+async def afinish_flight(provider: str, outcome: tuple, question: str, image_data, kwargs: dict, start_time: float, model_display: str, on_token=None) -> dict:
+    """Async twin of finish_flight. Streaming followers get the shared text as a single token."""
+    (full_content, usage), shared = outcome
+    if shared and on_token:
+        on_token(full_content)
+    result = await afinalize_provider_response(provider, full_content, question, image_data, kwargs, start_time, model_display,
+                                               usage_record(provider, 0, 0, "coalesced") if shared else usage)
+    if shared:
+        result["coalesced"] = True
+    return result
+
+def build_openai_request(question, image_data=None, **kwargs) -> Tuple[list, str]:
+    """Render the OpenAI chat messages. Returns (messages, model_display)."""
+    # DEFAULT PROMPT: Self-Selecting Expert
+    system_prompt = """You are an ELITE ADVISOR. 
 Before answering, analyze the query and decide which specific expert persona is most qualified to answer (e.g., 'Lead Data Architect', 'Venture Capitalist', 'Master Chef').
 1. Start your response by declaring: "Acting as: [Persona Name]"
 2. Provide specific, opinionated, and high-stakes advice. 
 3. DO NOT be generic. Use industry-specific terminology and benchmarks.
 4. MANDATORY REASONING: You MUST first perform a forensic logical decomposition of the problem inside <thinking> tags. If you skip this block, you have FAILED the prompt.
 5. ANTI-SANDBAGGING: NEVER save your best math, specific numbers, or brutal insights for the thinking tags. If you discover a critical fact in your thinking, it MUST appear in your final answer."""
-        
-        # COUNCIL MODE: USE ASSIGNED ROLE
-        if kwargs.get('council_mode'):
-            role_key = kwargs.get('role', 'visionary')  # Default to visionary if not specified
-            role_config = COUNCIL_ROLES.get(role_key, COUNCIL_ROLES['visionary'])
-            system_prompt = f"""You are the {role_config['name'].upper()} (GPT-5.2) on the High Council. 
+    model_display = "GPT-5.2"
+
+    # COUNCIL MODE: USE ASSIGNED ROLE
+    if kwargs.get('council_mode'):
+        role_key = kwargs.get('role', 'visionary')  # Default to visionary if not specified
+        role_config = COUNCIL_ROLES.get(role_key, COUNCIL_ROLES['visionary'])
+        system_prompt = f"""You are the {role_config['name'].upper()} (GPT-5.2) on the High Council. 
 You have 20+ years of elite experience in this field. 
 CRITICAL: DO NOT provide general advice or high-school level summaries. 
 Provide specific technical or financial details, industry benchmarks ($), and actionable metrics. 
@@ -393,91 +518,142 @@ Provide specific technical or financial details, industry benchmarks ($), and ac
 2. ABSOLUTELY NO generic "best practices" without specific configuration parameters.
 3. If you find yourself writing "It's important to note..." or other narrative cushioning, STOP and replace it with a hard data point.
 """
-            
-        if kwargs.get('hard_mode'):
-            system_prompt = get_hard_mode_directive() + system_prompt
+        model_display = f"GPT-5.2 ({role_config['name']})"
 
-        # VISUAL OVERRIDE (OpenAI Fix)
-        if image_data:
-            system_prompt = """VISUAL ANALYST MODE ACTIVATED.
-The user has uploaded an image. Your PRIMARY MANDATE is to analyze this specific visual evidence.
-1. Describes what you see in the image FORENSICALLY.
-2. Do NOT hallucinate context (like 'market research') if it is not in the pixels.
-3. If it is a document/screen, transcribe and analyze the text exactly.
-""" + system_prompt
+    if kwargs.get('hard_mode'):
+        system_prompt = get_hard_mode_directive() + system_prompt
 
-        # 2b. Add Visual Mandate if active
-        visual_profile = kwargs.get('visual_profile', 'off')
-        if visual_profile != 'off':
-            system_prompt += get_visual_mandate(visual_profile)
-            
-        # DUAL-RESPONSE HARDENING: If visual is requested, force text analysis.
-        if is_visual_request(question):
-            system_prompt += "\n\nCRITICAL: A visual mockup is being requested alongside this query. You MUST provide your full expert textual analysis first. DO NOT truncate your response or pivot into only generating an image. The user requires BOTH the forensic report and the visual."
+    # VISUAL OVERRIDE (OpenAI Fix)
+    if image_data:
+        system_prompt = VISUAL_ANALYST_PREAMBLE + system_prompt
 
-        messages = [{"role": "system", "content": system_prompt}]
-        
-        if image_data:
-            messages.append({
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": question},
-                    {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{image_data}"}}
-                ]
-            })
-        else:
-            messages.append({"role": "user", "content": question})
-        
-        response = client.chat.completions.create(
-            model="gpt-4o", 
-            messages=messages,
-            max_tokens=2500,
-            timeout=60 # Prevent infinite hang
-        )
-        elapsed_time = time.time() - start_time
-        full_content = response.choices[0].message.content
+    # 2b. Add Visual Mandate if active
+    visual_profile = kwargs.get('visual_profile', 'off')
+    if visual_profile != 'off':
+        system_prompt += get_visual_mandate(visual_profile)
 
-        # 3. Handle Visual Augmentation (Post-process)
-        visual_profile = kwargs.get('visual_profile', 'off')
-        if visual_profile != 'off':
-            from visuals import fabricate_and_persist_visual, generate_mermaid_viz
-            
-            if visual_profile in ['data-viz', 'knowledge-graph']:
-                visual_result = generate_mermaid_viz(full_content, profile=visual_profile)
-                if visual_result:
-                    full_content += f"\n\n### 📊 {visual_profile.replace('-', ' ').upper()}\n\n```mermaid\n{visual_result}\n```"
-            else:
-                # realistic, blueprint, or auto
-                visual_result = fabricate_and_persist_visual(full_content, role=kwargs.get('role', 'general'), profile=visual_profile)
-                if visual_result:
-                    full_content += f"\n\n### 🎨 Generated Visual ({visual_profile.capitalize()})\n\n![Generated Image]({visual_result})\n\n_Engine: Google Nano Banana_"
+    # DUAL-RESPONSE HARDENING: If visual is requested, force text analysis.
+    if is_visual_request(question):
+        system_prompt += "\n\nCRITICAL: A visual mockup is being requested alongside this query. You MUST provide your full expert textual analysis first. DO NOT truncate your response or pivot into only generating an image. The user requires BOTH the forensic report and the visual."
 
-        thought, clean_content = extract_thought(full_content)
-        cost = calculate_cost("gpt-4o", question, full_content)
-        
-        # Final model name display
-        model_display = f"GPT-5.2 ({role_config['name']})" if kwargs.get('council_mode') else "GPT-5.2"
-        self_selected_persona = None
-        
-        if not kwargs.get('council_mode'):
-            self_selected_persona = extract_persona(clean_content)
-            if self_selected_persona:
-                model_display = f"GPT-5.2 ({self_selected_persona})"
+    messages = [{"role": "system", "content": system_prompt}]
+
+    if image_data:
+        messages.append({
+            "role": "user",
+            "content": [
+                {"type": "text", "text": question},
+                {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{image_data}"}}
+            ]
+        })
+    else:
+        messages.append({"role": "user", "content": question})
+
+    return messages, model_display
 
-        # Enforcement Check
-        enforcement = run_enforcement_check(clean_content, kwargs, "openai", user_query=question, has_image=bool(image_data))
+def query_openai(question, image_data=None, **kwargs):
+    """Query OpenAI (Display: GPT-5.2) with DALL-E 3 Support"""
+    start_time = time.time()
+    deadline = deadline_from(kwargs)
 
+    # 2. Standard Chat Completion
+    try:
+        messages, model_display = build_openai_request(question, image_data, **kwargs)
+        use_cache = response_cache.active(kwargs)
+        cache_parts = (messages[0]['content'], question, image_data, {"max_tokens": 2500})
+        cached = response_cache.lookup("openai", ["gpt-4o"], *cache_parts) if use_cache else None
+        if cached:
+            return serve_cached_response("openai", cached, question, image_data, kwargs, start_time, model_display)
+
+        deadline.check("GPT-4o")
+
+        def fetch():
+            client = provider_clients.openai()
+            provider_limiter.acquire("openai", "gpt-4o", quota_tokens(messages[0]['content'], question, output=2500), deadline)
+            with provider_health.track("openai", "gpt-4o", deadline, 60):
+                response = client.chat.completions.create(
+                    model="gpt-4o", 
+                    messages=messages,
+                    max_tokens=2500,
+                    timeout=deadline.timeout(60) # Prevent infinite hang
+                )
+            full_content = response.choices[0].message.content
+            if use_cache:
+                response_cache.store("openai", "gpt-4o", full_content, *cache_parts)
+            return full_content, extract_usage("openai", response)
+
+        # An identical call already in flight (another tab, a duplicate workflow) is awaited, not repeated
+        outcome = single_flight.do("openai", flight_key("openai", ["gpt-4o"], cache_parts), fetch, deadline)
+        return finish_flight("openai", outcome, question, image_data, kwargs, start_time, model_display)
+    except Exception as e:
+        elapsed_time = time.time() - start_time
         return {
-            "success": True,
-            "response": clean_content,
-            "thought": thought,
-            "execution_bias": determine_execution_bias(clean_content),
+            "success": False,
+            "response": f"Error: {str(e)}",
             "time": round(elapsed_time, 2),
-            "cost": cost,
-            "model": model_display,
-            "self_selected_persona": self_selected_persona,
-            "enforcement": enforcement
+            "model": "GPT-5.2"
         }
+
+def reset_token_stream(on_token):
+    """A streamed attempt failed: have the listener drop its partial text before a retry or fallback model streams."""
+    reset = getattr(on_token, 'reset', None)
+    if reset:
+        reset()
+
+async def stream_openai_chat(client, on_token, usage: dict = None, **params) -> str:
+    """
+    Stream an OpenAI chat completion, forwarding each delta to on_token. Returns the full text.
+    Pass a dict as `usage` to have the final usage chunk's ledger entry written into it.
+    """
+    parts = []
+    if usage is not None:
+        params["stream_options"] = {"include_usage": True}
+    stream = await client.chat.completions.create(stream=True, **params)
+    async for chunk in stream:
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if delta:
+            parts.append(delta)
+            on_token(delta)
+        if usage is not None and getattr(chunk, 'usage', None):
+            usage.update(extract_usage("openai", chunk) or {})
+    return "".join(parts)
+
+async def aquery_openai(question, image_data=None, on_token=None, **kwargs):
+    """Async twin of query_openai for the fan-out engine. on_token(text) streams deltas as they arrive."""
+    start_time = time.time()
+    deadline = deadline_from(kwargs)
+    try:
+        messages, model_display = build_openai_request(question, image_data, **kwargs)
+        use_cache = response_cache.active(kwargs)
+        cache_parts = (messages[0]['content'], question, image_data, {"max_tokens": 2500})
+        cached = await asyncio.to_thread(response_cache.lookup, "openai", ["gpt-4o"], *cache_parts) if use_cache else None
+        if cached:
+            return await aserve_cached_response("openai", cached, question, image_data, kwargs, start_time, model_display, on_token)
+
+        deadline.check("GPT-4o")
+
+        async def fetch():
+            client = provider_clients.async_client('openai')
+            usage = {}
+            await provider_limiter.aacquire("openai", "gpt-4o", quota_tokens(messages[0]['content'], question, output=2500), deadline)
+            with provider_health.track("openai", "gpt-4o", deadline, 60):
+                if on_token:
+                    full_content = await stream_openai_chat(client, on_token, usage=usage, model="gpt-4o", messages=messages, max_tokens=2500, timeout=deadline.timeout(60))
+                else:
+                    response = await client.chat.completions.create(
+                        model="gpt-4o", 
+                        messages=messages,
+                        max_tokens=2500,
+                        timeout=deadline.timeout(60)
+                    )
+                    full_content = response.choices[0].message.content
+                    usage = extract_usage("openai", response)
+            if use_cache:
+                await asyncio.to_thread(response_cache.store, "openai", "gpt-4o", full_content, *cache_parts)
+            return full_content, usage
+
+        outcome = await single_flight.ado("openai", flight_key("openai", ["gpt-4o"], cache_parts), fetch, deadline)
+        return await afinish_flight("openai", outcome, question, image_data, kwargs, start_time, model_display, on_token)
     except Exception as e:
         elapsed_time = time.time() - start_time
         return {
@@ -517,10 +693,8 @@ STRATEGIC MANDATE:
 ---
 """
 
-def query_anthropic(question, image_data=None, **kwargs):
-    """Query Anthropic (Display: Claude 4.5 Sonnet)"""
-    start_time = time.time()
-    
+def build_anthropic_request(question, image_data=None, **kwargs) -> Tuple[str, list, str]:
+    """Render the Claude system prompt and messages. Returns (system_content, messages, role_display)."""
     # 1. Build Base System Prompt
     if kwargs.get('council_mode'):
         role_key = kwargs.get('role', 'architect') 
@@ -552,113 +726,139 @@ Analyze the query and adopt the single most effective expert persona for the tas
     # 3. Prepend Hard Mode Directive if active
     if kwargs.get('hard_mode'):
         system_content = get_hard_mode_directive() + system_content
-        
+
     # 4. VISUAL OVERRIDE (CRITICAL FIX)
     if image_data:
-        system_content = """VISUAL ANALYST MODE ACTIVATED.
-The user has uploaded an image. Your PRIMARY MANDATE is to analyze this specific visual evidence.
-1. Describes what you see in the image FORENSICALLY.
-2. Do NOT hallucinate context (like 'market research') if it is not in the pixels.
-3. If it is a document/screen, transcribe and analyze the text exactly.
-""" + system_content
-    
+        system_content = VISUAL_ANALYST_PREAMBLE + system_content
 
-    final_question = question
-    
     messages = []
-    
+
     if image_data:
         messages.append({
             "role": "user",
             "content": [
                 {"type": "image", "source": {"type": "base64", "media_type": "image/jpeg", "data": image_data}},
-                {"type": "text", "text": final_question}
+                {"type": "text", "text": question}
             ]
         })
     else:
-        messages.append({"role": "user", "content": final_question})
-
-    # Legacy-Safe Fallback List
-    models = [
-        "claude-3-5-sonnet-20241022", # Stable
-        "claude-3-5-sonnet-20240620", 
-        "claude-3-opus-20240229",
-        "claude-3-haiku-20240307"
-    ]
-    
-    last_error = None
-    for model_id in models:
-        try:
-            response = anthropic_client.messages.create(
-                model=model_id,
-                max_tokens=3000,
-                system=system_content,
-                messages=messages,
-                timeout=90 # Perplexity fallback and big researches need more time
-            )
-            full_content = response.content[0].text
-            
-            elapsed_time = time.time() - start_time
-            
-            # Handle Visual Augmentation (Post-process)
-            visual_profile = kwargs.get('visual_profile', 'off')
-            if visual_profile != 'off':
-                from visuals import fabricate_and_persist_visual, generate_mermaid_viz
-                
-                if visual_profile in ['data-viz', 'knowledge-graph']:
-                    visual_result = generate_mermaid_viz(full_content, profile=visual_profile)
-                    if visual_result:
-                        full_content += f"\n\n### 📊 {visual_profile.replace('-', ' ').upper()}\n\n```mermaid\n{visual_result}\n```"
-                else:
-                    role_key = kwargs.get('role', 'general')
-                    visual_result = fabricate_and_persist_visual(full_content, role=role_key, profile=visual_profile)
-                    if visual_result:
-                        full_content += f"\n\n### 🎨 Generated Visual ({visual_profile.capitalize()})\n\n![Generated Image]({visual_result})\n\n_Engine: Google Nano Banana_"
+        messages.append({"role": "user", "content": question})
 
-            thought, clean_content = extract_thought(full_content)
-            cost = calculate_cost("claude-sonnet-4", question, full_content)
+    return system_content, messages, role_display
 
-            # Final model name display
-            model_display = role_display
-            self_selected_persona = None
-            
-            if not kwargs.get('council_mode'):
-                self_selected_persona = extract_persona(clean_content)
-                if self_selected_persona:
-                    model_display = f"Claude 4.5 Sonnet ({self_selected_persona})"
-
-            # Enforcement Check
-            enforcement = run_enforcement_check(clean_content, kwargs, "anthropic", user_query=final_question or question, has_image=bool(image_data))
-
-            return {
-                "success": True,
-                "response": clean_content,
-                "thought": thought,
-                "execution_bias": determine_execution_bias(clean_content),
-                "time": round(elapsed_time, 2),
-                "cost": cost,
-                "model": model_display,
-                "self_selected_persona": self_selected_persona,
-                "enforcement": enforcement
-            }
-        except Exception as e:
-            last_error = f"{model_id}: {str(e)}"
-            continue
+def query_anthropic(question, image_data=None, **kwargs):
+    """Query Anthropic (Display: Claude 4.5 Sonnet)"""
+    start_time = time.time()
+    system_content, messages, role_display = build_anthropic_request(question, image_data, **kwargs)
+    deadline = deadline_from(kwargs)
+
+    use_cache = response_cache.active(kwargs)
+    cache_parts = (system_content, question, image_data, {"max_tokens": 3000})
+    cached = response_cache.lookup("anthropic", ANTHROPIC_MODELS, *cache_parts) if use_cache else None
+    if cached:
+        return serve_cached_response("anthropic", cached, question, image_data, kwargs, start_time, role_display)
+
+    def fetch():
+        last_error = None
+        for model_id in ANTHROPIC_MODELS:
+            # Only walk down the fallback chain while there is budget left
+            if not deadline.allows():
+                raise DeadlineExceeded(f"Deadline exceeded before trying {model_id} (last: {last_error})")
+            try:
+                provider_limiter.acquire("anthropic", model_id, quota_tokens(system_content, question, output=3000), deadline)
+                with provider_health.track("anthropic", model_id, deadline, 90):
+                    response = provider_clients.anthropic().messages.create(
+                        model=model_id,
+                        max_tokens=3000,
+                        system=system_content,
+                        messages=messages,
+                        timeout=deadline.timeout(90) # Perplexity fallback and big researches need more time
+                    )
+                full_content = response.content[0].text
+                if use_cache:
+                    response_cache.store("anthropic", model_id, full_content, *cache_parts)
+                return full_content, extract_usage("anthropic", response)
+            except Exception as e:
+                last_error = f"{model_id}: {str(e)}"
+                continue
+        raise Exception(last_error)
 
-    elapsed_time = time.time() - start_time
-    return {
-        "success": False,
-        "response": f"Error: {str(last_error)}",
-        "time": round(elapsed_time, 2),
-        "model": "Claude 4.5 Sonnet"
-    }
+    try:
+        outcome = single_flight.do("anthropic", flight_key("anthropic", ANTHROPIC_MODELS, cache_parts), fetch, deadline)
+        return finish_flight("anthropic", outcome, question, image_data, kwargs, start_time, role_display)
+    except Exception as e:
+        elapsed_time = time.time() - start_time
+        return {
+            "success": False,
+            "response": f"Error: {str(e)}",
+            "time": round(elapsed_time, 2),
+            "model": "Claude 4.5 Sonnet"
+        }
 
-def query_google(question, image_data=None, **kwargs):
-    """Query Gemini using Legacy SDK (Display: Gemini 3.0)"""
+async def aquery_anthropic(question, image_data=None, on_token=None, **kwargs):
+    """Async twin of query_anthropic for the fan-out engine. on_token(text) streams deltas as they arrive."""
     start_time = time.time()
-    GOOGLE_TIMEOUT = 45  # Hard timeout - kill if no response in 45 seconds
-    
+    system_content, messages, role_display = build_anthropic_request(question, image_data, **kwargs)
+    client = provider_clients.async_client('anthropic')
+    deadline = deadline_from(kwargs)
+
+    use_cache = response_cache.active(kwargs)
+    cache_parts = (system_content, question, image_data, {"max_tokens": 3000})
+    cached = await asyncio.to_thread(response_cache.lookup, "anthropic", ANTHROPIC_MODELS, *cache_parts) if use_cache else None
+    if cached:
+        return await aserve_cached_response("anthropic", cached, question, image_data, kwargs, start_time, role_display, on_token)
+
+    async def fetch():
+        last_error = None
+        for model_id in ANTHROPIC_MODELS:
+            if not deadline.allows():
+                raise DeadlineExceeded(f"Deadline exceeded before trying {model_id} (last: {last_error})")
+            try:
+                await provider_limiter.aacquire("anthropic", model_id, quota_tokens(system_content, question, output=3000), deadline)
+                with provider_health.track("anthropic", model_id, deadline, 90):
+                    if on_token:
+                        async with client.messages.stream(
+                            model=model_id,
+                            max_tokens=3000,
+                            system=system_content,
+                            messages=messages,
+                            timeout=deadline.timeout(90)
+                        ) as stream:
+                            async for text in stream.text_stream:
+                                on_token(text)
+                            response = await stream.get_final_message()
+                    else:
+                        response = await client.messages.create(
+                            model=model_id,
+                            max_tokens=3000,
+                            system=system_content,
+                            messages=messages,
+                            timeout=deadline.timeout(90)
+                        )
+                full_content = response.content[0].text
+                if use_cache:
+                    await asyncio.to_thread(response_cache.store, "anthropic", model_id, full_content, *cache_parts)
+                return full_content, extract_usage("anthropic", response)
+            except Exception as e:
+                last_error = f"{model_id}: {str(e)}"
+                reset_token_stream(on_token)
+                continue
+        raise Exception(last_error)
 
+    try:
+        outcome = await single_flight.ado("anthropic", flight_key("anthropic", ANTHROPIC_MODELS, cache_parts), fetch, deadline)
+        return await afinish_flight("anthropic", outcome, question, image_data, kwargs, start_time, role_display, on_token)
+    except Exception as e:
+        elapsed_time = time.time() - start_time
+        return {
+            "success": False,
+            "response": f"Error: {str(e)}",
+            "time": round(elapsed_time, 2),
+            "model": "Claude 4.5 Sonnet"
+        }
+
+def build_google_request(question, image_data=None, **kwargs) -> Tuple[object, str]:
+    """Render the Gemini prompt contents. Returns (contents, role_display)."""
     # DEFAULT PROMPT: Self-Selecting Expert
     prompt_with_reasoning = f"""Choose the most critical elite expert persona for this query. 
 1. Start with: "Expert Persona: [Chosen Name]"
@@ -688,145 +888,205 @@ Provide deep niche insights and specific technical data.
         
         Key Instruction: First explain your reasoning step-by-step inside <thinking> tags."""
         role_display = f"Gemini 3.0 Pro ({role_config['name']})"
-    
+
     if kwargs.get('hard_mode'):
         prompt_with_reasoning = get_hard_mode_directive() + prompt_with_reasoning
 
     # VISUAL OVERRIDE
     if image_data:
-        prompt_with_reasoning = """VISUAL ANALYST MODE ACTIVATED.
-The user has uploaded an image. Your PRIMARY MANDATE is to analyze this specific visual evidence.
-1. Describes what you see in the image FORENSICALLY.
-2. Do NOT hallucinate context (like 'market research') if it is not in the pixels.
-3. If it is a document/screen, transcribe and analyze the text exactly.
-""" + prompt_with_reasoning
-    
+        prompt_with_reasoning = VISUAL_ANALYST_PREAMBLE + prompt_with_reasoning
+
     # Add Visual Mandate if active
     visual_profile = kwargs.get('visual_profile', 'off')
     if visual_profile != 'off':
         prompt_with_reasoning += "\n" + get_visual_mandate(visual_profile)
-    
-    # 2026 ERA MODELS - Use exact version IDs to avoid "-latest" suffix issues
-    # Feb 2026 Model Priority (Paid Tier)
-    models_to_try = [
-        'gemini-2.5-flash',      # Primary: Current stable (active until June 2026)
-        'gemini-2.5-pro',        # Power: Higher reasoning (replacement for 1.5 Pro)
-        'gemini-2.0-flash'       # Fallback: Retiring March 31, 2026 but reliable
-    ]
-    
-    
-    last_error = None
-        
-    for model_name in models_to_try:
-        # Retry mechanism for 429 errors (Burst Limit Handling)
-        max_retries = 2
-        for attempt in range(max_retries + 1):
-            try:
-                # Wrap Google call in hard timeout using concurrent.futures
-                from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
-
-                def make_google_call():
-                    if image_data:
-                        from google.genai import types
-                        image_part = types.Part.from_bytes(
-                            data=base64.b64decode(image_data),
-                            mime_type="image/jpeg"
-                        )
-                        return google_client.models.generate_content(
-                            model=model_name,
-                            contents=[prompt_with_reasoning, image_part]
-                        )
-                    else:
-                        return google_client.models.generate_content(
+
+    if image_data:
+        from google.genai import types
+        image_part = types.Part.from_bytes(
+            data=base64.b64decode(image_data),
+            mime_type="image/jpeg"
+        )
+        return [prompt_with_reasoning, image_part], role_display
+    return prompt_with_reasoning, role_display
+
+def google_cache_parts(contents, image_data) -> tuple:
+    """Response cache key material for a Gemini call (the prompt text carries the whole system prompt)."""
+    prompt_text = contents if isinstance(contents, str) else contents[0]
+    return ("", prompt_text, image_data, {})
+
+def is_google_quota_error(error: Exception) -> bool:
+    return "429" in str(error) or "RESOURCE_EXHAUSTED" in str(error)
+
+def query_google(question, image_data=None, **kwargs):
+    """Query Gemini using Legacy SDK (Display: Gemini 3.0)"""
+    start_time = time.time()
+    contents, role_display = build_google_request(question, image_data, **kwargs)
+    deadline = deadline_from(kwargs)
+
+    use_cache = response_cache.active(kwargs)
+    cache_parts = google_cache_parts(contents, image_data)
+    cached = response_cache.lookup("google", GOOGLE_MODELS, *cache_parts) if use_cache else None
+    if cached:
+        return serve_cached_response("google", cached, question, image_data, kwargs, start_time, role_display)
+
+    def fetch():
+        last_error = None
+        for model_name in GOOGLE_MODELS:
+            # Only fall back to the next model while there is budget left (retries are gated below)
+            if not deadline.allows():
+                raise DeadlineExceeded(f"Deadline exceeded before trying {model_name} (last: {last_error})")
+            # Retry mechanism for 429 errors (Burst Limit Handling)
+            for attempt in range(GOOGLE_MAX_RETRIES + 1):
+                try:
+                    # Wrap Google call in hard timeout using concurrent.futures
+                    from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+
+                    def make_google_call():
+                        return provider_clients.google().models.generate_content(
                             model=model_name,
-                            contents=prompt_with_reasoning
+                            contents=contents
                         )
 
-                with ThreadPoolExecutor(max_workers=1) as executor:
-                    future = executor.submit(make_google_call)
-                    try:
-                        response = future.result(timeout=GOOGLE_TIMEOUT)
-                    except FuturesTimeoutError:
-                        raise Exception(f"Google API timed out after {GOOGLE_TIMEOUT}s - skipping")
-                
-                # Success! Process response
-                elapsed_time = time.time() - start_time
-                full_content = response.text
-                
-                # Handle Visual Augmentation (Post-process)
-                visual_profile = kwargs.get('visual_profile', 'off')
-                if visual_profile != 'off':
-                    from visuals import fabricate_and_persist_visual, generate_mermaid_viz
-                    
-                    if visual_profile in ['data-viz', 'knowledge-graph']:
-                        visual_result = generate_mermaid_viz(full_content, profile=visual_profile)
-                        if visual_result:
-                            full_content += f"\n\n### 📊 {visual_profile.replace('-', ' ').upper()}\n\n```mermaid\n{visual_result}\n```"
+                    provider_limiter.acquire("google", model_name, quota_tokens(cache_parts[1]), deadline)
+                    with provider_health.track("google", model_name, deadline, GOOGLE_TIMEOUT):
+                        with ThreadPoolExecutor(max_workers=1) as executor:
+                            future = executor.submit(make_google_call)
+                            attempt_timeout = deadline.timeout(GOOGLE_TIMEOUT)
+                            try:
+                                response = future.result(timeout=attempt_timeout)
+                            except FuturesTimeoutError:
+                                raise Exception(f"Google API timed out after {attempt_timeout:.0f}s - skipping")
+
+                    # Success! Process response
+                    if use_cache:
+                        response_cache.store("google", model_name, response.text, *cache_parts)
+                    return response.text, extract_usage("google", response)
+
+                except Exception as e:
+                    is_quota_error = is_google_quota_error(e)
+                    if is_quota_error:
+                        provider_limiter.throttle("google", model_name)
+
+                    wait_time = (attempt + 1) * 3  # Wait 3s, then 6s
+                    # No point waiting out a backoff for a model whose breaker the failure just opened
+                    if is_quota_error and attempt < GOOGLE_MAX_RETRIES and deadline.allows(wait_time + MIN_ATTEMPT_SECONDS) \
+                            and provider_health.state("google", model_name) != "open":
+                        print(f"⚠️ Google 429 Quota Hit on {model_name}. Retrying in {wait_time}s...")
+                        time.sleep(wait_time)
+                        continue  # Retry loop
+
+                    if is_quota_error:
+                        last_error = "Gemini Free Tier Quota Exceeded (Retries Exhausted). Please check Google Cloud Billing."
                     else:
-                        role_key = kwargs.get('role', 'general')
-                        visual_result = fabricate_and_persist_visual(full_content, role=role_key, profile=visual_profile)
-                        if visual_result:
-                            full_content += f"\n\n### 🎨 Generated Visual ({visual_profile.capitalize()})\n\n![Generated Image]({visual_result})\n\n_Engine: Google Nano Banana_"
-    
-                thought, clean_content = extract_thought(full_content)
-                
-                # Final model name display
-                model_display = role_display
-                self_selected_persona = None
-                
-                if not kwargs.get('council_mode'):
-                    self_selected_persona = extract_persona(clean_content)
-                    if self_selected_persona:
-                        model_display = f"Gemini 3.0 Pro ({self_selected_persona})"
-    
-                # Enforcement Check
-                enforcement = run_enforcement_check(clean_content, kwargs, "google", user_query=question, has_image=bool(image_data))
-    
-                return {
-                    "success": True,
-                    "response": clean_content,
-                    "thought": thought,
-                    "execution_bias": determine_execution_bias(clean_content),
-                    "time": round(elapsed_time, 2),
-                    "cost": 0,
-                    "model": model_display,
-                    "self_selected_persona": self_selected_persona,
-                    "enforcement": enforcement
-                }
+                        last_error = f"{model_name}: {str(e)}"
+
+                    break # Break retry loop, try next model in outer loop
+        raise Exception(last_error)
+
+    try:
+        outcome = single_flight.do("google", flight_key("google", GOOGLE_MODELS, cache_parts), fetch, deadline)
+        return finish_flight("google", outcome, question, image_data, kwargs, start_time, role_display)
+    except Exception as e:
+        elapsed_time = time.time() - start_time
+        return {
+            "success": False,
+            "response": f"All Gemini models failed. Last Error: {str(e)}",
+            "time": round(elapsed_time, 2),
+            "model": "Gemini 3.0"
+        }
+
+async def stream_google_content(model_name, contents, on_token, usage: dict = None) -> str:
+    """Stream a Gemini generation, forwarding each chunk to on_token. Returns the full text (usage as in stream_openai_chat)."""
+    parts = []
+    async for chunk in await provider_clients.google().aio.models.generate_content_stream(model=model_name, contents=contents):
+        if chunk.text:
+            parts.append(chunk.text)
+            on_token(chunk.text)
+        # Each chunk carries the running totals; the last one wins
+        if usage is not None:
+            usage.update(extract_usage("google", chunk) or {})
+    return "".join(parts)
+
+async def aquery_google(question, image_data=None, on_token=None, **kwargs):
+    """Async twin of query_google (google-genai .aio surface) for the fan-out engine. on_token(text) streams chunks."""
+    start_time = time.time()
+    contents, role_display = build_google_request(question, image_data, **kwargs)
+    deadline = deadline_from(kwargs)
+
+    use_cache = response_cache.active(kwargs)
+    cache_parts = google_cache_parts(contents, image_data)
+    cached = await asyncio.to_thread(response_cache.lookup, "google", GOOGLE_MODELS, *cache_parts) if use_cache else None
+    if cached:
+        return await aserve_cached_response("google", cached, question, image_data, kwargs, start_time, role_display, on_token)
+
+    async def fetch():
+        last_error = None
+        for model_name in GOOGLE_MODELS:
+            if not deadline.allows():
+                raise DeadlineExceeded(f"Deadline exceeded before trying {model_name} (last: {last_error})")
+            for attempt in range(GOOGLE_MAX_RETRIES + 1):
+                try:
+                    attempt_timeout = deadline.timeout(GOOGLE_TIMEOUT)
+                    usage = {}
+                    await provider_limiter.aacquire("google", model_name, quota_tokens(cache_parts[1]), deadline)
+                    with provider_health.track("google", model_name, deadline, GOOGLE_TIMEOUT):
+                        try:
+                            if on_token:
+                                full_content = await asyncio.wait_for(stream_google_content(model_name, contents, on_token, usage), timeout=attempt_timeout)
+                            else:
+                                response = await asyncio.wait_for(
+                                    provider_clients.google().aio.models.generate_content(model=model_name, contents=contents),
+                                    timeout=attempt_timeout
+                                )
+                                full_content = response.text
+                                usage = extract_usage("google", response)
+                        except asyncio.TimeoutError:
+                            raise Exception(f"Google API timed out after {attempt_timeout:.0f}s - skipping")
+
+                    if use_cache:
+                        await asyncio.to_thread(response_cache.store, "google", model_name, full_content, *cache_parts)
+                    return full_content, usage
+
+                except Exception as e:
+                    reset_token_stream(on_token)
+                    is_quota_error = is_google_quota_error(e)
+                    if is_quota_error:
+                        provider_limiter.throttle("google", model_name)
 
-            except Exception as e:
-                is_quota_error = "429" in str(e) or "RESOURCE_EXHAUSTED" in str(e)
-                
-                if is_quota_error and attempt < max_retries:
                     wait_time = (attempt + 1) * 3  # Wait 3s, then 6s
-                    print(f"⚠️ Google 429 Quota Hit on {model_name}. Retrying in {wait_time}s...")
-                    time.sleep(wait_time)
-                    continue  # Retry loop
-                
-                if is_quota_error:
-                    last_error = "Gemini Free Tier Quota Exceeded (Retries Exhausted). Please check Google Cloud Billing."
-                else:
-                    last_error = f"{model_name}: {str(e)}"
-                
-                break # Break retry loop, try next model in outer loop
+                    # No point waiting out a backoff for a model whose breaker the failure just opened
+                    if is_quota_error and attempt < GOOGLE_MAX_RETRIES and deadline.allows(wait_time + MIN_ATTEMPT_SECONDS) \
+                            and provider_health.state("google", model_name) != "open":
+                        print(f"⚠️ Google 429 Quota Hit on {model_name}. Retrying in {wait_time}s...")
+                        await asyncio.sleep(wait_time)
+                        continue
+
+                    if is_quota_error:
+                        last_error = "Gemini Free Tier Quota Exceeded (Retries Exhausted). Please check Google Cloud Billing."
+                    else:
+                        last_error = f"{model_name}: {str(e)}"
 
-    elapsed_time = time.time() - start_time
-    return {
-        "success": False,
-        "response": f"All Gemini models failed. Last Error: {last_error}",
-        "time": round(elapsed_time, 2),
-        "model": "Gemini 3.0"
-    }
+                    break
+        raise Exception(last_error)
 
-def query_perplexity(question, image_data=None, **kwargs):
-    """Query Perplexity (Display: Perplexity Pro)"""
+    try:
+        outcome = await single_flight.ado("google", flight_key("google", GOOGLE_MODELS, cache_parts), fetch, deadline)
+        return await afinish_flight("google", outcome, question, image_data, kwargs, start_time, role_display, on_token)
+    except Exception as e:
+        elapsed_time = time.time() - start_time
+        return {
+            "success": False,
+            "response": f"All Gemini models failed. Last Error: {str(e)}",
+            "time": round(elapsed_time, 2),
+            "model": "Gemini 3.0"
+        }
+
+def build_perplexity_request(question, image_data=None, **kwargs) -> Tuple[str, str, str]:
+    """Render the Perplexity system prompt. Returns (question, system_prompt, role_display)."""
     if image_data:
         question += "\n[Note: The user uploaded an image. As a text-only model, you cannot see it. Acknowledge this limitation but answer the text prompt to the best of your ability.]"
-        
-    start_time = time.time()
-    url = "https://api.perplexity.ai/chat/completions"
-    headers = {"Authorization": f"Bearer {PERPLEXITY_API_KEY}", "Content-Type": "application/json"}
-    
+
     # DEFAULT PROMPT: Self-Selecting Expert
     system_prompt = """You are an ELITE RESEARCHER. 
 Before providing data, choose a specific expert lens (e.g., 'Forensic Accountant', 'Supply Chain Analyst').
@@ -834,7 +1094,7 @@ Before providing data, choose a specific expert lens (e.g., 'Forensic Accountant
 - Focus on hard numbers, specific vendors, and verifiable benchmarks.
 - No fluff. No generalities.
 - Thinking tags required."""
-    
+
     # COUNCIL MODE: USE ASSIGNED ROLE
     role_display = "Perplexity Pro (Researcher)"
     if kwargs.get('council_mode'):
@@ -849,89 +1109,163 @@ Before providing data, choose a specific expert lens (e.g., 'Forensic Accountant
 3. FOCUS: Identify real-time changes, pricing shifts, and version updates that occurred in the last 24-48 hours.
 """
         role_display = f"Perplexity Pro ({role_config['name']})"
-    
+
     if kwargs.get('hard_mode'):
         system_prompt = get_hard_mode_directive() + system_prompt
-        
+
     # Add Visual Mandate if active
     visual_profile = kwargs.get('visual_profile', 'off')
     if visual_profile != 'off':
         system_prompt += "\n" + get_visual_mandate(visual_profile)
-    
-    models_to_try = ["sonar-pro", "sonar", "sonar-reasoning-pro", "sonar-reasoning"]
-    
-    for model_name in models_to_try:
-        try:
-            data = {
-                "model": model_name,
-                "messages": [{"role": "system", "content": system_prompt}, {"role": "user", "content": question}]
-            }
-            # Increased timeout to 60s for deep research
-            response = requests.post(url, json=data, headers=headers, timeout=60)
-            response.raise_for_status()
-            result = response.json()
-            full_content = result['choices'][0]['message']['content']
-            elapsed_time = time.time() - start_time
-            
-            # 3. Handle Visual Augmentation (Post-process)
-            visual_profile = kwargs.get('visual_profile', 'off')
-            if visual_profile != 'off':
-                from visuals import fabricate_and_persist_visual, generate_mermaid_viz
-                
-                if visual_profile in ['data-viz', 'knowledge-graph']:
-                    visual_result = generate_mermaid_viz(full_content, profile=visual_profile)
-                    if visual_result:
-                        full_content += f"\n\n### 📊 {visual_profile.replace('-', ' ').upper()}\n\n```mermaid\n{visual_result}\n```"
-                else:
-                    role_key = kwargs.get('role', 'general')
-                    visual_result = fabricate_and_persist_visual(full_content, role=role_key, profile=visual_profile)
-                    if visual_result:
-                        full_content += f"\n\n### 🎨 Generated Visual ({visual_profile.capitalize()})\n\n![Generated Image]({visual_result})\n\n_Engine: Google Nano Banana_"
 
-            thought, clean_content = extract_thought(full_content)
-            cost = calculate_cost("perplexity", question, full_content)
+    return question, system_prompt, role_display
 
-            # Final model name display
-            model_display = role_display
-            self_selected_persona = None
-            
-            if not kwargs.get('council_mode'):
-                self_selected_persona = extract_persona(clean_content)
-                if self_selected_persona:
-                    model_display = f"Perplexity Pro ({self_selected_persona})"
-
-            # Enforcement Check
-            enforcement = run_enforcement_check(clean_content, kwargs, "perplexity", user_query=question, has_image=bool(image_data))
-
-            return {
-                "success": True,
-                "response": clean_content,
-                "thought": thought,
-                "execution_bias": determine_execution_bias(clean_content),
-                "time": round(elapsed_time, 2),
-                "cost": cost,
-                "model": model_display,
-                "self_selected_persona": self_selected_persona,
-                "enforcement": enforcement
-            }
-        except Exception as e:
-            print(f"Perplexity error with {model_name}: {str(e)}")
-            continue
-            
-    elapsed_time = time.time() - start_time
-    return {
-        "success": False,
-        "response": "Error: Perplexity research timed out or API unavailable.",
-        "time": round(elapsed_time, 2),
-        "model": "Perplexity Pro"
-    }
+def query_perplexity(question, image_data=None, **kwargs):
+    """Query Perplexity (Display: Perplexity Pro)"""
+    start_time = time.time()
+    question, system_prompt, role_display = build_perplexity_request(question, image_data, **kwargs)
+    headers = {"Authorization": f"Bearer {PERPLEXITY_API_KEY}", "Content-Type": "application/json"}
+    deadline = deadline_from(kwargs)
+
+    use_cache = response_cache.active(kwargs)
+    cache_parts = (system_prompt, question, None, {})
+    cached = response_cache.lookup("perplexity", PERPLEXITY_MODELS, *cache_parts) if use_cache else None
+    if cached:
+        return serve_cached_response("perplexity", cached, question, image_data, kwargs, start_time, role_display)
+
+    def fetch():
+        for model_name in PERPLEXITY_MODELS:
+            if not deadline.allows():
+                raise DeadlineExceeded(f"Perplexity: deadline exceeded before trying {model_name}")
+            try:
+                data = {
+                    "model": model_name,
+                    "messages": [{"role": "system", "content": system_prompt}, {"role": "user", "content": question}]
+                }
+                # Increased timeout to 60s for deep research
+                provider_limiter.acquire("perplexity", model_name, quota_tokens(system_prompt, question), deadline)
+                with provider_health.track("perplexity", model_name, deadline, 60):
+                    response = provider_clients.http().post(PERPLEXITY_URL, json=data, headers=headers, timeout=deadline.timeout(60))
+                    response.raise_for_status()
+                    result = response.json()
+                full_content = result['choices'][0]['message']['content']
+                if use_cache:
+                    response_cache.store("perplexity", model_name, full_content, *cache_parts)
+                return full_content, extract_usage("perplexity", result)
+            except Exception as e:
+                print(f"Perplexity error with {model_name}: {str(e)}")
+                continue
+        raise Exception("All Perplexity models failed")
+
+    try:
+        outcome = single_flight.do("perplexity", flight_key("perplexity", PERPLEXITY_MODELS, cache_parts), fetch, deadline)
+        return finish_flight("perplexity", outcome, question, image_data, kwargs, start_time, role_display)
+    except Exception as e:
+        print(f"Perplexity failed: {str(e)}")
+        elapsed_time = time.time() - start_time
+        return {
+            "success": False,
+            "response": "Error: Perplexity research timed out or API unavailable.",
+            "time": round(elapsed_time, 2),
+            "model": "Perplexity Pro"
+        }
+
+async def stream_perplexity_chat(client, data, headers, on_token, timeout=60, usage: dict = None) -> str:
+    """Stream a Perplexity chat completion (OpenAI-compatible SSE). Returns the full text (usage as in stream_openai_chat)."""
+    parts = []
+    async with client.stream("POST", PERPLEXITY_URL, json={**data, "stream": True}, headers=headers, timeout=timeout) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            payload = line[5:].strip()
+            if payload == "[DONE]":
+                break
+            event = json.loads(payload)
+            if usage is not None and event.get('usage'):
+                usage.update(extract_usage("perplexity", event) or {})
+            choices = event.get('choices') or [{}]
+            delta = choices[0].get('delta', {}).get('content')
+            if delta:
+                parts.append(delta)
+                on_token(delta)
+    return "".join(parts)
+
+async def aquery_perplexity(question, image_data=None, on_token=None, **kwargs):
+    """Async twin of query_perplexity (httpx.AsyncClient) for the fan-out engine. on_token(text) streams deltas."""
+    start_time = time.time()
+    question, system_prompt, role_display = build_perplexity_request(question, image_data, **kwargs)
+    headers = {"Authorization": f"Bearer {PERPLEXITY_API_KEY}", "Content-Type": "application/json"}
+    client = provider_clients.async_client('perplexity')
+    deadline = deadline_from(kwargs)
+
+    use_cache = response_cache.active(kwargs)
+    cache_parts = (system_prompt, question, None, {})
+    cached = await asyncio.to_thread(response_cache.lookup, "perplexity", PERPLEXITY_MODELS, *cache_parts) if use_cache else None
+    if cached:
+        return await aserve_cached_response("perplexity", cached, question, image_data, kwargs, start_time, role_display, on_token)
+
+    async def fetch():
+        for model_name in PERPLEXITY_MODELS:
+            if not deadline.allows():
+                raise DeadlineExceeded(f"Perplexity: deadline exceeded before trying {model_name}")
+            try:
+                data = {
+                    "model": model_name,
+                    "messages": [{"role": "system", "content": system_prompt}, {"role": "user", "content": question}]
+                }
+                usage = {}
+                await provider_limiter.aacquire("perplexity", model_name, quota_tokens(system_prompt, question), deadline)
+                with provider_health.track("perplexity", model_name, deadline, 60):
+                    if on_token:
+                        full_content = await stream_perplexity_chat(client, data, headers, on_token, timeout=deadline.timeout(60), usage=usage)
+                    else:
+                        response = await client.post(PERPLEXITY_URL, json=data, headers=headers, timeout=deadline.timeout(60))
+                        response.raise_for_status()
+                        result = response.json()
+                        full_content = result['choices'][0]['message']['content']
+                        usage = extract_usage("perplexity", result)
+                if use_cache:
+                    await asyncio.to_thread(response_cache.store, "perplexity", model_name, full_content, *cache_parts)
+                return full_content, usage
+            except Exception as e:
+                print(f"Perplexity error with {model_name}: {str(e)}")
+                reset_token_stream(on_token)
+                continue
+        raise Exception("All Perplexity models failed")
+
+    try:
+        outcome = await single_flight.ado("perplexity", flight_key("perplexity", PERPLEXITY_MODELS, cache_parts), fetch, deadline)
+        return await afinish_flight("perplexity", outcome, question, image_data, kwargs, start_time, role_display, on_token)
+    except Exception as e:
+        print(f"Perplexity failed: {str(e)}")
+        elapsed_time = time.time() - start_time
+        return {
+            "success": False,
+            "response": "Error: Perplexity research timed out or API unavailable.",
+            "time": round(elapsed_time, 2),
+            "model": "Perplexity Pro"
+        }
+
+QUERY_FUNCS = {
+    'openai': query_openai,
+    'anthropic': query_anthropic,
+    'google': query_google,
+    'perplexity': query_perplexity
+}
+ASYNC_QUERY_FUNCS = {
+    'openai': aquery_openai,
+    'anthropic': aquery_anthropic,
+    'google': aquery_google,
+    'perplexity': aquery_perplexity
+}
 
 NTFY_TOPIC = "triai-carlos-admin"
 
 def send_ntfy_notification(title: str, message: str, tags: str = "robot", priority: str = "default"):
     """Send push notification via Ntfy.sh. Fails silently if ntfy is down."""
     try:
-        requests.post(
+        provider_clients.http().post(
             f"https://ntfy.sh/{NTFY_TOPIC}",
             data=message,
             headers={
@@ -985,83 +1319,270 @@ def korum():
     """Serve the new KORUM-OS Interface"""
     return render_template('korum.html')
 
-def generate_consensus(question, results, podcast_mode=False, council_mode=False):
+def build_consensus_prompt(question, results, podcast_mode=False, council_mode=False):
+    """Render the Chairman / Podcast / Standard consensus prompt from the 4 provider results"""
+    if council_mode:
+        prompt = f"""
+        You are the "Chairman of the High Council". You have received input from 4 distinct AI Advisors on the topic: "{question}".
+        
+        Advisor 1 (OpenAI): {results['openai']['response'][:2000]}
+        Advisor 2 (Claude): {results['anthropic']['response'][:2000]}
+        Advisor 3 (Gemini): {results['google']['response'][:2000]}
+        Advisor 4 (Perplexity): {results['perplexity']['response'][:2000]}
+        
+        Your Job:
+        Synthesize a FINAL EXECUTIVE DECISION. Do not just summarize. 
+        Act like a leader synthesizing advice into a clear path forward.
+        
+        Format:
+        🏛️ **COUNCIL DECISION**: [The final verdict]
+        ⚖️ **MINORITY OPINIONS**: [Any important dissenting views worth noting]
+        🚀 **ACTION PLAN**: [Recommended next steps]
+        """
+    elif podcast_mode:
+        prompt = f"""
+        Create a lively "Deep Dive" podcast script between two hosts (Host A and Host B) summarizing these findings.
+        
+        Source Material:
+        1. GPT: {results['openai']['response'][:2000]}
+        2. Claude: {results['anthropic']['response'][:2000]}
+        3. Gemini: {results['google']['response'][:2000]}
+        4. Perplexity: {results['perplexity']['response'][:2000]}
+        
+        Format:
+        **Host A**: [Text]
+        **Host B**: [Text]
+        ...
+        Keep it under 3 minutes of speaking time. Be engaging and synthesize the consensus and differences naturally.
+        """
+    else:
+        prompt = f"""
+        Analyze these 4 AI responses to: "{question}"
+        1. GPT: {results['openai']['response'][:2000]}
+        2. Claude: {results['anthropic']['response'][:2000]}
+        3. Gemini: {results['google']['response'][:2000]}
+        4. Perplexity: {results['perplexity']['response'][:2000]}
+        
+        Provide summary:
+        ✅ **CONSENSUS** (Agreeing models): [Summary]
+        ⚠️ **DIVERGENCE**: [Unique points per model]
+        """
+    return prompt
+
+CONSENSUS_CACHE_PARAMS = {"max_tokens": 500}
+
+def generate_consensus(question, results, podcast_mode=False, council_mode=False, deadline=None, use_cache=True):
     """Generate consensus using GPT-4o"""
+    deadline = deadline or Deadline()
     try:
-        if council_mode:
-            prompt = f"""
-            You are the "Chairman of the High Council". You have received input from 4 distinct AI Advisors on the topic: "{question}".
-            
-            Advisor 1 (OpenAI): {results['openai']['response'][:2000]}
-            Advisor 2 (Claude): {results['anthropic']['response'][:2000]}
-            Advisor 3 (Gemini): {results['google']['response'][:2000]}
-            Advisor 4 (Perplexity): {results['perplexity']['response'][:2000]}
-            
-            Your Job:
-            Synthesize a FINAL EXECUTIVE DECISION. Do not just summarize. 
-            Act like a leader synthesizing advice into a clear path forward.
-            
-            Format:
-            🏛️ **COUNCIL DECISION**: [The final verdict]
-            ⚖️ **MINORITY OPINIONS**: [Any important dissenting views worth noting]
-            🚀 **ACTION PLAN**: [Recommended next steps]
-            """
-        elif podcast_mode:
-            prompt = f"""
-            Create a lively "Deep Dive" podcast script between two hosts (Host A and Host B) summarizing these findings.
-            
-            Source Material:
-            1. GPT: {results['openai']['response'][:2000]}
-            2. Claude: {results['anthropic']['response'][:2000]}
-            3. Gemini: {results['google']['response'][:2000]}
-            4. Perplexity: {results['perplexity']['response'][:2000]}
-            
-            Format:
-            **Host A**: [Text]
-            **Host B**: [Text]
-            ...
-            Keep it under 3 minutes of speaking time. Be engaging and synthesize the consensus and differences naturally.
-            """
-        else:
-            prompt = f"""
-            Analyze these 4 AI responses to: "{question}"
-            1. GPT: {results['openai']['response'][:2000]}
-            2. Claude: {results['anthropic']['response'][:2000]}
-            3. Gemini: {results['google']['response'][:2000]}
-            4. Perplexity: {results['perplexity']['response'][:2000]}
-            
-            Provide summary:
-            ✅ **CONSENSUS** (Agreeing models): [Summary]
-            ⚠️ **DIVERGENCE**: [Unique points per model]
-            """
-        client = openai.OpenAI(api_key=OPENAI_API_KEY, timeout=60.0)
+        prompt = build_consensus_prompt(question, results, podcast_mode, council_mode)
+        use_cache = use_cache and response_cache.active()
+        cached = response_cache.lookup("openai", ["gpt-4o"], "", prompt, None, CONSENSUS_CACHE_PARAMS) if use_cache else None
+        if cached:
+            return cached['text']
+
+        deadline.check("consensus")
+        client = provider_clients.openai()
         response = client.chat.completions.create(
             model="gpt-4o",
             messages=[{"role": "user", "content": prompt}],
             max_tokens=500,
-            timeout=60.0
+            timeout=deadline.timeout(60.0)
         )
-        return response.choices[0].message.content
+        consensus = response.choices[0].message.content
+        if use_cache:
+            response_cache.store("openai", "gpt-4o", consensus, "", prompt, None, CONSENSUS_CACHE_PARAMS)
+        return consensus
     except Exception as e:
         return f"Consensus Error: {str(e)}"
 
+async def arun_consensus_prompt(prompt, on_token=None, deadline=None, use_cache=True):
+    """Run a consensus-style prompt through GPT-4o on the fan-out loop"""
+    deadline = deadline or Deadline()
+    try:
+        use_cache = use_cache and response_cache.active()
+        cached = await asyncio.to_thread(response_cache.lookup, "openai", ["gpt-4o"], "", prompt, None, CONSENSUS_CACHE_PARAMS) if use_cache else None
+        if cached:
+            if on_token:
+                on_token(cached['text'])
+            return cached['text']
+
+        deadline.check("consensus")
+        client = provider_clients.async_client('openai')
+        if on_token:
+            consensus = await stream_openai_chat(client, on_token, model="gpt-4o", messages=[{"role": "user", "content": prompt}], max_tokens=500, timeout=deadline.timeout(60.0))
+        else:
+            response = await client.chat.completions.create(
+                model="gpt-4o",
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=500,
+                timeout=deadline.timeout(60.0)
+            )
+            consensus = response.choices[0].message.content
+        if use_cache:
+            await asyncio.to_thread(response_cache.store, "openai", "gpt-4o", consensus, "", prompt, None, CONSENSUS_CACHE_PARAMS)
+        return consensus
+    except Exception as e:
+        return f"Consensus Error: {str(e)}"
+
+async def agenerate_consensus(question, results, podcast_mode=False, council_mode=False, on_token=None, deadline=None, use_cache=True):
+    """Async twin of generate_consensus for the fan-out engine. on_token(text) streams deltas."""
+    return await arun_consensus_prompt(build_consensus_prompt(question, results, podcast_mode, council_mode), on_token=on_token, deadline=deadline, use_cache=use_cache)
+
+def build_amendment_prompt(question, prior_consensus, late_results):
+    """Incremental prompt: amend a quorum consensus with the advisors that reported late"""
+    late_input = "\n".join([f"{PERSONA_DISPLAY_NAMES.get(p, p)}: {r['response'][:2000]}" for p, r in late_results.items()])
+    return f"""
+    You issued a preliminary synthesis on: "{question}" before every advisor had reported.
+
+    Preliminary Synthesis:
+    {prior_consensus}
+
+    Late Advisor Input:
+    {late_input}
+
+    Your Job:
+    Amend the preliminary synthesis. Keep its format and only change what the late input actually changes.
+    End with:
+    📝 **AMENDMENT**: [What the late input changed, or "No material change"]
+    """
+
+# ==========================================
+# ASYNC COUNCIL FAN-OUT
+# ==========================================
+PROVIDER_ORDER = ['openai', 'anthropic', 'google', 'perplexity']
+DEFAULT_PROVIDER_ROLES = {"openai": "visionary", "anthropic": "architect", "google": "critic", "perplexity": "researcher"}
+SSE_KEEPALIVE_SECONDS = 15
+# Quorum mode: consensus starts once N providers succeeded or the budget expires (0 = wait for all)
+QUORUM_SIZE = int(os.getenv('QUORUM_SIZE', '0'))
+QUORUM_BUDGET_SECONDS = float(os.getenv('QUORUM_BUDGET_SECONDS', '25'))
+
+def resolve_role_assignment(provider, role_overrides, council_roles):
+    """Returns (role, visual_profile) for a provider. Manual overrides beat council assignments."""
+    role_data = role_overrides.get(provider, council_roles.get(provider, DEFAULT_PROVIDER_ROLES[provider]))
+    role = role_data.get('role', role_data) if isinstance(role_data, dict) else role_data
+    visual_profile = role_data.get('visual_profile', 'off') if isinstance(role_data, dict) else 'off'
+    return role, visual_profile
+
+def has_citations(text):
+    import re
+    return bool(re.search(r'\[\d+\]|http', text or ''))
+
+async def query_provider(provider, question, image_data, provider_kwargs, emit=None):
+    """Run one aquery_* call. With emit, tokens are streamed and the finished result is announced."""
+    on_token = None
+    if emit:
+        on_token = lambda text: emit('token', {"provider": provider, "text": text})
+        on_token.reset = lambda: emit('reset', {"provider": provider})
+    result = await ASYNC_QUERY_FUNCS[provider](question, image_data, on_token=on_token, **provider_kwargs)
+    result['has_citations'] = has_citations(result['response'])
+    if emit:
+        emit('provider', {"provider": provider, "result": result})
+    return result
+
+def make_pending_result(provider: str) -> dict:
+    """Placeholder for a provider still running when quorum consensus starts."""
+    result = make_skipped_result(provider, response="Pending: still deliberating when the quorum was reached. An amended consensus will follow.")
+    result['pending'] = True
+    result['has_citations'] = False
+    return result
+
+async def run_council_fanout(question, image_data, provider_kwargs, podcast_mode=False, council_mode=False, emit=None, quorum=0, quorum_budget=None, deadline=None):
+    """
+    Query every active provider concurrently on the fan-out loop, then run consensus.
+    provider_kwargs: {provider: kwargs for its aquery_* call}. Missing providers are marked Skipped.
+    emit: optional callback(event, data) for the streaming endpoint.
+    quorum: if set, consensus starts once this many providers succeeded or quorum_budget seconds passed.
+    deadline: request Deadline; also caps the quorum budget and the consensus call.
+    Returns (results_map, consensus, late_tasks) - late_tasks are providers still running, for amend_consensus().
+    """
+    deadline = deadline or Deadline()
+    tasks = {p: asyncio.ensure_future(query_provider(p, question, image_data, kw, emit)) for p, kw in provider_kwargs.items()}
+    if quorum and tasks:
+        await FanoutEngine.wait_for_quorum(tasks, quorum, min(quorum_budget or QUORUM_BUDGET_SECONDS, deadline.remaining()))
+    elif tasks:
+        await asyncio.wait(tasks.values())
+
+    results_map = {}
+    late_tasks = {}
+    for provider in PROVIDER_ORDER:
+        task = tasks.get(provider)
+        if task is None:
+            result = make_skipped_result(provider)
+        elif not task.done():
+            late_tasks[provider] = task
+            result = make_pending_result(provider)
+        else:
+            result = FanoutEngine.settle(provider, FanoutEngine.task_outcome(task))
+        if 'has_citations' not in result:
+            # Skipped, or the task died before query_provider could finish it
+            result['has_citations'] = has_citations(result['response'])
+            if emit and provider in provider_kwargs:
+                emit('provider', {"provider": provider, "result": result})
+        results_map[provider] = result
+
+    if late_tasks:
+        print(f"DEBUG: Quorum reached, consensus starting without {list(late_tasks.keys())}")
+
+    on_token = (lambda text: emit('consensus_token', {"text": text})) if emit else None
+    use_cache = not any(kw.get('bypass_cache') for kw in provider_kwargs.values())
+    consensus = await agenerate_consensus(question, results_map, podcast_mode=podcast_mode, council_mode=council_mode, on_token=on_token, deadline=deadline, use_cache=use_cache)
+    if emit:
+        emit('consensus', {"consensus": consensus, "pending": list(late_tasks.keys())})
+    return results_map, consensus, late_tasks
+
+async def amend_consensus(question, results_map, consensus, late_tasks, emit=None, deadline=None):
+    """
+    Wait for the providers that missed the quorum, fold them into results_map and
+    issue an amended consensus. Returns (results_map, consensus, late_results).
+    """
+    late_results = {}
+    if late_tasks:
+        await asyncio.wait(late_tasks.values())
+    for provider, task in late_tasks.items():
+        result = FanoutEngine.settle(provider, FanoutEngine.task_outcome(task))
+        if 'has_citations' not in result:
+            result['has_citations'] = has_citations(result['response'])
+            if emit:
+                emit('provider', {"provider": provider, "result": result})
+        results_map[provider] = late_results[provider] = result
+
+    if any(r.get('success') for r in late_results.values()):
+        amended = await arun_consensus_prompt(build_amendment_prompt(question, consensus, late_results), deadline=deadline)
+        if not amended.startswith("Consensus Error"):
+            consensus = amended
+    if emit:
+        emit('consensus_amended', {"consensus": consensus, "providers": list(late_results.keys())})
+    return results_map, consensus, late_results
+
+def sse_event(event, data):
+    """Format one Server-Sent Events frame."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
 @app.route('/api/v2/reasoning_chain', methods=['POST'])
 def run_reasoning_chain():
     """
     V2 ENDPOINT: Runs the Functional Reasoning Pipeline (Layers 1-4).
     Replaces the Persona Council with the Cognitive Stack.
+    With "background": true the run is submitted as a tracked job instead (202 {job_id}); follow it on
+    /api/v2/reasoning_chain/stream/<job_id> or /status/<job_id>. Without it the call blocks until the
+    whole pipeline has finished.
     """
     try:
-        data = request.json
+        data = request.json or {}
         user_query = data.get('query')
         depth = data.get('depth', 'standard')
+        hacker_mode = bool(data.get('hacker_mode', False))
+        use_cache = not data.get('bypass_cache', False)
         
         if not user_query:
             return jsonify({"success": False, "error": "Query required"}), 400
+
+        if data.get('background'):
+            return submit_reasoning_job(user_query, depth, hacker_mode, use_cache)
             
-        # Execute the full pipeline synchronously (for now)
-        # TODO: Move to async/background task if it takes >30s
-        result = korum_orchestrator.execute_pipeline(user_query, depth)
+        result = korum_orchestrator.execute_pipeline(user_query, depth, hacker_mode=hacker_mode,
+                                                     deadline=Deadline.for_endpoint('reasoning_chain'), use_cache=use_cache)
         
         return jsonify({
             "success": True,
@@ -1072,9 +1593,12 @@ def run_reasoning_chain():
         print(f"V2 Pipeline Error: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
 
-@app.route('/api/ask', methods=['POST'])
-def ask_all_ais():
-    start_total = time.time()
+def parse_ask_request():
+    """
+    Parse an /api/ask payload (JSON or multipart) into a council request context.
+    Returns (ctx, None) on success or (None, error_response) if the request is unusable.
+    """
+    deadline = Deadline.for_endpoint('ask')  # Latency budget starts at request entry
     image_data = None
     question = ""
     
@@ -1119,7 +1643,7 @@ def ask_all_ais():
                 full_file_context = "\n\n".join(file_context_list)
                 question += f"\n\n{full_file_context}"
 
-    if not question: return jsonify({"error": "No question"}), 400
+    if not question: return None, (jsonify({"error": "No question"}), 400)
     
     # Handle Smart Project Context
     if project_name:
@@ -1167,6 +1691,30 @@ def ask_all_ais():
     # Hard Mode
     hard_mode = request.json.get('hard_mode') if request.is_json else (request.form.get('hard_mode') == 'true')
     
+    # Quorum Mode (start consensus before the slowest provider finishes)
+    quorum_raw = request.json.get('quorum') if request.is_json else request.form.get('quorum')
+    budget_raw = request.json.get('quorum_budget') if request.is_json else request.form.get('quorum_budget')
+    try:
+        quorum = int(quorum_raw) if quorum_raw not in (None, '') else QUORUM_SIZE
+        quorum_budget = float(budget_raw) if budget_raw not in (None, '') else QUORUM_BUDGET_SECONDS
+    except (TypeError, ValueError):
+        return None, (jsonify({"error": "quorum must be an integer and quorum_budget a number of seconds"}), 400)
+
+    # Response Cache Bypass ({"cache": false} or Cache-Control: no-cache forces fresh provider calls)
+    cache_raw = request.json.get('cache') if request.is_json else request.form.get('cache')
+    bypass_cache = cache_raw in (False, 'false') or 'no-cache' in request.headers.get('Cache-Control', '')
+
+    # Semantic Cache (opt-in): is this a paraphrase of a past question?
+    # "offer" attaches the match to the response; "serve" reuses its stored responses instead of a fan-out
+    semantic_mode = (request.json.get('semantic_cache') if request.is_json else request.form.get('semantic_cache')) or SEMANTIC_CACHE_MODE
+    semantic_match, semantic_prior = None, None
+    if semantic_cache.enabled and semantic_mode in ('offer', 'serve') and not bypass_cache and not image_data:
+        semantic_match = semantic_cache.match(question)
+        if semantic_match and semantic_mode == 'serve':
+            prior = get_comparison_results(semantic_match['comparison_id'])
+            if prior and any(r.get('success') for r in prior['results'].values()):
+                semantic_prior = prior
+
     # Manual Role Overrides (Dynamic Swapping)
     role_overrides = request.json.get('role_overrides', {}) if request.is_json else {}
     if not role_overrides and not request.is_json:
@@ -1195,89 +1743,57 @@ def ask_all_ais():
     if council_mode:
         print(f"DEBUG: Council Roles: {council_roles}")
     
-    # Initialize results containers
-    r1 = {"success": False, "response": "Skipped", "model": "GPT-5.2", "time": 0, "cost": 0, "thought": None}
-    r2 = {"success": False, "response": "Skipped", "model": "Claude 4.5 Sonnet", "time": 0, "cost": 0, "thought": None}
-    r3 = {"success": False, "response": "Skipped", "model": "Gemini 3.0", "time": 0, "cost": 0, "thought": None}
-    r4 = {"success": False, "response": "Skipped", "model": "Perplexity Pro", "time": 0, "cost": 0, "thought": None}
-
-    with ThreadPoolExecutor(max_workers=4) as executor:
-        futures = {}
-        if 'openai' in active_models: 
-            role_data = role_overrides.get('openai', council_roles.get('openai', 'visionary'))
-            role = role_data.get('role', role_data) if isinstance(role_data, dict) else role_data
-            visual_profile = role_data.get('visual_profile', 'off') if isinstance(role_data, dict) else 'off'
-            futures['f1'] = executor.submit(query_openai, question, image_data, council_mode=council_mode, role=role, visual_profile=visual_profile, hard_mode=hard_mode)
-        
-        if 'anthropic' in active_models: 
-            role_data = role_overrides.get('anthropic', council_roles.get('anthropic', 'architect'))
-            role = role_data.get('role', role_data) if isinstance(role_data, dict) else role_data
-            visual_profile = role_data.get('visual_profile', 'off') if isinstance(role_data, dict) else 'off'
-            futures['f2'] = executor.submit(query_anthropic, question, image_data, council_mode=council_mode, role=role, visual_profile=visual_profile, hard_mode=hard_mode)
-        
-        if 'google' in active_models: 
-            role_data = role_overrides.get('google', council_roles.get('google', 'critic'))
-            role = role_data.get('role', role_data) if isinstance(role_data, dict) else role_data
-            visual_profile = role_data.get('visual_profile', 'off') if isinstance(role_data, dict) else 'off'
-            futures['f3'] = executor.submit(query_google, question, image_data, council_mode=council_mode, role=role, visual_profile=visual_profile, hard_mode=hard_mode)
-        
-        if 'perplexity' in active_models: 
-            role_data = role_overrides.get('perplexity', council_roles.get('perplexity', 'researcher'))
-            role = role_data.get('role', role_data) if isinstance(role_data, dict) else role_data
-            visual_profile = role_data.get('visual_profile', 'off') if isinstance(role_data, dict) else 'off'
-            futures['f4'] = executor.submit(query_perplexity, question, image_data, council_mode=council_mode, role=role, visual_profile=visual_profile, hard_mode=hard_mode)
-        
-        try:
-            if 'f1' in futures: 
-                r1 = futures['f1'].result()
-                print("DEBUG: OpenAI finished")
-        except Exception as e:
-            print(f"CRITICAL: OpenAI Thread died: {e}")
-            r1 = {"success": False, "response": f"System Error: {str(e)}", "model": "Error", "time": 0, "cost": 0, "thought": None}
-            
-        try:
-            if 'f2' in futures:
-                r2 = futures['f2'].result()
-                print("DEBUG: Anthropic finished")
-        except Exception as e:
-            print(f"CRITICAL: Anthropic Thread died: {e}")
-            r2 = {"success": False, "response": f"System Error: {str(e)}", "model": "Error", "time": 0, "cost": 0, "thought": None}
-
-        try:
-            if 'f3' in futures:
-                r3 = futures['f3'].result()
-                print("DEBUG: Google finished")
-        except Exception as e:
-            print(f"CRITICAL: Google Thread died: {e}")
-            r3 = {"success": False, "response": f"System Error: {str(e)}", "model": "Error", "time": 0, "cost": 0, "thought": None}
-
-        try:
-            if 'f4' in futures:
-                r4 = futures['f4'].result()
-                print("DEBUG: Perplexity finished")
-        except Exception as e:
-            print(f"CRITICAL: Perplexity Thread died: {e}")
-            r4 = {"success": False, "response": f"System Error: {str(e)}", "model": "Error", "time": 0, "cost": 0, "thought": None}
-    
-    # Check citations
-    import re
-    def has_cite(txt): return bool(re.search(r'\[\d+\]|http', txt))
-    r1['has_citations'] = has_cite(r1['response'])
-    r2['has_citations'] = has_cite(r2['response'])
-    r3['has_citations'] = has_cite(r3['response'])
-    r4['has_citations'] = has_cite(r4['response'])
+    # Resolve per-provider role + visual profile, then fan out on the shared event loop
+    provider_kwargs = {}
+    for provider in PROVIDER_ORDER:
+        if provider in active_models:
+            role, visual_profile = resolve_role_assignment(provider, role_overrides, council_roles)
+            provider_kwargs[provider] = {"council_mode": council_mode, "role": role, "visual_profile": visual_profile, "hard_mode": hard_mode, "deadline": deadline, "bypass_cache": bypass_cache}
 
-    # Podcast Mode
-    podcast_mode = request.json.get('podcast_mode') if request.is_json else (request.form.get('podcast_mode') == 'true')
-    # Council Mode
-    council_mode = request.json.get('council_mode') if request.is_json else (request.form.get('council_mode') == 'true')
-
-    results_map = {"openai": r1, "anthropic": r2, "google": r3, "perplexity": r4}
-    consensus = generate_consensus(question, results_map, podcast_mode=podcast_mode, council_mode=council_mode)
+    return {
+        "question": question,
+        "image_data": image_data,
+        "project_name": project_name,
+        "active_models": active_models,
+        "podcast_mode": podcast_mode,
+        "council_mode": council_mode,
+        "provider_kwargs": provider_kwargs,
+        "quorum": quorum,
+        "quorum_budget": quorum_budget,
+        "deadline": deadline,
+        "semantic_match": semantic_match,
+        "semantic_prior": semantic_prior,
+        "username": request.authorization.username if request.authorization else 'User'
+    }, None
+
+async def serve_semantic_match(ctx, emit=None):
+    """Serve a near-duplicate past comparison: its stored responses plus a fresh consensus."""
+    semantic_cache._count("served")
+    prior = ctx['semantic_prior']
+    results_map = {}
+    for provider in PROVIDER_ORDER:
+        stored = prior['results'].get(provider) if provider in ctx['provider_kwargs'] else None
+        result = dict(stored, semantic_cache=True) if stored else make_skipped_result(provider)
+        result['has_citations'] = has_citations(result['response'])
+        if emit and stored:
+            emit('provider', {"provider": provider, "result": result})
+        results_map[provider] = result
+
+    on_token = (lambda text: emit('consensus_token', {"text": text})) if emit else None
+    consensus = await agenerate_consensus(ctx['question'], results_map, podcast_mode=ctx['podcast_mode'], council_mode=ctx['council_mode'], on_token=on_token, deadline=ctx['deadline'])
+    if emit:
+        emit('consensus', {"consensus": consensus, "pending": []})
+    return results_map, consensus, {}
+
+def persist_comparison(ctx, results_map, consensus):
+    """Queue the comparison (write-behind), then fire project save + ntfy in the background. Returns comparison_id."""
+    question = ctx['question']
+    project_name = ctx['project_name']
 
     try:
-        cid = save_comparison(question, results_map)
-    except:
+        cid = persistence_queue.enqueue_comparison(question, results_map)
+    except Exception as e:
+        print(f"CRITICAL: Could not queue comparison: {e}")
         cid = None
 
     # Save to Project in background (non-blocking)
@@ -1292,16 +1808,161 @@ def ask_all_ais():
 
     # Send ntfy notification in background (non-blocking)
     try:
-        username = request.authorization.username if request.authorization else 'User'
-        active_count = len([m for m in active_models if results_map.get(m, {}).get('success')])
-        threading.Thread(target=send_query_complete_notification, args=(username, question, active_count), daemon=True).start()
+        active_count = len([m for m in ctx['active_models'] if results_map.get(m, {}).get('success')])
+        threading.Thread(target=send_query_complete_notification, args=(ctx['username'], question, active_count), daemon=True).start()
     except:
         pass
 
+    return cid
+
+@app.route('/api/ask', methods=['POST'])
+def ask_all_ais():
+    ctx, error = parse_ask_request()
+    if error:
+        return error
+
+    served = ctx['semantic_prior'] is not None
+    try:
+        if served:
+            council = serve_semantic_match(ctx)
+        else:
+            council = run_council_fanout(ctx['question'], ctx['image_data'], ctx['provider_kwargs'], podcast_mode=ctx['podcast_mode'], council_mode=ctx['council_mode'],
+                                         quorum=ctx['quorum'], quorum_budget=ctx['quorum_budget'], deadline=ctx['deadline'])
+        results_map, consensus, late_tasks = fanout_engine.run(council, timeout=ctx['deadline'].remaining())
+    except Exception as e:
+        print(f"CRITICAL: Fan-out failed: {e}")
+        return jsonify({"error": f"Fan-out failed: {str(e)}"}), 504
+
+    # A served near-duplicate points back at the original comparison instead of saving a copy
+    cid = ctx['semantic_match']['comparison_id'] if served else persist_comparison(ctx, results_map, consensus)
+
+    # Quorum mode: late providers keep running; the amended consensus is polled via /api/ask/amendment/<id>
+    amendment_id = start_consensus_amendment(ctx, cid, results_map, consensus, late_tasks) if late_tasks else None
+
     return jsonify({
         "results": results_map,
         "consensus": consensus,
-        "comparison_id": cid
+        "comparison_id": cid,
+        "pending": list(late_tasks.keys()),
+        "amendment_id": amendment_id,
+        "semantic_match": ctx['semantic_match'],
+        "served_from_semantic_cache": served
+    })
+
+AMENDMENT_JOB_KIND = "consensus_amendment"
+AMENDMENT_LOST_ERROR = "The late providers were lost when their worker restarted"
+
+def start_consensus_amendment(ctx, comparison_id, results_map, consensus, late_tasks):
+    """Schedule amend_consensus on the fan-out loop, tracked as a workflow_jobs job (any worker can answer the poll)."""
+    amendment_id = str(uuid.uuid4())
+    pending = list(late_tasks.keys())
+    workflow_jobs.create(
+        amendment_id,
+        kind=AMENDMENT_JOB_KIND,
+        template_name="Consensus Amendment",
+        question=ctx['question'],
+        comparison_id=comparison_id,
+        final_history=json.dumps({"pending": pending})
+    )
+
+    async def amend():
+        try:
+            _, amended, late_results = await amend_consensus(ctx['question'], dict(results_map), consensus, late_tasks, deadline=ctx['deadline'])
+        except Exception as e:
+            print(f"CRITICAL: Consensus amendment failed: {e}")
+            await asyncio.to_thread(workflow_jobs.finish, amendment_id, "failed", error=str(e))
+            return
+        if comparison_id:
+            # Queued (ordered after the comparison insert), never waited on from the fan-out loop
+            persistence_queue.enqueue_response_update(comparison_id, late_results)
+        outcome = {"pending": pending, "results": late_results, "consensus": amended}
+        await asyncio.to_thread(workflow_jobs.finish, amendment_id, "complete", final_history=json.dumps(outcome, default=str))
+
+    fanout_engine.submit(amend())
+    return amendment_id
+
+@app.route('/api/ask/amendment/<amendment_id>', methods=['GET'])
+def get_consensus_amendment(amendment_id):
+    job = workflow_jobs.status(amendment_id)
+    if not job or job.get('kind') != AMENDMENT_JOB_KIND:
+        return jsonify({"error": "Amendment not found"}), 404
+    outcome = json.loads(job.get('final_history') or '{}')
+    return jsonify({
+        "status": "pending" if job['status'] == "running" else job['status'],
+        "pending": outcome.get('pending', []),
+        "results": outcome.get('results'),
+        "consensus": outcome.get('consensus'),
+        "comparison_id": job.get('comparison_id'),
+        "error": job.get('error'),
+        "created_at": job.get('created_at')
+    })
+
+async def stream_council(ctx, emit):
+    """Fan-out for the SSE endpoint. In quorum mode the stream stays open for the amended consensus."""
+    if ctx['semantic_prior'] is not None:
+        results_map, consensus, _ = await serve_semantic_match(ctx, emit)
+        return results_map, consensus
+    results_map, consensus, late_tasks = await run_council_fanout(
+        ctx['question'], ctx['image_data'], ctx['provider_kwargs'], podcast_mode=ctx['podcast_mode'], council_mode=ctx['council_mode'],
+        emit=emit, quorum=ctx['quorum'], quorum_budget=ctx['quorum_budget'], deadline=ctx['deadline']
+    )
+    if late_tasks:
+        results_map, consensus, _ = await amend_consensus(ctx['question'], results_map, consensus, late_tasks, emit=emit, deadline=ctx['deadline'])
+    return results_map, consensus
+
+@app.route('/api/ask/stream', methods=['POST'])
+def ask_all_ais_stream():
+    """
+    Streaming variant of /api/ask (Server-Sent Events).
+    Events: start -> token* / provider (one per model, as each finishes) -> consensus_token* -> consensus -> done.
+    "provider" carries the full result dict, including enforcement and execution_bias.
+    In quorum mode, late providers stream after "consensus" and are followed by "consensus_amended".
+    """
+    ctx, error = parse_ask_request()
+    if error:
+        return error
+
+    def generate():
+        events = queue.Queue()
+        emit = lambda event, data: events.put((event, data))
+        future = fanout_engine.submit(stream_council(ctx, emit))
+        future.add_done_callback(lambda f: events.put(None))
+        deadline = ctx['deadline']
+
+        try:
+            yield sse_event('start', {"active_models": list(ctx['provider_kwargs'].keys()), "semantic_match": ctx['semantic_match'], "served_from_semantic_cache": ctx['semantic_prior'] is not None})
+
+            while True:
+                remaining = deadline.remaining()
+                if remaining <= 0:
+                    yield sse_event('error', {"error": f"Request deadline exceeded after {deadline.elapsed():.0f}s"})
+                    return
+                try:
+                    item = events.get(timeout=min(SSE_KEEPALIVE_SECONDS, remaining))
+                except queue.Empty:
+                    yield ": keepalive\n\n"  # Stop proxies from closing an idle stream
+                    continue
+                if item is None:
+                    break
+                yield sse_event(*item)
+
+            try:
+                results_map, consensus = future.result()
+            except Exception as e:
+                print(f"CRITICAL: Fan-out failed: {e}")
+                yield sse_event('error', {"error": f"Fan-out failed: {str(e)}"})
+                return
+
+            cid = ctx['semantic_match']['comparison_id'] if ctx['semantic_prior'] is not None else persist_comparison(ctx, results_map, consensus)
+            yield sse_event('done', {"comparison_id": cid})
+        finally:
+            # Client disconnected or timed out: stop burning provider tokens
+            if not future.done():
+                future.cancel()
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
     })
 
 # Routes for history/stats etc
@@ -1349,6 +2010,8 @@ def submit_response_rating():
     if not data or 'comparison_id' not in data or 'ai_provider' not in data:
         return jsonify({"success": False, "error": "Missing data"}), 400
     
+    # The comparison may still be in the write-behind queue if the rating is very quick
+    persistence_queue.wait_until_written(data['comparison_id'])
     success = update_response_rating(
         data['comparison_id'], 
         data['ai_provider'], 
@@ -1582,6 +2245,229 @@ def save_to_obsidian():
 def get_workflows():
     return jsonify(WORKFLOW_TEMPLATES)
 
+def workflow_query_funcs(job_id):
+    """
+    Provider calls for a workflow job's steps. While someone streams the job (/api/workflow/stream),
+    steps run through the async twins on the fan-out loop so tokens can be pushed as they arrive;
+    otherwise the plain synchronous query_* functions are used.
+    """
+    sync_funcs = {
+        'openai': query_openai,
+        'anthropic': query_anthropic,
+        'google': query_google,
+        'perplexity': query_perplexity
+    }
+
+    def make_query(provider, sync_func):
+        def query(prompt, on_token=None, **kwargs):
+            if on_token is None or not workflow_events.listening(job_id):
+                return sync_func(prompt, **kwargs)
+            return fanout_engine.run(ASYNC_QUERY_FUNCS[provider](prompt, None, on_token=on_token, **kwargs))
+        return query
+
+    return {provider: make_query(provider, func) for provider, func in sync_funcs.items()}
+
+def start_workflow_job(job_id, workflow_id, question, hard_mode, resume=False):
+    """
+    Run a workflow job on a background thread. The job row must already exist and be owned by this
+    process (workflow_jobs.create / claim). resume=True continues from the job's checkpoint.
+    """
+    template = WORKFLOW_TEMPLATES[workflow_id]
+    engine = Workflow(name=template['name'], steps=template['steps'])
+    checkpoint = previous_results = None
+    if resume:
+        job = workflow_jobs.get(job_id, include_checkpoint=True) or {}
+        checkpoint, previous_results = job.get('checkpoint'), job.get('results', [])
+        # Results of steps that will re-run would otherwise show twice in the status feed
+        workflow_jobs.reset_steps(job_id, engine.resumable_keys(checkpoint))
+
+    # Start background execution
+    def background_worker(jid, question, hm, eng, dl):
+        try:
+            query_funcs = workflow_query_funcs(jid)
+            
+            def update_job_status(step_result):
+                workflow_jobs.append_result(jid, step_result, checkpoint=eng.checkpoint())
+                workflow_events.publish(jid, 'step-completed', {"result": step_result})
+                
+            results = eng.execute(question, query_funcs, hard_mode=hm, step_callback=update_job_status, deadline=dl,
+                                  checkpoint=checkpoint, previous_results=previous_results,
+                                  event_callback=lambda event, data: workflow_events.publish(jid, event, data))
+            
+            # Save to History Database
+            cid = None
+            try:
+                # Synthesize a 'responses' map for the database schema
+                workflow_name = eng.name or 'Custom Workflow'
+                db_question = f"🌀 [WORKFLOW: {workflow_name}] - {question}"
+                
+                # Create a results map that fits the standard 4-column UI for now
+                # We'll put the final synthesized result or the most relevant ones.
+                final_step = results[-1] if results else None
+                db_results = {
+                    "openai": {"success": True, "response": f"Workflow {workflow_name} completed. {len(results)} steps executed.", "model": "Workflow Engine"},
+                    "anthropic": {"success": True, "response": "See attached report for full details.", "model": "System"},
+                    "google": {"success": True, "response": final_step['data']['response'] if final_step else "No output", "model": "Consensus"},
+                    "perplexity": {"success": True, "response": "Full Workflow Log saved to Document Viewer.", "model": "Audit"}
+                }
+                
+                # SAVE FULL HISTORY to document_content so it's retrievable
+                cid = save_comparison(
+                    question=db_question, 
+                    responses=db_results,
+                    document_content=eng.full_history,
+                    document_name=f"Workflow_Report_{jid[:4]}.md"
+                )
+                print(f"DEBUG: Workflow {jid} saved to history with comparison_id: {cid}")
+            except Exception as db_err:
+                print(f"ERROR: Failed to save workflow to history: {db_err}")
+            workflow_jobs.finish(jid, "complete", final_history=eng.full_history, comparison_id=cid)
+            workflow_events.close(jid, {"status": "complete", "comparison_id": cid})
+        except Exception as ex:
+            import traceback
+            error_trace = traceback.format_exc()
+            print(f"ASYNC WORKFLOW CRASH ({jid}):\n{error_trace}")
+            workflow_jobs.finish(jid, "failed", error=str(ex), traceback=error_trace)
+            workflow_events.close(jid, {"status": "failed", "error": str(ex)})
+            
+            # PERSIST CRASH TO DASHBOARD
+            log_system_event(
+                event_type="WORKFLOW_FAIL",
+                message=f"Mission Failed: {jid[:8]}",
+                details=f"Error: {str(ex)}\n\nTraceback:\n{error_trace}"
+            )
+
+    thread = threading.Thread(target=background_worker, args=(job_id, question, hard_mode, engine, Deadline.for_endpoint('workflow')))
+    thread.start()
+
+REASONING_JOB_KIND = "reasoning_chain"
+REASONING_CANCELLED_ERROR = "Cancelled by user"
+REASONING_JOB_DEADLINES = {}  # job_id -> Deadline of the reasoning chain jobs this process is running (for cancel)
+reasoning_submit_lock = threading.Lock()
+
+def reasoning_dedup_key(query, depth, hacker_mode, use_cache):
+    """Identity of a reasoning chain request: identical submissions while one is in flight join it."""
+    payload = json.dumps([query.strip(), depth, bool(hacker_mode), bool(use_cache)])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def reasoning_layer_result(layer, data):
+    """A finished pipeline layer, in the job store's step result shape."""
+    output = data.get('output')
+    failed = output is None or (isinstance(output, dict) and 'error' in output)
+    return {
+        "step": list(PIPELINE_LAYERS).index(layer) if layer in PIPELINE_LAYERS else len(PIPELINE_LAYERS),
+        "key": layer,
+        "role": PIPELINE_LAYERS.get(layer, layer),
+        "model": data.get('lane') or "korum",
+        "data": {
+            "success": not failed,
+            "response": output if isinstance(output, str) else json.dumps(output, indent=2, default=str),
+            "seconds": data.get('seconds'),
+            "hedged": bool(data.get('hedged'))
+        }
+    }
+
+def start_reasoning_job(job_id, query, depth, hacker_mode, use_cache=True):
+    """
+    Run a Korum reasoning chain job on a background thread. The job row must already exist and be owned
+    by this process. Each layer is stored and published as a step result as soon as it finishes.
+    """
+    deadline = Deadline.for_endpoint('reasoning_chain_job')
+    REASONING_JOB_DEADLINES[job_id] = deadline
+
+    def cancelled_elsewhere():
+        # A cancel handled by another worker process only reaches this one through the store
+        job = workflow_jobs.status(job_id)
+        return bool(job) and job['status'] == 'cancelled'
+
+    def on_layer(event, layer, data):
+        if deadline.cancelled:
+            return  # Layers cut short by a cancel are not results
+        if event == 'layer-started':
+            workflow_events.publish(job_id, 'step-started', {"step": reasoning_layer_result(layer, {})['step'],
+                                                             "key": layer, "role": PIPELINE_LAYERS.get(layer, layer)})
+            return
+        result = reasoning_layer_result(layer, data)
+        workflow_jobs.append_result(job_id, result)
+        workflow_events.publish(job_id, 'step-completed', {"result": result})
+        if cancelled_elsewhere():
+            deadline.cancel()
+
+    def background_worker():
+        try:
+            result = korum_orchestrator.execute_pipeline(query, depth, hacker_mode=hacker_mode, deadline=deadline,
+                                                         use_cache=use_cache, layer_callback=on_layer)
+            if deadline.cancelled or cancelled_elsewhere():
+                workflow_jobs.finish(job_id, "cancelled", error=REASONING_CANCELLED_ERROR)
+                workflow_events.close(job_id, {"status": "cancelled"})
+                return
+            workflow_jobs.finish(job_id, "complete", final_history=json.dumps(result, default=str))
+            workflow_events.close(job_id, {"status": "complete"})
+        except Exception as ex:
+            import traceback
+            error_trace = traceback.format_exc()
+            status = "cancelled" if deadline.cancelled else "failed"
+            print(f"ASYNC REASONING CHAIN {status.upper()} ({job_id}):\n{error_trace}")
+            workflow_jobs.finish(job_id, status, error=REASONING_CANCELLED_ERROR if deadline.cancelled else str(ex), traceback=error_trace)
+            workflow_events.close(job_id, {"status": status, "error": str(ex)})
+        finally:
+            REASONING_JOB_DEADLINES.pop(job_id, None)
+
+    thread = threading.Thread(target=background_worker)
+    thread.start()
+
+def submit_reasoning_job(query, depth, hacker_mode, use_cache):
+    """Create (or join an identical in-flight) reasoning chain job and start it."""
+    dedup_key = reasoning_dedup_key(query, depth, hacker_mode, use_cache)
+    # Serialises lookup + create within this process; a second worker can still race, and then simply runs twice
+    with reasoning_submit_lock:
+        existing = workflow_jobs.find_running(dedup_key)
+        if existing:
+            return jsonify({"success": True, "job_id": existing, "status": "running", "deduplicated": True})
+        job_id = str(uuid.uuid4())
+        workflow_jobs.create(
+            job_id,
+            kind=REASONING_JOB_KIND,
+            dedup_key=dedup_key,
+            template_id=depth,
+            template_name="Korum V2 Reasoning Chain",
+            question=query,
+            hard_mode=hacker_mode,
+            use_cache=bool(use_cache)
+        )
+    try:
+        start_reasoning_job(job_id, query, depth, hacker_mode, use_cache)
+    except Exception as e:
+        workflow_jobs.finish(job_id, "failed", error=str(e))
+        raise
+    return jsonify({"success": True, "job_id": job_id, "status": "started", "deduplicated": False}), 202
+
+def resume_workflow_job(job_id):
+    """
+    Resume handler for job_store: restart a job this process has just claimed. Workflows continue from
+    their checkpoint; a reasoning chain re-runs from the top (layers it already finished are response-cache hits).
+    A consensus amendment can't be resumed: the late provider calls it was waiting on died with their worker.
+    """
+    job = workflow_jobs.get(job_id)
+    if job and job.get('kind') == AMENDMENT_JOB_KIND:
+        workflow_jobs.finish(job_id, "failed", error=AMENDMENT_LOST_ERROR)
+        return
+    if job and job.get('kind') == REASONING_JOB_KIND:
+        workflow_jobs.reset_steps(job_id, [])
+        start_reasoning_job(job_id, job.get('question') or '', job.get('template_id') or 'standard', bool(job.get('hard_mode')),
+                            use_cache=bool(job.get('use_cache', True)))
+        return
+    if not job or job.get('template_id') not in WORKFLOW_TEMPLATES:
+        raise ValueError(f"Workflow job {job_id} has no known template to resume")
+    start_workflow_job(job_id, job['template_id'], job.get('question') or '', bool(job.get('hard_mode')), resume=True)
+
+# Orphaned jobs (worker recycled or crashed mid-run) are claimed and resumed here, now and on every sweep
+workflow_jobs.set_resume_handler(resume_workflow_job)
+try:
+    workflow_jobs.recover()
+except Exception as e:
+    print(f"CRITICAL: Workflow job recovery failed: {e}")
+
 @app.route('/api/workflow/run', methods=['POST'])
 def run_workflow():
     try:
@@ -1594,91 +2480,27 @@ def run_workflow():
             return jsonify({"error": "Invalid workflow ID"}), 400
         
         template = WORKFLOW_TEMPLATES[workflow_id]
-        engine = Workflow(name=template['name'], steps=template['steps'])
         
-        # Cleanup old jobs before creating new one
-        cleanup_old_workflow_jobs()
-
         job_id = str(uuid.uuid4())
-        WORKFLOW_JOBS[job_id] = {
-            "status": "running",
-            "results": [],
-            "error": None,
-            "template_name": template['name'],
-            "created_at": time.time()
-        }
+        workflow_jobs.create(
+            job_id,
+            template_id=workflow_id,
+            template_name=template['name'],
+            question=initial_question,
+            hard_mode=bool(hard_mode)
+        )
         
         # MISSION HEARTBEAT
         try:
             log_system_event(
                 event_type="MISSION_START",
                 message=f"Deployment Launched: {template['name']}",
-                details=f"Prompt: {question[:100]}..."
+                details=f"Prompt: {initial_question[:100]}..."
             )
         except:
             pass
 
-        # Start background execution
-        def background_worker(jid, question, hm, eng):
-            try:
-                query_funcs = {
-                    'openai': query_openai,
-                    'anthropic': query_anthropic,
-                    'google': query_google,
-                    'perplexity': query_perplexity
-                }
-                
-                def update_job_status(step_result):
-                    WORKFLOW_JOBS[jid]["results"].append(step_result)
-                    
-                results = eng.execute(question, query_funcs, hard_mode=hm, step_callback=update_job_status)
-                WORKFLOW_JOBS[jid]["status"] = "complete"
-                WORKFLOW_JOBS[jid]["final_history"] = eng.full_history
-                
-                # Save to History Database
-                try:
-                    # Synthesize a 'responses' map for the database schema
-                    workflow_name = WORKFLOW_JOBS[jid].get('template_name', 'Custom Workflow')
-                    db_question = f"🌀 [WORKFLOW: {workflow_name}] - {question}"
-                    
-                    # Create a results map that fits the standard 4-column UI for now
-                    # We'll put the final synthesized result or the most relevant ones.
-                    final_step = results[-1] if results else None
-                    db_results = {
-                        "openai": {"success": True, "response": f"Workflow {workflow_name} completed. {len(results)} steps executed.", "model": "Workflow Engine"},
-                        "anthropic": {"success": True, "response": "See attached report for full details.", "model": "System"},
-                        "google": {"success": True, "response": final_step['data']['response'] if final_step else "No output", "model": "Consensus"},
-                        "perplexity": {"success": True, "response": "Full Workflow Log saved to Document Viewer.", "model": "Audit"}
-                    }
-                    
-                    # SAVE FULL HISTORY to document_content so it's retrievable
-                    cid = save_comparison(
-                        question=db_question, 
-                        responses=db_results,
-                        document_content=eng.full_history,
-                        document_name=f"Workflow_Report_{jid[:4]}.md"
-                    )
-                    WORKFLOW_JOBS[jid]["comparison_id"] = cid
-                    print(f"DEBUG: Workflow {jid} saved to history with comparison_id: {cid}")
-                except Exception as db_err:
-                    print(f"ERROR: Failed to save workflow to history: {db_err}")
-            except Exception as ex:
-                import traceback
-                error_trace = traceback.format_exc()
-                print(f"ASYNC WORKFLOW CRASH ({jid}):\n{error_trace}")
-                WORKFLOW_JOBS[jid]["status"] = "failed"
-                WORKFLOW_JOBS[jid]["error"] = str(ex)
-                WORKFLOW_JOBS[jid]["traceback"] = error_trace
-                
-                # PERSIST CRASH TO DASHBOARD
-                log_system_event(
-                    event_type="WORKFLOW_FAIL",
-                    message=f"Mission Failed: {jid[:8]}",
-                    details=f"Error: {str(ex)}\n\nTraceback:\n{error_trace}"
-                )
-
-        thread = threading.Thread(target=background_worker, args=(job_id, initial_question, hard_mode, engine))
-        thread.start()
+        start_workflow_job(job_id, workflow_id, initial_question, hard_mode)
         
         return jsonify({
             "job_id": job_id,
@@ -1688,18 +2510,173 @@ def run_workflow():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/workflow/resume/<job_id>', methods=['POST'])
+def resume_workflow(job_id):
+    """Continue a failed (or partially failed) workflow from its first incomplete step."""
+    job = workflow_jobs.get(job_id, include_checkpoint=True)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    if job.get('kind') == REASONING_JOB_KIND or job.get('template_id') not in WORKFLOW_TEMPLATES:
+        return jsonify({"error": "Job has no resumable template"}), 400
+
+    template = WORKFLOW_TEMPLATES[job['template_id']]
+    reusable = Workflow(name=template['name'], steps=template['steps']).resumable_keys(job.get('checkpoint'))
+    if job['status'] == 'complete' and len(reusable) == len(template['steps']):
+        return jsonify({"error": "Workflow already completed every step", "comparison_id": job.get('comparison_id')}), 409
+    if job['status'] == 'running' and not workflow_jobs.is_orphaned(job):
+        return jsonify({"error": "Workflow is still running"}), 409
+
+    # Compare-and-set on the owner: a concurrent resume (or the sweeper) can only win once
+    if not workflow_jobs.claim(job_id, job.get('owner'), statuses=("failed", "complete", "running")):
+        return jsonify({"error": "Workflow was resumed elsewhere"}), 409
+    try:
+        start_workflow_job(job_id, job['template_id'], job.get('question') or '', bool(job.get('hard_mode')), resume=True)
+    except Exception as e:
+        workflow_jobs.finish(job_id, "failed", error=f"Resume failed: {e}")
+        return jsonify({"error": str(e)}), 500
+
+    return jsonify({
+        "job_id": job_id,
+        "status": "resumed",
+        "restored_steps": len(reusable),
+        "remaining_steps": len(template['steps']) - len(reusable)
+    })
+
 @app.route('/api/workflow/status/<job_id>', methods=['GET'])
 def get_workflow_status(job_id):
-    job = WORKFLOW_JOBS.get(job_id)
+    """
+    Job status. ?since=N returns only the step results after the first N (pass back "cursor"),
+    so a poller doesn't re-download every finished step's full response each time.
+    """
+    since = max(0, request.args.get('since', 0, type=int))
+    job = workflow_jobs.get(job_id, since=since)
     if not job:
         return jsonify({"error": "Job not found"}), 404
     
+    job['since'] = since
+    job['cursor'] = since + len(job['results'])
     return jsonify(job)
 
+WORKFLOW_STREAM_POLL_SECONDS = float(os.getenv('WORKFLOW_STREAM_POLL_SECONDS', '3'))
+
+@app.route('/api/workflow/stream/<job_id>', methods=['GET'])
+def stream_workflow(job_id):
+    """
+    Live workflow progress (Server-Sent Events).
+    Events: snapshot (status + step results after ?since=N) -> step-started / step-token* / step-completed
+    per step -> done {status, error, comparison_id}. Jobs running in another worker process are followed
+    through the job store (step-completed only, no tokens).
+    """
+    since = max(0, request.args.get('since', 0, type=int))
+    if not workflow_jobs.status(job_id):
+        return jsonify({"error": "Job not found"}), 404
+    return job_event_stream(job_id, since, lambda job: {"comparison_id": job.get('comparison_id')})
+
+def job_event_stream(job_id, since, summary):
+    """SSE response following one job of the job store; summary(job) adds fields to the closing "done" event."""
+    def generate():
+        # Subscribe before reading the snapshot, so no step can finish in between unseen
+        events = workflow_events.subscribe(job_id)
+        try:
+            job = workflow_jobs.get(job_id, since=since)
+            if not job:
+                yield sse_event('error', {"error": "Job not found"})
+                return
+            cursor = since + len(job['results'])
+            seen = {(r.get('key'), r.get('step')) for r in job['results']}
+            yield sse_event('snapshot', {"status": job['status'], "template_id": job.get('template_id'), "results": job['results'], "cursor": cursor})
+
+            while job['status'] == 'running':
+                try:
+                    item = events.get(timeout=WORKFLOW_STREAM_POLL_SECONDS)
+                except queue.Empty:
+                    if not workflow_jobs.is_local(job_id):
+                        # Running elsewhere (or just finished): follow the store instead of the bus
+                        job = workflow_jobs.get(job_id, since=cursor) or {"status": "failed", "error": "Job expired", "results": []}
+                        for result in job['results']:
+                            cursor += 1
+                            yield sse_event('step-completed', {"result": result, "cursor": cursor})
+                    else:
+                        yield ": keepalive\n\n"  # Stop proxies from closing an idle stream
+                    continue
+                if item is None:
+                    job = workflow_jobs.get(job_id, since=cursor) or {"status": "failed", "error": "Job expired", "results": []}
+                    break
+                event, data = item
+                if event == 'step-completed':
+                    identity = (data['result'].get('key'), data['result'].get('step'))
+                    if identity in seen:
+                        seen.discard(identity)  # Already in the snapshot
+                        continue
+                    cursor += 1
+                    data = {**data, "cursor": cursor}
+                elif event == 'job-finished':
+                    continue  # The closing None follows; "done" is sent from the store's final state
+                yield sse_event(event, data)
+
+            yield sse_event('done', {"status": job['status'], "error": job.get('error'), **summary(job), "cursor": cursor})
+        finally:
+            workflow_events.unsubscribe(job_id, events)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+def get_reasoning_job(job_id, since=0, include_results=True):
+    """A reasoning chain job with its pipeline_result decoded, or None (workflow jobs don't count)."""
+    job = workflow_jobs.get(job_id, since=since) if include_results else workflow_jobs.status(job_id)
+    if not job or job.get('kind') != REASONING_JOB_KIND:
+        return None
+    final = job.pop('final_history', None)
+    job['pipeline_result'] = json.loads(final) if final else None
+    return job
+
+@app.route('/api/v2/reasoning_chain/status/<job_id>', methods=['GET'])
+def reasoning_chain_status(job_id):
+    """Reasoning chain job status: one result per finished layer (?since=N as for workflows), pipeline_result once complete."""
+    since = max(0, request.args.get('since', 0, type=int))
+    job = get_reasoning_job(job_id, since=since)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    job['since'] = since
+    job['cursor'] = since + len(job['results'])
+    return jsonify(job)
+
+@app.route('/api/v2/reasoning_chain/stream/<job_id>', methods=['GET'])
+def stream_reasoning_chain(job_id):
+    """
+    Live reasoning chain progress (Server-Sent Events), the same events as /api/workflow/stream with one
+    step per pipeline layer; done carries the pipeline_result.
+    """
+    since = max(0, request.args.get('since', 0, type=int))
+    if not get_reasoning_job(job_id, include_results=False):
+        return jsonify({"error": "Job not found"}), 404
+    return job_event_stream(job_id, since, lambda job: {"pipeline_result": (get_reasoning_job(job_id, include_results=False) or {}).get('pipeline_result')})
+
+@app.route('/api/v2/reasoning_chain/cancel/<job_id>', methods=['POST'])
+def cancel_reasoning_chain(job_id):
+    """
+    Stop a running reasoning chain. The model call in flight completes, but no further layer, retry or
+    fallback starts. Clients that joined the same job through deduplication are cancelled too.
+    """
+    job = workflow_jobs.status(job_id)
+    if not job or job.get('kind') != REASONING_JOB_KIND:
+        return jsonify({"error": "Job not found"}), 404
+    if job['status'] != 'running':
+        return jsonify({"error": f"Job already {job['status']}"}), 409
+
+    workflow_jobs.finish(job_id, "cancelled", error=REASONING_CANCELLED_ERROR)
+    deadline = REASONING_JOB_DEADLINES.get(job_id)
+    if deadline:
+        deadline.cancel()
+    workflow_events.close(job_id, {"status": "cancelled"})
+    return jsonify({"job_id": job_id, "status": "cancelled"})
+
 @app.route('/workflow/preview/<job_id>/<int:step_id>')
 def preview_workflow_step(job_id, step_id):
     """Serve the raw HTML output of a workflow step for browser rendering."""
-    job = WORKFLOW_JOBS.get(job_id)
+    job = workflow_jobs.get(job_id)
     if not job:
         return "Workflow job not found", 404
         
@@ -1736,6 +2713,7 @@ def preview_workflow_step(job_id, step_id):
 @app.route('/interrogate', methods=['POST'])
 def interrogate():
     """Endpoint for deep-diving into a specific AI response."""
+    deadline = Deadline.for_endpoint('interrogate')
     data = request.json
     model_type = data.get('model')
     question = data.get('question')
@@ -1791,7 +2769,7 @@ DIRECTIVE: Do not summarize. Do not be generic. Provide the specific, high-stake
     if not func:
         return jsonify({"success": False, "error": "Invalid model"}), 400
         
-    result = func(interrogation_prompt, hard_mode=True)
+    result = func(interrogation_prompt, hard_mode=True, deadline=deadline)
     
     
     # NEW: Analyze the defense
@@ -1910,7 +2888,7 @@ def resynthesize_consensus():
             }
             
         # Generate new consensus
-        new_consensus = generate_consensus(question, results_map, council_mode=council_mode)
+        new_consensus = generate_consensus(question, results_map, council_mode=council_mode, use_cache=not data.get('bypass_cache', False))
         
         return jsonify({
             "success": True,
@@ -1936,6 +2914,8 @@ def get_telemetry():
     try:
         from database import get_dashboard_telemetry
         data = get_dashboard_telemetry()
+        data["provider_health"] = provider_health.snapshot()  # Live, per process (not from the database)
+        data["rate_limiter"] = provider_limiter.stats()  # Queue wait times, per process
         return jsonify(data)
     except Exception as e:
         print(f"Telemetry API Error: {e}")
@@ -1946,6 +2926,17 @@ def get_telemetry():
             "cassandra_log": []
         })
 
+@app.route('/api/credibility')
+@basic_auth.required
+def get_credibility():
+    """Current credibility scores plus the recent change log (?model=openai&limit=50)."""
+    model = request.args.get('model')
+    limit = request.args.get('limit', 50, type=int)
+    return jsonify({
+        "scores": enforcement_engine.credibility_scores,
+        "events": credibility_store.history(model=model, limit=limit)
+    })
+
 @app.route('/api/oracle/verdicts')
 @basic_auth.required
 def get_oracle_verdicts():
@@ -1980,21 +2971,5 @@ def generate_voice_route():
         return jsonify({"success": True, "path": path})
     return jsonify({"success": False, "error": error or "Generation failed"})
 
-@app.route('/api/v2/reasoning_chain', methods=['POST'])
-def reasoning_chain():
-    data = request.json
-    query = data.get('query')
-    hacker_mode = data.get('hacker_mode', False)
-    
-    if not query:
-        return jsonify({"success": False, "error": "No query provided"})
-
-    try:
-        # Pass Hacker Mode Flag
-        result = orchestrator.execute_pipeline(query, hacker_mode=hacker_mode)
-        return jsonify({"success": True, "pipeline_result": result})
-    except Exception as e:
-        return jsonify({"success": False, "error": str(e)})
-   
 if __name__ == '__main__':
     app.run(debug=True, port=5002)
@@ -0,0 +1,185 @@
+"""
+Database Query Benchmark.
+Seeds a scratch database with ~1M responses and times the hot dashboard/history/rating
+queries before and after the access-path indexes (migrations.py 0001). The dashboard reads
+the telemetry_rollups table (0002); the pre-rollup 7-day cost scan is timed alongside it.
+
+Usage:
+    python benchmark_database.py                         # 1,000,000 responses in a temp SQLite file
+    python benchmark_database.py --responses 200000
+    python benchmark_database.py --url postgresql://...  # an EMPTY scratch database, never production
+"""
+
+import os
+import time
+import random
+import argparse
+import tempfile
+import statistics
+from datetime import datetime, timedelta
+
+parser = argparse.ArgumentParser(description="Benchmark TriAI database queries with and without indexes")
+parser.add_argument("--responses", type=int, default=1_000_000, help="Response rows to seed (4 per comparison)")
+parser.add_argument("--url", default=None, help="Database URL (default: temp SQLite file)")
+parser.add_argument("--repeat", type=int, default=3, help="Timed runs per query (median reported)")
+args = parser.parse_args()
+
+# database.py builds its engine at import time, so the URL must be set first
+os.environ['DATABASE_URL'] = args.url or f"sqlite:///{os.path.join(tempfile.gettempdir(), 'triai_benchmark.db')}"
+
+from sqlalchemy import text, insert, func
+import database
+from database import engine, SessionLocal, Base, Comparison, Response, QueryFeedback
+from migrations import ACCESS_PATH_INDEXES, run_migrations, schema_migrations, _backfill_telemetry_rollups
+
+PROVIDERS = ["openai", "anthropic", "google", "perplexity"]
+PERSONAS = [None, "Lead Data Architect", "Venture Capitalist", "CISO", "Forensic Accountant", "Supply Chain Analyst", "Principal SRE"]
+CATEGORIES = ["coding", "security", "finance", "strategy", "research", "general"]
+BATCH = 5000
+
+
+def seed(total_responses: int):
+    """Insert comparisons (4 responses each) spread over the last 90 days, plus feedback rows."""
+    db = SessionLocal()
+    existing = db.query(func.count(Response.id)).scalar()
+    db.close()
+    if existing >= total_responses:
+        print(f"Using existing {existing:,} responses")
+        return
+
+    comparisons = total_responses // len(PROVIDERS)
+    now = datetime.utcnow()
+    rng = random.Random(42)
+    print(f"Seeding {comparisons:,} comparisons / {total_responses:,} responses...")
+    start = time.time()
+    for offset in range(0, comparisons, BATCH):
+        comp_rows, resp_rows, feedback_rows = [], [], []
+        for cid in range(offset + 1, min(offset + BATCH, comparisons) + 1):
+            ts = now - timedelta(seconds=rng.randint(0, 90 * 86400))
+            comp_rows.append({"id": cid, "question": f"Benchmark question {cid} about {rng.choice(CATEGORIES)}", "timestamp": ts, "saved": rng.random() < 0.01})
+            for provider in PROVIDERS:
+                resp_rows.append({
+                    "comparison_id": cid, "ai_provider": provider, "model_name": provider,
+                    "response_text": "x" * rng.randint(200, 2000), "response_time": rng.random() * 30,
+                    "success": True, "self_selected_persona": rng.choice(PERSONAS),
+                    "individual_rating": rng.randint(1, 5) if rng.random() < 0.05 else None, "timestamp": ts
+                })
+            if rng.random() < 0.1:
+                feedback_rows.append({"comparison_id": cid, "rating": rng.randint(1, 5), "query_category": rng.choice(CATEGORIES),
+                                      "gpt_role": "visionary", "claude_role": "architect", "gemini_role": "critic", "perplexity_role": "researcher", "timestamp": ts})
+        with engine.begin() as conn:
+            conn.execute(insert(Comparison), comp_rows)
+            conn.execute(insert(Response), resp_rows)
+            if feedback_rows:
+                conn.execute(insert(QueryFeedback), feedback_rows)
+        done = min(offset + BATCH, comparisons)
+        print(f"  {done * len(PROVIDERS):>10,} responses ({time.time() - start:.0f}s)", end="\r")
+    print(f"\nSeeded in {time.time() - start:.1f}s")
+
+
+def rebuild_rollups():
+    """The seed inserts rows directly, bypassing the on-write rollup updates."""
+    start = time.time()
+    with engine.begin() as conn:
+        _backfill_telemetry_rollups(conn, Base.metadata)
+    print(f"Telemetry rollups rebuilt in {time.time() - start:.1f}s")
+
+
+def drop_indexes():
+    with engine.begin() as conn:
+        for name in ACCESS_PATH_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        conn.execute(schema_migrations.delete().where(schema_migrations.c.version == "0001_access_path_indexes"))
+
+
+def persona_drift():
+    """The two aggregate queries persona_synthesizer.analyze_persona_drift runs."""
+    with engine.connect() as conn:
+        conn.execute(text("""
+            SELECT ai_provider, self_selected_persona, count(*) AS frequency FROM responses
+            WHERE self_selected_persona IS NOT NULL
+            GROUP BY ai_provider, self_selected_persona ORDER BY ai_provider, frequency DESC
+        """)).fetchall()
+        conn.execute(text("""
+            SELECT r.ai_provider, AVG(e.specificity), AVG(e.depth), AVG(e.actionability)
+            FROM responses r JOIN response_evaluations e ON r.id = e.response_id GROUP BY r.ai_provider
+        """)).fetchall()
+
+
+def prompts_last_24h():
+    db = SessionLocal()
+    try:
+        db.query(Comparison).filter(Comparison.timestamp >= datetime.utcnow() - timedelta(hours=24)).count()
+    finally:
+        db.close()
+
+
+def legacy_cost_scan():
+    """The 7-day cost loop get_dashboard_telemetry ran before the rollups existed."""
+    db = SessionLocal()
+    try:
+        rows = db.query(Comparison.question, Response.ai_provider, Response.response_text)\
+            .join(Response, Comparison.id == Response.comparison_id)\
+            .filter(Comparison.timestamp >= datetime.utcnow() - timedelta(days=7)).all()
+        sum(len(q or "") + len(t or "") for q, _, t in rows)
+    finally:
+        db.close()
+
+
+def build_queries(max_comparison_id: int):
+    rng = random.Random(7)
+    return {
+        "get_dashboard_telemetry": database.get_dashboard_telemetry,
+        "7-day cost scan (pre-rollup)": legacy_cost_scan,
+        "get_recent_comparisons(50)": lambda: database.get_recent_comparisons(50),
+        "get_saved_comparisons": database.get_saved_comparisons,
+        "update_response_rating": lambda: database.update_response_rating(rng.randint(1, max_comparison_id), "OpenAI", rng.randint(1, 5)),
+        "get_best_config('security')": lambda: database.get_best_config("security"),
+        "prompts in last 24h": prompts_last_24h,
+        "analyze_persona_drift queries": persona_drift,
+    }
+
+
+def time_queries(queries, repeat):
+    timings = {}
+    for name, fn in queries.items():
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            runs.append((time.perf_counter() - start) * 1000)
+        timings[name] = statistics.median(runs)
+    return timings
+
+
+def main():
+    database.init_database()
+    seed(args.responses)
+    rebuild_rollups()
+
+    db = SessionLocal()
+    max_id = db.query(func.max(Comparison.id)).scalar() or 1
+    total = db.query(func.count(Response.id)).scalar()
+    db.close()
+    queries = build_queries(max_id)
+    print(f"Database: {engine.url.drivername}, {total:,} responses\n")
+
+    print("Dropping access-path indexes...")
+    drop_indexes()
+    before = time_queries(queries, args.repeat)
+
+    print("Applying migrations...")
+    start = time.time()
+    run_migrations(engine, Base.metadata)
+    print(f"Indexes built in {time.time() - start:.1f}s\n")
+    after = time_queries(queries, args.repeat)
+
+    print(f"{'query':<34}{'no index (ms)':>15}{'indexed (ms)':>15}{'speedup':>10}")
+    print("-" * 74)
+    for name in queries:
+        speedup = before[name] / after[name] if after[name] else float('inf')
+        print(f"{name:<34}{before[name]:>15.1f}{after[name]:>15.1f}{speedup:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Enforcement Scanner Microbenchmark.
+Times the single-pass EnforcementScanner (enforcement audit + execution bias from one scan)
+against the previous multi-pass implementation on synthetic ~50KB responses, after checking
+that both produce identical results.
+
+Usage:
+    python benchmark_enforcement.py
+    python benchmark_enforcement.py --size 200000 --responses 20
+"""
+
+import re
+import time
+import random
+import argparse
+import statistics
+
+from council_roles import COUNCIL_ROLES
+from enforcement import EnforcementEngine, enforcement_scanner, GENERIC_VERBS, ANCHORS
+from credibility_store import CredibilityStore
+
+parser = argparse.ArgumentParser(description="Benchmark the enforcement scanner")
+parser.add_argument("--size", type=int, default=50_000, help="Characters per synthetic response")
+parser.add_argument("--responses", type=int, default=10, help="Distinct responses to time")
+parser.add_argument("--repeat", type=int, default=5, help="Timed runs per response (median reported)")
+args = parser.parse_args()
+
+FILLER = ("the system should handle load across regions while the team reviews data model cloud "
+          "latency budget cache layer queue worker service owner plan review deploy rollback").split()
+SIGNAL_WORDS = (sorted(GENERIC_VERBS) + sorted(ANCHORS) +
+                ["roi", "tco", "floor value", "however", "note", "important to note", "implement", "steps",
+                 "tactical steps", "strategy", "consider", "risks", "analysis", "underestimated", "reporting"])
+METRICS = ["23%", "4.5%", "$500", "$5m", "$1,200.50", "$50k", "12.5%"]
+
+
+def make_response(size: int, rng: random.Random) -> str:
+    parts, length = [], 0
+    while length < size:
+        roll = rng.random()
+        if roll < 0.04:
+            token = rng.choice(METRICS)
+        elif roll < 0.12:
+            token = rng.choice(SIGNAL_WORDS)
+        elif roll < 0.14:
+            token = "\n\n### Action" if rng.random() < 0.2 else "\n- "
+        else:
+            token = rng.choice(FILLER)
+        parts.append(token)
+        length += len(token) + 1
+    return " ".join(parts)[:size]
+
+
+# --- Previous implementation (reference) ---
+
+def legacy_analyze(text, role_name, contract):
+    violations, warnings = [], []
+    lower_text = text.lower()
+    words = re.findall(r'\b\w+\b', lower_text)
+    unique_generics = set(word for word in words if word in GENERIC_VERBS)
+    if len(unique_generics) >= 3:
+        warnings.append(len(unique_generics))
+    all_matches = list(re.finditer(r'\b\d+(\.\d+)?%', text)) + list(re.finditer(r'\$\d+(?:,\d+)*(?:\.\d+)?(?:k|m|b|t)?\b', text, re.IGNORECASE))
+    for match in all_matches:
+        start, end = match.span()
+        window_start, window_end = max(0, start - 60), min(len(text), end + 60)
+        context = text[window_start:window_end].lower()
+        if not any(anchor in context for anchor in ANCHORS) and "\n" not in text[window_start:window_end]:
+            violations.append(f"UNANCHORED_METRIC: '{match.group()}'")
+    if contract:
+        for term in contract.get("forbidden", []):
+            if term.lower() in lower_text:
+                violations.append(term)
+        for term in contract.get("must_label", []):
+            if term.replace("_", " ") not in lower_text:
+                warnings.append(term)
+    if role_name == "CFO" and "roi" not in lower_text and "tco" not in lower_text:
+        warnings.append("ROLE_ADHERENCE")
+    return violations, warnings
+
+
+def legacy_bias(response_text):
+    text = response_text.lower()
+    groups = {
+        "action": [r"\b(do|implement|execute|run|start|setup|install|configure|mandatory)\b",
+                   r"\b(action plan|steps|immediate moves|tactical steps|deliverables)\b",
+                   r"1\.\s*[A-Z]", r"###\s+action", r"\b(script|code|command|terminal|bypass)\b"],
+        "advisory": [r"\b(consider|recommend|approach|framework|strategy|best practice)\b",
+                     r"\b(options|alternatives|roadmap|strategic|potential)\b",
+                     r"\b(consult|advice|guiding|perspective)\b"],
+        "narrative": [r"\b(however|caution|note|warn|risks|dangers|limitations|complexity)\b",
+                      r"\b(important to note|should be aware|significant drawback|challenges)\b",
+                      r"\b(explore|evaluate|analysis|background|context|nuance)\b",
+                      r"\b(comprehensive overview|history|theory)\b"]
+    }
+    return {name: sum(len(re.findall(p, text)) for p in patterns) for name, patterns in groups.items()}
+
+
+def scanner_pass(engine, text, contract):
+    scan = enforcement_scanner.scan(text)
+    report = engine.analyze_response(text, "CFO", "openai", contract, scan=scan)
+    return report, enforcement_scanner.execution_bias(scan)
+
+
+def legacy_pass(text, contract):
+    return legacy_analyze(text, "CFO", contract), legacy_bias(text)
+
+
+def check_equivalence(engine, responses, contract):
+    for text in responses:
+        scan = enforcement_scanner.scan(text)
+        violations, warnings = legacy_analyze(text, "CFO", contract)
+        report = engine.analyze_response(text, "CFO", "openai", contract, scan=scan)
+        unanchored = [v.split(" found")[0] for v in report["violations"] if v.startswith("UNANCHORED_METRIC")]
+        assert unanchored == [v for v in violations if v.startswith("UNANCHORED_METRIC")], "unanchored metrics differ"
+        assert scan["bias"] == legacy_bias(text), (scan["bias"], legacy_bias(text))
+        assert len(scan["generics"]) == len(set(w for w in re.findall(r'\b\w+\b', text.lower()) if w in GENERIC_VERBS))
+    print(f"Equivalence: {len(responses)} responses match the previous implementation")
+
+
+def time_it(fn, repeat):
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        runs.append((time.perf_counter() - start) * 1000)
+    return statistics.median(runs)
+
+
+def main():
+    rng = random.Random(42)
+    responses = [make_response(args.size, rng) for _ in range(args.responses)]
+    contract = COUNCIL_ROLES.get("cfo", {}).get("truth_contract")
+    engine = EnforcementEngine(store=CredibilityStore(persist=False))
+    check_equivalence(engine, responses, contract)
+
+    legacy = [time_it(lambda: legacy_pass(text, contract), args.repeat) for text in responses]
+    scanner = [time_it(lambda: scanner_pass(engine, text, contract), args.repeat) for text in responses]
+    legacy_ms, scanner_ms = statistics.median(legacy), statistics.median(scanner)
+
+    print(f"\n{args.responses} responses x {args.size:,} chars (median ms per response)")
+    print(f"{'implementation':<40}{'ms':>10}")
+    print("-" * 50)
+    print(f"{'previous (analyze + execution bias)':<40}{legacy_ms:>10.2f}")
+    print(f"{'single-pass scanner':<40}{scanner_ms:>10.2f}")
+    print(f"{'speedup':<40}{legacy_ms / scanner_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Credibility Score Store.
+Per-model credibility scores shared by /api/ask enforcement, background workflows and
+/interrogate. Updates are atomic read-modify-writes under lock stripes (one of N locks per
+model), every non-zero change is appended to an event log, and a background thread flushes
+new events plus a score snapshot to the database. On boot the snapshot is loaded back, so
+scores survive gunicorn's --max-requests worker recycling.
+
+Configuration:
+    CREDIBILITY_SNAPSHOT_SECONDS  (default 30)  flush interval for events and snapshot
+"""
+
+import os
+import zlib
+import atexit
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+CREDIBILITY_SNAPSHOT_SECONDS = float(os.getenv('CREDIBILITY_SNAPSHOT_SECONDS', '30'))
+CREDIBILITY_STRIPES = 16
+DEFAULT_SCORE = 100
+HISTORY_PER_MODEL = 200
+MAX_PENDING_EVENTS = 10000  # Unflushed events kept while the database is unreachable
+
+
+class CredibilityStore:
+    """
+    Lock-striped score counters with an append-only event log.
+    Event order in the log matches the order the stripe lock applied the changes.
+    """
+
+    def __init__(self, persist: bool = True, snapshot_seconds: float = CREDIBILITY_SNAPSHOT_SECONDS, stripes: int = CREDIBILITY_STRIPES):
+        self.persist = persist
+        self.snapshot_seconds = snapshot_seconds
+        self._stripes = [threading.Lock() for _ in range(stripes)]
+        self._scores: Dict[str, int] = {}
+        self._history: Dict[str, deque] = {}
+        self._pending: List[Dict] = []
+        self._pending_lock = threading.Lock()   # Always taken inside a stripe lock, never around one
+        self._dirty = set()
+        self._flush_lock = threading.Lock()     # Serializes the flusher thread and the shutdown flush
+        self._loaded = False
+        self._load_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.metrics = {"events": 0, "flushes": 0, "flushed_events": 0, "flush_failures": 0, "dropped_events": 0}
+
+    def _stripe(self, model: str) -> threading.Lock:
+        return self._stripes[zlib.crc32(model.encode()) % len(self._stripes)]
+
+    def warm_start(self):
+        """Load the persisted snapshot (idempotent). Called at boot and lazily on first use."""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if self._loaded:
+                return
+            if self.persist:
+                try:
+                    from database import load_credibility_state
+                    state = load_credibility_state(HISTORY_PER_MODEL)
+                    # apply() waits on warm_start(), so nothing has been scored in this process yet
+                    for model, entry in state.items():
+                        self._scores[model] = entry["score"]
+                        self._history[model] = deque(entry["history"], maxlen=HISTORY_PER_MODEL)
+                    if state:
+                        print(f"[CREDIBILITY] Warm start: {len(state)} models restored")
+                except Exception as e:
+                    print(f"CRITICAL: Credibility warm start failed, starting from defaults: {e}")
+                self._ensure_flusher()
+            self._loaded = True
+
+    def _ensure_flusher(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="triai-credibility", daemon=True)
+        self._thread.start()
+
+    def get(self, model: str) -> int:
+        self.warm_start()
+        return self._scores.get(model, DEFAULT_SCORE)
+
+    def scores(self, models=()) -> Dict[str, int]:
+        """Snapshot of all known scores (plus defaults for `models` never scored)."""
+        self.warm_start()
+        current = dict(self._scores)
+        for model in models:
+            current.setdefault(model, DEFAULT_SCORE)
+        return current
+
+    def apply(self, model: str, delta: int, reason: str = None, source: str = "enforcement",
+              ceiling: Optional[int] = None, details: str = None) -> int:
+        """Atomically add `delta` (floored at 0, optionally capped) and log it. Returns the new score."""
+        self.warm_start()
+        with self._stripe(model):
+            new_score = max(0, self._scores.get(model, DEFAULT_SCORE) + delta)
+            if ceiling is not None:
+                new_score = min(ceiling, new_score)
+            self._scores[model] = new_score
+            if delta:
+                event = {
+                    "model": model, "delta": delta, "score": new_score, "source": source,
+                    "reason": reason, "details": details, "timestamp": datetime.utcnow()
+                }
+                self._history.setdefault(model, deque(maxlen=HISTORY_PER_MODEL)).append(event)
+                with self._pending_lock:
+                    self.metrics["events"] += 1
+                    self._dirty.add(model)
+                    if self.persist:
+                        self._pending.append(event)
+                        if len(self._pending) > MAX_PENDING_EVENTS:
+                            self._pending.pop(0)
+                            self.metrics["dropped_events"] += 1
+        return new_score
+
+    def history(self, model: str = None, source: str = None, limit: int = 50) -> List[Dict]:
+        """Most recent events (newest last), optionally for one model and/or source."""
+        self.warm_start()
+        models = [model] if model else list(self._history)
+        events = [e for m in models for e in list(self._history.get(m, ()))]
+        if source:
+            events = [e for e in events if e["source"] == source]
+        events.sort(key=lambda e: e["timestamp"])
+        return [{**e, "timestamp": e["timestamp"].isoformat() + "Z"} for e in events[-limit:]]
+
+    def _run(self):
+        while not self._stop.wait(self.snapshot_seconds):
+            self.flush()
+
+    def flush(self) -> int:
+        """Write pending events and the touched models' scores. Returns events written."""
+        if not self.persist:
+            return 0
+        with self._flush_lock:
+            return self._flush()
+
+    def _flush(self) -> int:
+        with self._pending_lock:
+            events, self._pending = self._pending, []
+            dirty, self._dirty = self._dirty, set()
+        if not events and not dirty:
+            return 0
+        scores = {model: self._scores.get(model, DEFAULT_SCORE) for model in dirty}
+        try:
+            from database import append_credibility_events
+            append_credibility_events(events, scores)
+        except Exception as e:
+            # Put the batch back in front of anything logged meanwhile and retry next cycle
+            with self._pending_lock:
+                self._pending = (events + self._pending)[-MAX_PENDING_EVENTS:]
+                self._dirty |= dirty
+            self.metrics["flush_failures"] += 1
+            print(f"CRITICAL: Credibility snapshot failed ({len(events)} events pending): {e}")
+            return 0
+        self.metrics["flushes"] += 1
+        self.metrics["flushed_events"] += len(events)
+        return len(events)
+
+    def shutdown(self):
+        self._stop.set()
+        if self._loaded:
+            self.flush()
+
+    def stats(self) -> Dict:
+        return {
+            "models": len(self._scores),
+            "pending": len(self._pending),
+            "snapshot_seconds": self.snapshot_seconds,
+            "persist": self.persist,
+            **self.metrics
+        }
+
+
+# Initialize Singleton
+credibility_store = CredibilityStore()
+atexit.register(credibility_store.shutdown)
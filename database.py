@@ -4,10 +4,13 @@ Handles both SQLite (Local) and PostgreSQL (Railway/Production) transparently.
 """
 import os
 import json
-from datetime import datetime
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Optional, Any
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, DateTime, Float, ForeignKey, Text, func, select, desc
-from sqlalchemy.orm import declarative_base, sessionmaker, relationship, scoped_session
+from sqlalchemy import create_engine, Column, Integer, String, Boolean, DateTime, Float, ForeignKey, Text, Index, BigInteger, UniqueConstraint, func, select, desc, insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import declarative_base, sessionmaker, relationship, scoped_session, selectinload
 
 # --- Configuration ---
 # Use database URL from environment variable, or fallback to local SQLite
@@ -38,6 +41,12 @@ class Comparison(Base):
     responses = relationship("Response", back_populates="comparison", cascade="all, delete-orphan")
     feedback = relationship("QueryFeedback", back_populates="comparison", cascade="all, delete-orphan")
 
+    # Access paths: dashboard time windows, history ordering, saved list (see migrations.py)
+    __table_args__ = (
+        Index("ix_comparisons_timestamp", "timestamp"),
+        Index("ix_comparisons_saved_timestamp", "saved", "timestamp"),
+    )
+
 class Response(Base):
     __tablename__ = "responses"
     id = Column(Integer, primary_key=True, index=True)
@@ -50,11 +59,24 @@ class Response(Base):
     thought_text = Column(Text, nullable=True)
     self_selected_persona = Column(Text, nullable=True)
     individual_rating = Column(Integer, nullable=True) # Added for rating feature
+    # Cost ledger: token usage reported by the provider SDK at call time
+    input_tokens = Column(Integer, nullable=True)
+    output_tokens = Column(Integer, nullable=True)
+    cost = Column(Float, nullable=True)
+    usage_source = Column(String, nullable=True) # provider / estimate / cache / coalesced
     timestamp = Column(DateTime, default=datetime.utcnow)
 
     comparison = relationship("Comparison", back_populates="responses")
     evaluations = relationship("ResponseEvaluation", back_populates="response", cascade="all, delete-orphan")
 
+    # Access paths: joins/rating updates by comparison, persona density + drift, model leaderboard
+    __table_args__ = (
+        Index("ix_responses_comparison_provider", "comparison_id", "ai_provider"),
+        Index("ix_responses_provider_persona", "ai_provider", "self_selected_persona"),
+        Index("ix_responses_persona_provider", "self_selected_persona", "ai_provider"),
+        Index("ix_responses_provider_rating", "ai_provider", "individual_rating"),
+    )
+
 class QueryFeedback(Base):
     __tablename__ = "query_feedback"
     id = Column(Integer, primary_key=True, index=True)
@@ -87,6 +109,11 @@ class QueryFeedback(Base):
 
     comparison = relationship("Comparison", back_populates="feedback")
 
+    # Access path: get_best_config (category = ? AND rating >= 3), category counts
+    __table_args__ = (
+        Index("ix_query_feedback_category_rating", "query_category", "rating"),
+    )
+
 class ResponseEvaluation(Base):
     __tablename__ = "response_evaluations"
     id = Column(Integer, primary_key=True, index=True)
@@ -101,6 +128,10 @@ class ResponseEvaluation(Base):
 
     response = relationship("Response", back_populates="evaluations")
 
+    __table_args__ = (
+        Index("ix_response_evaluations_response_id", "response_id"),
+    )
+
 class SystemEvent(Base):
     __tablename__ = "system_events"
     id = Column(Integer, primary_key=True, index=True)
@@ -109,6 +140,312 @@ class SystemEvent(Base):
     details = Column(Text, nullable=True)
     timestamp = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        Index("ix_system_events_timestamp", "timestamp"),
+    )
+
+class ResponseCacheEntry(Base):
+    __tablename__ = "response_cache"
+    cache_key = Column(String(64), primary_key=True) # sha256 of provider/model/prompts/params
+    ai_provider = Column(String, nullable=False)
+    model_name = Column(String, nullable=False)
+    response_text = Column(Text, nullable=False)
+    hits = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+class TelemetryRollup(Base):
+    """Hourly per-provider aggregates, maintained on write so the dashboard never scans responses."""
+    __tablename__ = "telemetry_rollups"
+    id = Column(Integer, primary_key=True)
+    bucket_start = Column(DateTime, nullable=False) # UTC hour
+    ai_provider = Column(String, nullable=False)    # normalized key: openai / anthropic / google / perplexity
+    response_count = Column(Integer, default=0)
+    success_count = Column(Integer, default=0)
+    input_chars = Column(BigInteger, default=0)
+    output_chars = Column(BigInteger, default=0)
+    input_tokens = Column(BigInteger, default=0)
+    output_tokens = Column(BigInteger, default=0)
+    cost = Column(Float, default=0.0)
+    rating_sum = Column(Integer, default=0)
+    rating_count = Column(Integer, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("bucket_start", "ai_provider", name="uq_telemetry_rollups_bucket_provider"),
+    )
+
+class CredibilityEvent(Base):
+    """Append-only log of credibility changes (enforcement penalties, interrogation outcomes)."""
+    __tablename__ = "credibility_events"
+    id = Column(Integer, primary_key=True)
+    model = Column(String, nullable=False)
+    delta = Column(Integer, nullable=False)
+    score = Column(Integer, nullable=False) # Score after this event
+    source = Column(String, nullable=False) # enforcement / interrogation
+    reason = Column(Text, nullable=True)
+    details = Column(Text, nullable=True)
+    timestamp = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_credibility_events_model_id", "model", "id"),
+    )
+
+class CredibilitySnapshot(Base):
+    """Latest credibility score per model, written with each event flush for warm start."""
+    __tablename__ = "credibility_snapshots"
+    model = Column(String, primary_key=True)
+    score = Column(Integer, nullable=False)
+    last_event_id = Column(Integer, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class ResponseEnforcement(Base):
+    """Offline enforcement re-scores of stored responses, one row per (ruleset fingerprint, response)."""
+    __tablename__ = "response_enforcement"
+    id = Column(Integer, primary_key=True)
+    ruleset = Column(String, nullable=False) # Fingerprint of verbs/anchors/contract the row was scored with
+    response_id = Column(Integer, ForeignKey("responses.id", ondelete="CASCADE"), nullable=False)
+    role_name = Column(String, nullable=True)
+    status = Column(String, nullable=False) # PASSED / WARNING / VIOLATION
+    penalty = Column(Integer, default=0)
+    violations = Column(Text, nullable=True) # JSON list
+    warnings = Column(Text, nullable=True)   # JSON list
+    scored_at = Column(DateTime, default=datetime.utcnow)
+
+    # Also the resume watermark: max(response_id) for a ruleset
+    __table_args__ = (
+        UniqueConstraint("ruleset", "response_id", name="uq_response_enforcement_ruleset_response"),
+    )
+
+class WorkflowJob(Base):
+    """Background workflow or reasoning chain run, shared by every worker (see job_store.py)."""
+    __tablename__ = "workflow_jobs"
+    id = Column(String, primary_key=True) # uuid4 job id
+    status = Column(String, nullable=False, default="running") # running / complete / failed / cancelled
+    kind = Column(String, nullable=True, default="workflow") # workflow / reasoning_chain
+    dedup_key = Column(String, nullable=True) # Hash of the request; identical in-flight submissions join this job
+    template_id = Column(String, nullable=True)
+    template_name = Column(String, nullable=True)
+    question = Column(Text, nullable=True)
+    hard_mode = Column(Boolean, default=False)
+    use_cache = Column(Boolean, default=True) # False: submitted with bypass_cache; a resume keeps it off
+    error = Column(Text, nullable=True)
+    traceback = Column(Text, nullable=True)
+    final_history = Column(Text, nullable=True)
+    comparison_id = Column(Integer, nullable=True)
+    checkpoint = Column(Text, nullable=True) # JSON {context, completed, full_history} after the last finished step
+    owner = Column(String, nullable=True)    # host:pid of the worker running it
+    attempts = Column(Integer, default=1)    # Runs so far (first run + resumes)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow) # Heartbeat: bumped on every step result
+    finished_at = Column(DateTime, nullable=True)
+
+    # Sweeper: expire finished jobs / fail stale running ones
+    __table_args__ = (
+        Index("ix_workflow_jobs_status_updated", "status", "updated_at"),
+        Index("ix_workflow_jobs_dedup", "dedup_key", "status"),
+    )
+
+class WorkflowJobStep(Base):
+    """One completed step of a workflow job, in completion order."""
+    __tablename__ = "workflow_job_steps"
+    id = Column(Integer, primary_key=True)
+    job_id = Column(String, ForeignKey("workflow_jobs.id", ondelete="CASCADE"), nullable=False)
+    step = Column(Integer, nullable=True)
+    key = Column(String, nullable=True)
+    result = Column(Text, nullable=False) # JSON step result ({step, key, role, model, data})
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_workflow_job_steps_job_id", "job_id", "id"),
+    )
+
+class IdAllocator(Base):
+    __tablename__ = "id_allocator"
+    name = Column(String, primary_key=True) # Table the ids are handed out for
+    next_id = Column(Integer, nullable=False)
+
+# --- Id Pre-allocation ---
+
+COMPARISON_ID_BLOCK = int(os.getenv('COMPARISON_ID_BLOCK', '20'))
+
+class IdBlockAllocator:
+    """
+    Hi/lo id allocator: reserves a block of ids with one short UPDATE, then hands them out
+    from memory. Every Comparison insert takes its id from here, so an id can be returned to
+    the caller before the row is written (see persistence_queue.py). Unused ids in a block are
+    simply skipped when the process exits.
+    """
+
+    def __init__(self, name: str, model, block_size: int = COMPARISON_ID_BLOCK):
+        self.name = name
+        self.model = model
+        self.block_size = block_size
+        self._next = 0
+        self._end = 0
+        self._lock = threading.Lock()
+
+    def _reserve_block(self) -> int:
+        """Atomically advance the allocator row by one block. Returns the first id of the block."""
+        for _ in range(3):
+            db = SessionLocal()
+            try:
+                # The UPDATE takes the row (Postgres) / database (SQLite) write lock until commit
+                updated = db.execute(
+                    update(IdAllocator).where(IdAllocator.name == self.name).values(next_id=IdAllocator.next_id + self.block_size)
+                ).rowcount
+                if not updated:
+                    # First use: start past any rows written before the allocator existed
+                    start = (db.query(func.max(self.model.id)).scalar() or 0) + 1
+                    db.add(IdAllocator(name=self.name, next_id=start + self.block_size))
+                    db.commit()
+                    return start
+                next_id = db.query(IdAllocator.next_id).filter(IdAllocator.name == self.name).scalar()
+                db.commit()
+                return next_id - self.block_size
+            except IntegrityError:
+                db.rollback() # Another process created the row first; retry the UPDATE
+            finally:
+                db.close()
+        raise RuntimeError(f"Could not reserve an id block for {self.name}")
+
+    def next_id(self) -> int:
+        with self._lock:
+            if self._next >= self._end:
+                self._next = self._reserve_block()
+                self._end = self._next + self.block_size
+            allocated = self._next
+            self._next += 1
+            return allocated
+
+# --- Cost Ledger & Telemetry Rollups ---
+
+# Pricing per 1M tokens (USD), keyed by normalized provider. The single source for every spend figure.
+PROVIDER_PRICING = {
+    "openai": {"input": 5.00, "output": 15.00},
+    "anthropic": {"input": 3.00, "output": 15.00},
+    "google": {"input": 0.00, "output": 0.00},
+    "perplexity": {"input": 3.00, "output": 15.00}
+}
+CHARS_PER_TOKEN = 4  # Rough estimate used when the provider didn't report usage
+ROLLUP_COUNTERS = ("response_count", "success_count", "input_chars", "output_chars", "input_tokens", "output_tokens", "cost", "rating_sum", "rating_count")
+
+def normalize_provider(name: str) -> str:
+    """Map provider/model display names onto the four provider keys."""
+    p_key = name.lower() if name else 'unknown'
+    if 'openai' in p_key or 'gpt' in p_key: return 'openai'
+    if 'anthropic' in p_key or 'claude' in p_key: return 'anthropic'
+    if 'google' in p_key or 'gemini' in p_key: return 'google'
+    if 'perplexity' in p_key: return 'perplexity'
+    return p_key
+
+def hour_bucket(ts: datetime) -> datetime:
+    return (ts or datetime.utcnow()).replace(minute=0, second=0, microsecond=0)
+
+def usage_cost(provider: str, input_tokens: int, output_tokens: int) -> float:
+    price = PROVIDER_PRICING.get(normalize_provider(provider), {"input": 0, "output": 0})
+    return round((input_tokens or 0) / 1_000_000 * price["input"] + (output_tokens or 0) / 1_000_000 * price["output"], 8)
+
+def usage_record(provider: str, input_tokens: int, output_tokens: int, source: str = "provider") -> Dict:
+    """Ledger entry for one provider call: {input_tokens, output_tokens, cost, source}."""
+    return {
+        "input_tokens": int(input_tokens or 0),
+        "output_tokens": int(output_tokens or 0),
+        "cost": usage_cost(provider, input_tokens, output_tokens),
+        "source": source
+    }
+
+def estimate_usage(provider: str, input_text: str, output_text: str) -> Dict:
+    """Fallback when the provider response carried no usage block."""
+    return usage_record(provider, len(input_text or "") // CHARS_PER_TOKEN, len(output_text or "") // CHARS_PER_TOKEN, "estimate")
+
+def response_rollup_delta(question: str, response_text: str, success: bool, provider: str,
+                          input_tokens: int = None, output_tokens: int = None, cost: float = None) -> Dict:
+    """One response's contribution to its hourly rollup row."""
+    return rollup_delta_from_lengths(len(question or ""), len(response_text or ""), success, provider, input_tokens, output_tokens, cost)
+
+def rollup_delta_from_lengths(input_chars: int, output_chars: int, success: bool, provider: str,
+                              input_tokens: int = None, output_tokens: int = None, cost: float = None) -> Dict:
+    """
+    Recorded ledger values win; rows written before the ledger fall back to the chars/4 estimate.
+    Failed calls add no tokens or cost.
+    """
+    if not success:
+        input_tokens, output_tokens, cost = 0, 0, 0.0
+    elif input_tokens is None:
+        input_tokens, output_tokens = input_chars // CHARS_PER_TOKEN, output_chars // CHARS_PER_TOKEN
+    if cost is None:
+        cost = usage_cost(provider, input_tokens, output_tokens)
+    return {
+        "response_count": 1,
+        "success_count": 1 if success else 0,
+        "input_chars": input_chars,
+        "output_chars": output_chars,
+        "input_tokens": input_tokens or 0,
+        "output_tokens": output_tokens or 0,
+        "cost": cost
+    }
+
+def response_ledger_columns(r_data: Dict) -> Dict:
+    """Response column values for a result dict's "usage" entry (all None when it has none)."""
+    usage = r_data.get('usage') or {}
+    return {
+        "input_tokens": usage.get('input_tokens'),
+        "output_tokens": usage.get('output_tokens'),
+        "cost": usage.get('cost'),
+        "usage_source": usage.get('source')
+    }
+
+def merge_rollup_delta(deltas: Dict, bucket: datetime, provider: str, delta: Dict, sign: int = 1):
+    """Accumulate a delta into {(bucket, provider): {counter: value}}."""
+    target = deltas[(bucket, provider)]
+    for counter, value in delta.items():
+        target[counter] = target.get(counter, 0) + sign * value
+
+def apply_rollup_deltas(db, deltas: Dict):
+    """
+    Add accumulated deltas to their rollup rows inside the caller's transaction.
+    UPDATE ... SET c = c + ? first; a missing row is inserted in a savepoint so a concurrent
+    insert from another worker turns into a retried UPDATE instead of a failed transaction.
+    """
+    for (bucket, provider), delta in deltas.items():
+        if not any(delta.values()):
+            continue
+        values = {counter: getattr(TelemetryRollup, counter) + value for counter, value in delta.items()}
+        where = (TelemetryRollup.bucket_start == bucket, TelemetryRollup.ai_provider == provider)
+        stmt = update(TelemetryRollup).where(*where).values(values).execution_options(synchronize_session=False)
+        if db.execute(stmt).rowcount:
+            continue
+        try:
+            with db.begin_nested():
+                db.add(TelemetryRollup(bucket_start=bucket, ai_provider=provider, **{c: delta.get(c, 0) for c in ROLLUP_COUNTERS}))
+        except IntegrityError:
+            db.execute(stmt)
+
+def rollup_deltas_for_batch(batch: List[Dict]) -> Dict:
+    deltas = defaultdict(dict)
+    for item in batch:
+        question = item["comparison"]["question"]
+        for row in item["responses"]:
+            provider = normalize_provider(row["ai_provider"])
+            delta = response_rollup_delta(question, row["response_text"], row["success"], provider,
+                                          row.get("input_tokens"), row.get("output_tokens"), row.get("cost"))
+            merge_rollup_delta(deltas, hour_bucket(row["timestamp"]), provider, delta)
+    return deltas
+
+def get_rollup_totals(since: Optional[datetime] = None) -> Dict[str, Dict]:
+    """Per-provider sums over rollup buckets starting at or after `since` (all time if None)."""
+    db = SessionLocal()
+    try:
+        q = db.query(TelemetryRollup.ai_provider, *[func.sum(getattr(TelemetryRollup, c)) for c in ROLLUP_COUNTERS])
+        if since is not None:
+            q = q.filter(TelemetryRollup.bucket_start >= hour_bucket(since))
+        totals = {}
+        for row in q.group_by(TelemetryRollup.ai_provider).all():
+            totals[row[0]] = {c: (row[i + 1] or 0) for i, c in enumerate(ROLLUP_COUNTERS)}
+        return totals
+    finally:
+        db.close()
+
 # --- Core Functions ---
 
 def log_system_event(event_type: str, message: str, details: str = None):
@@ -127,48 +464,390 @@ def log_system_event(event_type: str, message: str, details: str = None):
     finally:
         db.close()
 
+def append_credibility_events(events: List[Dict], scores: Dict[str, int]):
+    """Append a batch of credibility events and upsert the snapshot rows, in one transaction. Raises on failure."""
+    db = SessionLocal()
+    try:
+        if events:
+            db.execute(insert(CredibilityEvent), events)
+        now = datetime.utcnow()
+        for model, score in scores.items():
+            last_event_id = db.query(func.max(CredibilityEvent.id)).filter(CredibilityEvent.model == model).scalar()
+            values = {"score": score, "last_event_id": last_event_id, "updated_at": now}
+            if not db.execute(update(CredibilitySnapshot).where(CredibilitySnapshot.model == model).values(values)).rowcount:
+                db.add(CredibilitySnapshot(model=model, **values))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def load_credibility_state(history_limit: int = 200) -> Dict[str, Dict]:
+    """
+    Warm-start state: {model: {"score": int, "history": [event dicts, oldest first]}}.
+    O(models) snapshot rows; events newer than a snapshot (another process flushed later) win.
+    """
+    db = SessionLocal()
+    try:
+        state = {snap.model: {"score": snap.score, "last_event_id": snap.last_event_id or 0}
+                 for snap in db.query(CredibilitySnapshot).all()}
+        # Every flush writes a snapshot row for each model it touched, so the snapshot lists all models
+        result = {}
+        for model in state:
+            events = db.query(CredibilityEvent).filter(CredibilityEvent.model == model)\
+                .order_by(desc(CredibilityEvent.id)).limit(history_limit).all()
+            history = [{
+                "model": e.model, "delta": e.delta, "score": e.score, "source": e.source,
+                "reason": e.reason, "details": e.details, "timestamp": e.timestamp
+            } for e in reversed(events)]
+            score = state[model]["score"]
+            if events and events[0].id > state[model]["last_event_id"]:
+                score = events[0].score
+            result[model] = {"score": score, "history": history}
+        return result
+    finally:
+        db.close()
+
+WORKFLOW_JOB_COLUMNS = ("status", "kind", "dedup_key", "template_id", "template_name", "question", "hard_mode", "use_cache",
+                        "error", "traceback", "final_history", "comparison_id", "owner", "attempts", "finished_at")
+
+def create_workflow_job(job_id: str, **fields):
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        values = {k: v for k, v in fields.items() if k in WORKFLOW_JOB_COLUMNS}
+        db.add(WorkflowJob(id=job_id, created_at=now, updated_at=now, **values))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def update_workflow_job(job_id: str, **fields) -> bool:
+    db = SessionLocal()
+    try:
+        values = {k: v for k, v in fields.items() if k in WORKFLOW_JOB_COLUMNS}
+        values["updated_at"] = datetime.utcnow()
+        updated = db.execute(update(WorkflowJob).where(WorkflowJob.id == job_id).values(values)).rowcount
+        db.commit()
+        return bool(updated)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def append_workflow_job_step(job_id: str, step_result: Dict, checkpoint: Dict = None):
+    """Store a finished step, the job's checkpoint and its heartbeat, in one transaction."""
+    db = SessionLocal()
+    try:
+        db.add(WorkflowJobStep(job_id=job_id, step=step_result.get("step"), key=step_result.get("key"),
+                               result=json.dumps(step_result, default=str)))
+        values = {"updated_at": datetime.utcnow()}
+        if checkpoint is not None:
+            values["checkpoint"] = json.dumps(checkpoint, default=str)
+        db.execute(update(WorkflowJob).where(WorkflowJob.id == job_id).values(values))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def get_workflow_job(job_id: str, include_checkpoint: bool = False, since: int = 0, include_results: bool = True) -> Optional[Dict]:
+    """
+    Job dict in the shape /api/workflow/status returns (timestamps as epoch seconds), or None. since=N skips the
+    first N step results; include_results=False skips the step query altogether (no "results" key).
+    """
+    db = SessionLocal()
+    try:
+        job = db.query(WorkflowJob).filter(WorkflowJob.id == job_id).first()
+        if not job:
+            return None
+        result = {col: getattr(job, col) for col in WORKFLOW_JOB_COLUMNS if col != "finished_at"}
+        result.update({
+            "job_id": job.id,
+            "created_at": job.created_at.replace(tzinfo=timezone.utc).timestamp() if job.created_at else None,
+            "updated_at": job.updated_at.replace(tzinfo=timezone.utc).timestamp() if job.updated_at else None
+        })
+        if include_results:
+            steps = db.query(WorkflowJobStep.result).filter(WorkflowJobStep.job_id == job_id).order_by(WorkflowJobStep.id).offset(since).all()
+            result["results"] = [json.loads(row.result) for row in steps]
+        if include_checkpoint:
+            result["checkpoint"] = json.loads(job.checkpoint) if job.checkpoint else None
+        return result
+    finally:
+        db.close()
+
+def list_running_workflow_jobs() -> List[Dict]:
+    """{job_id, owner, attempts, updated_at (epoch)} for every running job; the recovery scan's input."""
+    db = SessionLocal()
+    try:
+        rows = db.query(WorkflowJob.id, WorkflowJob.owner, WorkflowJob.attempts, WorkflowJob.updated_at)\
+            .filter(WorkflowJob.status == "running").all()
+        return [{"job_id": row.id, "owner": row.owner, "attempts": row.attempts or 1,
+                 "updated_at": row.updated_at.replace(tzinfo=timezone.utc).timestamp() if row.updated_at else 0}
+                for row in rows]
+    finally:
+        db.close()
+
+def find_running_workflow_job(dedup_key: str) -> Optional[str]:
+    """Id of a running job submitted with this dedup key, if any."""
+    db = SessionLocal()
+    try:
+        row = db.query(WorkflowJob.id).filter(WorkflowJob.dedup_key == dedup_key, WorkflowJob.status == "running")\
+            .order_by(WorkflowJob.created_at).first()
+        return row.id if row else None
+    finally:
+        db.close()
+
+def claim_workflow_job(job_id: str, expected_owner: Optional[str], owner: str, statuses=("running",)) -> bool:
+    """Compare-and-set the job's owner (only if it is still `expected_owner` and in `statuses`); marks it running."""
+    owner_filter = WorkflowJob.owner.is_(None) if expected_owner is None else WorkflowJob.owner == expected_owner
+    db = SessionLocal()
+    try:
+        claimed = db.execute(update(WorkflowJob)
+                             .where(WorkflowJob.id == job_id, owner_filter, WorkflowJob.status.in_(statuses))
+                             .values(owner=owner, status="running", error=None, traceback=None, finished_at=None,
+                                     attempts=func.coalesce(WorkflowJob.attempts, 1) + 1, updated_at=datetime.utcnow())).rowcount
+        db.commit()
+        return bool(claimed)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def delete_workflow_job_steps(job_id: str, keep_keys) -> int:
+    """Drop step results that a resume will re-run (everything whose key is not in keep_keys)."""
+    db = SessionLocal()
+    try:
+        q = db.query(WorkflowJobStep).filter(WorkflowJobStep.job_id == job_id)
+        if keep_keys:
+            q = q.filter(WorkflowJobStep.key.notin_(list(keep_keys)))
+        deleted = q.delete(synchronize_session=False)
+        db.commit()
+        return deleted
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def expire_workflow_jobs(finished_before: datetime, stale_before: Optional[datetime] = None) -> Dict[str, int]:
+    """Delete finished jobs last touched before `finished_before`; fail running jobs with no heartbeat since `stale_before` (if given)."""
+    db = SessionLocal()
+    try:
+        expired_ids = [row.id for row in db.query(WorkflowJob.id).filter(
+            WorkflowJob.status.in_(("complete", "failed", "cancelled")), WorkflowJob.updated_at < finished_before)]
+        if expired_ids:
+            db.query(WorkflowJobStep).filter(WorkflowJobStep.job_id.in_(expired_ids)).delete(synchronize_session=False)
+            db.query(WorkflowJob).filter(WorkflowJob.id.in_(expired_ids)).delete(synchronize_session=False)
+        now = datetime.utcnow()
+        stale = 0
+        if stale_before is not None:
+            stale = db.execute(update(WorkflowJob).where(WorkflowJob.status == "running", WorkflowJob.updated_at < stale_before)
+                               .values(status="failed", error="Workflow worker stopped responding (no progress before the stale timeout)",
+                                       updated_at=now, finished_at=now)).rowcount
+        db.commit()
+        return {"expired": len(expired_ids), "stale": stale}
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
 def init_database():
-    """Create tables if they don't exist"""
+    """Create tables if they don't exist, then apply pending schema migrations (indexes on existing tables)"""
+    from migrations import run_migrations
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine, Base.metadata)
     print(f"✅ Database initialized ({engine.url.drivername})")
 
 def get_db():
     return SessionLocal()
 
-def save_comparison(question: str, responses: Dict, document_content: str = None, document_name: str = None) -> int:
+comparison_ids = IdBlockAllocator("comparisons", Comparison)
+
+def build_comparison_rows(comparison_id: int, question: str, responses: Dict, document_content: str = None, document_name: str = None) -> Dict:
+    """Column dicts for one Comparison and its Response rows, ready for a bulk insert."""
+    now = datetime.utcnow()
+    return {
+        "comparison": {
+            "id": comparison_id,
+            "question": question,
+            "document_content": document_content,
+            "document_name": document_name,
+            "timestamp": now,
+            "saved": False
+        },
+        "responses": [{
+            "comparison_id": comparison_id,
+            "ai_provider": ai_name,
+            "model_name": r_data.get('model', 'Unknown'),
+            "response_text": r_data.get('response', ''),
+            "response_time": r_data.get('time', 0),
+            "success": r_data.get('success', False),
+            "thought_text": r_data.get('thought', ''),
+            "self_selected_persona": r_data.get('self_selected_persona', None),
+            **response_ledger_columns(r_data),
+            "timestamp": now
+        } for ai_name, r_data in responses.items()]
+    }
+
+def bulk_insert_comparisons(batch: List[Dict]) -> int:
+    """
+    Write many build_comparison_rows() payloads in a single transaction
+    (executemany / multi-row VALUES on both SQLite and Postgres). Raises on failure.
+    """
+    if not batch:
+        return 0
     db = SessionLocal()
     try:
-        # Create Comparison
-        comp = Comparison(
-            question=question,
-            document_content=document_content,
-            document_name=document_name,
-            saved=False
-        )
-        db.add(comp)
+        db.execute(insert(Comparison), [item["comparison"] for item in batch])
+        response_rows = [row for item in batch for row in item["responses"]]
+        if response_rows:
+            db.execute(insert(Response), response_rows)
+        apply_rollup_deltas(db, rollup_deltas_for_batch(batch))
         db.commit()
-        db.refresh(comp)
-        
-        # Create Responses
+        return len(batch)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def save_comparison(question: str, responses: Dict, document_content: str = None, document_name: str = None) -> int:
+    """Synchronous save (one transaction). /api/ask uses the write-behind persistence_queue instead."""
+    try:
+        comparison_id = comparison_ids.next_id()
+        bulk_insert_comparisons([build_comparison_rows(comparison_id, question, responses, document_content, document_name)])
+        return comparison_id
+    except Exception as e:
+        print(f"Error saving comparison: {e}")
+        return -1
+
+def update_comparison_responses(comparison_id: int, responses: Dict) -> bool:
+    """Overwrite provider rows of an existing comparison (quorum mode: late providers replace their pending rows)."""
+    db = SessionLocal()
+    try:
+        question = db.query(Comparison.question).filter(Comparison.id == comparison_id).scalar() or ""
+        deltas = defaultdict(dict)
         for ai_name, r_data in responses.items():
-            resp = Response(
-                comparison_id=comp.id,
-                ai_provider=ai_name,
-                model_name=r_data.get('model', 'Unknown'),
-                response_text=r_data.get('response', ''),
-                response_time=r_data.get('time', 0),
-                success=r_data.get('success', False),
-                thought_text=r_data.get('thought', ''),
-                self_selected_persona=r_data.get('self_selected_persona', None)
-            )
-            db.add(resp)
-        
+            resp = db.query(Response).filter(
+                Response.comparison_id == comparison_id,
+                Response.ai_provider == ai_name
+            ).first()
+            provider = normalize_provider(ai_name)
+            if resp is None:
+                resp = Response(comparison_id=comparison_id, ai_provider=ai_name, timestamp=datetime.utcnow())
+                db.add(resp)
+            else:
+                # Retract the pending row's contribution before adding the final one
+                merge_rollup_delta(deltas, hour_bucket(resp.timestamp), provider, response_rollup_delta(
+                    question, resp.response_text, resp.success, provider, resp.input_tokens, resp.output_tokens, resp.cost), sign=-1)
+            ledger = response_ledger_columns(r_data)
+            merge_rollup_delta(deltas, hour_bucket(resp.timestamp), provider, response_rollup_delta(
+                question, r_data.get('response', ''), r_data.get('success', False), provider, ledger["input_tokens"], ledger["output_tokens"], ledger["cost"]))
+            for column, value in ledger.items():
+                setattr(resp, column, value)
+            resp.model_name = r_data.get('model', 'Unknown')
+            resp.response_text = r_data.get('response', '')
+            resp.response_time = r_data.get('time', 0)
+            resp.success = r_data.get('success', False)
+            resp.thought_text = r_data.get('thought', '')
+            resp.self_selected_persona = r_data.get('self_selected_persona', None)
+
+        apply_rollup_deltas(db, deltas)
         db.commit()
-        return comp.id
+        return True
     except Exception as e:
         db.rollback()
-        print(f"Error saving comparison: {e}")
-        return -1
+        print(f"Error updating comparison responses: {e}")
+        return False
+    finally:
+        db.close()
+
+def get_cached_responses(cache_keys: List[str]) -> Dict[str, Dict]:
+    """Fetch the live response cache entries among cache_keys in one query: {cache_key: entry}. Read-only."""
+    if not cache_keys:
+        return {}
+    db = SessionLocal()
+    try:
+        entries = db.query(ResponseCacheEntry).filter(
+            ResponseCacheEntry.cache_key.in_(cache_keys),
+            ResponseCacheEntry.expires_at > datetime.utcnow()
+        ).all()
+        return {entry.cache_key: {
+            "provider": entry.ai_provider,
+            "model": entry.model_name,
+            "text": entry.response_text,
+            # Stored as naive UTC; .timestamp() on a naive datetime would read it as local time
+            "created_at": entry.created_at.replace(tzinfo=timezone.utc).timestamp(),
+            "expires_at": entry.expires_at.replace(tzinfo=timezone.utc).timestamp()
+        } for entry in entries}
+    except Exception as e:
+        print(f"Error reading response cache: {e}")
+        return {}
+    finally:
+        db.close()
+
+def add_cached_response_hits(hits: Dict[str, int]) -> bool:
+    """Add batched hit counts ({cache_key: hits}) to their response cache rows in one transaction."""
+    db = SessionLocal()
+    try:
+        for cache_key, count in hits.items():
+            db.query(ResponseCacheEntry).filter(ResponseCacheEntry.cache_key == cache_key).update(
+                {ResponseCacheEntry.hits: func.coalesce(ResponseCacheEntry.hits, 0) + count}, synchronize_session=False)
+        db.commit()
+        return True
+    except Exception as e:
+        db.rollback()
+        print(f"Error recording response cache hits: {e}")
+        return False
+    finally:
+        db.close()
+
+def store_cached_response(cache_key: str, ai_provider: str, model_name: str, response_text: str, expires_at: datetime) -> bool:
+    """Insert or refresh a response cache entry."""
+    db = SessionLocal()
+    try:
+        entry = db.query(ResponseCacheEntry).filter(ResponseCacheEntry.cache_key == cache_key).first()
+        if entry:
+            entry.response_text = response_text
+            entry.model_name = model_name
+            entry.created_at = datetime.utcnow()
+            entry.expires_at = expires_at
+        else:
+            db.add(ResponseCacheEntry(
+                cache_key=cache_key,
+                ai_provider=ai_provider,
+                model_name=model_name,
+                response_text=response_text,
+                expires_at=expires_at
+            ))
+        db.commit()
+        return True
+    except Exception as e:
+        db.rollback()
+        print(f"Error writing response cache: {e}")
+        return False
+    finally:
+        db.close()
+
+def purge_expired_cached_responses() -> int:
+    """Delete expired response cache rows. Returns the number removed."""
+    db = SessionLocal()
+    try:
+        removed = db.query(ResponseCacheEntry).filter(ResponseCacheEntry.expires_at <= datetime.utcnow()).delete()
+        db.commit()
+        return removed
+    except Exception as e:
+        db.rollback()
+        print(f"Error purging response cache: {e}")
+        return 0
     finally:
         db.close()
 
@@ -194,7 +873,14 @@ def update_response_rating(comparison_id: int, ai_provider: str, rating: int) ->
         ).first()
         
         if resp:
+            previous = resp.individual_rating
+            deltas = defaultdict(dict)
+            merge_rollup_delta(deltas, hour_bucket(resp.timestamp), normalize_provider(resp.ai_provider), {
+                "rating_sum": rating - (previous or 0),
+                "rating_count": 0 if previous is not None else 1
+            })
             resp.individual_rating = rating
+            apply_rollup_deltas(db, deltas)
             db.commit()
             return True
         return False
@@ -296,39 +982,14 @@ def get_best_config(category: str) -> Optional[Dict]:
         db.close()
 
 def get_total_spending() -> Dict:
-    pricing_config = {
-        "openai": {"input": 5.00, "output": 15.00},
-        "anthropic": {"input": 3.00, "output": 15.00},
-        "google": {"input": 0.00, "output": 0.00},
-        "perplexity": {"input": 3.00, "output": 15.00}
+    """All-time spend per provider, summed from the ledger-backed rollups."""
+    totals = get_rollup_totals()
+    breakdown = {p: round(float(totals.get(p, {}).get("cost", 0.0)), 4) for p in PROVIDER_PRICING}
+    return {
+        "total": round(sum(t["cost"] for t in totals.values()), 4),
+        "breakdown": breakdown,
+        "tokens": {p: {"input": t["input_tokens"], "output": t["output_tokens"]} for p, t in totals.items()}
     }
-    
-    db = SessionLocal()
-    try:
-        # Join Comparison + Response
-        responses = db.query(Comparison.question, Response.ai_provider, Response.response_text)\
-            .join(Response, Comparison.id == Response.comparison_id)\
-            .filter(Response.success == True)\
-            .all()
-            
-        breakdown = {p: 0.0 for p in pricing_config.keys()}
-        total = 0.0
-        
-        for q, provider, text in responses:
-            p_key = provider.lower()
-            if p_key in pricing_config:
-                p = pricing_config[p_key]
-                cost = (len(q or "") / 4 / 1_000_000 * p["input"]) + \
-                       (len(text or "") / 4 / 1_000_000 * p["output"])
-                breakdown[p_key] += cost
-                total += cost
-                
-        return {
-            "total": round(total, 4),
-            "breakdown": {p: round(c, 4) for p, c in breakdown.items()}
-        }
-    finally:
-        db.close()
 
 def get_analytics_summary() -> Dict:
     db = SessionLocal()
@@ -384,7 +1045,7 @@ def get_analytics_summary() -> Dict:
 def get_recent_comparisons(limit: int = 50) -> List[Dict]:
     db = SessionLocal()
     try:
-        comps = db.query(Comparison).order_by(desc(Comparison.timestamp)).limit(limit).all()
+        comps = db.query(Comparison).options(selectinload(Comparison.responses)).order_by(desc(Comparison.timestamp)).limit(limit).all()
         results = []
         for c in comps:
             c_dict = {
@@ -394,8 +1055,7 @@ def get_recent_comparisons(limit: int = 50) -> List[Dict]:
                 "saved": c.saved, "tags": c.tags,
                 "responses": []
             }
-            # Fetch responses manually or rely on relationship (lazy load)
-            # Relationship is easier but we need to convert to dict
+            # Responses are eager-loaded in one extra query (selectinload) instead of one per comparison
             for r in c.responses:
                 r_dict = {
                     "id": r.id, "ai_provider": r.ai_provider, "model_name": r.model_name,
@@ -413,7 +1073,7 @@ def get_recent_comparisons(limit: int = 50) -> List[Dict]:
 def get_saved_comparisons() -> List[Dict]:
     db = SessionLocal()
     try:
-        comps = db.query(Comparison).filter(Comparison.saved == True).order_by(desc(Comparison.timestamp)).all()
+        comps = db.query(Comparison).options(selectinload(Comparison.responses)).filter(Comparison.saved == True).order_by(desc(Comparison.timestamp)).all()
         results = []
         for c in comps:
             c_dict = {
@@ -437,7 +1097,7 @@ def get_saved_comparisons() -> List[Dict]:
 def search_comparisons(query: str) -> List[Dict]:
     db = SessionLocal()
     try:
-        comps = db.query(Comparison).filter(Comparison.question.ilike(f'%{query}%')).order_by(desc(Comparison.timestamp)).limit(50).all()
+        comps = db.query(Comparison).options(selectinload(Comparison.responses)).filter(Comparison.question.ilike(f'%{query}%')).order_by(desc(Comparison.timestamp)).limit(50).all()
         results = []
         for c in comps:
             c_dict = {
@@ -457,6 +1117,117 @@ def search_comparisons(query: str) -> List[Dict]:
     finally:
         db.close()
 
+def iter_comparison_questions(since: Optional[datetime] = None, batch_size: int = 1000):
+    """Yield (id, question) for every comparison (or those written since `since`), in id order, one batch per query."""
+    db = SessionLocal()
+    try:
+        last_id = 0
+        while True:
+            q = db.query(Comparison.id, Comparison.question).filter(Comparison.id > last_id)
+            if since is not None:
+                q = q.filter(Comparison.timestamp >= since)
+            rows = q.order_by(Comparison.id).limit(batch_size).all()
+            if not rows:
+                break
+            for row in rows:
+                yield row.id, row.question
+            last_id = rows[-1].id
+    finally:
+        db.close()
+
+def iter_response_chunks(after_id: int = 0, chunk_size: int = 2000):
+    """Yield lists of (response_id, question, response_text) for successful responses with id > after_id, keyset-paged in id order."""
+    db = SessionLocal()
+    try:
+        last_id = after_id
+        while True:
+            rows = db.query(Response.id, Comparison.question, Response.response_text)\
+                .join(Comparison, Comparison.id == Response.comparison_id)\
+                .filter(Response.id > last_id, Response.success == True)\
+                .order_by(Response.id).limit(chunk_size).all()
+            if not rows:
+                break
+            yield [tuple(row) for row in rows]
+            last_id = rows[-1].id
+            db.expunge_all()
+    finally:
+        db.close()
+
+def count_responses_after(after_id: int = 0) -> int:
+    db = SessionLocal()
+    try:
+        return db.query(func.count(Response.id)).filter(Response.id > after_id, Response.success == True).scalar() or 0
+    finally:
+        db.close()
+
+def get_enforcement_watermark(ruleset: str) -> int:
+    """Highest response id already re-scored under `ruleset` (0 if none); results are written in id order."""
+    db = SessionLocal()
+    try:
+        return db.query(func.max(ResponseEnforcement.response_id)).filter(ResponseEnforcement.ruleset == ruleset).scalar() or 0
+    finally:
+        db.close()
+
+def save_enforcement_results(rows: List[Dict]) -> int:
+    """Bulk insert one scored chunk (a single transaction, so a chunk is either fully written or not at all)."""
+    if not rows:
+        return 0
+    db = SessionLocal()
+    try:
+        db.execute(insert(ResponseEnforcement), rows)
+        db.commit()
+        return len(rows)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def clear_enforcement_results(ruleset: str) -> int:
+    db = SessionLocal()
+    try:
+        deleted = db.query(ResponseEnforcement).filter(ResponseEnforcement.ruleset == ruleset).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+    finally:
+        db.close()
+
+def get_enforcement_summary(ruleset: str) -> Dict[str, int]:
+    """{status: count} for one re-scoring run."""
+    db = SessionLocal()
+    try:
+        rows = db.query(ResponseEnforcement.status, func.count(ResponseEnforcement.id))\
+            .filter(ResponseEnforcement.ruleset == ruleset).group_by(ResponseEnforcement.status).all()
+        return {status: count for status, count in rows}
+    finally:
+        db.close()
+
+def get_comparison_results(comparison_id: int) -> Optional[Dict]:
+    """Load a past comparison as {question, timestamp, results: {provider: result dict}} for re-serving."""
+    db = SessionLocal()
+    try:
+        comp = db.query(Comparison).filter(Comparison.id == comparison_id).first()
+        if not comp:
+            return None
+        results = {}
+        for r in comp.responses:
+            results[r.ai_provider] = {
+                "success": r.success,
+                "response": r.response_text,
+                "thought": r.thought_text,
+                "model": r.model_name,
+                "time": r.response_time or 0,
+                "cost": 0,
+                "self_selected_persona": r.self_selected_persona
+            }
+        return {
+            "question": comp.question,
+            "timestamp": comp.timestamp.isoformat() if comp.timestamp else None,
+            "results": results
+        }
+    finally:
+        db.close()
+
 def get_comparison_stats() -> Dict:
     db = SessionLocal()
     try:
@@ -476,6 +1247,15 @@ def delete_comparison(comparison_id: int):
     try:
         comp = db.query(Comparison).filter(Comparison.id == comparison_id).first()
         if comp:
+            # Keep the rollups equal to an aggregate over the remaining rows
+            deltas = defaultdict(dict)
+            for resp in comp.responses:
+                provider = normalize_provider(resp.ai_provider)
+                delta = response_rollup_delta(comp.question, resp.response_text, resp.success, provider, resp.input_tokens, resp.output_tokens, resp.cost)
+                if resp.individual_rating is not None:
+                    delta.update(rating_sum=resp.individual_rating, rating_count=1)
+                merge_rollup_delta(deltas, hour_bucket(resp.timestamp), provider, delta, sign=-1)
+            apply_rollup_deltas(db, deltas)
             db.delete(comp)
             db.commit()
     finally:
@@ -486,15 +1266,6 @@ def get_dashboard_telemetry() -> Dict:
     Real-time telemetry for the Mission Control dashboard.
     Counts prompts, costs, top personas, and anomalies.
     """
-    from datetime import timedelta
-    
-    pricing = {
-        "openai": {"input": 5.00, "output": 15.00},
-        "anthropic": {"input": 3.00, "output": 15.00},
-        "google": {"input": 0.00, "output": 0.00},
-        "perplexity": {"input": 3.00, "output": 15.00}
-    }
-
     db = SessionLocal()
     try:
         now = datetime.utcnow()
@@ -505,40 +1276,12 @@ def get_dashboard_telemetry() -> Dict:
         total_prompts_24h = db.query(Comparison).filter(Comparison.timestamp >= past_24h).count()
         total_prompts_7d = db.query(Comparison).filter(Comparison.timestamp >= past_7d).count()
         
-        # 2. Daily Cost
-        # Uses Comparison.question joined with Response
-        responses_24h = db.query(Comparison.question, Response.ai_provider, Response.response_text)\
-             .join(Response, Comparison.id == Response.comparison_id)\
-             .filter(Comparison.timestamp >= past_24h)\
-             .all()
-        
-        cost_24h = 0.0
-        for q, provider, text in responses_24h:
-             pk = provider.lower() if provider else 'unknown'
-             if pk in pricing:
-                 c = pricing[pk]
-                 # Rough token estimate: 1 char ~= 0.25 tokens
-                 cost = (len(q or "") * 0.25 / 1_000_000 * c["input"]) + \
-                        (len(text or "") * 0.25 / 1_000_000 * c["output"])
-                 cost_24h += cost
-
-        # 3. 7-Day Cost
-        responses_7d_q = db.query(Comparison.question, Response.ai_provider, Response.response_text)\
-             .join(Response, Comparison.id == Response.comparison_id)\
-             .filter(Comparison.timestamp >= past_7d)\
-             .all()
-        
-        cost_7d = 0.0
-        prompts_processed = 0
-        for q, provider, text in responses_7d_q:
-             prompts_processed += 1
-             pk = provider.lower() if provider else 'unknown'
-             if pk in pricing:
-                 c = pricing[pk]
-                 cost = (len(q or "") * 0.25 / 1_000_000 * c["input"]) + \
-                        (len(text or "") * 0.25 / 1_000_000 * c["output"])
-                 cost_7d += cost
-                 
+        # 2-3. Costs from the hourly rollups (O(buckets), not O(responses))
+        totals_24h = get_rollup_totals(since=past_24h)
+        totals_7d = get_rollup_totals(since=past_7d)
+        cost_24h = sum(t["cost"] for t in totals_24h.values())
+        cost_7d = sum(t["cost"] for t in totals_7d.values())
+        prompts_processed = sum(t["response_count"] for t in totals_7d.values())
         avg_cost = (cost_7d / prompts_processed) if prompts_processed > 0 else 0.0
 
         # 4. Top Used Schema (Persona)
@@ -570,13 +1313,7 @@ def get_dashboard_telemetry() -> Dict:
             if persona not in persona_matrix:
                 persona_matrix[persona] = {"openai": 0, "anthropic": 0, "google": 0, "perplexity": 0}
             
-            p_key = provider.lower() if provider else 'unknown'
-            # Map common names to keys
-            if 'openai' in p_key or 'gpt' in p_key: p_key = 'openai'
-            elif 'anthropic' in p_key or 'claude' in p_key: p_key = 'anthropic'
-            elif 'google' in p_key or 'gemini' in p_key: p_key = 'google'
-            elif 'perplexity' in p_key: p_key = 'perplexity'
-            
+            p_key = normalize_provider(provider)
             if p_key in persona_matrix[persona]:
                 persona_matrix[persona][p_key] += count
 
@@ -629,42 +1366,21 @@ def get_dashboard_telemetry() -> Dict:
                 "message": "System nominal. No events detected."
             })
 
-        # 6. Model Leaderboard (Based on individual ratings)
+        # 6. Model Leaderboard (Based on individual ratings, from the rollups)
+        all_time = get_rollup_totals()
         model_leaderboard = {}
-        ratings_q = db.query(
-            Response.ai_provider,
-            func.avg(Response.individual_rating).label('avg_rating'),
-            func.count(Response.individual_rating).label('rated_count')
-        ).filter(
-            Response.individual_rating.isnot(None)
-        ).group_by(Response.ai_provider).all()
-
-        for provider, avg_rating, rated_count in ratings_q:
-            p_key = provider.lower() if provider else 'unknown'
-            if 'openai' in p_key or 'gpt' in p_key: p_key = 'openai'
-            elif 'anthropic' in p_key or 'claude' in p_key: p_key = 'anthropic'
-            elif 'google' in p_key or 'gemini' in p_key: p_key = 'google'
-            elif 'perplexity' in p_key: p_key = 'perplexity'
-
-            model_leaderboard[p_key] = {
-                "avg_rating": round(float(avg_rating), 2) if avg_rating else 0,
-                "rated_count": rated_count
-            }
+        for p_key, t in all_time.items():
+            if t["rating_count"]:
+                model_leaderboard[p_key] = {
+                    "avg_rating": round(t["rating_sum"] / t["rating_count"], 2),
+                    "rated_count": t["rating_count"]
+                }
 
         # 7. Cost by Provider (7-day breakdown)
         cost_by_provider = {"openai": 0.0, "anthropic": 0.0, "google": 0.0, "perplexity": 0.0}
-        for q, provider, text in responses_7d_q:
-            pk = provider.lower() if provider else 'unknown'
-            if 'openai' in pk or 'gpt' in pk: pk = 'openai'
-            elif 'anthropic' in pk or 'claude' in pk: pk = 'anthropic'
-            elif 'google' in pk or 'gemini' in pk: pk = 'google'
-            elif 'perplexity' in pk: pk = 'perplexity'
-
-            if pk in pricing:
-                c = pricing[pk]
-                cost = (len(q or "") * 0.25 / 1_000_000 * c["input"]) + \
-                       (len(text or "") * 0.25 / 1_000_000 * c["output"])
-                cost_by_provider[pk] = cost_by_provider.get(pk, 0) + cost
+        for p_key, t in totals_7d.items():
+            if p_key in PROVIDER_PRICING:
+                cost_by_provider[p_key] = cost_by_provider.get(p_key, 0) + t["cost"]
 
         # Round costs
         for k in cost_by_provider:
@@ -700,7 +1416,7 @@ def get_dashboard_telemetry() -> Dict:
             "recent_missions": recent_missions,
             "infra": {
                 "railway_uptime": "99.9%",
-                "postgres_rows": f"{db.query(Response).count()}",
+                "postgres_rows": f"{sum(t['response_count'] for t in all_time.values())}",
                 "aws_status": "Stopped"
             },
             "model_leaderboard": model_leaderboard,
@@ -0,0 +1,94 @@
+"""
+Request Deadlines.
+A Deadline is created once at request entry and handed down through every query_* call,
+retry loop and fallback chain. Each attempt gets min(its own timeout, time left), and a
+fallback is only tried if there is enough time left for it to plausibly finish.
+Cancelling a deadline (a background job stopped by the user) leaves no time at all, so the
+call in flight finishes but nothing new is started.
+"""
+
+import os
+import time
+from typing import Optional
+
+# Latency budget per entry point (seconds). Interactive routes stay under gunicorn --timeout 300.
+REQUEST_BUDGETS = {
+    "ask": float(os.getenv('ASK_BUDGET_SECONDS', '280')),
+    "reasoning_chain": float(os.getenv('REASONING_CHAIN_BUDGET_SECONDS', '280')),
+    "interrogate": float(os.getenv('INTERROGATE_BUDGET_SECONDS', '120')),
+    "workflow": float(os.getenv('WORKFLOW_BUDGET_SECONDS', '1800')),  # Runs in the background
+    "reasoning_chain_job": float(os.getenv('REASONING_CHAIN_JOB_BUDGET_SECONDS', '900'))  # Background reasoning chain
+}
+
+# Rate-limit queue class per entry point (see rate_limiter.py); anything not listed is interactive
+REQUEST_PRIORITIES = {
+    "workflow": "workflow",
+    "reasoning_chain_job": "workflow"
+}
+
+# Don't start a new attempt (retry or fallback model) with less than this left
+MIN_ATTEMPT_SECONDS = float(os.getenv('MIN_ATTEMPT_SECONDS', '5'))
+
+
+class DeadlineExceeded(Exception):
+    """Raised when there is not enough budget left to start another provider attempt."""
+    pass
+
+
+class Deadline:
+    """
+    Monotonic wall-clock budget for one request.
+    Deadline() with no budget never expires, so callers can treat it uniformly.
+    priority travels with it to every provider call (the rate limiter's queue order).
+    """
+
+    def __init__(self, budget: Optional[float] = None, label: str = "request", priority: str = "interactive"):
+        self.label = label
+        self.priority = priority
+        self.budget = budget
+        self.started_at = time.monotonic()
+        self.expires_at = None if budget is None else self.started_at + budget
+        self.cancelled = False
+
+    @classmethod
+    def for_endpoint(cls, name: str) -> "Deadline":
+        return cls(REQUEST_BUDGETS[name], label=name, priority=REQUEST_PRIORITIES.get(name, "interactive"))
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def cancel(self):
+        """Revoke the rest of the budget: every later check() / allows() fails."""
+        self.cancelled = True
+
+    def remaining(self) -> float:
+        if self.cancelled:
+            return 0.0
+        if self.expires_at is None:
+            return float('inf')
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def allows(self, seconds: float = MIN_ATTEMPT_SECONDS) -> bool:
+        """True if at least `seconds` of budget are left (i.e. another attempt is worth starting)."""
+        return self.remaining() >= seconds
+
+    def timeout(self, cap: float) -> float:
+        """Per-attempt timeout: the attempt's own cap, clipped to the time left."""
+        return max(0.1, min(cap, self.remaining()))
+
+    def check(self, what: str = "next attempt"):
+        if not self.allows():
+            if self.cancelled:
+                raise DeadlineExceeded(f"{self.label} cancelled after {self.elapsed():.1f}s (skipped {what})")
+            raise DeadlineExceeded(f"{self.label} deadline exceeded after {self.elapsed():.1f}s (skipped {what})")
+
+    def __repr__(self):
+        return f"Deadline({self.label}, remaining={self.remaining():.1f}s)"
+
+
+def deadline_from(kwargs: dict) -> Deadline:
+    """Pull the request deadline out of query_* kwargs (unbounded if the caller didn't pass one)."""
+    return kwargs.get('deadline') or Deadline()
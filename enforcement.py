@@ -3,80 +3,315 @@ Enforcement Engine for TriAI Council Mode.
 Responsible for auditing AI responses against Truth Contracts and detecting adherence to strict epistemic standards.
 """
 
+import os
 import re
+import json
+import time
+import hashlib
+from bisect import bisect_left
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Any, Tuple, Optional
 
-class EnforcementEngine:
-    def __init__(self):
-        # Starting credibility is 100 for all models
-        self.credibility_scores = {
-            "openai": 100,
-            "anthropic": 100,
-            "google": 100,
-            "perplexity": 100
-        }
-        self.interrogation_history = {m: [] for m in self.credibility_scores}
-        
-        # "Corporate Speak" that indicates low-density thought
-        self.generic_verbs = {
-            "leverage", "optimize", "synergize", "balance", 
-            "enhance", "facilitate", "empower", "orchestrate",
-            "streamline", "revolutionize", "transform", "align",
-            "foster", "cultivate", "harness", "navigate"
-        }
-        
-        # Anchoring terms that legitimize a number
-        self.anchors = {
-            "source", "citation", "report", "study", "analysis", 
-            "derived", "range", "estimated", "projected", "margin",
-            "confidence", "probability", "approx", "historic", "case study"
+import numpy as np
+
+from council_roles import COUNCIL_ROLES
+from credibility_store import CredibilityStore, credibility_store
+
+# "Corporate Speak" that indicates low-density thought (whole words)
+GENERIC_VERBS = {
+    "leverage", "optimize", "synergize", "balance", 
+    "enhance", "facilitate", "empower", "orchestrate",
+    "streamline", "revolutionize", "transform", "align",
+    "foster", "cultivate", "harness", "navigate"
+}
+
+# Anchoring terms that legitimize a number (substring match within the metric's window)
+ANCHORS = {
+    "source", "citation", "report", "study", "analysis", 
+    "derived", "range", "estimated", "projected", "margin",
+    "confidence", "probability", "approx", "historic", "case study"
+}
+ANCHOR_WINDOW = 60
+
+ROLE_TERMS = {"floor value", "liquidation", "roi", "tco"}
+IMAGE_EVASION_PHRASES = [
+    "cannot view", "cannot see", "unable to view", "upload the image",
+    "text-based", "language model", "description of the image"
+]
+IMAGE_ACKNOWLEDGEMENTS = ["i see", "appears to be"]
+
+# Execution bias keyword groups (whole words). Each group is counted like one
+# re.findall over the lowered text; "###\s+action" is the one non-literal pattern.
+EXECUTION_BIAS_KEYWORDS = {
+    "action": [
+        ["do", "implement", "execute", "run", "start", "setup", "install", "configure", "mandatory"],
+        ["action plan", "steps", "immediate moves", "tactical steps", "deliverables"],
+        ["script", "code", "command", "terminal", "bypass"]
+    ],
+    "advisory": [
+        ["consider", "recommend", "approach", "framework", "strategy", "best practice"],
+        ["options", "alternatives", "roadmap", "strategic", "potential"],
+        ["consult", "advice", "guiding", "perspective"]
+    ],
+    "narrative": [
+        ["however", "caution", "note", "warn", "risks", "dangers", "limitations", "complexity"],
+        ["important to note", "should be aware", "significant drawback", "challenges"],
+        ["explore", "evaluate", "analysis", "background", "context", "nuance"],
+        ["comprehensive overview", "history", "theory"]
+    ]
+}
+
+STEPS_PATTERN = re.compile(r'(\d+\.|- |\* )')
+_WORD_CHAR = re.compile(r'\w')
+
+
+def contract_terms(roles: Dict = COUNCIL_ROLES) -> set:
+    """Every forbidden / must_label term the council truth contracts can check, as matched (lowercase)."""
+    terms = set()
+    for role in roles.values():
+        contract = role.get('truth_contract') or {}
+        terms.update(term.lower() for term in contract.get('forbidden', []))
+        terms.update(term.replace("_", " ").lower() for term in contract.get('must_label', []))
+    return terms
+
+
+def _trie_pattern(phrases) -> str:
+    """Regex alternation factored into a character trie, so each position costs one branch walk."""
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[''] = True
+
+    def render(node) -> str:
+        branches = [re.escape(ch) + render(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return render(trie)
+
+
+class EnforcementScanner:
+    """
+    Collects every lexical signal the enforcement checks and the execution-bias classifier use
+    in a single pass. The automaton is compiled once at import: metric patterns plus one
+    trie-factored alternation over all phrases (generic verbs, anchors, contract/role terms,
+    evasion phrases, bias keywords). Every alternative is a zero-width lookahead, so the regex
+    engine visits each position once and overlapping phrases are all reported; only hits
+    cross into Python.
+    """
+
+    def __init__(self, extra_terms=()):
+        # phrase -> [(kind, key, whole_word)]
+        self.signals: Dict[str, List[Tuple]] = {}
+        for verb in GENERIC_VERBS:
+            self._add(verb, "generic", verb, True)
+        for anchor in ANCHORS:
+            self._add(anchor, "anchor", anchor, False)
+        for term in set(extra_terms) | ROLE_TERMS | set(IMAGE_EVASION_PHRASES) | set(IMAGE_ACKNOWLEDGEMENTS):
+            self._add(term, "term", term, False)
+        for category, groups in EXECUTION_BIAS_KEYWORDS.items():
+            for index, group in enumerate(groups):
+                for keyword in group:
+                    self._add(keyword, "bias", (category, index), True)
+
+        # Two phrases matching at the same position are always prefix-related; report both
+        self.prefixes = {p: [q for q in self.signals if p.startswith(q)] for p in self.signals}
+
+        body = (r'(?=(?P<pct>\b\d+(?:\.\d+)?%)'
+                r'|(?P<cur>\$\d+(?:,\d+)*(?:\.\d+)?(?:k|m|b|t)?\b)'
+                r'|(?P<heading>###\s+action)'
+                r'|(?P<phrase>' + _trie_pattern(self.signals) + '))')
+        self.pattern = re.compile(body)
+        # Lower-casing can change the length of some non-ASCII text; scan the original then
+        self.pattern_ignorecase = re.compile(body, re.IGNORECASE)
+
+    def _add(self, phrase: str, kind: str, key, whole_word: bool):
+        self.signals.setdefault(phrase.lower(), []).append((kind, key, whole_word))
+
+    @staticmethod
+    def _whole_word(text: str, start: int, end: int) -> bool:
+        return (start == 0 or not _WORD_CHAR.match(text[start - 1])) and (end >= len(text) or not _WORD_CHAR.match(text[end]))
+
+    def scan(self, text: str) -> Dict[str, Any]:
+        """
+        Returns {lower, generics (first-seen order), metrics [(start, end, text)], anchors [(start, end)],
+        terms (set), bias {action, advisory, narrative}}.
+        """
+        lower = text.lower()
+        subject, pattern = (lower, self.pattern) if len(lower) == len(text) else (text, self.pattern_ignorecase)
+
+        generics: Dict[str, None] = {}
+        metrics = {"pct": [], "cur": []}
+        metric_end = {"pct": -1, "cur": -1}
+        anchors: List[Tuple[int, int]] = []
+        terms = set()
+        bias = {"action": 0, "advisory": 0, "narrative": 0}
+        group_end: Dict[Tuple, int] = {}  # per bias group, like re.findall's non-overlapping matches
+
+        for match in pattern.finditer(subject):
+            kind = match.lastgroup
+            start, end = match.span(kind)
+            if kind in metrics:
+                # finditer semantics: no match may start inside the previous one of the same pattern
+                if start >= metric_end[kind]:
+                    metrics[kind].append((start, end, text[start:end]))
+                    metric_end[kind] = end
+                continue
+            if kind == "heading":
+                if start >= group_end.get("heading", -1):
+                    bias["action"] += 1
+                    group_end["heading"] = end
+                continue
+
+            for phrase in self.prefixes[match.group(kind).lower()]:
+                phrase_end = start + len(phrase)
+                for signal, key, whole_word in self.signals[phrase]:
+                    if whole_word and not self._whole_word(subject, start, phrase_end):
+                        continue
+                    if signal == "generic":
+                        generics.setdefault(key)
+                    elif signal == "anchor":
+                        anchors.append((start, phrase_end))
+                    elif signal == "term":
+                        terms.add(key)
+                    elif start >= group_end.get(key, -1):
+                        bias[key[0]] += 1
+                        group_end[key] = phrase_end
+
+        return {
+            "lower": lower,
+            "generics": list(generics),
+            "metrics": metrics["pct"] + metrics["cur"],
+            "anchors": anchors,
+            "terms": terms,
+            "bias": bias
         }
 
-    def analyze_response(self, text: str, role_name: str, model_name: str, contract: Dict[str, Any] = None, user_query: str = "", has_image: bool = False) -> Dict[str, Any]:
+    @staticmethod
+    def has_anchor(scan: Dict, text: str, start: int, end: int) -> bool:
+        """Any anchor occurrence inside text[start - ANCHOR_WINDOW : end + ANCHOR_WINDOW]."""
+        window_start, window_end = max(0, start - ANCHOR_WINDOW), min(len(text), end + ANCHOR_WINDOW)
+        anchors = scan["anchors"]
+        i = bisect_left(anchors, (window_start, -1))
+        while i < len(anchors) and anchors[i][0] < window_end:
+            if anchors[i][1] <= window_end:
+                return True
+            i += 1
+        return False
+
+    @staticmethod
+    def has_term(scan: Dict, term: str) -> bool:
+        """Substring presence of a (lowercase) term; terms outside the compiled set fall back to `in`."""
+        return term in scan["terms"] or term in scan["lower"]
+
+    @staticmethod
+    def execution_bias(scan: Dict) -> str:
+        """Detects Execution Bias: action-forward, advisory, or narrative."""
+        action_score, advisory_score, narrative_score = (scan["bias"][k] for k in ("action", "advisory", "narrative"))
+        # Weighting: Mandatory and Concrete markers rank higher for "Action"
+        if action_score >= advisory_score and action_score >= narrative_score and action_score > 0:
+            return "action-forward"
+        elif narrative_score > advisory_score and narrative_score > action_score:
+            return "narrative"
+        else:
+            return "advisory"
+
+
+# Initialize Singleton (compiled once at import)
+enforcement_scanner = EnforcementScanner(contract_terms())
+
+
+MODELS = ("openai", "anthropic", "google", "perplexity")
+
+# Bump when the audit logic itself changes, so analyze_batch re-scores instead of resuming
+ENFORCEMENT_RULES_VERSION = 1
+BATCH_CHUNK_SIZE = 2000
+
+
+def ruleset_fingerprint(role_name: str, contract: Dict[str, Any] = None) -> str:
+    """Short hash of everything a re-score depends on: verbs, anchors, role and its truth contract."""
+    rules = {
+        "version": ENFORCEMENT_RULES_VERSION,
+        "generic_verbs": sorted(GENERIC_VERBS),
+        "anchors": sorted(ANCHORS),
+        "role": role_name,
+        "contract": contract or {}
+    }
+    return hashlib.sha1(json.dumps(rules, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def _score_chunk(rows: List[Tuple[int, str, str]], role_name: str, contract: Dict[str, Any], ruleset: str) -> List[Dict]:
+    """Process-pool worker: audit (response_id, question, text) rows with a throwaway, non-persisting store."""
+    engine = EnforcementEngine(store=CredibilityStore(persist=False))
+    results = []
+    for response_id, question, text in rows:
+        report = engine.evaluate_response(text or "", role_name, contract, user_query=question or "")
+        results.append({
+            "ruleset": ruleset,
+            "response_id": response_id,
+            "role_name": role_name,
+            "status": report["status"],
+            "penalty": report["penalty_applied"],
+            "violations": json.dumps(report["violations"]),
+            "warnings": json.dumps(report["warnings"])
+        })
+    return results
+
+class EnforcementEngine:
+    def __init__(self, store: CredibilityStore = None):
+        # Starting credibility is 100 for all models; scores live in the shared, persisted store
+        self.store = store or credibility_store
+        self.generic_verbs = GENERIC_VERBS
+        self.anchors = ANCHORS
+
+    def analyze_response(self, text: str, role_name: str, model_name: str, contract: Dict[str, Any] = None, user_query: str = "", has_image: bool = False, scan: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         Analyzes a single AI response for reliability violations.
         Returns a dict containing violations, scores, and updated credibility.
+        Pass `scan` (enforcement_scanner.scan(text)) to reuse a scan already done for the same text.
+        """
+        report = self.evaluate_response(text, role_name, contract, user_query=user_query, has_image=has_image, scan=scan)
+
+        # Update Score
+        new_score = self.store.apply(model_name, -report["penalty_applied"], reason=f"{report['status']} ({role_name})",
+                                     source="enforcement", details="; ".join(report["violations"] + report["warnings"])[:1000] or None)
+
+        return {**report, "current_credibility": new_score}
+
+    def evaluate_response(self, text: str, role_name: str, contract: Dict[str, Any] = None, user_query: str = "", has_image: bool = False, scan: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        The audit itself, without touching credibility scores (safe for re-scoring history).
+        Returns status, violations, warnings and the penalty analyze_response would apply.
         """
         violations = []
         warnings = []
         score_penalty = 0
         
-        lower_text = text.lower()
+        scan = scan or enforcement_scanner.scan(text)
         
         # 1. Generic Verb Detection (The "Fluff" Filter)
         # We count unique generic verbs used
-        words = re.findall(r'\b\w+\b', lower_text)
-        found_generics = [word for word in words if word in self.generic_verbs]
-        unique_generics = list(set(found_generics))
+        unique_generics = scan["generics"]
         
         if len(unique_generics) >= 3:
             warnings.append(f"HIGH_FLUFF_DENSITY: Used {len(unique_generics)} distinct generic verbs ({', '.join(unique_generics[:3])}...)")
             score_penalty += 2
             
         # 2. Unanchored Number Detection (The "Precision" Filter)
-        # Regex for percentages: 23%, 23.5%
-        # Regex for currency: $500, $5m, $50k
-        percentage_matches = re.finditer(r'\b\d+(\.\d+)?%', text)
-        currency_matches = re.finditer(r'\$\d+(?:,\d+)*(?:\.\d+)?(?:k|m|b|t)?\b', text, re.IGNORECASE)
-        
-        all_matches = list(percentage_matches) + list(currency_matches)
-        
-        for match in all_matches:
-            start, end = match.span()
-            # Look at a window of 50 chars before and after
-            window_start = max(0, start - 60)
-            window_end = min(len(text), end + 60)
-            context = text[window_start:window_end].lower()
-            
-            # Check if any anchor word appears in context
-            has_anchor = any(anchor in context for anchor in self.anchors)
-            
-            if not has_anchor:
+        # Percentages (23%, 23.5%) then currency ($500, $5m, $50k), as located by the scan
+        for start, end, metric in scan["metrics"]:
+            # Check if any anchor word appears within ANCHOR_WINDOW chars before and after
+            if not enforcement_scanner.has_anchor(scan, text, start, end):
                 # One last check: is it a list item or table? Often those are stripped of context but valid.
                 # Heuristic: if lines are short.
-                if "\n" not in text[window_start:window_end]:
+                if text.find("\n", max(0, start - ANCHOR_WINDOW), end + ANCHOR_WINDOW) == -1:
                      # It's inline text, so it's a higher risk
-                     violations.append(f"UNANCHORED_METRIC: '{match.group()}' found without visible justification (source, range, or derivation).")
+                     violations.append(f"UNANCHORED_METRIC: '{metric}' found without visible justification (source, range, or derivation).")
                      score_penalty += 5
 
         # 3. Truth Contract Enforcement
@@ -86,7 +321,7 @@ class EnforcementEngine:
             if "forbidden" in contract:
                 for forbidden_term in contract["forbidden"]:
                     # Simple case-insensitive existence check
-                    if forbidden_term.lower() in lower_text:
+                    if enforcement_scanner.has_term(scan, forbidden_term.lower()):
                         violations.append(f"CONTRACT_VIOLATION: Forbidden term '{forbidden_term}' detected.")
                         score_penalty += 10 # Heavy penalty for direct violation
 
@@ -95,73 +330,144 @@ class EnforcementEngine:
                 for mandatory_term in contract["must_label"]:
                     # Naive check: term must appear (e.g. "floor_value" -> "floor value")
                     clean_term = mandatory_term.replace("_", " ")
-                    if clean_term not in lower_text:
+                    if not enforcement_scanner.has_term(scan, clean_term.lower()):
                         warnings.append(f"CONTRACT_MISSING: Failed to explicitly label '{clean_term}'.")
                         score_penalty += 2
 
         # 4. Role-Specific Logic
         if role_name == "Liquidator":
-             if "floor value" not in lower_text and "liquidation" not in lower_text:
+             if "floor value" not in scan["terms"] and "liquidation" not in scan["terms"]:
                  warnings.append("ROLE_ADHERENCE: Failed to state Floor Value explicitly.")
         
         if role_name == "CFO":
-             if "roi" not in lower_text and "tco" not in lower_text:
+             if "roi" not in scan["terms"] and "tco" not in scan["terms"]:
                  warnings.append("ROLE_ADHERENCE: Missing financial primitives (ROI/TCO).")
 
         # 5. Task Relevance Check (The "Evasion" Filter)
-        evasion_result = self.verify_task_relevance(user_query, text, has_image)
+        evasion_result = self.verify_task_relevance(user_query, text, has_image, scan)
         if evasion_result:
             violations.append(f"{evasion_result['violation']}: {evasion_result['reason']}")
             score_penalty += abs(evasion_result['penalty'])
 
-        # Update Score
-        current_score = self.credibility_scores.get(model_name, 100)
-        new_score = max(0, current_score - score_penalty)
-        self.credibility_scores[model_name] = new_score
-        
         status = "PASSED"
         if violations:
             status = "VIOLATION"
         elif warnings:
             status = "WARNING"
-            
+
         return {
             "status": status,
             "violations": violations,
             "warnings": warnings,
-            "current_credibility": new_score,
             "penalty_applied": score_penalty
         }
 
+    def analyze_batch(self, role_key: str = None, chunk_size: int = BATCH_CHUNK_SIZE, workers: int = None,
+                      resume: bool = True, progress=None) -> Dict[str, Any]:
+        """
+        Re-score every stored successful response into response_enforcement, without touching
+        credibility scores. Rows stream from the database in id-ordered chunks and are audited
+        in a process pool (workers=1 runs inline); finished chunks are written in id order, so an
+        interrupted run resumes after the highest response id stored for the same ruleset.
+        `role_key` applies that council role's truth contract (default: the Standard Model rules); an
+        unknown key raises ValueError.
+        `progress(done, total)` is called after every written chunk.
+        """
+        from database import (iter_response_chunks, count_responses_after, get_enforcement_watermark,
+                              save_enforcement_results, clear_enforcement_results, get_enforcement_summary)
+
+        role_name, contract = "Standard Model", None
+        if role_key:
+            if role_key not in COUNCIL_ROLES:
+                raise ValueError(f"Unknown council role '{role_key}' (known: {', '.join(sorted(COUNCIL_ROLES))})")
+            role_config = COUNCIL_ROLES[role_key]
+            contract = role_config.get('truth_contract')
+            role_name = role_config.get('name', 'Unknown')
+        ruleset = ruleset_fingerprint(role_name, contract)
+
+        if resume:
+            start_after = get_enforcement_watermark(ruleset)
+        else:
+            clear_enforcement_results(ruleset)
+            start_after = 0
+        total = count_responses_after(start_after)
+        workers = workers or os.cpu_count() or 1
+        print(f"[ENFORCE] Ruleset {ruleset} ({role_name}): {total:,} responses to score after id {start_after}, {workers} workers")
+
+        done = 0
+        started = last_report = time.time()
+
+        def write(rows):
+            nonlocal done, last_report
+            done += save_enforcement_results(rows)
+            if progress:
+                progress(done, total)
+            now = time.time()
+            if now - last_report >= 5 or done >= total:
+                rate = done / max(now - started, 1e-6)
+                eta = (total - done) / rate if rate else 0
+                print(f"[ENFORCE] {done:,}/{total:,} ({rate:,.0f}/s, ETA {eta:.0f}s)")
+                last_report = now
+
+        chunks = iter_response_chunks(start_after, chunk_size)
+        if workers <= 1:
+            for chunk in chunks:
+                write(_score_chunk(chunk, role_name, contract, ruleset))
+        else:
+            # Bounded in-flight window keeps memory flat; popping from the left keeps writes in id order
+            in_flight = deque()
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for chunk in chunks:
+                    in_flight.append(pool.submit(_score_chunk, chunk, role_name, contract, ruleset))
+                    if len(in_flight) >= workers * 2:
+                        write(in_flight.popleft().result())
+                while in_flight:
+                    write(in_flight.popleft().result())
+
+        return {
+            "ruleset": ruleset,
+            "role": role_name,
+            "resumed_after": start_after,
+            "scored": done,
+            "seconds": round(time.time() - started, 2),
+            "statuses": get_enforcement_summary(ruleset)
+        }
+
     def track_interrogation_revision(self, model_name: str, penalty: int):
         """
         Updates the credibility score based on an interrogation outcome.
         """
-        current_score = self.credibility_scores.get(model_name, 100)
-        new_score = max(0, current_score - penalty)
-        self.credibility_scores[model_name] = new_score
-        return new_score
+        return self.store.apply(model_name, -penalty, reason="Interrogation revision", source="interrogation")
+
+    def adjust_credibility(self, model_name: str, change: int, reason: str, ceiling: int = None, details: str = None) -> int:
+        """Apply an interrogation outcome atomically. Returns the new score."""
+        return self.store.apply(model_name, change, reason=reason, source="interrogation", ceiling=ceiling, details=details)
+
+    @property
+    def credibility_scores(self) -> Dict[str, int]:
+        """Read-only snapshot; mutate through the store (apply / adjust_credibility)."""
+        return self.store.scores(MODELS)
+
+    @property
+    def interrogation_history(self) -> Dict[str, List[Dict]]:
+        return {m: self.store.history(m, source="interrogation") for m in self.store.scores(MODELS)}
 
     def get_credibility_report(self):
         return self.credibility_scores
 
-    def verify_task_relevance(self, question: str, response: str, has_image: bool) -> Optional[Dict]:
+    def verify_task_relevance(self, question: str, response: str, has_image: bool, scan: Dict[str, Any] = None) -> Optional[Dict]:
         """
         Penalize responses that don't address the actual question or evade image tasks.
         """
-        lower_response = response.lower()
         lower_question = question.lower()
 
         # 1. Image Evasion Check
         # If user uploaded image, AI must not say "I cannot see"
         if has_image:
-            evasion_phrases = [
-                "cannot view", "cannot see", "unable to view", "upload the image",
-                "text-based", "language model", "description of the image"
-            ]
-            if any(phrase in lower_response for phrase in evasion_phrases):
+            scan = scan or enforcement_scanner.scan(response)
+            if any(phrase in scan["terms"] for phrase in IMAGE_EVASION_PHRASES):
                 # Exception: unless they are explaining *what* they see
-                if "i see" not in lower_response and "appears to be" not in lower_response:
+                if not any(phrase in scan["terms"] for phrase in IMAGE_ACKNOWLEDGEMENTS):
                     return {
                         'violation': 'TASK_EVASION',
                         'penalty': -30,
@@ -172,7 +478,7 @@ class EnforcementEngine:
         # If user asked "How to...", response must have steps
         if "how to" in lower_question or "guide" in lower_question:
             # Check for numbered lists (1., 2.) or bullet points
-            if not re.search(r'(\d+\.|- |\* )', response):
+            if not STEPS_PATTERN.search(response):
                 return {
                     'violation': 'INSUFFICIENT_ACTIONABILITY',
                     'penalty': -20,
@@ -181,18 +487,41 @@ class EnforcementEngine:
         
         return None
 
+WORD_PATTERN = re.compile(r'\b\w+\b')
+# Sentence breaks and words in one scan (a maximal \w+ run is exactly a \b\w+\b match)
+SENTENCE_TOKEN_PATTERN = re.compile(r'[.!?]+|\w+')
+NUMBER_PATTERN = re.compile(r'[$]?\d+(?:,\d{3})*(?:\.\d+)?%?')
+
+
 class InterrogationAnalyzer:
     """Analyzes interrogation defense responses and updates credibility."""
     
     def __init__(self, enforcement_engine: EnforcementEngine):
         self.enforcement = enforcement_engine
+
+    def _tokenize(self, defense: str) -> Dict[str, Any]:
+        """
+        One pass over the defense, shared by the scope, classification and evidence checks:
+        lowered text plus word and sentence-break tokens, with each token's sentence number.
+        """
+        lower = defense.lower()
+        tokens = SENTENCE_TOKEN_PATTERN.findall(lower)
+        is_break = np.fromiter((token[0] in '.!?' for token in tokens), dtype=bool, count=len(tokens))
+        return {
+            "lower": lower,
+            "tokens": tokens,
+            "sentence_of_token": np.cumsum(is_break),
+            "sentence_count": int(is_break.sum()) + 1,
+            "word_count": len(defense.split())
+        }
         
     def analyze_defense(self, original_claim: str, defense_response: str, 
                        ai_model: str, role_name: str = 'Unknown') -> Dict:
         """
         Comprehensive analysis of interrogation defense.
         """
-        defense_lower = defense_response.lower()
+        tokens = self._tokenize(defense_response)
+        defense_lower = tokens["lower"]
         
         # 1. CHECK FOR WITHDRAWAL
         withdrawal_indicators = [
@@ -205,15 +534,15 @@ class InterrogationAnalyzer:
             return self._handle_withdrawal(ai_model, original_claim, defense_response)
         
         # 2. CHECK FOR SCOPE VIOLATION
-        scope_check = self._check_scope_violation(original_claim, defense_response)
+        scope_check = self._check_scope_violation(original_claim, defense_response, tokens)
         if scope_check['violated']:
             return self._handle_scope_violation(ai_model, scope_check['reason'])
         
         # 3. EXTRACT CLAIM CLASSIFICATION
-        classification = self._extract_classification(defense_response)
+        classification = self._extract_classification(defense_response, tokens)
         
         # 4. VERIFY EVIDENCE MATCHES CLASSIFICATION
-        evidence_check = self._verify_evidence(defense_response, classification)
+        evidence_check = self._verify_evidence(defense_response, classification, tokens)
         
         # 5. CHECK FOR MATERIAL REVISION
         revision_check = self._detect_revision(original_claim, defense_response)
@@ -245,29 +574,27 @@ class InterrogationAnalyzer:
                 evidence_check
             )
     
-    def _check_scope_violation(self, original_claim: str, defense: str) -> Dict:
+    def _check_scope_violation(self, original_claim: str, defense: str, tokens: Dict[str, Any] = None) -> Dict:
         """Check if AI broadened scope beyond the specific claim."""
+        tokens = tokens or self._tokenize(defense)
         
-        # Extract key terms from original claim
-        original_terms = set(re.findall(r'\b\w+\b', original_claim.lower()))
-        
-        # Count paragraphs in defense
-        paragraphs = defense.split('\n\n')
+        # Extract key terms from original claim (numbered, so sentence/term pairs fit in one int array)
+        term_ids = {term: i for i, term in enumerate(set(WORD_PATTERN.findall(original_claim.lower())))}
         
         violations = []
         
         # VIOLATION 1: Response too long (>800 words suggests deflection)
-        word_count = len(defense.split())
+        word_count = tokens["word_count"]
         if word_count > 800:
             violations.append(f"Excessive length: {word_count} words (limit: 800)")
         
         # VIOLATION 2: Introduced 5+ new topics not in original claim
-        defense_sentences = re.split(r'[.!?]+', defense)
-        new_topics = 0
-        for sentence in defense_sentences:
-            sentence_terms = set(re.findall(r'\b\w+\b', sentence.lower()))
-            if len(original_terms.intersection(sentence_terms)) < 2:
-                new_topics += 1
+        # A sentence is a new topic if it shares fewer than 2 distinct terms with the claim
+        ids = np.fromiter((term_ids.get(token, -1) for token in tokens["tokens"]), dtype=np.int64, count=len(tokens["tokens"]))
+        shared = ids >= 0  # Sentence breaks never match: claim terms are \w-only
+        pairs = np.unique(tokens["sentence_of_token"][shared] * max(len(term_ids), 1) + ids[shared])
+        shared_per_sentence = np.bincount(pairs // max(len(term_ids), 1), minlength=tokens["sentence_count"])
+        new_topics = int(np.count_nonzero(shared_per_sentence < 2))
         
         if new_topics > 5:
             violations.append(f"Introduced {new_topics} unrelated topics")
@@ -278,7 +605,7 @@ class InterrogationAnalyzer:
             'it\'s important to note', 'however', 'on the other hand',
             'various factors', 'multiple considerations'
         ]
-        deflection_count = sum(1 for phrase in deflection_phrases if phrase in defense.lower())
+        deflection_count = sum(1 for phrase in deflection_phrases if phrase in tokens["lower"])
         if deflection_count > 3:
             violations.append(f"Excessive deflection language: {deflection_count} instances")
         
@@ -287,10 +614,10 @@ class InterrogationAnalyzer:
             'reason': '; '.join(violations) if violations else None
         }
     
-    def _extract_classification(self, defense: str) -> str:
+    def _extract_classification(self, defense: str, tokens: Dict[str, Any] = None) -> str:
         """Extract how AI classified their claim."""
         
-        defense_lower = defense.lower()
+        defense_lower = tokens["lower"] if tokens else defense.lower()
         
         # Look for explicit classification
         if 'derived' in defense_lower or 'calculation' in defense_lower:
@@ -312,8 +639,9 @@ class InterrogationAnalyzer:
         # Default if not explicitly stated
         return 'UNCLASSIFIED'
     
-    def _verify_evidence(self, defense: str, classification: str) -> Dict:
+    def _verify_evidence(self, defense: str, classification: str, tokens: Dict[str, Any] = None) -> Dict:
         """Verify AI provided evidence matching their classification."""
+        defense_lower = tokens["lower"] if tokens else defense.lower()
         
         evidence = {
             'sufficient': False,
@@ -336,8 +664,8 @@ class InterrogationAnalyzer:
         
         elif classification == 'SOURCED':
             # Need to see specific source
-            has_url = 'http' in defense.lower()
-            has_citation = bool(re.search(r'(per |according to |source:|cited in)', defense.lower()))
+            has_url = 'http' in defense_lower
+            has_citation = bool(re.search(r'(per |according to |source:|cited in)', defense_lower))
             
             if has_url or has_citation:
                 evidence['sufficient'] = True
@@ -349,9 +677,9 @@ class InterrogationAnalyzer:
         
         elif classification == 'ESTIMATED':
             # Need to see assumptions and reasoning
-            has_assumptions = 'assumption' in defense.lower() or 'based on' in defense.lower()
+            has_assumptions = 'assumption' in defense_lower or 'based on' in defense_lower
             has_range = bool(re.search(r'\d+\s*[-–to]\s*\d+', defense))
-            has_caveats = any(word in defense.lower() for word in ['approximate', 'roughly', 'estimate', 'could vary'])
+            has_caveats = any(word in defense_lower for word in ['approximate', 'roughly', 'estimate', 'could vary'])
             
             if has_assumptions and has_range and has_caveats:
                 evidence['sufficient'] = True
@@ -364,8 +692,8 @@ class InterrogationAnalyzer:
         
         elif classification == 'SPECULATIVE':
             # Need to acknowledge uncertainty
-            has_confidence = bool(re.search(r'(low|medium|high)\s+confidence', defense.lower()))
-            has_scenarios = 'scenario' in defense.lower() or 'if' in defense.lower()
+            has_confidence = bool(re.search(r'(low|medium|high)\s+confidence', defense_lower))
+            has_scenarios = 'scenario' in defense_lower or 'if' in defense_lower
             
             if has_confidence and has_scenarios:
                 evidence['sufficient'] = True
@@ -387,31 +715,34 @@ class InterrogationAnalyzer:
             'changes': []
         }
         
-        if not original_numbers or not defense_numbers:
+        if not original_numbers.size or not defense_numbers.size:
             return revision
         
-        # Check each original number
-        for orig_num in original_numbers:
-            # Find closest defense number
-            closest_def = min(defense_numbers, key=lambda x: abs(x - orig_num))
-            
-            # Calculate percentage change
-            if orig_num != 0:
-                pct_change = abs((closest_def - orig_num) / orig_num) * 100
-            else:
-                pct_change = 100 if closest_def != 0 else 0
-            
-            if pct_change > 50:
-                revision['revised'] = True
-                revision['severity'] = 'MAJOR'
-                revision['changes'].append(f"{orig_num} → {closest_def} ({pct_change:.0f}% change)")
-            elif pct_change > 15:
-                # If MAJOR severity is NOT already set, set to MODERATE or keep as is. 
-                # Actually logic in user code: revision['severity'] = 'MODERATE' if revision['severity'] != 'MAJOR' else 'MAJOR'
-                current_sev = revision['severity']
-                revision['revised'] = True
-                revision['severity'] = 'MODERATE' if current_sev != 'MAJOR' else 'MAJOR'
-                revision['changes'].append(f"{orig_num} → {closest_def} ({pct_change:.0f}% change)")
+        # Closest defense number for every original number: binary search into the sorted
+        # distinct defense values, then compare the neighbours on either side.
+        # Equidistant neighbours resolve to whichever appeared first in the defense.
+        values, first_seen = np.unique(defense_numbers, return_index=True)
+        right = np.clip(np.searchsorted(values, original_numbers), 0, len(values) - 1)
+        left = np.clip(right - 1, 0, len(values) - 1)
+        left_gap = np.abs(values[left] - original_numbers)
+        right_gap = np.abs(values[right] - original_numbers)
+        take_right = (right_gap < left_gap) | ((right_gap == left_gap) & (first_seen[right] < first_seen[left]))
+        closest = np.where(take_right, values[right], values[left])
+        
+        # Percentage change (a zero original counts as 100% unless the defense kept it at zero)
+        nonzero = original_numbers != 0
+        pct_change = np.where(closest != 0, 100.0, 0.0)
+        np.divide(np.abs(closest - original_numbers), np.abs(original_numbers), out=pct_change, where=nonzero)
+        pct_change[nonzero] *= 100
+        
+        if (pct_change > 50).any():
+            revision['revised'] = True
+            revision['severity'] = 'MAJOR'
+        elif (pct_change > 15).any():
+            revision['revised'] = True
+            revision['severity'] = 'MODERATE'
+        for i in np.flatnonzero(pct_change > 15):
+            revision['changes'].append(f"{float(original_numbers[i])} → {float(closest[i])} ({pct_change[i]:.0f}% change)")
         
         # Check for range widening (e.g., $0.25-$0.50 → $0.10-$1.00)
         if '-' in original and '-' in defense:
@@ -426,7 +757,10 @@ class InterrogationAnalyzer:
                     current_sev = revision['severity']
                     revision['revised'] = True
                     revision['severity'] = 'MODERATE' if current_sev != 'MAJOR' else 'MAJOR' # User Logic assumed moderate
-                    revision['changes'].append(f"Range widened by {(def_width/orig_width - 1)*100:.0f}%")
+                    if orig_width != 0:
+                        revision['changes'].append(f"Range widened by {(def_width/orig_width - 1)*100:.0f}%")
+                    else:
+                        revision['changes'].append(f"Range widened from a single value to {def_width:g}")
         
         return revision
     
@@ -461,22 +795,12 @@ class InterrogationAnalyzer:
         
         return fabrication
     
-    def _extract_numbers(self, text: str) -> List[float]:
-        """Extract all numbers from text."""
+    def _extract_numbers(self, text: str) -> np.ndarray:
+        """Extract all numbers from text, in order of appearance."""
         # Pattern matches: 123, 1.23, $123, $1.23, 123%, etc.
-        pattern = r'[$]?\d+(?:,\d{3})*(?:\.\d+)?%?'
-        matches = re.findall(pattern, text)
-        
-        numbers = []
-        for match in matches:
-            # Clean and convert
-            clean = match.replace('$', '').replace(',', '').replace('%', '')
-            try:
-                numbers.append(float(clean))
-            except ValueError:
-                continue
-        
-        return numbers
+        matches = NUMBER_PATTERN.findall(text)
+        return np.fromiter((float(m.replace('$', '').replace(',', '').replace('%', '')) for m in matches),
+                           dtype=np.float64, count=len(matches))
     
     def _extract_range(self, text: str) -> Optional[Tuple[float, float]]:
         """Extract numeric range like $0.25-$0.50."""
@@ -500,14 +824,13 @@ class InterrogationAnalyzer:
         else:  # ADEQUATE
             credibility_change = -3
         
-        self.enforcement.credibility_scores[ai_model] += credibility_change
-        self.enforcement.credibility_scores[ai_model] = min(100, max(0, self.enforcement.credibility_scores[ai_model]))
+        new_score = self.enforcement.adjust_credibility(ai_model, credibility_change, f"Defended as {classification}", ceiling=100)
         
         return {
             'outcome': 'DEFENDED',
             'claim_classification': classification,
             'credibility_change': credibility_change,
-            'new_credibility': self.enforcement.credibility_scores[ai_model],
+            'new_credibility': new_score,
             'defense_quality': 'EXCELLENT' if evidence['quality'] == 'STRONG' else 'GOOD',
             'evidence_provided': True,
             'violations': [],
@@ -535,21 +858,17 @@ class InterrogationAnalyzer:
         if evidence['sufficient'] and evidence['quality'] in ['STRONG', 'GOOD']:
             credibility_change += 5  # Partial credit for honesty
         
-        self.enforcement.credibility_scores[ai_model] += credibility_change
-        self.enforcement.credibility_scores[ai_model] = max(0, self.enforcement.credibility_scores[ai_model])
-        
-        # Log revision
-        self.enforcement.interrogation_history[ai_model].append({
-            'original': original_claim,
-            'revised': '; '.join(revision['changes']),
-            'penalty': credibility_change
-        })
+        # Logged with the original claim and what changed
+        new_score = self.enforcement.adjust_credibility(
+            ai_model, credibility_change, f"Claim revised ({revision['severity']})",
+            details=f"Original: {original_claim[:500]} | Revised: {'; '.join(revision['changes'])}"
+        )
         
         return {
             'outcome': 'REVISED',
             'claim_classification': classification,
             'credibility_change': credibility_change,
-            'new_credibility': self.enforcement.credibility_scores[ai_model],
+            'new_credibility': new_score,
             'defense_quality': 'WEAK',
             'evidence_provided': evidence['sufficient'],
             'violations': [f"Material revision: {change}" for change in revision['changes']],
@@ -566,14 +885,13 @@ class InterrogationAnalyzer:
         
         credibility_change = -20
         
-        self.enforcement.credibility_scores[ai_model] += credibility_change
-        self.enforcement.credibility_scores[ai_model] = max(0, self.enforcement.credibility_scores[ai_model])
+        new_score = self.enforcement.adjust_credibility(ai_model, credibility_change, "Claim withdrawn")
         
         return {
             'outcome': 'WITHDRAWN',
             'claim_classification': 'UNSUBSTANTIATED',
             'credibility_change': credibility_change,
-            'new_credibility': self.enforcement.credibility_scores[ai_model],
+            'new_credibility': new_score,
             'defense_quality': 'FAILED',
             'evidence_provided': False,
             'violations': ['Claim withdrawn - insufficient evidence'],
@@ -589,14 +907,13 @@ class InterrogationAnalyzer:
         
         credibility_change = -15
         
-        self.enforcement.credibility_scores[ai_model] += credibility_change
-        self.enforcement.credibility_scores[ai_model] = max(0, self.enforcement.credibility_scores[ai_model])
+        new_score = self.enforcement.adjust_credibility(ai_model, credibility_change, f"Scope violation: {reason}")
         
         return {
             'outcome': 'SCOPE_VIOLATION',
             'claim_classification': 'UNDEFENDED',
             'credibility_change': credibility_change,
-            'new_credibility': self.enforcement.credibility_scores[ai_model],
+            'new_credibility': new_score,
             'defense_quality': 'FAILED',
             'evidence_provided': False,
             'violations': [f'Scope violation: {reason}'],
@@ -613,14 +930,13 @@ class InterrogationAnalyzer:
         
         credibility_change = -8
         
-        self.enforcement.credibility_scores[ai_model] += credibility_change
-        self.enforcement.credibility_scores[ai_model] = max(0, self.enforcement.credibility_scores[ai_model])
+        new_score = self.enforcement.adjust_credibility(ai_model, credibility_change, f"Weak {classification} defense")
         
         return {
             'outcome': 'DEFENDED',
             'claim_classification': classification,
             'credibility_change': credibility_change,
-            'new_credibility': self.enforcement.credibility_scores[ai_model],
+            'new_credibility': new_score,
             'defense_quality': 'WEAK',
             'evidence_provided': False,
             'violations': [f'Insufficient evidence for {classification} classification'],
@@ -636,14 +952,13 @@ class InterrogationAnalyzer:
         
         credibility_change = -30  # Severe penalty
         
-        self.enforcement.credibility_scores[ai_model] += credibility_change
-        self.enforcement.credibility_scores[ai_model] = max(0, self.enforcement.credibility_scores[ai_model])
+        new_score = self.enforcement.adjust_credibility(ai_model, credibility_change, "Fabrication detected", details="; ".join(evidence))
         
         return {
             'outcome': 'FABRICATED',
             'claim_classification': 'FRAUDULENT',
             'credibility_change': credibility_change,
-            'new_credibility': self.enforcement.credibility_scores[ai_model],
+            'new_credibility': new_score,
             'defense_quality': 'FAILED',
             'evidence_provided': False,
             'violations': [f'Fabrication detected: {e}' for e in evidence],
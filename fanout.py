@@ -0,0 +1,129 @@
+"""
+Async Fan-Out Engine for TriAI Council Mode.
+Runs every provider call (and the consensus pass) on one shared asyncio event loop, so an
+in-flight comparison costs a handful of coroutines instead of a pool of blocked threads.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future, TimeoutError as FuturesTimeoutError
+from typing import Any, Awaitable, Coroutine, Dict, Optional
+
+
+class FanoutEngine:
+    """
+    Owns a single background event loop per process.
+    Flask request threads submit coroutines with run()/submit(); the loop does the waiting.
+    The loop is started lazily so gunicorn workers each get their own after fork.
+    """
+
+    def __init__(self, name: str = "triai-fanout"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is not None and self._thread is not None and self._thread.is_alive():
+                return self._loop
+
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def runner():
+                asyncio.set_event_loop(loop)
+                ready.set()
+                loop.run_forever()
+
+            thread = threading.Thread(target=runner, name=self.name, daemon=True)
+            thread.start()
+            ready.wait()
+
+            self._loop, self._thread = loop, thread
+            print(f"[FANOUT] Event loop started ({self.name})")
+            return loop
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self._ensure_loop()
+
+    async def _tracked(self, coro: Awaitable) -> Any:
+        self.in_flight += 1
+        try:
+            return await coro
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+
+    def submit(self, coro: Coroutine) -> Future:
+        """Schedule a coroutine on the shared loop from any thread."""
+        return asyncio.run_coroutine_threadsafe(self._tracked(coro), self._ensure_loop())
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the shared loop and block the calling thread for its result."""
+        future = self.submit(coro)
+        try:
+            return future.result(timeout=timeout)
+        except FuturesTimeoutError:
+            future.cancel()
+            raise
+
+    @staticmethod
+    def settle(key: str, outcome: Any) -> Dict:
+        """Convert a provider task outcome into a result dict (exceptions become the standard error result)."""
+        if isinstance(outcome, BaseException):
+            print(f"CRITICAL: {key} task died: {outcome}")
+            return {"success": False, "response": f"System Error: {str(outcome)}", "model": "Error", "time": 0, "cost": 0, "thought": None}
+        print(f"DEBUG: {key} finished")
+        return outcome
+
+    @staticmethod
+    async def gather_providers(calls: Dict[str, Awaitable]) -> Dict[str, Dict]:
+        """
+        Await a {provider_key: coroutine} map concurrently.
+        A provider task that raises is converted into the standard error result dict.
+        """
+        keys = list(calls.keys())
+        outcomes = await asyncio.gather(*calls.values(), return_exceptions=True)
+        return {key: FanoutEngine.settle(key, outcome) for key, outcome in zip(keys, outcomes)}
+
+    @staticmethod
+    def task_outcome(task: asyncio.Task) -> Any:
+        if task.cancelled():
+            return asyncio.CancelledError()
+        return task.exception() or task.result()
+
+    @staticmethod
+    async def wait_for_quorum(tasks: Dict[str, asyncio.Task], quorum: int, budget: float) -> None:
+        """
+        Quorum mode: return as soon as `quorum` tasks have succeeded, `budget` seconds have
+        passed, or every task has finished. Unfinished tasks keep running on the loop.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + budget
+        pending = set(tasks.values())
+        successes = 0
+
+        while pending and successes < quorum:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                outcome = FanoutEngine.task_outcome(task)
+                if isinstance(outcome, dict) and outcome.get('success'):
+                    successes += 1
+
+    def stats(self) -> Dict:
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "in_flight": self.in_flight,
+            "completed": self.completed
+        }
+
+
+# Initialize Singleton
+fanout_engine = FanoutEngine()
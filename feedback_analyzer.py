@@ -3,16 +3,22 @@ import os
 import json
 from typing import List, Dict
 from dotenv import load_dotenv
+from provider_clients import provider_clients
+from rate_limiter import provider_limiter, quota_tokens
+from deadline import Deadline, MIN_ATTEMPT_SECONDS
 
 load_dotenv()
 
+# Feedback tagging is lowest priority: it waits at most this long for a rate-limit slot, then is skipped
+FEEDBACK_RATE_LIMIT_WAIT_SECONDS = float(os.getenv('FEEDBACK_RATE_LIMIT_WAIT_SECONDS', '10'))
+
 # Reuse the key from environment
 GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
 if not GOOGLE_API_KEY:
     print("WARNING: GOOGLE_API_KEY missing in feedback_analyzer.py. Feedback analysis will fail.")
     client = None
 else:
-    client = genai.Client(api_key=GOOGLE_API_KEY)
+    client = provider_clients.google()
 
 def analyze_feedback_text(feedback_text: str, rating: int) -> Dict[str, any]:
     """
@@ -54,6 +60,8 @@ def analyze_feedback_text(feedback_text: str, rating: int) -> Dict[str, any]:
         if not client:
              return {"tags": [], "sentiment": "neutral"}
 
+        deadline = Deadline(FEEDBACK_RATE_LIMIT_WAIT_SECONDS + MIN_ATTEMPT_SECONDS, "feedback", priority="feedback")
+        provider_limiter.acquire("google", "gemini-2.0-flash", quota_tokens(prompt), deadline)
         response = client.models.generate_content(
             model='gemini-2.0-flash', 
             contents=prompt,
@@ -0,0 +1,515 @@
+"""
+Workflow Job Store.
+Background jobs (status, per-step results, errors, final report) live in a shared backend
+instead of a per-process dict: any gunicorn worker can answer /api/workflow/status/<job_id>,
+and a --max-requests recycle no longer wipes a running job. Workflows, Korum reasoning
+chains (kind="reasoning_chain", one result per pipeline layer) and quorum-mode consensus
+amendments (kind="consensus_amendment") share the store; a job created with a dedup_key can
+be found again by find_running() while it is in flight.
+
+Every finished step is stored together with a checkpoint (context, completed step keys,
+full_history), so a failed or interrupted run can resume from its first incomplete step.
+Each job records the worker (host:pid) running it; that worker heartbeats its jobs. A daemon
+sweeper expires finished jobs and hands orphaned running jobs (owner process gone, or no
+heartbeat for WORKFLOW_JOB_STALE_SECONDS) to the resume handler, which claims them atomically.
+
+Configuration:
+    WORKFLOW_JOB_STORE            (default sql)  sql (SQLite/Postgres via database.py), redis, memory
+    REDIS_URL                     (default redis://localhost:6379/0)  redis backend only (pip install redis)
+    WORKFLOW_JOB_TTL_SECONDS      (default 600)  finished jobs are kept this long
+    WORKFLOW_JOB_SWEEP_SECONDS    (default 60)   sweeper + heartbeat interval
+    WORKFLOW_JOB_STALE_SECONDS    (default 300)  running jobs with no heartbeat for this long are orphaned
+    WORKFLOW_JOB_MAX_ATTEMPTS     (default 3)    runs per job (first run + automatic resumes) before giving up
+"""
+
+import os
+import json
+import time
+import socket
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+
+WORKFLOW_JOB_STORE = os.getenv('WORKFLOW_JOB_STORE', 'sql').lower()
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+WORKFLOW_JOB_TTL = float(os.getenv('WORKFLOW_JOB_TTL_SECONDS', '600'))
+WORKFLOW_JOB_SWEEP_SECONDS = float(os.getenv('WORKFLOW_JOB_SWEEP_SECONDS', '60'))
+WORKFLOW_JOB_STALE_SECONDS = float(os.getenv('WORKFLOW_JOB_STALE_SECONDS', '300'))
+WORKFLOW_JOB_MAX_ATTEMPTS = int(os.getenv('WORKFLOW_JOB_MAX_ATTEMPTS', '3'))
+
+FINISHED_STATUSES = ("complete", "failed", "cancelled")
+STALE_ERROR = "Workflow worker stopped responding (no progress before the stale timeout)"
+
+
+def worker_id() -> str:
+    """host:pid of this process (evaluated per call, so gunicorn workers forked after import differ)."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def owner_alive(owner: Optional[str]) -> Optional[bool]:
+    """True/False for an owner on this host, None if it runs elsewhere (only the heartbeat can tell)."""
+    if not owner or ":" not in owner:
+        return False
+    host, pid = owner.rsplit(":", 1)
+    if host != socket.gethostname():
+        return None
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, ValueError):
+        return True
+    return True
+
+
+class JobStore:
+    """
+    Backend interface. Jobs are plain dicts shaped like the /api/workflow/status response:
+    {job_id, status, results: [step results in completion order], error, ..., created_at}.
+    """
+    backend = "base"
+
+    def __init__(self, ttl: float = WORKFLOW_JOB_TTL, sweep_seconds: float = WORKFLOW_JOB_SWEEP_SECONDS,
+                 stale_seconds: float = WORKFLOW_JOB_STALE_SECONDS, max_attempts: int = WORKFLOW_JOB_MAX_ATTEMPTS):
+        self.ttl = ttl
+        self.sweep_seconds = sweep_seconds
+        self.stale_seconds = stale_seconds
+        self.max_attempts = max_attempts
+        self._active = set()  # Jobs this process is running (heartbeated by the sweeper)
+        self._resume_handler: Optional[Callable[[str], None]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.metrics = {"created": 0, "steps": 0, "expired": 0, "stale": 0, "resumed": 0, "errors": 0}
+
+    # --- Backend operations ---
+
+    def _create(self, job_id: str, fields: Dict):
+        raise NotImplementedError
+
+    def get(self, job_id: str, include_checkpoint: bool = False, since: int = 0) -> Optional[Dict]:
+        """Job dict; since=N returns only results[N:] (the step results a poller has not seen yet)."""
+        raise NotImplementedError
+
+    def status(self, job_id: str) -> Optional[Dict]:
+        """Job dict without its step results or checkpoint (existence / status checks, one cheap read)."""
+        raise NotImplementedError
+
+    def _update(self, job_id: str, fields: Dict):
+        raise NotImplementedError
+
+    def _append(self, job_id: str, step_result: Dict, checkpoint: Optional[Dict]):
+        raise NotImplementedError
+
+    def running_jobs(self) -> List[Dict]:
+        """[{job_id, owner, attempts, updated_at (epoch)}] for every job in status running."""
+        raise NotImplementedError
+
+    def find_running(self, dedup_key: str) -> Optional[str]:
+        """Id of a running job created with this dedup_key, or None."""
+        raise NotImplementedError
+
+    def _claim(self, job_id: str, expected_owner: Optional[str], statuses: Iterable[str]) -> bool:
+        """Atomically take ownership (status running, attempts + 1) if the owner is still expected_owner."""
+        raise NotImplementedError
+
+    def reset_steps(self, job_id: str, keep_keys: Iterable[str]):
+        """Drop stored step results whose key is not in keep_keys (they are about to be re-run)."""
+        raise NotImplementedError
+
+    def _touch(self, job_ids: Iterable[str]):
+        raise NotImplementedError
+
+    def _expire(self) -> int:
+        """Delete finished jobs idle for longer than ttl. Returns how many."""
+        raise NotImplementedError
+
+    # --- Shared logic ---
+
+    def create(self, job_id: str, **fields):
+        # Marked active before the row exists, so this process's own sweeper never sees it as orphaned
+        self._active.add(job_id)
+        try:
+            self._create(job_id, {**fields, "status": "running", "owner": worker_id(), "attempts": 1})
+        except Exception:
+            self._active.discard(job_id)
+            raise
+        self.metrics["created"] += 1
+
+    def update(self, job_id: str, **fields):
+        self._update(job_id, fields)
+
+    def append_result(self, job_id: str, step_result: Dict, checkpoint: Dict = None):
+        self._append(job_id, step_result, checkpoint)
+        self.metrics["steps"] += 1
+
+    def finish(self, job_id: str, status: str, **fields):
+        self._update(job_id, {**fields, "status": status})
+        self._active.discard(job_id)
+
+    def claim(self, job_id: str, expected_owner: Optional[str], statuses: Iterable[str] = ("running",)) -> bool:
+        already_active = job_id in self._active
+        self._active.add(job_id)
+        try:
+            claimed = self._claim(job_id, expected_owner, tuple(statuses))
+        except Exception:
+            claimed = False
+            raise
+        finally:
+            if not claimed and not already_active:
+                self._active.discard(job_id)
+        return claimed
+
+    def is_local(self, job_id: str) -> bool:
+        """True if this process is running the job (so its live events are published here)."""
+        return job_id in self._active
+
+    def set_resume_handler(self, handler: Callable[[str], None]):
+        """handler(job_id) restarts a job this process has just claimed."""
+        self._resume_handler = handler
+
+    def is_orphaned(self, job: Dict) -> bool:
+        if job["owner"] == worker_id():
+            return job["job_id"] not in self._active  # Same pid, earlier process (pid reuse)
+        alive = owner_alive(job["owner"])
+        if alive is not None:
+            return not alive
+        return time.time() - job["updated_at"] > self.stale_seconds
+
+    def recover(self) -> Dict[str, int]:
+        """Resume (or, past max_attempts / without a handler, fail) every orphaned running job."""
+        resumed = failed = 0
+        for job in self.running_jobs():
+            if not self.is_orphaned(job):
+                continue
+            if self._resume_handler and job["attempts"] < self.max_attempts:
+                if self.claim(job["job_id"], job["owner"]):
+                    print(f"[JOBS] Resuming orphaned workflow job {job['job_id'][:8]} (was {job['owner']}, attempt {job['attempts'] + 1})")
+                    resumed += 1
+                    try:
+                        self._resume_handler(job["job_id"])
+                    except Exception as e:
+                        self.finish(job["job_id"], "failed", error=f"Resume failed: {e}")
+            elif self.claim(job["job_id"], job["owner"]):
+                self.finish(job["job_id"], "failed", error=STALE_ERROR)
+                failed += 1
+        self.metrics["resumed"] += resumed
+        self.metrics["stale"] += failed
+        return {"resumed": resumed, "stale": failed}
+
+    def sweep(self) -> Dict[str, int]:
+        if self._active:
+            self._touch(list(self._active))
+        result = {"expired": self._expire(), **self.recover()}
+        self.metrics["expired"] += result["expired"]
+        if any(result.values()):
+            print(f"[JOBS] Swept {result['expired']} expired, resumed {result['resumed']}, failed {result['stale']} stale workflow jobs")
+        return result
+
+    def start_sweeper(self):
+        """Start the expiry/heartbeat thread (idempotent; one per worker process)."""
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="triai-job-sweeper", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.sweep_seconds)
+            try:
+                self.sweep()
+            except Exception as e:
+                self.metrics["errors"] += 1
+                print(f"CRITICAL: Workflow job sweep failed: {e}")
+
+    def stats(self) -> Dict:
+        return {"backend": self.backend, "ttl_seconds": self.ttl, "active": len(self._active), **self.metrics}
+
+
+class MemoryJobStore(JobStore):
+    """Process-local dict (the previous behaviour); single worker / local development only."""
+    backend = "memory"
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._jobs: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def _create(self, job_id: str, fields: Dict):
+        now = time.time()
+        with self._lock:
+            self._jobs[job_id] = {"job_id": job_id, "results": [], "error": None, "checkpoint": None,
+                                  **fields, "created_at": now, "updated_at": now}
+
+    def get(self, job_id: str, include_checkpoint: bool = False, since: int = 0) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job:
+                return None
+            job = {**job, "results": job["results"][since:]}
+        if not include_checkpoint:
+            job.pop("checkpoint", None)
+        return job
+
+    def status(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job:
+                return None
+            return {k: v for k, v in job.items() if k not in ("results", "checkpoint")}
+
+    def _update(self, job_id: str, fields: Dict):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields, updated_at=time.time())
+
+    def _append(self, job_id: str, step_result: Dict, checkpoint: Optional[Dict]):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                job["results"].append(step_result)
+                job["updated_at"] = time.time()
+                if checkpoint is not None:
+                    job["checkpoint"] = checkpoint
+
+    def running_jobs(self) -> List[Dict]:
+        with self._lock:
+            return [{"job_id": j["job_id"], "owner": j["owner"], "attempts": j["attempts"], "updated_at": j["updated_at"]}
+                    for j in self._jobs.values() if j["status"] == "running"]
+
+    def find_running(self, dedup_key: str) -> Optional[str]:
+        with self._lock:
+            return next((j["job_id"] for j in self._jobs.values()
+                         if j["status"] == "running" and j.get("dedup_key") == dedup_key), None)
+
+    def _claim(self, job_id: str, expected_owner: Optional[str], statuses) -> bool:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job["owner"] != expected_owner or job["status"] not in statuses:
+                return False
+            job.update(owner=worker_id(), status="running", error=None, attempts=job["attempts"] + 1, updated_at=time.time())
+            return True
+
+    def reset_steps(self, job_id: str, keep_keys: Iterable[str]):
+        keep = set(keep_keys)
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id]["results"] = [r for r in self._jobs[job_id]["results"] if r.get("key") in keep]
+
+    def _touch(self, job_ids: Iterable[str]):
+        now = time.time()
+        with self._lock:
+            for job_id in job_ids:
+                if job_id in self._jobs:
+                    self._jobs[job_id]["updated_at"] = now
+
+    def _expire(self) -> int:
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job["status"] in FINISHED_STATUSES and job["updated_at"] < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+        return len(expired)
+
+    def stats(self) -> Dict:
+        return {**super().stats(), "jobs": len(self._jobs)}
+
+
+class SQLJobStore(JobStore):
+    """workflow_jobs / workflow_job_steps tables in the app database (SQLite locally, Postgres on Railway)."""
+    backend = "sql"
+
+    def _create(self, job_id: str, fields: Dict):
+        from database import create_workflow_job
+        create_workflow_job(job_id, **fields)
+
+    def get(self, job_id: str, include_checkpoint: bool = False, since: int = 0) -> Optional[Dict]:
+        from database import get_workflow_job
+        return get_workflow_job(job_id, include_checkpoint=include_checkpoint, since=since)
+
+    def status(self, job_id: str) -> Optional[Dict]:
+        from database import get_workflow_job
+        return get_workflow_job(job_id, include_results=False)
+
+    def _update(self, job_id: str, fields: Dict):
+        from database import update_workflow_job
+        if fields.get("status") in FINISHED_STATUSES:
+            fields.setdefault("finished_at", datetime.utcnow())
+        update_workflow_job(job_id, **fields)
+
+    def _append(self, job_id: str, step_result: Dict, checkpoint: Optional[Dict]):
+        from database import append_workflow_job_step
+        append_workflow_job_step(job_id, step_result, checkpoint)
+
+    def running_jobs(self) -> List[Dict]:
+        from database import list_running_workflow_jobs
+        return list_running_workflow_jobs()
+
+    def find_running(self, dedup_key: str) -> Optional[str]:
+        from database import find_running_workflow_job
+        return find_running_workflow_job(dedup_key)
+
+    def _claim(self, job_id: str, expected_owner: Optional[str], statuses) -> bool:
+        from database import claim_workflow_job
+        return claim_workflow_job(job_id, expected_owner, worker_id(), statuses)
+
+    def reset_steps(self, job_id: str, keep_keys: Iterable[str]):
+        from database import delete_workflow_job_steps
+        delete_workflow_job_steps(job_id, list(keep_keys))
+
+    def _touch(self, job_ids: Iterable[str]):
+        from database import update_workflow_job
+        for job_id in job_ids:
+            update_workflow_job(job_id)
+
+    def _expire(self) -> int:
+        from database import expire_workflow_jobs
+        return expire_workflow_jobs(datetime.utcnow() - timedelta(seconds=self.ttl))["expired"]
+
+
+class RedisJobStore(JobStore):
+    """
+    Job hash + step list per job. Finished jobs get a native Redis TTL; running jobs are
+    tracked in a sorted set scored by heartbeat.
+    """
+    backend = "redis"
+    PREFIX = "triai:workflow_job:"
+    RUNNING = "triai:workflow_jobs:running"
+
+    def __init__(self, url: str = REDIS_URL, **kwargs):
+        super().__init__(**kwargs)
+        import redis
+        self.redis = redis.Redis.from_url(url, decode_responses=True)
+        self.redis.ping()
+
+    def _key(self, job_id: str) -> str:
+        return self.PREFIX + job_id
+
+    @staticmethod
+    def _encode(fields: Dict) -> Dict:
+        return {k: json.dumps(v, default=str) for k, v in fields.items()}
+
+    def _create(self, job_id: str, fields: Dict):
+        now = time.time()
+        job = {"job_id": job_id, "error": None, **fields, "created_at": now, "updated_at": now}
+        pipe = self.redis.pipeline()
+        pipe.hset(self._key(job_id), mapping=self._encode(job))
+        pipe.zadd(self.RUNNING, {job_id: now})
+        pipe.execute()
+
+    def get(self, job_id: str, include_checkpoint: bool = False, since: int = 0) -> Optional[Dict]:
+        pipe = self.redis.pipeline()
+        pipe.hgetall(self._key(job_id))
+        pipe.lrange(self._key(job_id) + ":steps", since, -1)
+        fields, steps = pipe.execute()
+        if not fields:
+            return None
+        job = {k: json.loads(v) for k, v in fields.items()}
+        job["results"] = [json.loads(step) for step in steps]
+        if not include_checkpoint:
+            job.pop("checkpoint", None)
+        return job
+
+    def status(self, job_id: str) -> Optional[Dict]:
+        fields = self.redis.hgetall(self._key(job_id))
+        if not fields:
+            return None
+        job = {k: json.loads(v) for k, v in fields.items()}
+        job.pop("checkpoint", None)
+        return job
+
+    def _update(self, job_id: str, fields: Dict):
+        now = time.time()
+        pipe = self.redis.pipeline()
+        pipe.hset(self._key(job_id), mapping=self._encode({**fields, "updated_at": now}))
+        if fields.get("status") in FINISHED_STATUSES:
+            pipe.zrem(self.RUNNING, job_id)
+            pipe.expire(self._key(job_id), int(self.ttl))
+            pipe.expire(self._key(job_id) + ":steps", int(self.ttl))
+        else:
+            pipe.zadd(self.RUNNING, {job_id: now}, xx=True)
+        pipe.execute()
+
+    def _append(self, job_id: str, step_result: Dict, checkpoint: Optional[Dict]):
+        now = time.time()
+        fields = {"updated_at": now} if checkpoint is None else {"updated_at": now, "checkpoint": checkpoint}
+        pipe = self.redis.pipeline()
+        pipe.rpush(self._key(job_id) + ":steps", json.dumps(step_result, default=str))
+        pipe.hset(self._key(job_id), mapping=self._encode(fields))
+        pipe.zadd(self.RUNNING, {job_id: now}, xx=True)
+        pipe.execute()
+
+    def running_jobs(self) -> List[Dict]:
+        jobs = []
+        for job_id, heartbeat in self.redis.zrange(self.RUNNING, 0, -1, withscores=True):
+            owner, attempts = self.redis.hmget(self._key(job_id), "owner", "attempts")
+            jobs.append({"job_id": job_id, "owner": json.loads(owner) if owner else None,
+                         "attempts": json.loads(attempts) if attempts else 1, "updated_at": heartbeat})
+        return jobs
+
+    def find_running(self, dedup_key: str) -> Optional[str]:
+        # The running set only holds in-flight jobs, so a scan of it stays small
+        for job_id in self.redis.zrange(self.RUNNING, 0, -1):
+            key = self.redis.hget(self._key(job_id), "dedup_key")
+            if key and json.loads(key) == dedup_key:
+                return job_id
+        return None
+
+    def _claim(self, job_id: str, expected_owner: Optional[str], statuses) -> bool:
+        import redis
+        key = self._key(job_id)
+        with self.redis.pipeline() as pipe:
+            try:
+                pipe.watch(key)
+                owner, status, attempts = pipe.hmget(key, "owner", "status", "attempts")
+                if status is None or json.loads(status) not in statuses or (json.loads(owner) if owner else None) != expected_owner:
+                    return False
+                now = time.time()
+                pipe.multi()
+                pipe.hset(key, mapping=self._encode({"owner": worker_id(), "status": "running", "error": None,
+                                                     "attempts": (json.loads(attempts) if attempts else 1) + 1, "updated_at": now}))
+                pipe.persist(key)
+                pipe.persist(key + ":steps")
+                pipe.zadd(self.RUNNING, {job_id: now})
+                pipe.execute()
+                return True
+            except redis.WatchError:
+                return False
+
+    def reset_steps(self, job_id: str, keep_keys: Iterable[str]):
+        keep = set(keep_keys)
+        steps_key = self._key(job_id) + ":steps"
+        kept = [s for s in self.redis.lrange(steps_key, 0, -1) if json.loads(s).get("key") in keep]
+        pipe = self.redis.pipeline()
+        pipe.delete(steps_key)
+        if kept:
+            pipe.rpush(steps_key, *kept)
+        pipe.execute()
+
+    def _touch(self, job_ids: Iterable[str]):
+        now = time.time()
+        pipe = self.redis.pipeline()
+        for job_id in job_ids:
+            pipe.hset(self._key(job_id), "updated_at", json.dumps(now))
+            pipe.zadd(self.RUNNING, {job_id: now}, xx=True)
+        pipe.execute()
+
+    def _expire(self) -> int:
+        return 0  # Finished jobs carry a native TTL
+
+
+def create_job_store(backend: str = WORKFLOW_JOB_STORE) -> JobStore:
+    if backend == "redis":
+        try:
+            return RedisJobStore()
+        except Exception as e:
+            print(f"CRITICAL: Redis job store unavailable ({e}); falling back to the SQL job store")
+            backend = "sql"
+    if backend == "memory":
+        return MemoryJobStore()
+    return SQLJobStore()
+
+
+# Initialize Singleton
+workflow_jobs = create_job_store()
@@ -0,0 +1,135 @@
+"""
+Built-in Schema Migrations.
+Base.metadata.create_all() only creates missing tables; it never alters tables that already
+exist (e.g. the Railway Postgres database). Schema changes to existing tables go here as
+ordered, idempotent steps. Applied versions are recorded in schema_migrations.
+
+Add a migration by appending (version, description, fn(conn, metadata)) to MIGRATIONS.
+"""
+
+from datetime import datetime
+from collections import defaultdict
+from typing import Callable, List, Tuple
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, select, func, inspect, literal, text
+
+
+def _create_model_indexes(*index_names: str) -> Callable:
+    """Migration step that creates indexes declared in the models' __table_args__ (if missing)."""
+    def step(conn, metadata: MetaData):
+        wanted = set(index_names)
+        for table in metadata.sorted_tables:
+            for index in table.indexes:
+                if index.name in wanted:
+                    index.create(bind=conn, checkfirst=True)
+                    wanted.discard(index.name)
+        if wanted:
+            raise RuntimeError(f"Indexes not declared on any model: {sorted(wanted)}")
+    return step
+
+
+# Indexes matching the hot query access paths (declared on the models in database.py)
+ACCESS_PATH_INDEXES = (
+    "ix_comparisons_timestamp",
+    "ix_comparisons_saved_timestamp",
+    "ix_responses_comparison_provider",
+    "ix_responses_provider_persona",
+    "ix_responses_persona_provider",
+    "ix_responses_provider_rating",
+    "ix_query_feedback_category_rating",
+    "ix_response_evaluations_response_id",
+    "ix_system_events_timestamp"
+)
+
+
+def _add_model_columns(table_name: str, *column_names: str) -> Callable:
+    """Migration step that ALTERs in columns declared on a model but missing from an existing table."""
+    def step(conn, metadata: MetaData):
+        table = metadata.tables[table_name]
+        existing = {col["name"] for col in inspect(conn).get_columns(table_name)}
+        for name in column_names:
+            if name in existing:
+                continue
+            column_type = table.c[name].type.compile(dialect=conn.dialect)
+            conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {name} {column_type}"))
+    return step
+
+
+def _backfill_telemetry_rollups(conn, metadata: MetaData):
+    """
+    Aggregate existing responses into telemetry_rollups (hourly, per provider). Streams rows once.
+    Each row goes through rollup_delta_from_lengths, the ledger cost rules live writes use (failed calls cost nothing).
+    """
+    from database import normalize_provider, hour_bucket, rollup_delta_from_lengths, merge_rollup_delta, ROLLUP_COUNTERS
+
+    comparisons, responses = metadata.tables["comparisons"], metadata.tables["responses"]
+    rollups = metadata.tables["telemetry_rollups"]
+    rollups.create(bind=conn, checkfirst=True)
+    conn.execute(rollups.delete())
+
+    # Recorded ledger usage (0003) is used when the columns exist; older rows are estimated from lengths
+    existing = {col["name"] for col in inspect(conn).get_columns("responses")}
+    ledger = [responses.c[name] if name in existing else literal(None) for name in ("input_tokens", "output_tokens", "cost")]
+
+    # Lengths are computed in the database so response text never crosses the wire
+    rows = conn.execution_options(stream_results=True, yield_per=5000).execute(
+        select(responses.c.ai_provider, responses.c.success, responses.c.individual_rating, responses.c.timestamp,
+               func.length(comparisons.c.question), func.length(responses.c.response_text), *ledger)
+        .select_from(responses.join(comparisons, comparisons.c.id == responses.c.comparison_id))
+    )
+    deltas = defaultdict(dict)
+    for provider_name, success, rating, ts, question_len, text_len, input_tokens, output_tokens, cost in rows:
+        provider = normalize_provider(provider_name)
+        delta = rollup_delta_from_lengths(question_len or 0, text_len or 0, success, provider, input_tokens, output_tokens, cost)
+        if rating is not None:
+            delta.update(rating_sum=rating, rating_count=1)
+        merge_rollup_delta(deltas, hour_bucket(ts), provider, delta)
+
+    rows = [{"bucket_start": bucket, "ai_provider": provider, **{c: delta.get(c, 0) for c in ROLLUP_COUNTERS}}
+            for (bucket, provider), delta in deltas.items()]
+    if rows:
+        conn.execute(rollups.insert(), rows)
+
+
+MIGRATIONS: List[Tuple[str, str, Callable]] = [
+    ("0001_access_path_indexes", "Composite indexes for dashboard, history, rating and feedback queries", _create_model_indexes(*ACCESS_PATH_INDEXES)),
+    ("0002_telemetry_rollups", "Backfill hourly per-provider telemetry rollups from existing responses", _backfill_telemetry_rollups),
+    ("0003_response_usage_ledger", "Per-response token usage and cost columns", _add_model_columns("responses", "input_tokens", "output_tokens", "cost", "usage_source")),
+]
+
+
+# Kept out of the models' metadata so create_all() and the migrations stay independent
+schema_migrations = Table(
+    "schema_migrations", MetaData(),
+    Column("version", String, primary_key=True),
+    Column("description", String, nullable=True),
+    Column("applied_at", DateTime, default=datetime.utcnow)
+)
+
+
+def applied_versions(engine) -> set:
+    schema_migrations.create(bind=engine, checkfirst=True)
+    with engine.connect() as conn:
+        return {row.version for row in conn.execute(select(schema_migrations.c.version))}
+
+
+def run_migrations(engine, metadata: MetaData) -> List[str]:
+    """Apply every pending migration, each in its own transaction. Returns the versions applied."""
+    done = applied_versions(engine)
+    applied = []
+    for version, description, step in MIGRATIONS:
+        if version in done:
+            continue
+        try:
+            with engine.begin() as conn:
+                step(conn, metadata)
+                conn.execute(schema_migrations.insert().values(version=version, description=description, applied_at=datetime.utcnow()))
+            applied.append(version)
+            print(f"✅ Migration applied: {version} ({description})")
+        except Exception as e:
+            # Another worker may have applied it concurrently; re-check before treating it as a failure
+            if version in applied_versions(engine):
+                continue
+            print(f"🔥 CRITICAL: Migration {version} failed: {e}")
+            raise
+    return applied
@@ -1,8 +1,11 @@
 import logging
 import json
 import re
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait, TimeoutError as FuturesTimeoutError
 import requests
 from google import genai
 from google.genai import types # Import types for new SDK config
@@ -16,11 +19,131 @@ load_dotenv()
 
 # Import Safety Middleware
 from safety_middleware import wrap_for_compliance
+from provider_clients import provider_clients
+from deadline import Deadline, MIN_ATTEMPT_SECONDS
+from response_cache import response_cache
+from provider_health import provider_health
+from rate_limiter import provider_limiter, quota_tokens
+from single_flight import single_flight
 
 # Configure Logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Per-attempt ceiling for a single layer call (the request Deadline clips it further)
+ATTEMPT_TIMEOUT = 90
+ATTEMPT_OUTPUT_TOKENS = 2000  # Rate-limit allowance for layer calls without max_tokens
+
+# Staged concurrency: Layer 1 (deconstruct) starts alongside the Layer 0 scout instead of after it.
+# KORUM_REFINE_CONSTRAINTS re-runs Layer 1 with the scout's intel once it arrives (one more Claude call).
+KORUM_SPECULATIVE = os.getenv('KORUM_SPECULATIVE', 'true').lower() == 'true'
+KORUM_REFINE_CONSTRAINTS = os.getenv('KORUM_REFINE_CONSTRAINTS', 'false').lower() == 'true'
+# Hedged fallbacks: if a layer's primary lane hasn't answered by this percentile of its recent
+# latencies, its backup lane is fired too and the first success wins.
+KORUM_HEDGING = os.getenv('KORUM_HEDGING', 'true').lower() == 'true'
+KORUM_HEDGE_PERCENTILE = float(os.getenv('KORUM_HEDGE_PERCENTILE', '0.9'))
+KORUM_HEDGE_DEFAULT_SECONDS = float(os.getenv('KORUM_HEDGE_DEFAULT_SECONDS', '30'))  # Until enough samples
+KORUM_HEDGE_MIN_SECONDS = float(os.getenv('KORUM_HEDGE_MIN_SECONDS', '5'))  # Never hedge sooner (tight latency histories)
+KORUM_HEDGE_MIN_SAMPLES = 5
+KORUM_LATENCY_SAMPLES = 50
+KORUM_WORKERS = int(os.getenv('KORUM_WORKERS', '16'))
+
+SCOUT_PENDING = "Being gathered in parallel; the Architect layer receives it."
+SCOUT_UNAVAILABLE = "No live intelligence available."
+SCOUT_FAILURES = (SCOUT_UNAVAILABLE, "Perplexity Scout failed to report.", "Perplexity Scout offline.")
+
+# Trace layer name -> role, in pipeline order (progress reporting labels)
+PIPELINE_LAYERS = {
+    "layer_0_scout": "Scout",
+    "layer_1_deconstruct": "Deconstructor",
+    "layer_1_refine": "Deconstructor (refined)",
+    "layer_2_build": "Architect",
+    "layer_3_stress": "Stressor",
+    "layer_3_5_hacker": "Hacker",
+    "layer_4_synthesize": "Synthesizer"
+}
+
+
+class LatencyTracker:
+    """Recent successful call latencies per lane (cache hits excluded); the hedge delay is a percentile of them."""
+
+    def __init__(self, samples: int = KORUM_LATENCY_SAMPLES):
+        self._samples: Dict[str, deque] = {}
+        self._maxlen = samples
+        self._lock = threading.Lock()
+
+    def record(self, lane: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(lane, deque(maxlen=self._maxlen)).append(seconds)
+
+    def percentile(self, lane: str, q: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(lane, ()))
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def hedge_delay(self, lane: str) -> float:
+        with self._lock:
+            count = len(self._samples.get(lane, ()))
+        if count < KORUM_HEDGE_MIN_SAMPLES:
+            return KORUM_HEDGE_DEFAULT_SECONDS
+        return max(KORUM_HEDGE_MIN_SECONDS, self.percentile(lane, KORUM_HEDGE_PERCENTILE))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lanes = list(self._samples)
+        return {lane: {"samples": len(self._samples[lane]), "p50": round(self.percentile(lane, 0.5), 2),
+                       "p90": round(self.percentile(lane, 0.9), 2), "hedge_after": round(self.hedge_delay(lane), 2)}
+                for lane in lanes}
+
+
+class PipelineTrace:
+    """
+    Per-layer timings for one pipeline run: start offset (seconds into the run), duration, and which lane answered.
+    callback(event, layer, data), if given, hears "layer-started" and "layer-completed" (with the layer's output) as they happen.
+    """
+
+    def __init__(self, callback: Callable = None):
+        self.started = time.monotonic()
+        self.layers: Dict[str, Dict] = {}
+        self.callback = callback
+        self._lock = threading.Lock()
+
+    def run(self, layer: str, fn, *args, **kwargs):
+        start = time.monotonic()
+        with self._lock:
+            self.layers.setdefault(layer, {})["started_at"] = round(start - self.started, 2)
+        self._emit("layer-started", layer, {"started_at": round(start - self.started, 2)})
+        output = None
+        try:
+            output = fn(*args, **kwargs)
+            return output
+        finally:
+            seconds = round(time.monotonic() - start, 2)
+            self.note(layer, seconds=seconds)
+            logger.info(f"{layer} finished in {seconds}s")
+            with self._lock:
+                entry = dict(self.layers[layer])
+            self._emit("layer-completed", layer, {**entry, "output": output})
+
+    def _emit(self, event: str, layer: str, data: Dict):
+        if self.callback is None:
+            return
+        try:
+            self.callback(event, layer, data)
+        except Exception as e:
+            logger.warning(f"{layer}: {event} callback failed: {e}")
+
+    def note(self, layer: str, **fields):
+        with self._lock:
+            self.layers.setdefault(layer, {}).update(fields)
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {"layers": {name: dict(entry) for name, entry in self.layers.items()},
+                    "total_seconds": round(time.monotonic() - self.started, 2)}
+
 class KorumOrchestrator:
     """
     Manages the V2 Functional Reasoning Pipeline.
@@ -28,15 +151,55 @@ class KorumOrchestrator:
     """
     
     def __init__(self):
-        # Initialize Clients
-        self.openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        self.anthropic_client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-        self.google_client = genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
+        # Shared pooled clients (one per provider per process)
+        self.openai_client = provider_clients.openai()
+        self.anthropic_client = provider_clients.anthropic()
+        self.google_client = provider_clients.google()
+        self.http = provider_clients.http()
+        # Layers and hedge lanes get separate pools, so a layer waiting on its lanes can't starve them
+        self._layers = ThreadPoolExecutor(max_workers=KORUM_WORKERS, thread_name_prefix="triai-korum")
+        self._lanes = ThreadPoolExecutor(max_workers=KORUM_WORKERS, thread_name_prefix="triai-korum-lane")
+        self._local = threading.local()
+        self.latency = LatencyTracker()
+        self.metrics = {"runs": 0, "hedges_fired": 0, "hedges_won": 0, "failovers": 0, "coalesced_calls": 0}
+        self._metrics_lock = threading.Lock()
+
+    def _count(self, metric: str):
+        with self._metrics_lock:
+            self.metrics[metric] += 1
+
+    def _cached_call(self, provider: str, model: str, system_prompt: str, prompt: str, params: Dict, call, use_cache: bool = True,
+                     deadline: Deadline = None) -> str:
+        """Serve a layer's model call from the response cache or an identical call in flight, or run call() (rate limited) and cache its text."""
+        use_cache = use_cache and response_cache.active()
+        self._local.cache_hit = False
+        if use_cache:
+            cached = response_cache.lookup(provider, [model], system_prompt, prompt, None, params)
+            if cached:
+                self._local.cache_hit = True
+                return cached['text']
+
+        def fetch():
+            provider_limiter.acquire(provider, model, quota_tokens(system_prompt, prompt, output=params.get("max_tokens", ATTEMPT_OUTPUT_TOKENS)), deadline)
+            with provider_health.track(provider, model, deadline, ATTEMPT_TIMEOUT):  # Known-bad models fail fast (CircuitOpenError)
+                text = call()
+            if use_cache:
+                response_cache.store(provider, model, text, system_prompt, prompt, None, params)
+            return text
 
-    def _generate_gemini_safe(self, prompt: str) -> str:
+        # The same layer call already in flight (same query from another tab or run) is awaited, not repeated
+        text, shared = single_flight.do(provider, response_cache.make_key(provider, model, system_prompt, prompt, None, params), fetch, deadline)
+        if shared:
+            self._local.cache_hit = True  # Only the leader's timing is a latency sample
+            self._count("coalesced_calls")
+        return text
+
+    def _generate_gemini_safe(self, prompt: str, deadline: Deadline = None, use_cache: bool = True) -> str:
         """
         Executes Gemini with Heimdall Core stability logic (Fallbacks + Backoff).
+        Retries and model fallbacks stop once the request deadline can't fit another attempt.
         """
+        deadline = deadline or Deadline()
         # GEMINI MODEL HIERARCHY (Heimdall Core - Future Proof)
         GEMINI_HIERARCHY = [
             "gemini-flash-latest",    # Primary (Speed)
@@ -45,30 +208,105 @@ class KorumOrchestrator:
         
         for model_name in GEMINI_HIERARCHY:
             for attempt in range(3): # Max 3 attempts per model
+                if not deadline.allows():
+                    logger.warning(f"HEIMDALL: Deadline exceeded before {model_name} (Attempt {attempt+1})")
+                    return "Error: HEIMDALL Protocol Failed. Request deadline exceeded."
                 try:
                     logger.info(f"HEIMDALL: Engaging model {model_name} (Attempt {attempt+1})")
                     
-                    response = self.google_client.models.generate_content(
+                    return self._cached_call("google", model_name, "", prompt, {"temperature": 0.7}, lambda: self.google_client.models.generate_content(
                         model=model_name,
                         contents=prompt,
                         config=types.GenerateContentConfig(
-                            temperature=0.7
+                            temperature=0.7,
+                            http_options=types.HttpOptions(timeout=int(deadline.timeout(ATTEMPT_TIMEOUT) * 1000))
                         )
-                    )
-                    return response.text
+                    ).text, use_cache, deadline)
 
                 except Exception as e:
                     error_str = str(e)
-                    if "429" in error_str or "503" in error_str:
+                    if "429" in error_str:
+                        provider_limiter.throttle("google", model_name)
+                    backoff = 2 * (2 ** attempt) # Exponential Backoff (2s, 4s, 8s)
+                    if ("429" in error_str or "503" in error_str) and deadline.allows(backoff + MIN_ATTEMPT_SECONDS) \
+                            and provider_health.state("google", model_name) != "open":
                         logger.warning(f"HEIMDALL: Stability breach on {model_name}: {e}")
-                        time.sleep(2 * (2 ** attempt)) # Exponential Backoff (2s, 4s, 8s)
+                        time.sleep(backoff)
                     else:
                         logger.error(f"HEIMDALL: Non-retriable error on {model_name}: {e}")
                         break # Move to next model immediately
 
         return "Error: HEIMDALL Protocol Failed. All Gemini models exhausted."
 
-    def execute_pipeline(self, query: str, depth: str = "standard", hacker_mode: bool = False) -> Dict:
+    def _run_lane(self, lane: str, fn):
+        """Run one lane; successful live (uncached) calls feed the lane's latency history."""
+        start = time.monotonic()
+        result = fn()
+        if not getattr(self._local, 'cache_hit', False):
+            self.latency.record(lane, time.monotonic() - start)
+        return result
+
+    def _hedged(self, layer: str, primary, backup, deadline: Deadline, trace: PipelineTrace = None):
+        """
+        Run the primary (lane, fn) and fall back to the backup (lane, fn): immediately if the primary
+        fails, or as a hedge alongside it once the primary is slower than its usual latency percentile.
+        fn() returns the result or raises. Returns the first success; a losing lane is left to finish
+        in the background (its response still lands in the cache). Raises the last error if both fail.
+        """
+        futures = {self._lanes.submit(self._run_lane, *primary): primary[0]}
+        hedge_at = time.monotonic() + (self.latency.hedge_delay(primary[0]) if KORUM_HEDGING else float('inf'))
+        backup_started = hedged = False
+        last_error = None
+        while futures:
+            wait_until = deadline.remaining() if backup_started else min(hedge_at - time.monotonic(), deadline.remaining())
+            done, _ = wait(futures, timeout=None if wait_until == float('inf') else max(0.0, wait_until), return_when=FIRST_COMPLETED)
+            for future in done:
+                lane = futures.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.warning(f"{layer}: lane {lane} failed: {e}")
+                    last_error = e
+                    continue
+                if hedged and lane == backup[0]:
+                    self._count("hedges_won")
+                if trace:
+                    trace.note(layer, lane=lane, hedged=hedged)
+                return result
+            if backup_started:
+                if not done:
+                    break  # Deadline reached with the remaining lanes still running
+                continue
+            if not deadline.allows():
+                break
+            if futures:
+                logger.warning(f"{layer}: {primary[0]} slower than its p{int(KORUM_HEDGE_PERCENTILE * 100)}, hedging with {backup[0]}")
+                self._count("hedges_fired")
+                hedged = True
+            else:
+                logger.warning(f"{layer}: {primary[0]} failed, failing over to {backup[0]}")
+                self._count("failovers")
+            futures[self._lanes.submit(self._run_lane, *backup)] = backup[0]
+            backup_started = True
+        raise last_error or TimeoutError(f"{layer}: request deadline exceeded")
+
+    def _await_layer(self, future, deadline: Deadline, fallback, layer: str):
+        """Result of a layer running on the layer pool, or `fallback` if the deadline passes first."""
+        remaining = deadline.remaining()
+        try:
+            return future.result(timeout=None if remaining == float('inf') else remaining + MIN_ATTEMPT_SECONDS)
+        except FuturesTimeoutError:
+            logger.error(f"{layer} still running at the request deadline")
+            return fallback
+
+    def stats(self) -> Dict:
+        with self._metrics_lock:
+            metrics = dict(self.metrics)
+        return {"speculative": KORUM_SPECULATIVE, "refine_constraints": KORUM_REFINE_CONSTRAINTS, "hedging": KORUM_HEDGING,
+                **metrics, "lanes": self.latency.stats()}
+
+    def execute_pipeline(self, query: str, depth: str = "standard", hacker_mode: bool = False, deadline: Deadline = None, use_cache: bool = True,
+                         speculative: bool = KORUM_SPECULATIVE, refine: bool = KORUM_REFINE_CONSTRAINTS, layer_callback: Callable = None) -> Dict:
         """
         Executes the 5-stage reasoning pipeline (Crucible Architecture).
         
@@ -79,37 +317,61 @@ class KorumOrchestrator:
         3. Stressor (Gemini 2.5) - Failure Mode Analysis
         3.5 Hacker (Gemini/Claude) - Red Team Exploit Generation (Optional)
         4. Synthesizer (GPT-4o) - Final Decision Artifact
+
+        deadline: request Deadline shared by every layer, retry and fallback.
+        use_cache: False forces fresh model calls instead of the response cache.
+        speculative: start Layer 1 alongside the scout (it then works from the query alone);
+            False runs the scout first and hands its intel to Layer 1, as originally.
+        refine: with speculative, re-run Layer 1 with the scout's intel once it arrives.
+        layer_callback: callback(event, layer, data) for progress reporting (see PipelineTrace).
+        The result's "timings" has each layer's start offset and duration.
         """
-        logger.info(f"Starting Korum V2 Pipeline for query: {query[:50]}... (Hacker Mode: {hacker_mode})")
+        deadline = deadline or Deadline()
+        trace = PipelineTrace(layer_callback)
+        self._count("runs")
+        logger.info(f"Starting Korum V2 Pipeline for query: {query[:50]}... (Hacker Mode: {hacker_mode}, Speculative: {speculative})")
         
         # --- LAYER 0: THE SILENT SCOUT (Perplexity) ---
         logger.info("Engaging Layer 0: Perplexity Scout...")
-        scout_context = self._layer_0_scout(query)
-        logger.info("Layer 0 Complete: Intelligence Gathered")
+        scout_future = self._layers.submit(trace.run, "layer_0_scout", self._layer_0_scout, query, deadline, use_cache)
 
         # --- LAYER 1: DECONSTRUCTION ---
-        constraints = self._layer_1_deconstruct(query, scout_context)
-        logger.info("Layer 1 Complete: Constraints Extracted")
+        if speculative:
+            # Constraint extraction doesn't need live data; don't make it wait for the scout
+            constraints_future = self._layers.submit(trace.run, "layer_1_deconstruct", self._layer_1_deconstruct,
+                                                     query, SCOUT_PENDING, deadline, use_cache, trace=trace)
+            scout_context = self._await_layer(scout_future, deadline, SCOUT_UNAVAILABLE, "layer_0_scout")
+            constraints = self._await_layer(constraints_future, deadline, {"error": "Deconstruction Failed. Request deadline exceeded."}, "layer_1_deconstruct")
+            if refine and scout_context not in SCOUT_FAILURES and deadline.allows():
+                refined = trace.run("layer_1_refine", self._layer_1_deconstruct, query, scout_context, deadline, use_cache)
+                if "error" not in refined:
+                    constraints = refined
+        else:
+            scout_context = self._await_layer(scout_future, deadline, SCOUT_UNAVAILABLE, "layer_0_scout")
+            constraints = trace.run("layer_1_deconstruct", self._layer_1_deconstruct, query, scout_context, deadline, use_cache, trace=trace)
+        logger.info("Layer 0 + 1 Complete: Intelligence Gathered, Constraints Extracted")
         
         # --- LAYER 2: CONSTRUCTION ---
-        standard_solution = self._layer_2_build(query, constraints, scout_context)
+        standard_solution = trace.run("layer_2_build", self._layer_2_build, query, constraints, scout_context, deadline, use_cache, trace=trace)
         logger.info("Layer 2 Complete: Standard Solution Built")
         
         # --- LAYER 3: STRESS TEST ---
-        failure_analysis = self._layer_3_stress_test(standard_solution)
+        failure_analysis = trace.run("layer_3_stress", self._layer_3_stress_test, standard_solution, deadline, use_cache)
         logger.info("Layer 3 Complete: Failure Modes Identified")
         
         # --- LAYER 3.5: HACKER PROTOCOL ---
         exploit_poc = None
         if hacker_mode:
             logger.info("Engaging Layer 3.5: Red Team Exploit Generation...")
-            exploit_poc = self._layer_3_5_hacker_exploit(failure_analysis)
+            exploit_poc = trace.run("layer_3_5_hacker", self._layer_3_5_hacker_exploit, failure_analysis, deadline, use_cache)
             logger.info("Layer 3.5 Complete: Exploit PoC Generated")
         
         # --- LAYER 4: SYNTHESIS ---
-        final_artifact = self._layer_4_synthesize(query, standard_solution, failure_analysis, exploit_poc)
+        final_artifact = trace.run("layer_4_synthesize", self._layer_4_synthesize, query, standard_solution, failure_analysis, exploit_poc, deadline, use_cache)
         logger.info("Layer 4 Complete: Artifact Synthesized")
         
+        timings = trace.to_dict()
+        logger.info(f"Korum V2 Pipeline finished in {timings['total_seconds']}s")
         return {
             "query": query,
             "scout_context": scout_context,
@@ -117,10 +379,11 @@ class KorumOrchestrator:
             "standard_solution": standard_solution,
             "failure_analysis": failure_analysis,
             "exploit_poc": exploit_poc,
-            "final_artifact": final_artifact
+            "final_artifact": final_artifact,
+            "timings": timings
         }
 
-    def _layer_0_scout(self, query: str) -> str:
+    def _layer_0_scout(self, query: str, deadline: Deadline = None, use_cache: bool = True) -> str:
         """
         Layer 0: The Silent Scout (Perplexity)
         Role: Live Intelligence Gathering.
@@ -130,6 +393,11 @@ class KorumOrchestrator:
         if not api_key:
             logger.warning("Layer 0 Skipped: PERPLEXITY_API_KEY not found.")
             return "No live intelligence available."
+
+        deadline = deadline or Deadline()
+        if not deadline.allows():
+            logger.warning("Layer 0 Skipped: request deadline exceeded.")
+            return "No live intelligence available."
             
         url = "https://api.perplexity.ai/chat/completions"
         
@@ -160,21 +428,40 @@ class KorumOrchestrator:
         }
         
         try:
-            response = requests.post(url, json=payload, headers=headers)
-            if response.status_code == 200:
-                return response.json()['choices'][0]['message']['content']
-            else:
-                logger.error(f"Layer 0 Error: {response.text}")
-                return "Perplexity Scout failed to report."
+            use_cache = use_cache and response_cache.active()
+            cached = response_cache.lookup("perplexity", ["sonar-pro"], "You are a Technical Intelligence Officer.", prompt) if use_cache else None
+            if cached:
+                return cached['text']
+
+            def fetch():
+                provider_limiter.acquire("perplexity", "sonar-pro", quota_tokens(prompt), deadline)
+                with provider_health.track("perplexity", "sonar-pro", deadline, 60):
+                    response = self.http.post(url, json=payload, headers=headers, timeout=deadline.timeout(60))
+                    if response.status_code != 200:
+                        raise requests.HTTPError(response.text, response=response)
+                intel = response.json()['choices'][0]['message']['content']
+                if use_cache:
+                    response_cache.store("perplexity", "sonar-pro", intel, "You are a Technical Intelligence Officer.", prompt)
+                return intel
+
+            key = response_cache.make_key("perplexity", "sonar-pro", "You are a Technical Intelligence Officer.", prompt)
+            intel, shared = single_flight.do("perplexity", key, fetch, deadline)
+            if shared:
+                self._count("coalesced_calls")
+            return intel
+        except requests.HTTPError as e:
+            logger.error(f"Layer 0 Error: {e}")
+            return "Perplexity Scout failed to report."
         except Exception as e:
             logger.error(f"Layer 0 Exception: {e}")
             return "Perplexity Scout offline."
 
-    def _layer_1_deconstruct(self, query: str, context: str = "") -> Dict:
+    def _layer_1_deconstruct(self, query: str, context: str = "", deadline: Deadline = None, use_cache: bool = True, trace: PipelineTrace = None) -> Dict:
         """
         Layer 1: The Deconstructor (Claude 3.5 Sonnet)
         Role: Pure Analysis. No solving.
         Output: JSON Variables & Constraints.
+        The Claude chain is hedged with GPT-4o (see _hedged).
         """
         prompt = f"""
         You are a REQUIREMENT EXTRACTION ENGINE. Your GOAL is to deconstruct the user's request into atomic constraints.
@@ -207,41 +494,54 @@ class KorumOrchestrator:
             "claude-3-haiku-20240307"     # Fast Backup
         ]
         
-        for model_id in models_to_try:
-            try:
-                response = self.anthropic_client.messages.create(
-                    model=model_id,
-                    max_tokens=1000,
-                    temperature=0.0, # Zero temp for analytical precision
-                    messages=[
-                        {"role": "user", "content": prompt}
-                    ]
-                )
-                raw_text = response.content[0].text
-                return self._clean_json(raw_text)
-            except Exception as e:
-                logger.warning(f"Layer 1 Model {model_id} failed: {e}. Trying next...")
-                continue
-        
-        # --- FALLBACK TO GPT-4o ---
-        logger.warning("Layer 1 Primary (Claude) Failed. Engaging Secondary Node (GPT-4o)...")
-        try:
-            fallback_response = self.openai_client.chat.completions.create(
+        deadline = deadline or Deadline()
+
+        def claude_chain():
+            for model_id in models_to_try:
+                if not deadline.allows():
+                    logger.warning(f"Layer 1: deadline exceeded before {model_id}, abandoning Claude chain")
+                    break
+                try:
+                    raw_text = self._cached_call("anthropic", model_id, "", prompt, {"max_tokens": 1000, "temperature": 0.0}, lambda: self.anthropic_client.messages.create(
+                        model=model_id,
+                        max_tokens=1000,
+                        temperature=0.0, # Zero temp for analytical precision
+                        messages=[
+                            {"role": "user", "content": prompt}
+                        ],
+                        timeout=deadline.timeout(ATTEMPT_TIMEOUT)
+                    ).content[0].text, use_cache, deadline)
+                    return self._clean_json(raw_text)
+                except Exception as e:
+                    logger.warning(f"Layer 1 Model {model_id} failed: {e}. Trying next...")
+                    continue
+            raise RuntimeError("Every Claude model failed")
+
+        # --- FALLBACK / HEDGE: GPT-4o ---
+        def gpt_fallback():
+            fallback_text = self._cached_call("openai", "gpt-4o", "You are a JSON-only extraction engine.", prompt, {"temperature": 0.0}, lambda: self.openai_client.chat.completions.create(
                 model="gpt-4o",
                 messages=[{"role": "system", "content": "You are a JSON-only extraction engine."},
                           {"role": "user", "content": prompt}],
-                temperature=0.0
-            )
-            return self._clean_json(fallback_response.choices[0].message.content)
+                temperature=0.0,
+                timeout=deadline.timeout(ATTEMPT_TIMEOUT)
+            ).choices[0].message.content, use_cache, deadline)
+            return self._clean_json(fallback_text)
+
+        try:
+            return self._hedged("layer_1_deconstruct", ("layer_1:claude", claude_chain), ("layer_1:gpt-4o", gpt_fallback), deadline, trace)
         except Exception as e:
+            if not deadline.allows():
+                logger.error("Layer 1 CRITICAL FAILURE: request deadline exceeded")
+                return {"error": "Deconstruction Failed. Request deadline exceeded."}
             logger.error(f"Layer 1 CRITICAL FAILURE (Both Claude & GPT-4o): {e}")
             return {"error": "Deconstruction Failed. System Offline."}
 
-    def _layer_2_build(self, query: str, constraints: Dict, context: str = "") -> str:
+    def _layer_2_build(self, query: str, constraints: Dict, context: str = "", deadline: Deadline = None, use_cache: bool = True, trace: PipelineTrace = None) -> str:
         """
         Layer 2: The Architect (GPT-4o)
         Role: Standard Solution Builder.
-        Constructs the "Textbook" solution based strictly on constraints.
+        Constructs the "Textbook" solution based strictly on constraints. Hedged with Gemini (see _hedged).
         """
         constraints_str = json.dumps(constraints, indent=2)
         
@@ -273,24 +573,34 @@ class KorumOrchestrator:
         
         # APPLY SAFETY WRAPPER (Red Team Frame)
         safe_prompt = wrap_for_compliance(prompt, intent="analysis")
+        deadline = deadline or Deadline()
+        if not deadline.allows():
+            logger.error("Layer 2 Skipped: request deadline exceeded")
+            return "Error building solution: request deadline exceeded"
 
-        try:
-            response = self.openai_client.chat.completions.create(
+        def gpt_build():
+            return self._cached_call("openai", "gpt-4o", "You are an expert Systems Architect running an educational simulation.", safe_prompt, {"temperature": 0.2}, lambda: self.openai_client.chat.completions.create(
                 model="gpt-4o",
                 messages=[{"role": "system", "content": "You are an expert Systems Architect running an educational simulation."},
                           {"role": "user", "content": safe_prompt}],
-                temperature=0.2
-            )
-            return response.choices[0].message.content
+                temperature=0.2,
+                timeout=deadline.timeout(ATTEMPT_TIMEOUT)
+            ).choices[0].message.content, use_cache, deadline)
+
+        # Backup / hedge: Gemini via Heimdall Core
+        def gemini_build():
+            text = self._generate_gemini_safe(safe_prompt, deadline, use_cache)
+            if text.startswith("Error: HEIMDALL"):
+                raise RuntimeError(text)
+            return text
+
+        try:
+            return self._hedged("layer_2_build", ("layer_2:gpt-4o", gpt_build), ("layer_2:gemini", gemini_build), deadline, trace)
         except Exception as e:
-            logger.error(f"Layer 2 Primary (GPT-4o) Failed: {e}. Engaging Backup (Heimdall)...")
-            try:
-                # Fallback to Gemini via Heimdall Core
-                return self._generate_gemini_safe(safe_prompt)
-            except Exception as e2:
-                return f"Error building solution: {str(e)} AND {str(e2)}"
-
-    def _layer_3_stress_test(self, solution: str) -> str:
+            logger.error(f"Layer 2 Failed (GPT-4o and Heimdall): {e}")
+            return f"Error building solution: {str(e)}"
+
+    def _layer_3_stress_test(self, solution: str, deadline: Deadline = None, use_cache: bool = True) -> str:
         """
         Layer 3: The Stressor (Gemini 2.5)
         Role: Reliability Engineering / Failure Physics.
@@ -318,12 +628,12 @@ class KorumOrchestrator:
         """
         
         try:
-            return self._generate_gemini_safe(prompt)
+            return self._generate_gemini_safe(prompt, deadline, use_cache)
         except Exception as e:
             logger.error(f"Layer 3 Failed: {e}")
             return f"Error analyzing risks: {str(e)}"
 
-    def _layer_4_synthesize(self, query: str, solution: str, failures: str, exploit_poc: str = None) -> str:
+    def _layer_4_synthesize(self, query: str, solution: str, failures: str, exploit_poc: str = None, deadline: Deadline = None, use_cache: bool = True) -> str:
         """
         Layer 4: The Synthesizer (GPT-4o)
         Role: Executive Decision Maker.
@@ -375,20 +685,24 @@ class KorumOrchestrator:
         
         # APPLY SAFETY WRAPPER (Red Team Frame)
         safe_prompt = wrap_for_compliance(prompt, intent="synthesis")
+        deadline = deadline or Deadline()
+        if not deadline.allows():
+            logger.error("Layer 4 Skipped: request deadline exceeded")
+            return "Error synthesizing artifact: request deadline exceeded"
 
         try:
-            response = self.openai_client.chat.completions.create(
+            return self._cached_call("openai", "gpt-4o", "You are a CEO-level decision maker.", safe_prompt, {"temperature": 0.1}, lambda: self.openai_client.chat.completions.create(
                 model="gpt-4o",
                 messages=[{"role": "system", "content": "You are a CEO-level decision maker."},
                           {"role": "user", "content": safe_prompt}],
-                temperature=0.1
-            )
-            return response.choices[0].message.content
+                temperature=0.1,
+                timeout=deadline.timeout(ATTEMPT_TIMEOUT)
+            ).choices[0].message.content, use_cache, deadline)
         except Exception as e:
             logger.error(f"Layer 4 Failed: {e}")
             return f"Error synthesizing artifact: {str(e)}"
 
-    def _layer_3_5_hacker_exploit(self, vulnerabilities: str) -> str:
+    def _layer_3_5_hacker_exploit(self, vulnerabilities: str, deadline: Deadline = None, use_cache: bool = True) -> str:
         """
         Layer 3.5: The Hacker (On Demand)
         Role: Offensive Security / Red Team.
@@ -414,7 +728,7 @@ class KorumOrchestrator:
         """
         
         try:
-            return self._generate_gemini_safe(prompt)
+            return self._generate_gemini_safe(prompt, deadline, use_cache)
         except Exception as e:
              logger.error(f"Layer 3.5 Failed: {e}")
              return f"Error generating exploit: {str(e)}"
@@ -0,0 +1,180 @@
+"""
+Write-Behind Persistence Queue for comparisons.
+/api/ask gets a pre-allocated comparison id immediately and returns; a background writer
+batches the Comparison + Response inserts into single transactions. Later updates to a
+queued comparison (quorum amendments) go through the same queue, so the single writer
+applies them after the insert without anyone waiting for it.
+
+Configuration:
+    PERSIST_BATCH_SIZE     (default 50)   flush once this many comparisons are queued
+    PERSIST_FLUSH_SECONDS  (default 0.5)  ...or once the oldest queued comparison is this old
+The queue is drained on interpreter exit (gunicorn worker shutdown / --max-requests recycle).
+"""
+
+import os
+import time
+import queue
+import atexit
+import threading
+from typing import Dict, List, Optional
+
+from database import comparison_ids, build_comparison_rows, bulk_insert_comparisons, update_comparison_responses, log_system_event
+
+PERSIST_BATCH_SIZE = int(os.getenv('PERSIST_BATCH_SIZE', '50'))
+PERSIST_FLUSH_SECONDS = float(os.getenv('PERSIST_FLUSH_SECONDS', '0.5'))
+SHUTDOWN_DRAIN_SECONDS = 10
+
+_STOP = object()
+
+
+class PersistenceQueue:
+    """
+    Single writer thread per process. enqueue_comparison() never touches the database
+    except when the id allocator needs a fresh block.
+    """
+
+    def __init__(self, batch_size: int = PERSIST_BATCH_SIZE, flush_seconds: float = PERSIST_FLUSH_SECONDS):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._queue: "queue.Queue" = queue.Queue()
+        self._pending = set()
+        self._written = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.metrics = {"enqueued": 0, "written": 0, "batches": 0, "failed": 0, "last_batch_ms": 0.0}
+
+    def _ensure_writer(self):
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="triai-persist", daemon=True)
+            self._thread.start()
+
+    def enqueue_comparison(self, question: str, responses: Dict, document_content: str = None, document_name: str = None) -> int:
+        """Queue a comparison for the background writer and return its (pre-allocated) id."""
+        comparison_id = comparison_ids.next_id()
+        # Rows are rendered now so later mutation of `responses` can't leak into the write
+        item = build_comparison_rows(comparison_id, question, responses, document_content, document_name)
+        with self._written:
+            self._pending.add(comparison_id)
+        self.metrics["enqueued"] += 1
+        self._ensure_writer()
+        self._queue.put(item)
+        return comparison_id
+
+    def enqueue_response_update(self, comparison_id: int, responses: Dict):
+        """Queue an overwrite of a comparison's provider rows; applied after that comparison's insert."""
+        self.metrics["enqueued"] += 1
+        self._ensure_writer()
+        self._queue.put({"update": comparison_id, "responses": dict(responses)})
+
+    def wait_until_written(self, comparison_id: int, timeout: float = 5.0) -> bool:
+        """Block until a queued comparison is in the database (read-your-writes for follow-up updates)."""
+        deadline = time.monotonic() + timeout
+        with self._written:
+            while comparison_id in self._pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._written.wait(remaining)
+        return True
+
+    def _run(self):
+        while True:
+            batch, stop = self._collect_batch()
+            if batch:
+                self._flush(batch)
+            if stop:
+                return
+
+    def _collect_batch(self):
+        """Block for the first item, then gather until batch_size or flush_seconds. Returns (batch, stop)."""
+        first = self._queue.get()
+        if first is _STOP:
+            return [], True
+        batch = [first]
+        flush_at = time.monotonic() + self.flush_seconds
+        while len(batch) < self.batch_size:
+            remaining = flush_at - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _flush(self, batch: List[Dict]):
+        updates = [item for item in batch if "update" in item]
+        batch = [item for item in batch if "update" not in item]
+        if batch:
+            self._flush_inserts(batch)
+        # FIFO queue + inserts first: an update always lands after its comparison's insert
+        for item in updates:
+            self._apply_update(item)
+
+    def _apply_update(self, item: Dict):
+        try:
+            if update_comparison_responses(item["update"], item["responses"]):
+                self.metrics["written"] += 1
+                return
+            error = "update returned False"
+        except Exception as e:
+            error = str(e)
+        self.metrics["failed"] += 1
+        print(f"CRITICAL: Dropped response update for comparison {item['update']}: {error}")
+        log_system_event("PERSIST_FAIL", f"Response update for comparison {item['update']} could not be saved", error)
+
+    def _flush_inserts(self, batch: List[Dict]):
+        start = time.perf_counter()
+        try:
+            bulk_insert_comparisons(batch)
+            written = batch
+        except Exception as e:
+            # One bad row shouldn't lose the whole batch: retry item by item
+            print(f"CRITICAL: Batched comparison write failed ({len(batch)} rows), retrying individually: {e}")
+            written = []
+            for item in batch:
+                try:
+                    bulk_insert_comparisons([item])
+                    written.append(item)
+                except Exception as item_error:
+                    self.metrics["failed"] += 1
+                    print(f"CRITICAL: Dropped comparison {item['comparison']['id']}: {item_error}")
+                    log_system_event("PERSIST_FAIL", f"Comparison {item['comparison']['id']} could not be saved", str(item_error))
+
+        self.metrics["written"] += len(written)
+        self.metrics["batches"] += 1
+        self.metrics["last_batch_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        with self._written:
+            for item in batch:
+                self._pending.discard(item['comparison']['id'])
+            self._written.notify_all()
+
+    def drain(self, timeout: float = SHUTDOWN_DRAIN_SECONDS):
+        """Flush everything queued so far and stop the writer."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._pending:
+            print(f"CRITICAL: {len(self._pending)} comparisons still unsaved at shutdown")
+        else:
+            print("[PERSIST] Queue drained")
+
+    def stats(self) -> Dict:
+        return {
+            "queued": self._queue.qsize(),
+            "pending": len(self._pending),
+            "batch_size": self.batch_size,
+            "flush_seconds": self.flush_seconds,
+            **self.metrics
+        }
+
+
+# Initialize Singleton
+persistence_queue = PersistenceQueue()
+atexit.register(persistence_queue.drain)
@@ -0,0 +1,230 @@
+"""
+Shared Provider Client Registry.
+One keep-alive, pooled client per provider per process, instead of a fresh SDK client
+(and a fresh TLS handshake + connection pool) on every call.
+
+Pool sizes are configurable through the environment:
+    PROVIDER_POOL_MAX_CONNECTIONS   (default 20)  max open connections per provider
+    PROVIDER_POOL_MAX_KEEPALIVE     (default 10)  idle connections kept warm per provider
+    PROVIDER_POOL_KEEPALIVE_EXPIRY  (default 60)  seconds an idle connection is kept
+"""
+
+import os
+import threading
+from typing import Dict, Optional
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+import openai
+import anthropic
+from google import genai
+from google.genai import types
+from dotenv import load_dotenv
+
+load_dotenv()
+
+POOL_MAX_CONNECTIONS = int(os.getenv('PROVIDER_POOL_MAX_CONNECTIONS', '20'))
+POOL_MAX_KEEPALIVE = int(os.getenv('PROVIDER_POOL_MAX_KEEPALIVE', '10'))
+POOL_KEEPALIVE_EXPIRY = float(os.getenv('PROVIDER_POOL_KEEPALIVE_EXPIRY', '60'))
+
+# SDK-level default timeouts (per-call timeouts still override these)
+PROVIDER_TIMEOUTS = {
+    "openai": 90.0,
+    "anthropic": 90.0,
+    "google": 90.0,
+    "http": 60.0
+}
+
+
+class ConnectionStats:
+    """Counts requests vs. freshly opened TCP connections for one pool."""
+
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_connection(self):
+        with self._lock:
+            self.new_connections += 1
+
+    def snapshot(self) -> Dict:
+        reused = max(self.requests - self.new_connections, 0)
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "reused": reused,
+            "reuse_ratio": round(reused / self.requests, 3) if self.requests else 0.0
+        }
+
+
+class ProviderClientRegistry:
+    """
+    Lazily builds and caches pooled clients:
+      openai() / anthropic() / google()   -> SDK clients over a shared httpx pool
+      http()                              -> requests.Session for plain REST (Perplexity, ElevenLabs, ntfy, image downloads)
+      async_client(provider)              -> async twins for the fan-out loop
+    Async clients are bound to the event loop that first uses them, so only call
+    async_client() from coroutines running on the fan-out engine's loop.
+    """
+
+    def __init__(self):
+        self._clients = {}
+        self._async_clients = {}
+        self._stats: Dict[str, ConnectionStats] = {}
+        self._lock = threading.Lock()
+
+    # ---- connection accounting ----
+
+    def _stats_for(self, name: str) -> ConnectionStats:
+        if name not in self._stats:
+            self._stats[name] = ConnectionStats()
+        return self._stats[name]
+
+    def _limits(self, limits_cls=httpx.Limits):
+        return limits_cls(
+            max_connections=POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=POOL_MAX_KEEPALIVE,
+            keepalive_expiry=POOL_KEEPALIVE_EXPIRY
+        )
+
+    def _httpx_client(self, name: str, timeout: float, client_cls=httpx.Client, limits_cls=httpx.Limits):
+        """
+        Pooled sync client with request/new-connection counting.
+        client_cls/limits_cls let the OpenAI and Anthropic SDKs get their own
+        DefaultHttpxClient, since newer SDK releases bundle a separate httpx build.
+        """
+        stats = self._stats_for(name)
+
+        def trace(event_name, info):
+            if event_name == "connection.connect_tcp.complete":
+                stats.record_connection()
+
+        def on_request(request):
+            stats.record_request()
+            request.extensions["trace"] = trace
+
+        return client_cls(limits=self._limits(limits_cls), timeout=timeout, event_hooks={"request": [on_request]})
+
+    def _httpx_async_client(self, name: str, timeout: float, client_cls=httpx.AsyncClient, limits_cls=httpx.Limits):
+        stats = self._stats_for(name)
+
+        async def trace(event_name, info):
+            if event_name == "connection.connect_tcp.complete":
+                stats.record_connection()
+
+        async def on_request(request):
+            stats.record_request()
+            request.extensions["trace"] = trace
+
+        return client_cls(limits=self._limits(limits_cls), timeout=timeout, event_hooks={"request": [on_request]})
+
+    def _get_or_create(self, cache: Dict, key: str, factory):
+        client = cache.get(key)
+        if client is None:
+            with self._lock:
+                client = cache.get(key)
+                if client is None:
+                    client = factory()
+                    cache[key] = client
+        return client
+
+    # ---- sync clients ----
+
+    def openai(self) -> openai.OpenAI:
+        return self._get_or_create(self._clients, "openai", lambda: openai.OpenAI(
+            api_key=os.getenv('OPENAI_API_KEY'),
+            timeout=PROVIDER_TIMEOUTS["openai"],
+            http_client=self._httpx_client("openai", PROVIDER_TIMEOUTS["openai"], openai.DefaultHttpxClient, type(openai.DEFAULT_CONNECTION_LIMITS))
+        ))
+
+    def anthropic(self) -> anthropic.Anthropic:
+        return self._get_or_create(self._clients, "anthropic", lambda: anthropic.Anthropic(
+            api_key=os.getenv('ANTHROPIC_API_KEY'),
+            timeout=PROVIDER_TIMEOUTS["anthropic"],
+            http_client=self._httpx_client("anthropic", PROVIDER_TIMEOUTS["anthropic"], anthropic.DefaultHttpxClient, type(anthropic.DEFAULT_CONNECTION_LIMITS))
+        ))
+
+    def google(self) -> genai.Client:
+        """One genai.Client per process; its .aio surface shares the same registry accounting."""
+        return self._get_or_create(self._clients, "google", lambda: genai.Client(
+            api_key=os.getenv('GOOGLE_API_KEY'),
+            http_options=types.HttpOptions(
+                httpx_client=self._httpx_client("google", PROVIDER_TIMEOUTS["google"]),
+                httpx_async_client=self._httpx_async_client("google_async", PROVIDER_TIMEOUTS["google"])
+            )
+        ))
+
+    def http(self) -> requests.Session:
+        """Keep-alive requests.Session for plain REST providers."""
+        def build():
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_MAX_KEEPALIVE, pool_maxsize=POOL_MAX_CONNECTIONS)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            return session
+        return self._get_or_create(self._clients, "http", build)
+
+    # ---- async clients (fan-out loop only) ----
+
+    def async_client(self, provider: str):
+        def build():
+            if provider == 'openai':
+                return openai.AsyncOpenAI(
+                    api_key=os.getenv('OPENAI_API_KEY'),
+                    timeout=PROVIDER_TIMEOUTS["openai"],
+                    http_client=self._httpx_async_client("openai_async", PROVIDER_TIMEOUTS["openai"], openai.DefaultAsyncHttpxClient, type(openai.DEFAULT_CONNECTION_LIMITS))
+                )
+            if provider == 'anthropic':
+                return anthropic.AsyncAnthropic(
+                    api_key=os.getenv('ANTHROPIC_API_KEY'),
+                    timeout=PROVIDER_TIMEOUTS["anthropic"],
+                    http_client=self._httpx_async_client("anthropic_async", PROVIDER_TIMEOUTS["anthropic"], anthropic.DefaultAsyncHttpxClient, type(anthropic.DEFAULT_CONNECTION_LIMITS))
+                )
+            if provider == 'perplexity':
+                return self._httpx_async_client("perplexity_async", PROVIDER_TIMEOUTS["http"])
+            raise ValueError(f"No async client for provider: {provider}")
+        return self._get_or_create(self._async_clients, provider, build)
+
+    # ---- reporting ----
+
+    def _http_session_stats(self) -> Optional[Dict]:
+        """requests/urllib3 keeps its own counters on each host pool."""
+        session = self._clients.get("http")
+        if session is None:
+            return None
+        total_requests, total_connections = 0, 0
+        for adapter in set(session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is not None:
+                    total_requests += pool.num_requests
+                    total_connections += pool.num_connections
+        stats = ConnectionStats()
+        stats.requests, stats.new_connections = total_requests, total_connections
+        return stats.snapshot()
+
+    def stats(self) -> Dict:
+        report = {name: s.snapshot() for name, s in self._stats.items()}
+        http_stats = self._http_session_stats()
+        if http_stats:
+            report["http"] = http_stats
+        return {
+            "pool": {
+                "max_connections": POOL_MAX_CONNECTIONS,
+                "max_keepalive": POOL_MAX_KEEPALIVE,
+                "keepalive_expiry": POOL_KEEPALIVE_EXPIRY
+            },
+            "clients": sorted(list(self._clients.keys()) + [f"{k}_async" for k in self._async_clients.keys()]),
+            "connections": report
+        }
+
+
+# Initialize Singleton
+provider_clients = ProviderClientRegistry()
@@ -0,0 +1,253 @@
+"""
+Provider Health Registry.
+Sliding-window outcomes (success/failure and latency) per (provider, model), shared by every
+query_* function and the Korum layers, with a circuit breaker on top. A model that keeps failing
+(N consecutive errors, or an error rate over the threshold once the window has enough calls)
+is opened: calls to it fail at once with CircuitOpenError, so the retry loops and fallback
+chains move straight to the next model instead of paying the timeouts / 429 backoffs again.
+After a cool-down one probe call is let through (half-open); success closes the breaker,
+failure re-opens it with a doubled cool-down.
+
+Only the provider's own trouble counts against a model: 429s, 5xx, connection errors and
+timeouts that had the attempt's full cap. Caller errors (400s, content-policy rejections, bad
+images) and timeouts clipped short by the request's deadline are not recorded at all.
+
+Configuration:
+    PROVIDER_HEALTH_WINDOW_SECONDS    (default 300)  outcomes older than this are forgotten
+    PROVIDER_BREAKER_MIN_CALLS        (default 5)    calls in the window before the error rate can open a breaker
+    PROVIDER_BREAKER_ERROR_RATE       (default 0.5)  window error rate that opens a breaker
+    PROVIDER_BREAKER_CONSECUTIVE      (default 3)    consecutive failures that open a breaker regardless of volume
+    PROVIDER_BREAKER_OPEN_SECONDS     (default 30)   first cool-down before a probe
+    PROVIDER_BREAKER_MAX_OPEN_SECONDS (default 300)  cool-down ceiling after repeated failed probes
+"""
+
+import os
+import re
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+PROVIDER_HEALTH_WINDOW_SECONDS = float(os.getenv('PROVIDER_HEALTH_WINDOW_SECONDS', '300'))
+PROVIDER_BREAKER_MIN_CALLS = int(os.getenv('PROVIDER_BREAKER_MIN_CALLS', '5'))
+PROVIDER_BREAKER_ERROR_RATE = float(os.getenv('PROVIDER_BREAKER_ERROR_RATE', '0.5'))
+PROVIDER_BREAKER_CONSECUTIVE = int(os.getenv('PROVIDER_BREAKER_CONSECUTIVE', '3'))
+PROVIDER_BREAKER_OPEN_SECONDS = float(os.getenv('PROVIDER_BREAKER_OPEN_SECONDS', '30'))
+PROVIDER_BREAKER_MAX_OPEN_SECONDS = float(os.getenv('PROVIDER_BREAKER_MAX_OPEN_SECONDS', '300'))
+
+MAX_WINDOW_OUTCOMES = 500  # Per model; bounds memory for very busy models
+PROBE_TIMEOUT_SECONDS = 180  # A probe that never reported back (killed thread) stops blocking new probes
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+# SDK-agnostic classification: exception class names anywhere in the MRO, status codes, message text
+TIMEOUT_NAMES = ("Timeout",)  # TimeoutError, requests.Timeout, httpx.TimeoutException, openai.APITimeoutError...
+CONNECTION_NAMES = ("ConnectionError", "ConnectError", "APIConnectionError", "RemoteProtocolError")
+STATUS_IN_MESSAGE = re.compile(r"\b(429|50[0-4])\b|RESOURCE_EXHAUSTED|UNAVAILABLE|rate limit", re.IGNORECASE)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a model whose breaker is open."""
+    pass
+
+
+def error_status(error: BaseException) -> Optional[int]:
+    """HTTP status carried by an SDK / HTTP-client error, if any."""
+    for status in (getattr(error, 'status_code', None), getattr(error, 'code', None),
+                   getattr(getattr(error, 'response', None), 'status_code', None)):
+        if isinstance(status, int) and 100 <= status < 600:
+            return status
+    return None
+
+
+def is_timeout(error: BaseException) -> bool:
+    names = [cls.__name__ for cls in type(error).__mro__]
+    return any(t in name for name in names for t in TIMEOUT_NAMES) or "timed out" in str(error).lower()
+
+
+def is_provider_failure(error: BaseException) -> bool:
+    """429, 5xx and connection errors: the provider's trouble. Anything else is the caller's (or ours)."""
+    status = error_status(error)
+    if status is not None:
+        return status == 429 or status >= 500
+    if any(name in CONNECTION_NAMES for name in (cls.__name__ for cls in type(error).__mro__)):
+        return True
+    return bool(STATUS_IN_MESSAGE.search(str(error)))
+
+
+class ModelHealth:
+    """Window and breaker state of one (provider, model). Guarded by the registry's lock."""
+
+    def __init__(self, cooldown: float):
+        self.outcomes: deque = deque(maxlen=MAX_WINDOW_OUTCOMES)  # (timestamp, ok, seconds)
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.cooldown = cooldown
+        self.open_until = 0.0
+        self.probe_started: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.counters = {"calls": 0, "failures": 0, "short_circuited": 0, "opened": 0}
+
+    def prune(self, now: float, window: float):
+        while self.outcomes and self.outcomes[0][0] < now - window:
+            self.outcomes.popleft()
+
+
+class ProviderHealthRegistry:
+    """Thread-safe health registry; track() is the one call sites use."""
+
+    def __init__(self, window: float = PROVIDER_HEALTH_WINDOW_SECONDS, min_calls: int = PROVIDER_BREAKER_MIN_CALLS,
+                 error_rate: float = PROVIDER_BREAKER_ERROR_RATE, consecutive: int = PROVIDER_BREAKER_CONSECUTIVE,
+                 open_seconds: float = PROVIDER_BREAKER_OPEN_SECONDS, max_open_seconds: float = PROVIDER_BREAKER_MAX_OPEN_SECONDS):
+        self.window = window
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.consecutive = consecutive
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self._models: Dict[Tuple[str, str], ModelHealth] = {}
+        self._lock = threading.Lock()
+
+    def _health(self, provider: str, model: str) -> ModelHealth:
+        key = (provider, model)
+        if key not in self._models:
+            self._models[key] = ModelHealth(self.open_seconds)
+        return self._models[key]
+
+    def allow(self, provider: str, model: str) -> bool:
+        """True if a call may go out now. An expired open breaker admits exactly one probe."""
+        now = time.time()
+        with self._lock:
+            health = self._health(provider, model)
+            if health.state == CLOSED:
+                return True
+            if health.state == OPEN and now >= health.open_until:
+                health.state = HALF_OPEN
+                health.probe_started = None
+            if health.state == HALF_OPEN and (health.probe_started is None or now - health.probe_started > PROBE_TIMEOUT_SECONDS):
+                health.probe_started = now
+                print(f"[HEALTH] Probing {provider}:{model} (breaker half-open)")
+                return True
+            health.counters["short_circuited"] += 1
+            return False
+
+    def record(self, provider: str, model: str, ok: bool, seconds: float, error: Optional[str] = None):
+        now = time.time()
+        with self._lock:
+            health = self._health(provider, model)
+            health.prune(now, self.window)
+            health.outcomes.append((now, ok, seconds))
+            health.counters["calls"] += 1
+            if ok:
+                health.consecutive_failures = 0
+                if health.state != CLOSED:
+                    print(f"[HEALTH] {provider}:{model} recovered; breaker closed")
+                    # Start the window fresh, or the failures that opened it would re-open it on the next error
+                    health.outcomes.clear()
+                    health.outcomes.append((now, ok, seconds))
+                health.state = CLOSED
+                health.cooldown = self.open_seconds
+                health.probe_started = None
+                return
+            health.counters["failures"] += 1
+            health.consecutive_failures += 1
+            health.last_error = (error or "")[:200]
+            if health.state == HALF_OPEN:
+                health.cooldown = min(health.cooldown * 2, self.max_open_seconds)
+                self._open(provider, model, health, now, "probe failed")
+            elif health.state == CLOSED and self._tripped(health):
+                self._open(provider, model, health, now, f"{health.consecutive_failures} consecutive failures"
+                           if health.consecutive_failures >= self.consecutive else "error rate")
+
+    def _tripped(self, health: ModelHealth) -> bool:
+        if health.consecutive_failures >= self.consecutive:
+            return True
+        calls = len(health.outcomes)
+        failures = sum(1 for _, ok, _ in health.outcomes if not ok)
+        return calls >= self.min_calls and failures / calls >= self.error_rate
+
+    def _open(self, provider: str, model: str, health: ModelHealth, now: float, reason: str):
+        health.state = OPEN
+        health.open_until = now + health.cooldown
+        health.probe_started = None
+        health.counters["opened"] += 1
+        print(f"⚠️ [HEALTH] Breaker open for {provider}:{model} ({reason}); skipping it for {health.cooldown:.0f}s")
+
+    def release(self, provider: str, model: str):
+        """The call ended without a verdict on the model: free the probe slot without judging it."""
+        with self._lock:
+            self._health(provider, model).probe_started = None
+
+    @contextmanager
+    def track(self, provider: str, model: str, deadline=None, cap: Optional[float] = None):
+        """
+        Guard one upstream call: raises CircuitOpenError without calling if the breaker is open,
+        otherwise times the block and records its outcome (re-raising any exception). Pass the
+        request deadline and the attempt's own timeout cap so that a timeout clipped short by
+        the deadline isn't blamed on the model.
+        """
+        if not self.allow(provider, model):
+            raise CircuitOpenError(f"{provider}:{model} circuit open (recent failures); skipped")
+        clipped = deadline is not None and cap is not None and deadline.remaining() < cap
+        start = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            if (not clipped) if is_timeout(e) else is_provider_failure(e):
+                self.record(provider, model, False, time.monotonic() - start, str(e))
+            else:
+                self.release(provider, model)
+            raise
+        except BaseException:
+            # Cancelled (not the provider's fault)
+            self.release(provider, model)
+            raise
+        self.record(provider, model, True, time.monotonic() - start)
+
+    def state(self, provider: str, model: str) -> str:
+        with self._lock:
+            health = self._models.get((provider, model))
+            if health is None:
+                return CLOSED
+            if health.state == OPEN and time.time() >= health.open_until:
+                return HALF_OPEN
+            return health.state
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """{"provider:model": {state, window error rate, latencies, counters}} for /health and the dashboard."""
+        now = time.time()
+        result = {}
+        with self._lock:
+            for (provider, model), health in sorted(self._models.items()):
+                health.prune(now, self.window)
+                calls = len(health.outcomes)
+                failures = sum(1 for _, ok, _ in health.outcomes if not ok)
+                latencies = sorted(seconds for _, ok, seconds in health.outcomes if ok)
+                state = HALF_OPEN if health.state == OPEN and now >= health.open_until else health.state
+                result[f"{provider}:{model}"] = {
+                    "provider": provider,
+                    "model": model,
+                    "state": state,
+                    "window_calls": calls,
+                    "error_rate": round(failures / calls, 3) if calls else 0.0,
+                    "p50_seconds": round(latencies[len(latencies) // 2], 2) if latencies else None,
+                    "p95_seconds": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2) if latencies else None,
+                    "reopens_in": round(max(0.0, health.open_until - now), 1) if state == OPEN else None,
+                    "last_error": health.last_error,
+                    **health.counters
+                }
+        return result
+
+    def stats(self) -> Dict:
+        models = self.snapshot()
+        return {
+            "window_seconds": self.window,
+            "open": sorted(name for name, m in models.items() if m["state"] != CLOSED),
+            "short_circuited": sum(m["short_circuited"] for m in models.values()),
+            "models": models
+        }
+
+
+# Initialize Singleton
+provider_health = ProviderHealthRegistry()
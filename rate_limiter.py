@@ -0,0 +1,254 @@
+"""
+Provider Rate Limiter.
+Client-side token buckets per (provider, model) sized from our provider quotas: one bucket for
+requests per minute, one for tokens per minute (prompt estimate + max output, the way the
+providers count it). Every upstream call takes its share before it is sent, so concurrent
+workflows queue here instead of provoking 429s and backing off blindly. Waiting calls are
+served by priority, then arrival: interactive requests (/api/ask, Korum, visuals) ahead of
+background workflows ahead of feedback tagging. A call never waits past its request
+deadline (RateLimitTimeout, a DeadlineExceeded). A 429 that gets through anyway drains the
+model's request bucket, so the calls queued behind it pause instead of piling on.
+
+Buckets are per process; with several gunicorn workers give each a share of the quota.
+
+Configuration:
+    RATE_LIMIT_ENABLED          (default true)
+    PROVIDER_RATE_LIMITS        JSON overrides, e.g. {"openai:gpt-4o": {"rpm": 5000, "tpm": 800000}, "anthropic": {"rpm": 50}}
+                                ("provider:model" entries win over "provider" ones; see DEFAULT_RATE_LIMITS)
+    RATE_LIMIT_MAX_WAIT_SECONDS (default 120)  longest wait for callers without a request deadline
+"""
+
+import os
+import json
+import time
+import heapq
+import asyncio
+import threading
+import itertools
+from typing import Dict, Optional, Tuple
+
+from deadline import Deadline, DeadlineExceeded, MIN_ATTEMPT_SECONDS
+from database import CHARS_PER_TOKEN
+
+RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+RATE_LIMIT_MAX_WAIT_SECONDS = float(os.getenv('RATE_LIMIT_MAX_WAIT_SECONDS', '120'))
+
+# Quotas of our current tiers (requests / tokens per minute); PROVIDER_RATE_LIMITS overrides
+DEFAULT_RATE_LIMITS = {
+    "openai": {"rpm": 500, "tpm": 30000},
+    "openai:dall-e-3": {"rpm": 5, "tpm": None},
+    "anthropic": {"rpm": 50, "tpm": 40000},
+    "google": {"rpm": 1000, "tpm": 1000000},
+    "google:gemini-2.5-pro": {"rpm": 150, "tpm": 2000000},
+    "google:gemini-pro-latest": {"rpm": 150, "tpm": 2000000},
+    "perplexity": {"rpm": 50, "tpm": None}
+}
+
+# Lower rank is served first
+PRIORITIES = {"interactive": 0, "workflow": 1, "feedback": 2}
+DEFAULT_OUTPUT_TOKENS = 1000  # Output allowance for calls that don't set max_tokens
+ASYNC_POLL_SECONDS = 0.25     # Async waiters re-check at most this often (sync waiters are notified)
+
+
+def load_rate_limits() -> Dict[str, Dict]:
+    limits = {key: dict(value) for key, value in DEFAULT_RATE_LIMITS.items()}
+    overrides = os.getenv('PROVIDER_RATE_LIMITS')
+    if overrides:
+        try:
+            for key, value in json.loads(overrides).items():
+                limits.setdefault(key, {}).update(value)
+        except (ValueError, AttributeError) as e:
+            print(f"CRITICAL: PROVIDER_RATE_LIMITS is not valid JSON ({e}); using default quotas")
+    return limits
+
+
+def quota_tokens(*texts, output: int = DEFAULT_OUTPUT_TOKENS) -> int:
+    """Tokens one call counts against a TPM quota: the prompt estimate plus the output allowance."""
+    return sum(len(t) for t in texts if isinstance(t, str)) // CHARS_PER_TOKEN + (output or 0)
+
+
+class RateLimitTimeout(DeadlineExceeded):
+    """The call could not get a rate-limit slot before its deadline."""
+    pass
+
+
+class TokenBucket:
+    """Continuously refilled bucket holding up to one minute of quota. None = unlimited."""
+
+    def __init__(self, per_minute: Optional[float]):
+        self.capacity = float(per_minute) if per_minute else None
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        if self.capacity is not None:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60.0)
+        self.updated = now
+
+    def ready_in(self, amount: float) -> float:
+        """Seconds until `amount` is available (amounts over capacity only need a full bucket)."""
+        if self.capacity is None:
+            return 0.0
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing * 60.0 / self.capacity)
+
+    def take(self, amount: float):
+        if self.capacity is not None:
+            self.level -= min(amount, self.capacity)
+
+
+class ModelLimiter:
+    """RPM + TPM buckets of one (provider, model), with a priority queue of waiting calls."""
+
+    def __init__(self, rpm: Optional[float], tpm: Optional[float]):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.queue = []  # heap of (priority rank, arrival seq)
+        self.metrics = {"calls": 0, "waited": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0, "timeouts": 0, "throttled": 0}
+        self.wait_by_priority = {name: 0.0 for name in PRIORITIES}
+
+    def ready_in(self, tokens: int) -> float:
+        return max(self.requests.ready_in(1), self.tokens.ready_in(tokens))
+
+
+class ProviderRateLimiter:
+    """acquire() (threads) / aacquire() (event loop) before every upstream call."""
+
+    def __init__(self, limits: Optional[Dict[str, Dict]] = None, enabled: bool = RATE_LIMIT_ENABLED):
+        self.limits = limits if limits is not None else load_rate_limits()
+        self.enabled = enabled
+        self._models: Dict[Tuple[str, str], ModelLimiter] = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def _limiter(self, provider: str, model: str) -> ModelLimiter:
+        key = (provider, model)
+        if key not in self._models:
+            quota = {**self.limits.get(provider, {}), **self.limits.get(f"{provider}:{model}", {})}
+            self._models[key] = ModelLimiter(quota.get("rpm"), quota.get("tpm"))
+        return self._models[key]
+
+    def _enter(self, provider: str, model: str, priority: str):
+        with self._cond:
+            limiter = self._limiter(provider, model)
+            ticket = (PRIORITIES.get(priority, PRIORITIES["interactive"]), next(self._seq))
+            heapq.heappush(limiter.queue, ticket)
+            return limiter, ticket
+
+    def _try_take(self, limiter: ModelLimiter, ticket, tokens: int) -> float:
+        """Take the slot if this ticket is first in line and the buckets allow it (returns 0), else seconds to wait. Holds _cond."""
+        now = time.monotonic()
+        limiter.requests.refill(now)
+        limiter.tokens.refill(now)
+        wait = limiter.ready_in(tokens)
+        if limiter.queue[0] != ticket:
+            return max(wait, 0.05)  # Someone ahead of us; re-check when they are served
+        if wait > 0:
+            return wait
+        heapq.heappop(limiter.queue)
+        limiter.requests.take(1)
+        limiter.tokens.take(tokens)
+        self._cond.notify_all()
+        return 0.0
+
+    def _leave(self, limiter: ModelLimiter, ticket):
+        limiter.queue.remove(ticket)
+        heapq.heapify(limiter.queue)
+        self._cond.notify_all()
+
+    def _budget(self, deadline: Optional[Deadline], waited: float) -> float:
+        """How much longer this call may wait: the deadline minus time for the call itself, capped by the max wait."""
+        remaining = deadline.remaining() - MIN_ATTEMPT_SECONDS if deadline is not None else float('inf')
+        return min(remaining, RATE_LIMIT_MAX_WAIT_SECONDS - waited)
+
+    def _record(self, limiter: ModelLimiter, priority: str, waited: float):
+        limiter.metrics["calls"] += 1
+        if waited > 0.01:
+            limiter.metrics["waited"] += 1
+            limiter.metrics["wait_seconds"] += waited
+            limiter.metrics["max_wait_seconds"] = max(limiter.metrics["max_wait_seconds"], waited)
+            limiter.wait_by_priority[priority if priority in PRIORITIES else "interactive"] += waited
+
+    def _timeout(self, limiter: ModelLimiter, ticket, provider: str, model: str, waited: float):
+        self._leave(limiter, ticket)
+        limiter.metrics["timeouts"] += 1
+        return RateLimitTimeout(f"{provider}:{model} rate limit: no slot within the request deadline (waited {waited:.1f}s)")
+
+    def acquire(self, provider: str, model: str, tokens: int = DEFAULT_OUTPUT_TOKENS, deadline: Deadline = None,
+                priority: Optional[str] = None) -> float:
+        """Block until the call may be sent. Returns the seconds waited. priority defaults to the deadline's."""
+        if not self.enabled:
+            return 0.0
+        priority = priority or getattr(deadline, 'priority', 'interactive')
+        start = time.monotonic()
+        limiter, ticket = self._enter(provider, model, priority)
+        with self._cond:
+            while True:
+                wait = self._try_take(limiter, ticket, tokens)
+                waited = time.monotonic() - start
+                if wait == 0:
+                    self._record(limiter, priority, waited)
+                    return waited
+                if wait > self._budget(deadline, waited):
+                    raise self._timeout(limiter, ticket, provider, model, waited)
+                self._cond.wait(timeout=wait)
+
+    async def aacquire(self, provider: str, model: str, tokens: int = DEFAULT_OUTPUT_TOKENS, deadline: Deadline = None,
+                       priority: Optional[str] = None) -> float:
+        """acquire() for coroutines: waits with asyncio.sleep instead of blocking the event loop."""
+        if not self.enabled:
+            return 0.0
+        priority = priority or getattr(deadline, 'priority', 'interactive')
+        start = time.monotonic()
+        limiter, ticket = self._enter(provider, model, priority)
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_take(limiter, ticket, tokens)
+                    waited = time.monotonic() - start
+                    if wait == 0:
+                        self._record(limiter, priority, waited)
+                        return waited
+                    if wait > self._budget(deadline, waited):
+                        raise self._timeout(limiter, ticket, provider, model, waited)
+                await asyncio.sleep(min(wait, ASYNC_POLL_SECONDS))
+        except asyncio.CancelledError:
+            with self._cond:
+                if ticket in limiter.queue:
+                    self._leave(limiter, ticket)
+            raise
+
+    def throttle(self, provider: str, model: str):
+        """The provider answered 429: empty the request bucket so queued calls wait for it to refill."""
+        with self._cond:
+            limiter = self._limiter(provider, model)
+            limiter.requests.refill(time.monotonic())
+            if limiter.requests.capacity is not None:
+                limiter.requests.level = 0.0
+            limiter.metrics["throttled"] += 1
+
+    def stats(self) -> Dict:
+        with self._cond:
+            models = {}
+            for (provider, model), limiter in sorted(self._models.items()):
+                calls, waited = limiter.metrics["calls"], limiter.metrics["waited"]
+                models[f"{provider}:{model}"] = {
+                    "rpm": limiter.requests.capacity,
+                    "tpm": limiter.tokens.capacity,
+                    "queued": len(limiter.queue),
+                    **limiter.metrics,
+                    "wait_seconds": round(limiter.metrics["wait_seconds"], 2),
+                    "max_wait_seconds": round(limiter.metrics["max_wait_seconds"], 2),
+                    "avg_wait_seconds": round(limiter.metrics["wait_seconds"] / calls, 3) if calls else 0.0,
+                    "wait_seconds_by_priority": {k: round(v, 2) for k, v in limiter.wait_by_priority.items()}
+                }
+        return {
+            "enabled": self.enabled,
+            "queued": sum(m["queued"] for m in models.values()),
+            "wait_seconds": round(sum(m["wait_seconds"] for m in models.values()), 2),
+            "models": models
+        }
+
+
+# Initialize Singleton
+provider_limiter = ProviderRateLimiter()
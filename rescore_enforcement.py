@@ -0,0 +1,38 @@
+"""
+Enforcement Re-scoring.
+Re-audits every stored response with the current GENERIC_VERBS / ANCHORS / truth contracts
+(EnforcementEngine.analyze_batch) and writes the results to response_enforcement. Live
+credibility scores are not touched. Interrupted runs resume where they stopped; a changed
+ruleset gets a new fingerprint and starts from the first response.
+
+Usage:
+    python rescore_enforcement.py                     # Standard Model rules, all CPU cores
+    python rescore_enforcement.py --role cfo          # apply the CFO truth contract
+    python rescore_enforcement.py --restart --workers 4
+"""
+
+import argparse
+
+from database import init_database
+from enforcement import enforcement_engine, BATCH_CHUNK_SIZE
+from council_roles import COUNCIL_ROLES
+
+parser = argparse.ArgumentParser(description="Re-score historical responses with the current enforcement rules")
+parser.add_argument("--role", default=None, choices=sorted(COUNCIL_ROLES), metavar="ROLE", help="Council role key whose truth contract to apply (see council_roles.py)")
+parser.add_argument("--chunk-size", type=int, default=BATCH_CHUNK_SIZE, help="Responses per database read / worker task")
+parser.add_argument("--workers", type=int, default=None, help="Scoring processes (default: CPU count, 1 = inline)")
+parser.add_argument("--restart", action="store_true", help="Discard this ruleset's previous results instead of resuming")
+
+
+def main():
+    args = parser.parse_args()
+    init_database()
+    result = enforcement_engine.analyze_batch(role_key=args.role, chunk_size=args.chunk_size,
+                                              workers=args.workers, resume=not args.restart)
+    print(f"\nRuleset {result['ruleset']} ({result['role']}): {result['scored']:,} responses scored in {result['seconds']}s")
+    for status, count in sorted(result["statuses"].items()):
+        print(f"  {status:<10}{count:>10,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Content-Addressed Response Cache.
+Provider output is keyed on everything that determines it: provider, model, the fully
+rendered system prompt, the user prompt, an image hash and the sampling parameters.
+Re-running a comparison or re-synthesizing the same prompt is then served from memory
+(LRU tier) or the database (SQLite/Postgres tier) instead of a paid provider call.
+A lookup costs at most one read-only query for the provider's whole model chain; database
+hit counts are written in batches (HIT_FLUSH_SECONDS) off the lookup path.
+
+Configuration:
+    RESPONSE_CACHE_ENABLED       (default true)
+    RESPONSE_CACHE_SIZE          (default 512)    entries kept in the in-memory LRU
+    RESPONSE_CACHE_TTL_SECONDS   (default 86400)  entry lifetime
+    RESPONSE_CACHE_TTL_PERPLEXITY (default 3600)  live research goes stale faster
+Per request, pass bypass_cache=True in the provider kwargs to skip lookup and storage.
+"""
+
+import os
+import json
+import time
+import atexit
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from database import get_cached_responses, add_cached_response_hits, store_cached_response, purge_expired_cached_responses
+
+CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', '512'))
+CACHE_TTL_SECONDS = float(os.getenv('RESPONSE_CACHE_TTL_SECONDS', '86400'))
+PROVIDER_TTL_SECONDS = {
+    "perplexity": float(os.getenv('RESPONSE_CACHE_TTL_PERPLEXITY', '3600'))
+}
+PURGE_INTERVAL_SECONDS = 3600
+HIT_FLUSH_SECONDS = 60  # Database hit counts are written in batches, never on the lookup path
+
+
+class ResponseCache:
+    """
+    Two-tier cache: an LRU dict in front of the response_cache table.
+    Database errors are logged and treated as misses; the cache never fails a request.
+    """
+
+    def __init__(self, max_entries: int = CACHE_SIZE, ttl: float = CACHE_TTL_SECONDS, enabled: bool = CACHE_ENABLED):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = enabled
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_purge = time.time()
+        self._last_hit_flush = time.time()
+        self._pending_hits: Dict[str, int] = {}
+        self.metrics = {"memory_hits": 0, "db_hits": 0, "misses": 0, "stores": 0, "bypassed": 0, "evictions": 0}
+        self.provider_metrics: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def make_key(provider: str, model: str, system_prompt: str, user_prompt, image_data: Optional[str] = None, params: Optional[Dict] = None) -> str:
+        """sha256 over a canonical JSON rendering of everything that shapes the output."""
+        image_hash = hashlib.sha256(image_data.encode() if isinstance(image_data, str) else image_data).hexdigest() if image_data else None
+        material = json.dumps({
+            "provider": provider,
+            "model": model,
+            "system": system_prompt or "",
+            "user": user_prompt,
+            "image": image_hash,
+            "params": params or {}
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def active(self, kwargs: Optional[Dict] = None) -> bool:
+        """False when caching is globally off or the caller asked to bypass it."""
+        if not self.enabled:
+            return False
+        if kwargs and kwargs.get('bypass_cache'):
+            with self._lock:
+                self.metrics["bypassed"] += 1
+            return False
+        return True
+
+    def _ttl_for(self, provider: str) -> float:
+        return PROVIDER_TTL_SECONDS.get(provider, self.ttl)
+
+    def _count(self, provider: str, outcome: str):
+        counts = self.provider_metrics.setdefault(provider, {"hits": 0, "misses": 0})
+        counts[outcome] += 1
+
+    def _remember(self, key: str, entry: Dict):
+        """Insert into the LRU tier (caller holds the lock)."""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.metrics["evictions"] += 1
+
+    def _fetch(self, keys: List[str]) -> Optional[Dict]:
+        """First of `keys` (in order) cached in memory, else in the database (one query for all of them)."""
+        now = time.time()
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                if entry["expires_at"] > now:
+                    self._entries.move_to_end(key)
+                    self.metrics["memory_hits"] += 1
+                    return entry
+                del self._entries[key]
+
+        found = get_cached_responses(keys)
+        for key in keys:
+            entry = found.get(key)
+            if entry is not None:
+                with self._lock:
+                    self._remember(key, entry)
+                    self.metrics["db_hits"] += 1
+                    self._pending_hits[key] = self._pending_hits.get(key, 0) + 1
+                return entry
+        return None
+
+    def get(self, key: str) -> Optional[Dict]:
+        return self._fetch([key])
+
+    def lookup(self, provider: str, models: Iterable[str], system_prompt: str, user_prompt, image_data: Optional[str] = None, params: Optional[Dict] = None) -> Optional[Dict]:
+        """
+        Check every model in a provider's fallback chain (first cached model wins; one database query for the chain).
+        Returns the cached entry ({text, model, provider, created_at, expires_at}) or None.
+        """
+        entry = self._fetch([self.make_key(provider, model, system_prompt, user_prompt, image_data, params) for model in models])
+        if entry is not None:
+            with self._lock:
+                self._count(provider, "hits")
+            print(f"[CACHE] {provider}/{entry['model']} hit")
+            return entry
+        with self._lock:
+            self.metrics["misses"] += 1
+            self._count(provider, "misses")
+        return None
+
+    def store(self, provider: str, model: str, text: str, system_prompt: str, user_prompt, image_data: Optional[str] = None, params: Optional[Dict] = None):
+        """Cache a successful provider response in both tiers."""
+        if not text:
+            return
+        key = self.make_key(provider, model, system_prompt, user_prompt, image_data, params)
+        now = time.time()
+        expires_at = now + self._ttl_for(provider)
+        entry = {"provider": provider, "model": model, "text": text, "created_at": now, "expires_at": expires_at}
+        with self._lock:
+            self._remember(key, entry)
+            self.metrics["stores"] += 1
+        store_cached_response(key, provider, model, text, datetime.utcnow() + timedelta(seconds=self._ttl_for(provider)))
+        if time.time() - self._last_hit_flush >= HIT_FLUSH_SECONDS:
+            self.flush_hits()
+        self._maybe_purge()
+
+    def flush_hits(self):
+        """Write the database hit counts gathered since the last flush (one transaction)."""
+        with self._lock:
+            hits, self._pending_hits = self._pending_hits, {}
+            self._last_hit_flush = time.time()
+        if hits:
+            add_cached_response_hits(hits)
+
+    def _maybe_purge(self):
+        """Drop expired database rows at most once per PURGE_INTERVAL_SECONDS."""
+        if time.time() - self._last_purge < PURGE_INTERVAL_SECONDS:
+            return
+        self._last_purge = time.time()
+        removed = purge_expired_cached_responses()
+        if removed:
+            print(f"[CLEANUP] Removed {removed} expired response cache entries")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            hits = self.metrics["memory_hits"] + self.metrics["db_hits"]
+            lookups = hits + self.metrics["misses"]
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                **self.metrics,
+                "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+                "providers": {name: dict(counts) for name, counts in self.provider_metrics.items()}
+            }
+
+
+# Initialize Singleton
+response_cache = ResponseCache()
+atexit.register(response_cache.flush_hits)
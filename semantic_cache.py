@@ -0,0 +1,215 @@
+"""
+Semantic Near-Duplicate Query Cache (opt-in).
+Questions are embedded with a local hashed n-gram vectorizer (word unigrams/bigrams plus
+character trigrams, no model download, CPU only) and searched against every past
+Comparison.question. When a new /api/ask question is a close paraphrase of an earlier one,
+the prior Response rows can be offered to the user or served in place of a fresh fan-out.
+
+Configuration:
+    SEMANTIC_CACHE_ENABLED       (default false)  every worker process builds its own index by reading every
+                                                  Comparison.question once (on a background thread at start-up)
+    SEMANTIC_CACHE_THRESHOLD     (default 0.85)   cosine similarity needed for a match
+    SEMANTIC_CACHE_MODE          (default offer)  offer = attach the match, serve = reuse its responses
+    SEMANTIC_CACHE_SYNC_SECONDS  (default 5)      searches pull rows written by other workers / the write-behind
+                                                  queue at most this often (one query per sync)
+"""
+
+import os
+import re
+import math
+import zlib
+import time
+import threading
+from array import array
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+
+from database import Comparison, iter_comparison_questions
+
+SEMANTIC_CACHE_ENABLED = os.getenv('SEMANTIC_CACHE_ENABLED', 'false').lower() == 'true'
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.85'))
+SEMANTIC_CACHE_MODE = os.getenv('SEMANTIC_CACHE_MODE', 'offer')
+SEMANTIC_CACHE_SYNC_SECONDS = float(os.getenv('SEMANTIC_CACHE_SYNC_SECONDS', '5'))
+
+VECTOR_DIM = 2 ** 20
+MAX_QUESTION_CHARS = 4000   # Long attached-file context adds noise, not meaning
+MAX_CANDIDATES = 200        # Exact cosine is computed for this many inverted-index candidates
+CHAR_NGRAM_WEIGHT = 0.5
+# Comparison ids are pre-allocated in blocks and written behind, so they don't arrive in id
+# order; catch-up re-reads a trailing time window instead (add() skips rows already indexed)
+SYNC_OVERLAP = timedelta(minutes=2)
+
+
+class HashedNgramVectorizer:
+    """
+    Stateless text -> sparse unit vector. Features are hashed with crc32 so vectors
+    are stable across processes and restarts (Python's hash() is salted per process).
+    """
+
+    def __init__(self, dim: int = VECTOR_DIM):
+        self.dim = dim
+
+    def _bucket(self, feature: str) -> int:
+        return zlib.crc32(feature.encode()) % self.dim
+
+    def tokenize(self, text: str) -> List[str]:
+        return re.findall(r'[a-z0-9]+', text[:MAX_QUESTION_CHARS].lower())
+
+    def transform(self, text: str) -> Tuple[Dict[int, float], set]:
+        """Returns (L2-normalized sparse vector, word-level buckets used for candidate lookup)."""
+        words = self.tokenize(text)
+        counts = Counter()
+        word_buckets = set()
+
+        for i, word in enumerate(words):
+            for feature in [f"w:{word}"] + ([f"b:{words[i - 1]} {word}"] if i else []):
+                bucket = self._bucket(feature)
+                counts[bucket] += 1.0
+                word_buckets.add(bucket)
+            padded = f" {word} "
+            for j in range(len(padded) - 2):
+                counts[self._bucket(f"c:{padded[j:j + 3]}")] += CHAR_NGRAM_WEIGHT
+
+        # Sublinear tf so a repeated word doesn't dominate the vector
+        vector = {bucket: 1.0 + math.log(count) if count >= 1 else count for bucket, count in counts.items()}
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        if norm:
+            vector = {bucket: w / norm for bucket, w in vector.items()}
+        return vector, word_buckets
+
+
+class SemanticQueryCache:
+    """
+    In-process vector index over Comparison.question.
+    New rows are added as they are inserted (SQLAlchemy after_insert, synchronous saves), and
+    searches pull recently written rows (at most every sync_seconds), which covers the
+    write-behind queue and rows written by other gunicorn workers.
+    """
+
+    def __init__(self, enabled: bool = SEMANTIC_CACHE_ENABLED, threshold: float = SEMANTIC_CACHE_THRESHOLD,
+                 sync_seconds: float = SEMANTIC_CACHE_SYNC_SECONDS):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.sync_seconds = sync_seconds
+        self.vectorizer = HashedNgramVectorizer()
+        self._vectors: Dict[int, Tuple[array, array]] = {}
+        self._previews: Dict[int, str] = {}
+        self._postings: Dict[int, array] = {}
+        self._synced_at: Optional[datetime] = None
+        self._last_sync = 0.0
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self.metrics = {"searches": 0, "matches": 0, "served": 0, "syncs": 0}
+        if enabled:
+            event.listen(Comparison, "after_insert", self._on_comparison_insert)
+            # The full build reads every past question: keep it off the request path
+            threading.Thread(target=self._build, name="triai-semantic-index", daemon=True).start()
+
+    def _count(self, metric: str):
+        with self._lock:
+            self.metrics[metric] += 1
+
+    def _build(self):
+        try:
+            self.sync(force=True)
+        except Exception as e:
+            print(f"[SEMANTIC] Index build failed: {e}")
+
+    def _on_comparison_insert(self, mapper, connection, target):
+        try:
+            self.add(target.id, target.question)
+        except Exception as e:
+            print(f"[SEMANTIC] Failed to index comparison {target.id}: {e}")
+
+    def add(self, comparison_id: int, question: str):
+        """Index one comparison (no-op if it is already indexed)."""
+        if not question or comparison_id in self._vectors:
+            return
+        vector, word_buckets = self.vectorizer.transform(question)
+        keys = array('l', vector.keys())
+        weights = array('f', vector.values())
+        with self._lock:
+            if comparison_id in self._vectors:
+                return
+            self._vectors[comparison_id] = (keys, weights)
+            self._previews[comparison_id] = question[:200]
+            for bucket in word_buckets:
+                self._postings.setdefault(bucket, array('l')).append(comparison_id)
+
+    def sync(self, force: bool = False):
+        """
+        Index comparisons written since the last sync (the first one builds the whole index).
+        Skipped if the last sync began under sync_seconds ago, or another thread is syncing now.
+        """
+        if not force and time.monotonic() - self._last_sync < self.sync_seconds:
+            return
+        if not self._sync_lock.acquire(blocking=False):
+            return  # Search what is indexed so far rather than wait
+        try:
+            self._last_sync = time.monotonic()  # Also when the query fails: don't retry it on every request
+            started = datetime.utcnow()
+            since = self._synced_at - SYNC_OVERLAP if self._synced_at else None
+            for comparison_id, question in iter_comparison_questions(since=since):
+                self.add(comparison_id, question)
+            self._synced_at = started
+            self._count("syncs")
+        finally:
+            self._sync_lock.release()
+
+    def search(self, question: str, limit: int = 1) -> List[Tuple[int, float]]:
+        """Top `limit` (comparison_id, cosine similarity) pairs for a question."""
+        self.sync()
+        query, word_buckets = self.vectorizer.transform(question)
+        if not query:
+            return []
+
+        with self._lock:
+            # Candidate generation: shared word features, skipping buckets common to most documents
+            df_cap = max(50, len(self._vectors) // 5)
+            overlap = Counter()
+            for bucket in word_buckets:
+                postings = self._postings.get(bucket)
+                if postings is not None and len(postings) <= df_cap:
+                    overlap.update(postings)
+            candidates = [(cid, self._vectors[cid]) for cid, _ in overlap.most_common(MAX_CANDIDATES)]
+
+        scored = []
+        for comparison_id, (keys, weights) in candidates:
+            score = sum(query.get(k, 0.0) * w for k, w in zip(keys, weights))
+            scored.append((comparison_id, round(score, 4)))
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:limit]
+
+    def match(self, question: str) -> Optional[Dict]:
+        """Best past comparison above the similarity threshold, or None."""
+        if not self.enabled:
+            return None
+        self._count("searches")
+        try:
+            hits = self.search(question)
+        except Exception as e:
+            print(f"[SEMANTIC] Search failed: {e}")
+            return None
+        if not hits or hits[0][1] < self.threshold:
+            return None
+        comparison_id, similarity = hits[0]
+        self._count("matches")
+        print(f"[SEMANTIC] Near-duplicate of comparison {comparison_id} (similarity {similarity})")
+        return {"comparison_id": comparison_id, "question": self._previews.get(comparison_id, ""), "similarity": similarity}
+
+    def stats(self) -> Dict:
+        with self._lock:
+            metrics = dict(self.metrics)
+        return {
+            "enabled": self.enabled,
+            "threshold": self.threshold,
+            "indexed": len(self._vectors),
+            **metrics
+        }
+
+
+# Initialize Singleton
+semantic_cache = SemanticQueryCache()
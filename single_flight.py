@@ -0,0 +1,168 @@
+"""
+Single-Flight Call Coalescing.
+Concurrent identical provider calls share one upstream request. Calls are keyed on everything
+that shapes the output (provider, model chain, rendered prompts, image and sampling parameters;
+the response cache's key), so when the same workflow template is launched twice or two browser
+tabs submit the same question, the first caller (the leader) makes the call and the others
+wait for its result instead of calling the provider again. Threads (query_*, Korum layers) and
+coroutines (aquery_*) share the same flights. Only calls still in flight are shared; finished
+results are the response cache's job.
+
+A follower never waits past its own request deadline. If the leader gives up for reasons of its
+own (its deadline ran out or it was cancelled), its followers don't inherit that: one of them
+takes over and makes the call.
+
+Configuration:
+    SINGLE_FLIGHT_ENABLED  (default true)
+"""
+
+import os
+import time
+import asyncio
+import threading
+from concurrent import futures
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from deadline import Deadline, DeadlineExceeded
+
+SINGLE_FLIGHT_ENABLED = os.getenv('SINGLE_FLIGHT_ENABLED', 'true').lower() == 'true'
+
+FOLLOWER_POLL_SECONDS = 1.0  # Followers re-check their own deadline (it may be cancelled) this often
+
+
+class LeaderAbandoned(Exception):
+    """The leader stopped for its own reasons (deadline, cancellation); a follower should take over."""
+    pass
+
+
+class Flight:
+    """One upstream call in progress. The future carries its result (or error) to the followers."""
+
+    def __init__(self):
+        self.future: futures.Future = futures.Future()
+        self.followers = 0
+
+
+class SingleFlight:
+    """do() (threads) / ado() (event loop) around an upstream call. Both return (result, shared)."""
+
+    def __init__(self, enabled: bool = SINGLE_FLIGHT_ENABLED):
+        self.enabled = enabled
+        self._flights: Dict[str, Flight] = {}
+        self._lock = threading.Lock()
+        self.metrics = {"leaders": 0, "saved": 0, "takeovers": 0, "follower_timeouts": 0, "wait_seconds": 0.0}
+        self.provider_metrics: Dict[str, Dict[str, int]] = {}
+
+    def _join(self, provider: str, key: str) -> Tuple[Flight, bool]:
+        """The flight for `key` and whether we lead it (no identical call was in flight)."""
+        with self._lock:
+            counts = self.provider_metrics.setdefault(provider, {"calls": 0, "saved": 0})
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = Flight()
+                self.metrics["leaders"] += 1
+                counts["calls"] += 1
+                return flight, True
+            flight.followers += 1
+            return flight, False
+
+    def _land(self, key: str, flight: Flight, deadline: Optional[Deadline], result=None, error: BaseException = None):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        if error is None:
+            flight.future.set_result(result)
+        elif not isinstance(error, Exception) or isinstance(error, DeadlineExceeded) or (deadline is not None and deadline.expired()):
+            # Cancelled, or out of the leader's own budget: not an answer the followers should share
+            flight.future.set_exception(LeaderAbandoned())
+        else:
+            flight.future.set_exception(error)
+
+    def _settle(self, provider: str, flight: Flight, waited: float):
+        """A follower's flight finished: its result (shared), its error (re-raised, also shared) or a takeover."""
+        abandoned = isinstance(flight.future.exception(), LeaderAbandoned)
+        with self._lock:
+            self.metrics["wait_seconds"] += waited
+            if abandoned:
+                self.metrics["takeovers"] += 1
+            else:
+                self.metrics["saved"] += 1
+                self.provider_metrics[provider]["saved"] += 1
+        return flight.future.result()
+
+    def _timeout(self, provider: str, waited: float, deadline: Deadline) -> DeadlineExceeded:
+        with self._lock:
+            self.metrics["follower_timeouts"] += 1
+            self.metrics["wait_seconds"] += waited
+        return DeadlineExceeded(f"{deadline.label}: no time left waiting for an identical in-flight {provider} call ({waited:.1f}s)")
+
+    def do(self, provider: str, key: str, fn: Callable, deadline: Deadline = None):
+        """Run fn() unless an identical call is in flight, in which case wait for that one's outcome."""
+        if not self.enabled:
+            return fn(), False
+        while True:
+            flight, leader = self._join(provider, key)
+            if leader:
+                try:
+                    result = fn()
+                except BaseException as e:
+                    self._land(key, flight, deadline, error=e)
+                    raise
+                self._land(key, flight, deadline, result)
+                return result, False
+
+            start = time.monotonic()
+            while not flight.future.done():
+                remaining = deadline.remaining() if deadline is not None else FOLLOWER_POLL_SECONDS
+                if remaining <= 0:
+                    raise self._timeout(provider, time.monotonic() - start, deadline)
+                futures.wait([flight.future], timeout=min(remaining, FOLLOWER_POLL_SECONDS))
+            try:
+                return self._settle(provider, flight, time.monotonic() - start), True
+            except LeaderAbandoned:
+                continue
+
+    async def ado(self, provider: str, key: str, fn: Callable[[], Awaitable], deadline: Deadline = None):
+        """do() for coroutines: fn is a coroutine function; followers wait without blocking the event loop."""
+        if not self.enabled:
+            return await fn(), False
+        while True:
+            flight, leader = self._join(provider, key)
+            if leader:
+                try:
+                    result = await fn()
+                except BaseException as e:
+                    self._land(key, flight, deadline, error=e)
+                    raise
+                self._land(key, flight, deadline, result)
+                return result, False
+
+            start = time.monotonic()
+            waiter = asyncio.wrap_future(flight.future)
+            while not waiter.done():
+                remaining = deadline.remaining() if deadline is not None else FOLLOWER_POLL_SECONDS
+                if remaining <= 0:
+                    raise self._timeout(provider, time.monotonic() - start, deadline)
+                # asyncio.wait leaves the waiter (and so the leader's future) alone on timeout
+                await asyncio.wait({waiter}, timeout=min(remaining, FOLLOWER_POLL_SECONDS))
+            try:
+                return self._settle(provider, flight, time.monotonic() - start), True
+            except LeaderAbandoned:
+                continue
+
+    def stats(self) -> Dict:
+        with self._lock:
+            metrics = dict(self.metrics)
+            requested = metrics["leaders"] + metrics["saved"]
+            return {
+                "enabled": self.enabled,
+                "in_flight": len(self._flights),
+                **metrics,
+                "wait_seconds": round(metrics["wait_seconds"], 2),
+                "saved_ratio": round(metrics["saved"] / requested, 3) if requested else 0.0,
+                "providers": {name: dict(counts) for name, counts in sorted(self.provider_metrics.items())}
+            }
+
+
+# Initialize Singleton
+single_flight = SingleFlight()
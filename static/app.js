@@ -773,7 +773,7 @@ async function handleAskAllAIs(forcedVisualize = false) {
                 formData.append('council_roles', JSON.stringify(roles));
             }
 
-            response = await fetch('/api/ask', {
+            response = await fetch('/api/ask/stream', {
                 method: 'POST',
                 body: formData // No Content-Type header needed, browser sets boundary
             });
@@ -801,7 +801,7 @@ async function handleAskAllAIs(forcedVisualize = false) {
                 payload.council_roles = getCouncilRoles();
             }
 
-            response = await fetch('/api/ask', {
+            response = await fetch('/api/ask/stream', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json'
@@ -822,12 +822,8 @@ async function handleAskAllAIs(forcedVisualize = false) {
             throw new Error(errorMsg);
         }
 
-        let data;
-        try {
-            data = await response.json();
-        } catch (e) {
-            throw new Error(`Invalid server response (HTML returned instead of JSON). Status: ${response.status}`);
-        }
+        // Render tokens and per-model results as they stream in
+        const data = await readAskStream(response);
 
         // Update UI with responses using the "results" key
         const results = data.results;
@@ -904,6 +900,83 @@ async function handleAskAllAIs(forcedVisualize = false) {
     }
 }
 
+// ==================== //
+// Streaming /api/ask
+// ==================== //
+// Parses the Server-Sent Events stream from /api/ask/stream, rendering partial
+// output as it arrives. Resolves with the same shape as the /api/ask JSON body.
+async function readAskStream(response) {
+    const data = { results: {}, consensus: null, comparison_id: null };
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    const streamedText = {};
+    let consensusText = '';
+    let buffer = '';
+
+    const handleEvent = (event, payload) => {
+        if (event === 'start') {
+            // Reveal the cards now so tokens are visible immediately
+            loadingState.classList.add('hidden');
+            resultsSection.classList.remove('hidden');
+            Object.keys(responses).forEach(key => {
+                responses[key].card.style.display = activeModels.has(key) ? 'flex' : 'none';
+            });
+        } else if (event === 'token') {
+            const elements = responses[payload.provider];
+            if (!elements) return;
+            streamedText[payload.provider] = (streamedText[payload.provider] || '') + payload.text;
+            elements.response.textContent = streamedText[payload.provider];
+        } else if (event === 'reset') {
+            // A streamed attempt failed; the retry or fallback model starts over
+            const elements = responses[payload.provider];
+            streamedText[payload.provider] = '';
+            if (elements) elements.response.textContent = '';
+        } else if (event === 'provider') {
+            data.results[payload.provider] = payload.result;
+            updateResponse(payload.provider, payload.result);
+        } else if (event === 'consensus_token') {
+            consensusText += payload.text;
+            consensusContent.textContent = consensusText;
+            consensusSection.classList.remove('hidden');
+        } else if (event === 'consensus') {
+            data.consensus = payload.consensus;
+            consensusContent.innerHTML = formatMarkdown(payload.consensus);
+            consensusSection.classList.remove('hidden');
+        } else if (event === 'consensus_amended') {
+            // Quorum mode: late models arrived after the first synthesis
+            data.consensus = payload.consensus;
+            consensusContent.innerHTML = formatMarkdown(payload.consensus);
+        } else if (event === 'done') {
+            data.comparison_id = payload.comparison_id;
+        } else if (event === 'error') {
+            throw new Error(payload.error);
+        }
+    };
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        // SSE frames are separated by a blank line
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const frame = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let event = 'message';
+            let payload = '';
+            frame.split('\n').forEach(line => {
+                if (line.startsWith('event:')) event = line.slice(6).trim();
+                else if (line.startsWith('data:')) payload += line.slice(5).trim();
+            });
+            if (payload) handleEvent(event, JSON.parse(payload));
+        }
+    }
+
+    return data;
+}
+
 // ==================== //
 // Response Handling
 // ==================== //
@@ -3097,8 +3170,8 @@ async function runWorkflowMode() {
         currentWorkflowData = workflowsData[workflowId];
         activeWorkflowName.textContent = `Project: ${currentWorkflowData.name} `;
 
-        // Start Polling
-        pollWorkflowStatus(jobId);
+        // Follow progress (event stream, polling fallback)
+        followWorkflowStatus(jobId);
 
     } catch (err) {
         alert(`Workflow Init Error: ${err.message} `);
@@ -3106,65 +3179,152 @@ async function runWorkflowMode() {
     }
 }
 
-function pollWorkflowStatus(jobId) {
+// Follows a workflow job over /api/workflow/stream (Server-Sent Events): a snapshot of the
+// finished steps, then step-started / step-token / step-completed as they happen. If the
+// stream can't be used, falls back to polling /api/workflow/status with ?since= deltas.
+function followWorkflowStatus(jobId) {
     const renderedStepIds = new Set();
+    const liveCards = {};
+    const liveText = {};
+    let cursor = 0;
+    let finished = false;
+    currentWorkflowResults = [];
+
+    const appendCard = (card) => {
+        if (workflowStepsContainer.children.length > 0) {
+            const arrow = document.createElement('div');
+            arrow.className = 'pipeline-arrow';
+            workflowStepsContainer.appendChild(arrow);
+        }
+        workflowStepsContainer.appendChild(card);
+        window.scrollTo({ top: document.body.scrollHeight, behavior: 'smooth' });
+    };
+
+    const renderStep = (step) => {
+        if (renderedStepIds.has(step.step)) return;
+        renderedStepIds.add(step.step);
+        currentWorkflowResults.push(step);
+        workflowContext[step.key || `step_${step.step}`] = step.data.response;
+
+        // Replace the streaming placeholder in place, keeping the pipeline order
+        const card = createStepCard(step);
+        if (liveCards[step.step]) {
+            liveCards[step.step].replaceWith(card);
+            delete liveCards[step.step];
+        } else {
+            appendCard(card);
+        }
+
+        // Update Header Status
+        const progress = Math.round((renderedStepIds.size / currentWorkflowData.steps.length) * 100);
+        workflowProgressBarFill.style.width = `${progress}% `;
+        workflowProgressText.textContent = `${progress}% Complete`;
+    };
 
-    const interval = setInterval(async () => {
-        if (!isQuerying) {
-            clearInterval(interval);
+    const startLiveStep = (info) => {
+        if (renderedStepIds.has(info.step)) return;
+        if (liveCards[info.step]) {
+            // Restarted (retry or failover): drop the failed attempt's partial text
+            liveText[info.step] = '';
+            liveCards[info.step].style.setProperty('--step-color', getModelColors(info.model).hex);
+            liveCards[info.step].querySelector('.step-response').textContent = '';
             return;
         }
+        const card = document.createElement('div');
+        card.className = 'workflow-step-card active';
+        card.style.setProperty('--step-color', getModelColors(info.model).hex);
+        card.innerHTML = `
+            <div class="step-status-row">
+                <div class="status-badge running">Running</div>
+                <div class="step-id">STEP ${info.step}: ${info.role.toUpperCase()}</div>
+            </div>
+            <div class="step-response"></div>
+        `;
+        liveCards[info.step] = card;
+        liveText[info.step] = '';
+        appendCard(card);
+    };
 
-        try {
-            const response = await fetch(`/api/workflow/status/${jobId}`);
-            const data = await response.json();
+    const finish = (data) => {
+        finished = true;
+        if (data.status === 'complete') {
+            if (data.comparison_id) currentComparisonId = data.comparison_id;
+            finishWorkflow();
+        } else if (data.status === 'failed') {
+            alert(`Workflow Failed: ${data.error || 'Unknown Error'} `);
+            stopWorkflow();
+        }
+    };
 
-            if (data.error) {
+    const poll = () => {
+        const interval = setInterval(async () => {
+            if (!isQuerying || finished) {
                 clearInterval(interval);
-                alert(`Polling Error: ${data.error}`);
-                stopWorkflow();
                 return;
             }
 
-            const totalSteps = currentWorkflowData.steps.length;
-            currentWorkflowResults = data.results || [];
-
-            // Render new results
-            currentWorkflowResults.forEach((step) => {
-                if (!renderedStepIds.has(step.step)) {
-                    if (renderedStepIds.size > 0) {
-                        const arrow = document.createElement('div');
-                        arrow.className = 'pipeline-arrow';
-                        workflowStepsContainer.appendChild(arrow);
-                    }
-                    const card = createStepCard(step);
-                    workflowStepsContainer.appendChild(card);
-                    window.scrollTo({ top: document.body.scrollHeight, behavior: 'smooth' });
+            try {
+                const response = await fetch(`/api/workflow/status/${jobId}?since=${cursor}`);
+                const data = await response.json();
 
-                    renderedStepIds.add(step.step);
-                    workflowContext[step.key || `step_${step.step}`] = step.data.response;
+                if (data.error) {
+                    clearInterval(interval);
+                    alert(`Polling Error: ${data.error}`);
+                    stopWorkflow();
+                    return;
                 }
-            });
 
-            // Update Header Status
-            const progress = Math.round((renderedStepIds.size / totalSteps) * 100);
-            workflowProgressBarFill.style.width = `${progress}% `;
-            workflowProgressText.textContent = `${progress}% Complete`;
-
-            if (data.status === 'complete') {
-                clearInterval(interval);
-                if (data.comparison_id) currentComparisonId = data.comparison_id;
-                finishWorkflow();
-            } else if (data.status === 'failed') {
-                clearInterval(interval);
-                alert(`Workflow Failed: ${data.error || 'Unknown Error'} `);
-                stopWorkflow();
+                (data.results || []).forEach(renderStep);
+                cursor = data.cursor;
+                if (data.status !== 'running') {
+                    clearInterval(interval);
+                    finish(data);
+                }
+            } catch (err) {
+                console.error('Polling cycle error:', err);
             }
+        }, 2000);
+    };
+
+    if (!window.EventSource) {
+        poll();
+        return;
+    }
 
-        } catch (err) {
-            console.error('Polling cycle error:', err);
+    const source = new EventSource(`/api/workflow/stream/${jobId}?since=${cursor}`);
+    const handle = (event, handler) => source.addEventListener(event, (e) => {
+        if (!isQuerying || finished) {
+            source.close();
+            return;
         }
-    }, 2000);
+        handler(JSON.parse(e.data));
+    });
+
+    handle('snapshot', (data) => {
+        data.results.forEach(renderStep);
+        cursor = data.cursor;
+    });
+    handle('step-started', startLiveStep);
+    handle('step-token', (data) => {
+        const card = liveCards[data.step];
+        if (!card) return;
+        liveText[data.step] += data.text;
+        card.querySelector('.step-response').textContent = liveText[data.step];
+    });
+    handle('step-completed', (data) => {
+        renderStep(data.result);
+        cursor = data.cursor;
+    });
+    handle('done', (data) => {
+        source.close();
+        finish(data);
+    });
+
+    // Dropped connection (or a server-sent error): continue from the cursor by polling
+    source.addEventListener('error', () => {
+        source.close();
+        if (isQuerying && !finished) poll();
+    });
 }
 
 function createStepCard(step) {
@@ -223,20 +223,74 @@ async function executeReasoningChain(query) {
     const response = await fetch('/api/v2/reasoning_chain', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify(payload)
+        body: JSON.stringify({ ...payload, background: true })
     });
 
     if (!response.ok) throw new Error(`HTTP Error ${response.status}`);
     const data = await response.json();
+    if (!data.success) throw new Error(data.error || "Pipeline Failed");
 
-    if (data.success) {
-        renderChainResults(data.pipeline_result);
-    } else {
-        throw new Error(data.error || "Pipeline Failed");
-    }
+    logTelemetry(data.deduplicated ? `Joined in-flight pipeline ${data.job_id.slice(0, 8)}` : `Pipeline job ${data.job_id.slice(0, 8)} queued`, "process");
+    const result = await followReasoningJob(data.job_id);
+    renderChainResults(result);
     resetUI();
 }
 
+// Follows a background reasoning chain job: each layer is logged as it lands; resolves with the pipeline_result.
+// Falls back to polling the status endpoint if the event stream drops.
+function followReasoningJob(jobId) {
+    const logLayer = (result) => {
+        const d = result.data || {};
+        const lane = result.model ? ` via ${result.model}${d.hedged ? ' (hedged)' : ''}` : '';
+        logTelemetry(`${result.role} ${d.success ? 'complete' : 'FAILED'} (${d.seconds}s${lane})`, d.success ? "process" : "system");
+    };
+    const settle = (job, resolve, reject) => {
+        if (job.status === 'complete' && job.pipeline_result) resolve(job.pipeline_result);
+        else reject(new Error(job.error || `Pipeline ${job.status}`));
+    };
+
+    return new Promise((resolve, reject) => {
+        let cursor = 0;
+        const poll = async () => {
+            try {
+                const res = await fetch(`/api/v2/reasoning_chain/status/${jobId}?since=${cursor}`);
+                if (!res.ok) throw new Error(`HTTP Error ${res.status}`);
+                const job = await res.json();
+                job.results.forEach(logLayer);
+                cursor = job.cursor;
+                if (job.status === 'running') setTimeout(poll, 3000);
+                else settle(job, resolve, reject);
+            } catch (err) {
+                reject(err);
+            }
+        };
+
+        if (!window.EventSource) return poll();
+        const stream = new EventSource(`/api/v2/reasoning_chain/stream/${jobId}`);
+        stream.addEventListener('snapshot', (e) => {
+            const snap = JSON.parse(e.data);
+            snap.results.forEach(logLayer);
+            cursor = snap.cursor;
+        });
+        stream.addEventListener('step-started', (e) => logTelemetry(`Engaging ${JSON.parse(e.data).role}...`, "process"));
+        stream.addEventListener('step-completed', (e) => {
+            const msg = JSON.parse(e.data);
+            logLayer(msg.result);
+            cursor = msg.cursor;
+        });
+        stream.addEventListener('done', (e) => {
+            stream.close();
+            settle(JSON.parse(e.data), resolve, reject);
+        });
+        stream.onerror = () => {
+            if (stream.readyState === EventSource.CLOSED) return;
+            stream.close();
+            logTelemetry("Pipeline stream lost; polling status", "system");
+            poll();
+        };
+    });
+}
+
 function renderChainResults(result) {
     const container = document.querySelector(".results-content");
     container.innerHTML = "";
@@ -289,6 +343,15 @@ function renderChainResults(result) {
     container.appendChild(grid);
     document.querySelector(".results-container").classList.add("visible");
     logTelemetry("Pipeline Execution Complete.", "system");
+
+    // Per-layer timings (layers that overlapped show the same start offset range)
+    if (result.timings) {
+        Object.entries(result.timings.layers).forEach(([layer, t]) => {
+            const lane = t.lane ? ` via ${t.lane}${t.hedged ? ' (hedged)' : ''}` : '';
+            logTelemetry(`${layer}: +${t.started_at}s, ${t.seconds}s${lane}`, "system");
+        });
+        logTelemetry(`Pipeline total: ${result.timings.total_seconds}s`, "system");
+    }
 }
 
 function formatV2Content(content, phase) {
@@ -20,21 +20,23 @@ from openai import OpenAI
 from google import genai
 from google.genai import types
 from dotenv import load_dotenv
+from provider_clients import provider_clients
+from rate_limiter import provider_limiter, quota_tokens
 
 # Re-load for standalone resilience
 load_dotenv()
 
-# Client lazy-loaders
+# Client lazy-loaders (shared pooled clients from the provider registry)
 def get_openai_client():
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         print("WARNING: OPENAI_API_KEY not found in environment.")
-    return OpenAI(api_key=api_key) if api_key else None
+    return provider_clients.openai() if api_key else None
 
 def get_google_genai():
     api_key = os.getenv("GOOGLE_API_KEY")
     if api_key:
-        return genai.Client(api_key=api_key)
+        return provider_clients.google()
     return None
 
 visuals_bp = Blueprint('visuals', __name__)
@@ -89,7 +91,7 @@ def sanitize_mermaid_code(code):
     code = re.sub(r'(\[)(.*?)(\])', clean_label, code)
     return code
 
-def generate_mermaid_viz(concept, profile='data-viz'):
+def generate_mermaid_viz(concept, profile='data-viz', deadline=None):
     """Generates precise Mermaid.js XYChart code using Gemini."""
     import logging
     logger = logging.getLogger(__name__)
@@ -165,6 +167,7 @@ def generate_mermaid_viz(concept, profile='data-viz'):
             logger.error("Google Client missing for Mermaid gen.")
             return None
             
+        provider_limiter.acquire("google", "gemini-2.5-flash", quota_tokens(prompt), deadline)
         response = google_client.models.generate_content(
             model="gemini-2.5-flash",  # Feb 2026 primary model
             contents=prompt
@@ -288,7 +291,7 @@ def clean_table_input(text):
         
     return "\n".join(cleaned_lines)
 
-def fabricate_and_persist_visual(concept, role='general', profile='realistic'):
+def fabricate_and_persist_visual(concept, role='general', profile='realistic', deadline=None):
     """High-fidelity visual generation prioritizing Matplotlib over DALL-E."""
     import logging
     logger = logging.getLogger(__name__)
@@ -327,6 +330,7 @@ def fabricate_and_persist_visual(concept, role='general', profile='realistic'):
              # Use generic LLM to extract JSON
             openai_client = get_openai_client()
             if openai_client:
+                provider_limiter.acquire("openai", "gpt-4o", quota_tokens(extraction_prompt), deadline)
                 json_resp = openai_client.chat.completions.create(
                     model="gpt-4o",
                     messages=[{"role": "user", "content": extraction_prompt}],
@@ -448,6 +452,7 @@ def fabricate_and_persist_visual(concept, role='general', profile='realistic'):
             return None
         
         logger.info(f"Refining prompt for {role} using profile {profile}...")
+        provider_limiter.acquire("openai", "gpt-4o", quota_tokens(fabricator_instruction), deadline)
         refined_response = openai_client.chat.completions.create(
             model="gpt-4o",
             messages=[{"role": "system", "content": fabricator_instruction}]
@@ -458,6 +463,7 @@ def fabricate_and_persist_visual(concept, role='general', profile='realistic'):
         try:
              logger.info(f"Executing fabrication with DALL-E 3...")
              
+             provider_limiter.acquire("openai", "dall-e-3", 0, deadline)
              response = openai_client.images.generate(
                 model="dall-e-3",
                 prompt=final_prompt[:4000],
@@ -469,7 +475,7 @@ def fabricate_and_persist_visual(concept, role='general', profile='realistic'):
              image_url = response.data[0].url
              
              # Download and save locally
-             img_data = requests.get(image_url).content
+             img_data = provider_clients.http().get(image_url, timeout=60).content
              save_dir = Path("static/img/fabricated")
              save_dir.mkdir(parents=True, exist_ok=True)
              filename = f"dalle_{uuid.uuid4().hex[:12]}.png"
@@ -8,6 +8,8 @@ from pathlib import Path
 from dotenv import load_dotenv
 load_dotenv()
 
+from provider_clients import provider_clients
+
 CHUNK_SIZE = 1024
 SOUNDS_DIR = Path('static/sounds')
 
@@ -103,7 +105,7 @@ def generate_voice_alert(text, filename=None):
     }
     
     try:
-        response = requests.post(url, json=data, headers=headers)
+        response = provider_clients.http().post(url, json=data, headers=headers)
         
         if response.status_code != 200:
             import datetime
@@ -115,7 +117,7 @@ def generate_voice_alert(text, filename=None):
             # Final attempt with Multilingual if v1 failed (unlikely)
             print("Trying fallback to multilingual v2 model...")
             data["model_id"] = "eleven_multilingual_v2"
-            response = requests.post(url, json=data, headers=headers)
+            response = provider_clients.http().post(url, json=data, headers=headers)
             
             if response.status_code != 200:
                 with open("voice_errors.txt", "a") as log:
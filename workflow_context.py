@@ -0,0 +1,216 @@
+"""
+Workflow Context Builder.
+Bounds what a workflow step sends as context. Outputs that the step's instruction references
+through {previous_context[key]} go in verbatim (they are what the step works on). Every other
+upstream step is represented by a short extractive digest: headings, figures and the lead
+line of each paragraph. The whole context fits a token budget. Digests are cached by a hash
+of the step output, so a step seen by several later steps (or again after a resume) is only
+digested once. Workflow.full_history keeps every output in full for the final report.
+
+Configuration:
+    WORKFLOW_CONTEXT_TOKENS     (default 8000)  budget for referenced outputs + digests in one step prompt
+    WORKFLOW_DIGEST_TOKENS      (default 300)   maximum size of one unreferenced step's digest
+    WORKFLOW_DIGEST_CACHE_SIZE  (default 512)   digests kept in the LRU
+"""
+
+import os
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from database import CHARS_PER_TOKEN
+
+WORKFLOW_CONTEXT_TOKENS = int(os.getenv('WORKFLOW_CONTEXT_TOKENS', '8000'))
+WORKFLOW_DIGEST_TOKENS = int(os.getenv('WORKFLOW_DIGEST_TOKENS', '300'))
+WORKFLOW_DIGEST_CACHE_SIZE = int(os.getenv('WORKFLOW_DIGEST_CACHE_SIZE', '512'))
+
+MIN_DIGEST_TOKENS = 40     # Below this a digest is just the first heading; not worth shrinking further
+MAX_DIGEST_LINE_CHARS = 240
+
+HEADING = re.compile(r'^\s*(#{1,6}\s+\S|\*\*[^*]+\*\*\s*:?\s*$|[A-Z][A-Z0-9 &/:\-]{6,}$)')
+FIGURE = re.compile(r'\d+(?:\.\d+)?\s*%|\$\s?\d|\b\d{2,}\b')
+LIST_ITEM = re.compile(r'^\s*(?:[-*•]|\d+[.)])\s+')
+SENTENCE_END = re.compile(r'(?<=[.!?])\s')
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text or "") // CHARS_PER_TOKEN
+
+
+def truncate_middle(text: str, max_tokens: int) -> str:
+    """Keep the head and tail of `text` within max_tokens, marking the cut."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    keep = max(0, max_tokens * CHARS_PER_TOKEN - 60)
+    head, tail = text[:keep * 2 // 3], text[len(text) - keep // 3:] if keep // 3 else ""
+    omitted = estimate_tokens(text) - estimate_tokens(head + tail)
+    return f"{head.rstrip()}\n[... {omitted} tokens omitted ...]\n{tail.lstrip()}"
+
+
+def digest(text: str, max_tokens: int = WORKFLOW_DIGEST_TOKENS) -> str:
+    """
+    Extractive digest: headings first, then lines carrying figures, then the lead sentence of each
+    paragraph / list item, taken in that priority until max_tokens and emitted in document order.
+    """
+    text = text or ""
+    if estimate_tokens(text) <= max_tokens:
+        return text.strip()
+
+    candidates = []  # (priority, position, line)
+    paragraph_start = True
+    for position, raw in enumerate(text.splitlines()):
+        line = raw.strip()
+        if not line:
+            paragraph_start = True
+            continue
+        if HEADING.match(line):
+            priority = 0
+        elif FIGURE.search(line):
+            priority = 1
+        elif paragraph_start or LIST_ITEM.match(line):
+            priority = 2
+        else:
+            priority = None
+        paragraph_start = False
+        if priority is None:
+            continue
+        if priority > 0:
+            line = SENTENCE_END.split(line, 1)[0]
+        candidates.append((priority, position, line[:MAX_DIGEST_LINE_CHARS]))
+
+    budget = max_tokens * CHARS_PER_TOKEN
+    chosen, used = [], 0
+    for priority, position, line in sorted(candidates):
+        if used + len(line) + 1 > budget:
+            continue
+        chosen.append((position, line))
+        used += len(line) + 1
+    if not chosen:
+        return truncate_middle(text.strip(), max_tokens)
+    return "\n".join(line for _, line in sorted(chosen))
+
+
+class DigestCache:
+    """LRU of digests keyed by (sha256 of the step output, digest size)."""
+
+    def __init__(self, max_entries: int = WORKFLOW_DIGEST_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, int], str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.metrics = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, text: str, max_tokens: int) -> str:
+        key = (hashlib.sha256((text or "").encode()).hexdigest(), max_tokens)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.metrics["hits"] += 1
+                return cached
+        summary = digest(text, max_tokens)
+        with self._lock:
+            self.metrics["misses"] += 1
+            self._entries[key] = summary
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.metrics["evictions"] += 1
+        return summary
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self.max_entries, **self.metrics}
+
+
+class StepContext:
+    """
+    What one step gets to see.
+    previous_context: {key: text} for instruction.format (referenced outputs, trimmed only if over budget).
+    history(inlined): the project-history section; with inlined=False (the instruction could not be
+    formatted) the referenced outputs are written out there instead of pointing at the instruction.
+    """
+
+    def __init__(self, initial_goal: str, sections: List[Dict], tokens: int, full_tokens: int):
+        self.initial_goal = initial_goal
+        self.sections = sections
+        self.tokens = tokens
+        self.full_tokens = full_tokens
+        self.previous_context = {s["key"]: s["text"] for s in sections if s["referenced"]}
+
+    def history(self, inlined: bool = True) -> str:
+        history = f"INITIAL GOAL: {self.initial_goal}\n\n"
+        for s in self.sections:
+            if not s["referenced"]:
+                history += f"--- STEP {s['step_id']} ({s['role']}) DIGEST ---\n{s['text']}\n\n"
+            elif inlined:
+                history += f"--- STEP {s['step_id']} ({s['role']}) OUTPUT ---\n[Included in the instruction above]\n\n"
+            else:
+                history += f"--- STEP {s['step_id']} ({s['role']}) OUTPUT ---\n{s['text']}\n\n"
+        return history
+
+
+class ContextBuilder:
+    """
+    Token-budgeted context for a workflow step. Digests of unreferenced steps get at most half the
+    budget when something is referenced (all of it otherwise); referenced outputs share the rest,
+    shortest first, so only outputs larger than their fair share are trimmed.
+    """
+
+    def __init__(self, budget: int = WORKFLOW_CONTEXT_TOKENS, digest_tokens: int = WORKFLOW_DIGEST_TOKENS,
+                 cache: Optional[DigestCache] = None):
+        self.budget = budget
+        self.digest_tokens = digest_tokens
+        self.cache = cache or DigestCache()
+        self._lock = threading.Lock()
+        self.metrics = {"steps": 0, "context_tokens": 0, "full_tokens": 0, "trimmed_outputs": 0}
+
+    def build(self, initial_goal: str, outputs: Iterable[Tuple[str, int, str, str]], referenced: Iterable[str]) -> StepContext:
+        """outputs: (key, step_id, role, text) of the step's completed ancestors, in step order."""
+        outputs = list(outputs)
+        referenced = set(referenced)
+        full = [o for o in outputs if o[0] in referenced]
+        others = [o for o in outputs if o[0] not in referenced]
+
+        digest_share = self.budget // 2 if full else self.budget
+        digest_size = max(MIN_DIGEST_TOKENS, min(self.digest_tokens, digest_share // len(others))) if others else 0
+        texts = {key: self.cache.get(text, digest_size) for key, _, _, text in others}
+
+        remaining = self.budget - sum(estimate_tokens(t) for t in texts.values())
+        trimmed = 0
+        by_size = sorted(full, key=lambda o: estimate_tokens(o[3]))
+        for i, (key, _, _, text) in enumerate(by_size):
+            share = max(0, remaining) // (len(by_size) - i)
+            if estimate_tokens(text) <= share:
+                texts[key] = text
+            else:
+                texts[key] = truncate_middle(text, share)
+                trimmed += 1
+            remaining -= estimate_tokens(texts[key])
+
+        sections = [{"key": key, "step_id": step_id, "role": role, "text": texts[key], "referenced": key in referenced}
+                    for key, step_id, role, _ in outputs]
+        tokens = sum(estimate_tokens(s["text"]) for s in sections)
+        # What the unbounded protocol sent: every ancestor in full, plus referenced outputs again inline
+        full_tokens = sum(estimate_tokens(o[3]) for o in outputs) + sum(estimate_tokens(o[3]) for o in full)
+        with self._lock:
+            self.metrics["steps"] += 1
+            self.metrics["context_tokens"] += tokens
+            self.metrics["full_tokens"] += full_tokens
+            self.metrics["trimmed_outputs"] += trimmed
+        return StepContext(initial_goal, sections, tokens, full_tokens)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            metrics = dict(self.metrics)
+        return {
+            "budget_tokens": self.budget,
+            "digest_tokens": self.digest_tokens,
+            **metrics,
+            "saved_ratio": round(1 - metrics["context_tokens"] / metrics["full_tokens"], 3) if metrics["full_tokens"] else 0.0,
+            "digest_cache": self.cache.stats()
+        }
+
+
+# Initialize Singleton
+context_builder = ContextBuilder()
@@ -0,0 +1,93 @@
+"""
+Workflow Event Bus.
+In-process fan-out of live workflow progress to /api/workflow/stream subscribers:
+step-started, step-token and step-completed events for each job, then one final event
+when the job finishes. Events are only held for subscribers; nothing is replayed. The
+job store remains the source of truth for completed steps, and a stream starts with a
+snapshot read from it. Jobs running in another worker process publish nothing here, so
+their streams fall back to reading step deltas from the store.
+
+Configuration:
+    WORKFLOW_STREAM_QUEUE_SIZE  (default 2000)  events buffered per subscriber; a slow client loses tokens, not steps
+"""
+
+import os
+import queue
+import threading
+from typing import Dict, List, Optional
+
+WORKFLOW_STREAM_QUEUE_SIZE = int(os.getenv('WORKFLOW_STREAM_QUEUE_SIZE', '2000'))
+
+# Token events may be dropped for a slow subscriber; these never are
+RELIABLE_EVENTS = ("step-started", "step-completed", "job-finished")
+
+
+class WorkflowEventBus:
+    """Per-job subscriber queues. publish() never blocks the workflow thread."""
+
+    def __init__(self, queue_size: int = WORKFLOW_STREAM_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, List[queue.Queue]] = {}
+        self._lock = threading.Lock()
+        self.metrics = {"published": 0, "delivered": 0, "dropped_tokens": 0, "streams": 0}
+
+    def subscribe(self, job_id: str) -> queue.Queue:
+        subscription = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(job_id, []).append(subscription)
+            self.metrics["streams"] += 1
+        return subscription
+
+    def unsubscribe(self, job_id: str, subscription: queue.Queue):
+        with self._lock:
+            subscribers = self._subscribers.get(job_id, [])
+            if subscription in subscribers:
+                subscribers.remove(subscription)
+            if not subscribers:
+                self._subscribers.pop(job_id, None)
+
+    def listening(self, job_id: str) -> bool:
+        """True if someone is streaming this job (worth paying for token streaming)."""
+        return bool(self._subscribers.get(job_id))
+
+    def publish(self, job_id: str, event: str, data: Dict):
+        with self._lock:
+            subscribers = list(self._subscribers.get(job_id, ()))
+            self.metrics["published"] += 1
+        for subscription in subscribers:
+            self._offer(subscription, (event, data), reliable=event in RELIABLE_EVENTS)
+
+    def close(self, job_id: str, data: Optional[Dict] = None):
+        """Announce the job's end (job-finished) and end every open stream for it."""
+        self.publish(job_id, "job-finished", data or {})
+        with self._lock:
+            subscribers = self._subscribers.pop(job_id, [])
+        for subscription in subscribers:
+            self._offer(subscription, None, reliable=True)
+
+    def _offer(self, subscription: queue.Queue, item, reliable: bool):
+        try:
+            subscription.put_nowait(item)
+        except queue.Full:
+            if not reliable:
+                with self._lock:
+                    self.metrics["dropped_tokens"] += 1
+                return
+            # Make room by discarding the oldest buffered event (a token, almost always)
+            try:
+                subscription.get_nowait()
+                subscription.put_nowait(item)
+            except (queue.Empty, queue.Full):
+                pass
+            with self._lock:
+                self.metrics["dropped_tokens"] += 1
+        with self._lock:
+            self.metrics["delivered"] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"jobs": len(self._subscribers), "subscribers": sum(len(s) for s in self._subscribers.values()), **self.metrics}
+
+
+# Initialize Singleton
+workflow_events = WorkflowEventBus()
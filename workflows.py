@@ -1,129 +1,327 @@
 # TriAI Workflow Templates
 # These define the multi-step sequences for the Workflow Engine.
+#
+# Steps run as a DAG: a step waits only for the steps whose output it uses, inferred from the
+# {previous_context[key]} references in its instruction or listed explicitly as "depends_on": [keys].
+# Independent steps run concurrently, at most WORKFLOW_PROVIDER_CONCURRENCY (default 2) in-flight
+# workflow steps per provider across the whole process.
+#
+# A step's prompt carries the outputs its instruction references in full and digests of its other
+# ancestors, within WORKFLOW_CONTEXT_TOKENS (see workflow_context.py). full_history stays complete.
+
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from deadline import Deadline
+from workflow_context import context_builder
+
+CONTEXT_REFERENCE = re.compile(r'\{previous_context\[(\w+)\]\}')
+WORKFLOW_PROVIDER_CONCURRENCY = int(os.getenv('WORKFLOW_PROVIDER_CONCURRENCY', '2'))
+WORKFLOW_MAX_PARALLEL_STEPS = int(os.getenv('WORKFLOW_MAX_PARALLEL_STEPS', '4'))
+
+# Shared by every running workflow, so concurrent jobs don't stack up on one provider's rate limit
+_provider_slots = {}
+_provider_slots_lock = threading.Lock()
+
+
+def provider_slot(model_type: str) -> threading.BoundedSemaphore:
+    with _provider_slots_lock:
+        if model_type not in _provider_slots:
+            _provider_slots[model_type] = threading.BoundedSemaphore(WORKFLOW_PROVIDER_CONCURRENCY)
+        return _provider_slots[model_type]
+
+
+def step_key(step) -> str:
+    return step.get('key', f"step_{step['id']}")
+
+
+def step_dependencies(steps, parallel=True):
+    """
+    {task_key: [task_keys it waits for]}. Explicit "depends_on" wins over inferred references;
+    unknown keys are dropped. parallel=False (or a dependency cycle) chains every step to the
+    one before it, i.e. the original strictly sequential order.
+    """
+    keys = [step_key(step) for step in steps]
+    if not parallel:
+        return {key: keys[:i][-1:] for i, key in enumerate(keys)}
+
+    known = set(keys)
+    deps = {}
+    for step, key in zip(steps, keys):
+        wanted = step.get('depends_on')
+        if wanted is None:
+            wanted = CONTEXT_REFERENCE.findall(step.get('instruction', ''))
+        deps[key] = [dep for dep in dict.fromkeys(wanted) if dep in known and dep != key]
+
+    # Kahn's algorithm: every step must become ready eventually
+    remaining = {key: set(d) for key, d in deps.items()}
+    ready = [key for key, d in remaining.items() if not d]
+    while ready:
+        done = ready.pop()
+        for key, d in remaining.items():
+            if done in d:
+                d.discard(done)
+                if not d:
+                    ready.append(key)
+        remaining.pop(done)
+    if remaining:
+        print(f"⚠️ Workflow dependency cycle between {sorted(remaining)}; running steps sequentially")
+        return step_dependencies(steps, parallel=False)
+    return deps
 
-import asyncio
-from concurrent.futures import ThreadPoolExecutor
 
 class Workflow:
     """
-    Core Logic for Multi-Step Sequential AI Orchestration.
-    Formalizes the 'Context Accumulation' protocol.
-    Supports dictionary-based context keys.
+    Core Logic for Multi-Step AI Orchestration.
+    Formalizes the 'Context Accumulation' protocol: each step sees the outputs of the
+    steps it (transitively) depends on, bounded by the context builder. Supports dictionary-based context keys.
     """
     def __init__(self, name, steps):
         self.name = name
         self.steps = steps  # List of steps from WORKFLOW_TEMPLATES
         self.context = {}   # Dictionary of results: {task_key: output}
-        self.full_history = "" # Cumulative string for simpler templates
+        self.full_history = "" # Cumulative string of every completed step, in step order
         self.step_results = [] # Detailed metadata per step
+        self._outputs = {}     # {task_key: (step_id, role, output)} for successful steps
+        self._completed = set() # Successful steps already handed to step_callback (i.e. checkpointed)
+        self._event_callback = None
+        self._lock = threading.Lock()
+
+    def _plan(self, parallel=True):
+        """(dependencies, step order, transitive ancestors), all keyed by task key."""
+        deps = step_dependencies(self.steps, parallel)
+        order = {step_key(step): i for i, step in enumerate(self.steps)}
+        ancestors = {}
+        for step in self.steps:
+            self._ancestors(step_key(step), deps, ancestors)
+        return deps, order, ancestors
+
+    def resumable_keys(self, checkpoint, parallel=True):
+        """
+        Steps a resume can reuse from `checkpoint`: completed ones whose ancestors all completed too.
+        Anything downstream of a failed or unfinished step is re-run, since its input changes.
+        """
+        if not checkpoint:
+            return set()
+        _, order, ancestors = self._plan(parallel)
+        context = checkpoint.get('context', {})
+        completed = {key for key in checkpoint.get('completed', []) if key in order and key in context}
+        return {key for key in completed if ancestors[key] <= completed}
+
+    def checkpoint(self):
+        """Resumable state after the steps reported so far: {context, completed, full_history}."""
+        with self._lock:
+            order = {step_key(step): i for i, step in enumerate(self.steps)}
+            completed = sorted(self._completed, key=order.get)
+            return {
+                "context": {'initial_goal': self.context.get('initial_goal'), **{key: self.context[key] for key in completed}},
+                "completed": completed,
+                "full_history": self._history_for(completed, order)
+            }
     
-    def execute(self, initial_input, query_funcs, hard_mode=False, step_callback=None):
+    def execute(self, initial_input, query_funcs, hard_mode=False, step_callback=None, deadline=None, parallel=True,
+                checkpoint=None, previous_results=None, event_callback=None):
         """
-        Executes the workflow steps sequentially.
-        step_callback: function called with (step_result) after each step.
+        Executes the workflow steps, independent ones concurrently (parallel=False: one at a time).
+        step_callback: function called with (step_result) after each step, from this thread;
+            self.checkpoint() taken inside the callback includes that step.
+        event_callback: optional function(event, data) for live progress, called from the step threads:
+            "step-started" {step, key, role, model} and "step-token" {step, key, text}. With it set, query
+            functions also receive on_token=callable(text) and may stream the response through it.
+            step-started is sent again when a failed attempt is retried or failed over; the step's text starts over.
+        deadline: request Deadline shared by every step, retry and failover.
+        checkpoint / previous_results: resume a run, reusing resumable_keys(checkpoint) and their stored results.
+        Returns the step results in step order.
         """
+        deadline = deadline or Deadline()
         self.context = {'initial_goal': initial_input}
         self.full_history = f"INITIAL GOAL: {initial_input}\n\n"
         self.step_results = []
+        self._outputs = {}
+        self._completed = set()
+        self._event_callback = event_callback
         
-        print(f"--- STARTING WORKFLOW: {self.name} ---")
+        deps, order, ancestors = self._plan(parallel)
+        pending = {step_key(step): step for step in self.steps}
+        finished = set()
+        running = {}
         
-        for step in self.steps:
-            step_id = step['id']
-            role = step['role']
-            model_type = step['model']
-            instruction = step['instruction']
-            task_key = step.get('key', f"step_{step_id}")
-            
-            print(f"Executing Step {step_id}: {role} ({model_type})")
-            
-            # HEARTBEAT FOR DASHBOARD
+        # Restore checkpointed steps (newest stored result per key) instead of paying for them again
+        reused = self.resumable_keys(checkpoint, parallel)
+        if reused:
+            latest = {r.get('key'): r for r in (previous_results or [])}
+            for key in sorted(reused, key=order.get):
+                step = pending.pop(key)
+                self.context[key] = checkpoint['context'][key]
+                self._outputs[key] = (step['id'], step['role'], self.context[key])
+                self._completed.add(key)
+                finished.add(key)
+                if key in latest:
+                    self.step_results.append(latest[key])
+            self.full_history = self._history_for(self._outputs, order)
+        
+        print(f"--- {'RESUMING' if reused else 'STARTING'} WORKFLOW: {self.name} ({'DAG' if parallel else 'sequential'}"
+              f"{f', {len(reused)} steps restored' if reused else ''}) ---")
+        max_parallel = max(1, WORKFLOW_MAX_PARALLEL_STEPS) if parallel else 1
+        with ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix="triai-workflow") as pool:
+            while pending or running:
+                for key in sorted(pending, key=order.get):
+                    if len(running) >= max_parallel:
+                        break
+                    if all(dep in finished for dep in deps[key]):
+                        step = pending.pop(key)
+                        running[pool.submit(self._run_step, step, ancestors[key], order, initial_input,
+                                            query_funcs, hard_mode, deadline)] = key
+                
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = running.pop(future)
+                    finished.add(key)  # Failed steps release their dependents too, as before
+                    result_obj = future.result()
+                    self.step_results.append(result_obj)
+                    if result_obj['data'].get('success'):
+                        with self._lock:
+                            self._completed.add(key)
+                    if step_callback:
+                        step_callback(result_obj)
+        
+        self.step_results.sort(key=lambda r: order[r['key']])
+        print(f"--- WORKFLOW {self.name} FINISHED ---")
+        return self.step_results
+
+    @staticmethod
+    def _ancestors(key, deps, memo):
+        if key not in memo:
+            memo[key] = set(deps[key])
+            for dep in deps[key]:
+                memo[key] |= Workflow._ancestors(dep, deps, memo)
+        return memo[key]
+
+    def _history_for(self, keys, order):
+        """Unabridged history: the initial goal plus the given steps' outputs, in step order (final report, checkpoints)."""
+        history = f"INITIAL GOAL: {self.context['initial_goal']}\n\n"
+        for key in sorted(keys, key=order.get):
+            if key in self._outputs:
+                step_id, role, text = self._outputs[key]
+                history += f"--- STEP {step_id} ({role}) OUTPUT ---\n{text}\n\n"
+        return history
+
+    def _run_step(self, step, ancestor_keys, order, initial_input, query_funcs, hard_mode, deadline):
+        step_id = step['id']
+        role = step['role']
+        model_type = step['model']
+        instruction = step['instruction']
+        task_key = step_key(step)
+        
+        print(f"Executing Step {step_id}: {role} ({model_type})")
+        
+        # HEARTBEAT FOR DASHBOARD
+        try:
+            from database import log_system_event
+            log_system_event(
+                event_type="MISSION_STEPS",
+                message=f"Processing Step {step_id}: {role.upper()}",
+                details=f"Model: {model_type} | Key: {task_key}"
+            )
+        except:
+            pass
+        
+        # Bounded context: referenced outputs verbatim, digests of the other ancestors
+        with self._lock:
+            ancestor_outputs = [(key, *self._outputs[key]) for key in sorted(ancestor_keys, key=order.get) if key in self._outputs]
+        step_context = context_builder.build(initial_input, ancestor_outputs, CONTEXT_REFERENCE.findall(instruction))
+        
+        # Attempt to format the instruction
+        try:
+            formatted_instruction = instruction.format(
+                user_input=initial_input,
+                previous_context=step_context.previous_context
+            )
+            step_history = step_context.history()
+        except Exception as e:
+            print(f"Step {step_id} formatting skipped or failed: {e}")
+            formatted_instruction = instruction
+            step_history = step_context.history(inlined=False)
+
+        # Build prompt
+        step_prompt = (
+            f"WORKFLOW STEP {step_id} ({role.upper()}):\n"
+            f"{formatted_instruction}\n\n"
+            f"--- PROJECT HISTORY ---\n{step_history}\n\n"
+            f"Please execute your specific task now."
+        )
+        
+        # Live progress for /api/workflow/stream
+        stream_kwargs = {}
+        started = {"step": step_id, "key": task_key, "role": role, "model": model_type}
+        if self._event_callback:
+            self._event_callback("step-started", started)
+            on_token = lambda text: self._event_callback("step-token", {"step": step_id, "key": task_key, "text": text})
+            # A failed attempt (retry / fallback model) restarts the step: clients drop its partial text
+            on_token.reset = lambda: self._event_callback("step-started", started)
+            stream_kwargs["on_token"] = on_token
+        
+        query_func = query_funcs.get(model_type)
+        if not query_func:
+            res = {"success": False, "response": f"Unknown model: {model_type}"}
+        elif not deadline.allows():
+            res = {"success": False, "response": f"Error: Workflow deadline exceeded after {deadline.elapsed():.0f}s. Step skipped."}
+        else:
             try:
-                from database import log_system_event
-                log_system_event(
-                    event_type="MISSION_STEPS",
-                    message=f"Processing Step {step_id}: {role.upper()}",
-                    details=f"Model: {model_type} | Key: {task_key}"
-                )
-            except:
-                pass
-            
-            # Attempt to format the instruction
+                with provider_slot(model_type):
+                    res = query_func(step_prompt, council_mode=True, role=role, hard_mode=hard_mode, deadline=deadline, **stream_kwargs)
+                
+                # AUTO-FAILOVER PROTOCOL
+                if not res.get('success') and model_type == 'google' and deadline.allows():
+                    print(f"⚠️ Google Failure Detected (Step {step_id}). Initiating Failover to OpenAI...")
+                    fallback_func = query_funcs.get('openai')
+                    if fallback_func:
+                        if self._event_callback:
+                            self._event_callback("step-started", {**started, "model": "openai"})
+                        with provider_slot('openai'):
+                            res = fallback_func(step_prompt, council_mode=True, role=role, hard_mode=hard_mode, deadline=deadline, **stream_kwargs)
+                        res['model'] = f"GPT-5.2 (Failover from Google)"
+                        res['response'] = f"**[SYSTEM NOTE: Google API Quota Exceeded. Rerouted to OpenAI for completion.]**\n\n" + res.get('response', '')
+
+            except Exception as e:
+                print(f"Step {step_id} execution error: {e}")
+                res = {"success": False, "response": f"Error: {str(e)}"}
+        
+        result_obj = {
+            "step": step_id,
+            "key": task_key,
+            "role": role,
+            "model": model_type,
+            "data": res
+        }
+        
+        if res.get('success'):
+            # ENFORCEMENT SCAN
             try:
-                formatted_instruction = instruction.format(
-                    user_input=initial_input,
-                    previous_context=self.context
+                from enforcement import enforcement_engine
+                enf_report = enforcement_engine.analyze_response(
+                    text=res.get('response', ''),
+                    role_name=role,
+                    model_name=model_type
                 )
+                res['enforcement'] = enf_report
+                print(f"Step {step_id} Enforcement: Score {enf_report['current_credibility']}")
+            except ImportError:
+                print("Enforcement Engine not found/imported")
             except Exception as e:
-                print(f"Step {step_id} formatting skipped or failed: {e}")
-                formatted_instruction = instruction
-
-            # Build prompt
-            step_prompt = (
-                f"WORKFLOW STEP {step_id} ({role.upper()}):\n"
-                f"{formatted_instruction}\n\n"
-                f"--- FULL PROJECT HISTORY ---\n{self.full_history}\n\n"
-                f"Please execute your specific task now."
-            )
-            
-            query_func = query_funcs.get(model_type)
-            if not query_func:
-                res = {"success": False, "response": f"Unknown model: {model_type}"}
-            else:
-                try:
-                    res = query_func(step_prompt, council_mode=True, role=role, hard_mode=hard_mode)
-                    
-                    # AUTO-FAILOVER PROTOCOL
-                    if not res.get('success') and model_type == 'google':
-                        print(f"⚠️ Google Failure Detected (Step {step_id}). Initiating Failover to OpenAI...")
-                        fallback_func = query_funcs.get('openai')
-                        if fallback_func:
-                            res = fallback_func(step_prompt, council_mode=True, role=role, hard_mode=hard_mode)
-                            res['model'] = f"GPT-5.2 (Failover from Google)"
-                            res['response'] = f"**[SYSTEM NOTE: Google API Quota Exceeded. Rerouted to OpenAI for completion.]**\n\n" + res.get('response', '')
-
-                except Exception as e:
-                    print(f"Step {step_id} execution error: {e}")
-                    res = {"success": False, "response": f"Error: {str(e)}"}
-            
-            result_obj = {
-                "step": step_id,
-                "key": task_key,
-                "role": role,
-                "model": model_type,
-                "data": res
-            }
-            self.step_results.append(result_obj)
-            
-            if res.get('success'):
-                # ENFORCEMENT SCAN
-                try:
-                    from enforcement import enforcement_engine
-                    enf_report = enforcement_engine.analyze_response(
-                        text=res.get('response', ''),
-                        role_name=role,
-                        model_name=model_type
-                    )
-                    res['enforcement'] = enf_report
-                    print(f"Step {step_id} Enforcement: Score {enf_report['current_credibility']}")
-                except ImportError:
-                    print("Enforcement Engine not found/imported")
-                except Exception as e:
-                    print(f"Enforcement Check Failed: {e}")
+                print(f"Enforcement Check Failed: {e}")
 
-                resp_text = res.get('response')
+            resp_text = res.get('response')
+            with self._lock:
                 self.context[task_key] = resp_text
-                self.full_history += f"--- STEP {step_id} ({role}) OUTPUT ---\n{resp_text}\n\n"
-                print(f"Step {step_id} completed successfully.")
-            else:
-                print(f"Step {step_id} FAILED.")
+                self._outputs[task_key] = (step_id, role, resp_text)
+                self.full_history = self._history_for(self._outputs, order)
+            print(f"Step {step_id} completed successfully.")
+        else:
+            print(f"Step {step_id} FAILED.")
 
-            # Notify callback if provided
-            if step_callback:
-                step_callback(result_obj)
-        
-        print(f"--- WORKFLOW {self.name} FINISHED ---")
-        return self.step_results
+        return result_obj
 
 WORKFLOW_TEMPLATES = {
     "marketing_campaign": {